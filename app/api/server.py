@@ -1,21 +1,35 @@
 """FastAPI сервер для доступа к данным анализа."""
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 import yaml
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 from fastapi import FastAPI, HTTPException, status, Query
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from loguru import logger
 import asyncio
+import collections
+import orjson
 
 from app.config.loader import get_config
+from app.process.diff import diff_path, diff_reports
+from app.process.refresh import INTRADAY_FILE, STATE_FILE
+from app.store.analytics import AnalyticsEngine, AnalyticsError, SqlResult
+from app.store.history import get_history_store
+from app.store.partial import get_partial_report
+from app.store.report_binary import load_report_table
+from app.store.run_ledger import read_runs
 from app.store.io import (
     load_analysis_report,
+    load_json,
+    load_range_index,
     save_portfolio,
     load_portfolio,
     StorageError
@@ -57,6 +71,12 @@ class MessageResponse(BaseModel):
     message: str
 
 
+class SqlQueryRequest(BaseModel):
+    """Аналитический SQL запрос."""
+    sql: str
+    limit: Optional[int] = None
+
+
 # Создаём приложение FastAPI
 app = FastAPI(
     title="Stock Analytics API",
@@ -489,6 +509,363 @@ async def get_today_report():
         )
 
 
+@app.get("/report/live", response_model=ReportResponse)
+async def get_live_report():
+    """
+    Получить самое свежее состояние отчёта.
+    
+    Во время прогона отдаётся частичный отчёт с уже готовыми тикерами
+    (complete: false, progress: done/total/pct); признаки доходности и
+    риска появляются только в полном отчёте. Вне прогона — последний
+    полный отчёт с complete: true.
+    
+    Returns:
+        ReportResponse: Отчёт или ошибка
+    """
+    try:
+        config = get_config()
+        partial = get_partial_report(config.output.analysis_file).snapshot()
+        if partial is not None and not partial['error']:
+            return ReportResponse(ok=True, data=partial, error=None)
+        
+        analysis_file = Path(config.output.analysis_file)
+        if not analysis_file.exists():
+            return ReportResponse(
+                ok=False,
+                data=None,
+                error="No report found. Generate report first."
+            )
+        
+        report_data = load_analysis_report(analysis_file)
+        total = len(report_data.get('universe', []))
+        
+        return ReportResponse(
+            ok=True,
+            data={
+                **report_data,
+                'complete': True,
+                'progress': {'done': total, 'total': total, 'pct': 100.0}
+            },
+            error=None
+        )
+        
+    except StorageError as e:
+        logger.error(f"Storage error loading report: {e}")
+        return ReportResponse(
+            ok=False,
+            data=None,
+            error=f"Failed to load report: {str(e)}"
+        )
+    except Exception as e:
+        logger.error(f"Error getting live report: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@app.get("/report/diff")
+async def get_report_diff(
+    symbols: Optional[List[str]] = Query(default=None, description="Только эти тикеры"),
+    base: Optional[str] = Query(default=None, description="Сравнить с ежедневным отчётом за дату (YYYY-MM-DD)")
+):
+    """
+    Получить изменения последнего отчёта: новые и снятые сигналы, сдвиги
+    dy_pct, пересечения SMA200, тикеры с новыми ошибками.
+    
+    Без base отдаются изменения относительно предыдущего опубликованного
+    отчёта (сохраняются при генерации); с base — рассчитываются
+    относительно ежедневного отчёта за указанную дату.
+    
+    Args:
+        symbols: Оставить изменения только по этим тикерам
+        base: Дата ежедневного отчёта для сравнения
+        
+    Returns:
+        Dict: Изменения отчёта
+    """
+    try:
+        config = get_config()
+        
+        if base:
+            base_file = Path(config.output.reports_dir) / f"{date.fromisoformat(base).isoformat()}.json"
+            if not base_file.exists():
+                return {"ok": False, "error": f"No daily report for {base}"}
+            diff = diff_reports(load_json(base_file), load_analysis_report(config.output.analysis_file))
+        else:
+            path = diff_path(config.output.analysis_file)
+            if not path.exists():
+                return {"ok": False, "error": "No report diff found. Generate report first."}
+            diff = load_json(path)
+        
+        if symbols:
+            wanted = set(symbols)
+            diff = {
+                **diff,
+                'added': [symbol for symbol in diff['added'] if symbol in wanted],
+                'removed': [symbol for symbol in diff['removed'] if symbol in wanted],
+                'changes': {symbol: change for symbol, change in diff['changes'].items() if symbol in wanted}
+            }
+        
+        return {"ok": True, "data": diff}
+        
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    except StorageError as e:
+        logger.error(f"Storage error loading report diff: {e}")
+        return {"ok": False, "error": f"Failed to load report: {str(e)}"}
+    except Exception as e:
+        logger.error(f"Error getting report diff: {e}")
+        return {"ok": False, "error": str(e)}
+
+
+@app.get("/report/intraday")
+async def get_report_intraday(
+    symbols: Optional[List[str]] = Query(default=None, description="Только эти тикеры")
+):
+    """
+    Получить внутридневную сводку: свежие котировки поверх метрик последнего отчёта.
+    
+    Сводка перестраивается задачами обновления котировок и дивидендов
+    (refresh.enabled) и после каждого ночного отчёта.
+    
+    Args:
+        symbols: Оставить только эти тикеры
+        
+    Returns:
+        Dict: Сводка и время последнего обновления каждого среза
+    """
+    try:
+        config = get_config()
+        refresh_dir = Path(config.refresh.dir)
+        
+        path = refresh_dir / INTRADAY_FILE
+        if not path.exists():
+            return {"ok": False, "error": "No intraday data found. Enable refresh jobs first."}
+        intraday = load_json(path)
+        
+        if symbols:
+            wanted = set(symbols)
+            intraday = {
+                **intraday,
+                'by_symbol': {symbol: entry for symbol, entry in intraday['by_symbol'].items() if symbol in wanted}
+            }
+        
+        state_path = refresh_dir / STATE_FILE
+        return {
+            "ok": True,
+            "data": {
+                **intraday,
+                'refresh': load_json(state_path) if state_path.exists() else {}
+            }
+        }
+        
+    except StorageError as e:
+        logger.error(f"Storage error loading intraday data: {e}")
+        return {"ok": False, "error": f"Failed to load intraday data: {str(e)}"}
+    except Exception as e:
+        logger.error(f"Error getting intraday data: {e}")
+        return {"ok": False, "error": str(e)}
+
+
+@app.get("/ranges")
+async def get_ranges(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    weeks: Optional[int] = Query(default=None, ge=1, description="Окно в неделях от последней свечи"),
+    symbols: Optional[List[str]] = Query(default=None, description="Тикеры (по умолчанию весь universe)")
+):
+    """
+    Получить максимум high и минимум low по произвольному окну дат для тикеров.
+    
+    Запрос отвечается по сохранённым индексам диапазонов за O(1) на тикер.
+    
+    Args:
+        start: Начало окна (YYYY-MM-DD)
+        end: Конец окна (YYYY-MM-DD)
+        weeks: Окно в неделях, отсчитываемое от последней свечи тикера (вместо start)
+        symbols: Список тикеров
+        
+    Returns:
+        Dict: Диапазоны по тикерам
+    """
+    try:
+        config = get_config()
+        
+        if not symbols:
+            symbols = [t.symbol for t in config.universe]
+        
+        items = {}
+        for symbol in symbols:
+            index = load_range_index(symbol, config.output.raw_data_dir)
+            
+            if index is None or len(index) == 0:
+                items[symbol] = None
+                continue
+            
+            window_start = start
+            if weeks is not None:
+                window_start = index.timestamps[-1] - np.timedelta64(weeks * 7, 'D')
+            
+            result = index.query(window_start, end)
+            items[symbol] = {"high": result[0], "low": result[1]} if result else None
+        
+        return {
+            "ok": True,
+            "data": {
+                "start": start,
+                "end": end,
+                "weeks": weeks,
+                "items": items
+            }
+        }
+        
+    except Exception as e:
+        logger.error(f"Error getting ranges: {e}")
+        return {"ok": False, "error": str(e)}
+
+
+@app.get("/history/metrics")
+async def get_metric_history(
+    symbols: List[str] = Query(description="Тикеры"),
+    fields: Optional[List[str]] = Query(default=None, description="Поля (по умолчанию все)"),
+    days: Optional[int] = Query(default=None, ge=1, description="Последние N дней"),
+    start: Optional[str] = None,
+    end: Optional[str] = None
+):
+    """
+    Получить историю метрик тикеров по ежедневным отчётам.
+    
+    Args:
+        symbols: Список тикеров
+        fields: Поля истории (dy_pct, signals, sma_200, ret_20d_pct, ...)
+        days: Последние N дней (вместо start)
+        start: Первая дата (YYYY-MM-DD)
+        end: Последняя дата (YYYY-MM-DD)
+        
+    Returns:
+        Dict: Ряды метрик по тикерам
+    """
+    try:
+        config = get_config()
+        store = get_history_store(config.output.history_db)
+        
+        items = store.query(
+            symbols,
+            fields=fields,
+            start=date.fromisoformat(start) if start else None,
+            end=date.fromisoformat(end) if end else None,
+            days=days
+        )
+        
+        return {
+            "ok": True,
+            "data": {
+                "fields": fields,
+                "items": items
+            }
+        }
+        
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Error getting metric history: {e}")
+        return {"ok": False, "error": str(e)}
+
+
+@app.get("/runs/ledger")
+async def get_run_ledger(
+    limit: int = Query(default=30, ge=1, le=1000, description="Последние N прогонов"),
+    since: Optional[str] = Query(default=None, description="Прогоны, начатые не раньше (ISO)")
+):
+    """
+    Получить журнал прогонов: длительности этапов, перцентили и счётчики.
+    
+    Args:
+        limit: Последние N прогонов
+        since: Только прогоны, начатые не раньше этого момента (ISO)
+        
+    Returns:
+        Dict: Строки прогонов (от старых к новым)
+    """
+    try:
+        config = get_config()
+        if since:
+            since = datetime.fromisoformat(since).isoformat()
+        
+        return {
+            "ok": True,
+            "data": {
+                "items": read_runs(config.output.run_ledger, limit=limit, since=since)
+            }
+        }
+        
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Error reading run ledger: {e}")
+        return {"ok": False, "error": str(e)}
+
+
+def _json_default(value: Any) -> Any:
+    """Сериализация типов, которые orjson не поддерживает (Decimal и т.п.)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _stream_sql_result(result: SqlResult):
+    """
+    Выдать результат запроса в формате NDJSON.
+    
+    Первая строка — {"columns": [...]}, далее строки результата массивами,
+    последняя — {"rows": N, "truncated": bool} или {"error": "..."}.
+    """
+    yield orjson.dumps({"columns": result.columns}) + b"\n"
+    
+    try:
+        for batch in result.batches():
+            columns = [batch.column(i).to_pylist() for i in range(batch.num_columns)]
+            yield b"".join(
+                orjson.dumps(list(row), default=_json_default) + b"\n"
+                for row in zip(*columns)
+            )
+    except AnalyticsError as e:
+        yield orjson.dumps({"error": str(e)}) + b"\n"
+        return
+    
+    yield orjson.dumps({"rows": result.rows, "truncated": result.truncated}) + b"\n"
+
+
+@app.post("/analytics/sql")
+async def run_analytics_sql(request: SqlQueryRequest):
+    """
+    Выполнить аналитический SQL запрос только для чтения.
+    
+    Таблицы: candles, report_history, report, portfolio. Результат
+    отдаётся потоком NDJSON пачками строк, с ограничением по числу строк
+    и таймаутом.
+    
+    Args:
+        request: Запрос (sql, limit)
+        
+    Returns:
+        StreamingResponse: Результат в формате NDJSON
+    """
+    try:
+        engine = AnalyticsEngine.from_config(get_config())
+        # Запрос исполняется движком синхронно — не блокируем цикл событий
+        result = await asyncio.to_thread(engine.execute, request.sql, request.limit)
+    except AnalyticsError as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"ok": False, "error": str(e)}
+        )
+    
+    return StreamingResponse(_stream_sql_result(result), media_type="application/x-ndjson")
+
+
 @app.post("/portfolio", response_model=MessageResponse)
 async def save_portfolio_data(portfolio: Portfolio):
     """
@@ -606,44 +983,44 @@ async def get_event_signal_api(
 
 
 @app.get("/predictor/history")
-async def get_event_history_api(limit: int = 10):
+async def get_event_history_api(
+    limit: int = Query(default=10, ge=1, le=1000),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
     """
     Получить историю событийных сигналов.
     
+    Без start/end возвращаются последние limit сигналов (чтение с конца
+    журнала по индексу), с ними — сигналы за интервал.
+    
     Args:
         limit: Максимальное количество записей
+        start: Начало интервала (ISO datetime)
+        end: Конец интервала (ISO datetime)
         
     Returns:
         Dict: История сигналов
     """
     try:
-        import json
-        from pathlib import Path
-        
-        history_file = Path("data/events_history.json")
-        
-        if not history_file.exists():
-            return {
-                "ok": True,
-                "data": {
-                    "items": [],
-                    "count": 0
-                }
-            }
+        from app.predictor.config import PredictorConfig
+        from app.predictor.event_log import EventLog
         
-        with open(history_file, 'r', encoding='utf-8') as f:
-            history = json.load(f)
+        event_log = EventLog(PredictorConfig.load().events_log_path)
         
-        # Возвращаем последние N записей
-        recent = history[-limit:] if len(history) > limit else history
-        recent.reverse()  # Новые сверху
+        if start is not None or end is not None:
+            # Последние limit сигналов интервала, новые сверху
+            items = list(collections.deque(event_log.range(start, end), maxlen=limit))
+            items.reverse()
+        else:
+            items = event_log.tail(limit)
         
         return {
             "ok": True,
             "data": {
-                "items": recent,
-                "count": len(recent),
-                "total": len(history)
+                "items": items,
+                "count": len(items),
+                "total": event_log.count()
             }
         }
         
@@ -688,11 +1065,51 @@ async def get_predictor_config_api():
         }
 
 
+def _summary_from_table(table: pa.Table, dividend_target_pct: float) -> Dict[str, Any]:
+    """
+    Посчитать сводку по таблице отчёта векторно, без разбора JSON.
+    
+    Args:
+        table: Таблица отчёта из горячего кэша
+        dividend_target_pct: Целевая дивидендная доходность
+        
+    Returns:
+        Dict: Данные сводки
+    """
+    errors = pc.struct_field(table.column('meta'), 'error')
+    failed = pc.count(errors, mode='only_valid').as_py()
+    
+    dy = table.column('dy_pct')
+    high_mask = pc.fill_null(pc.greater_equal(dy, dividend_target_pct), False)
+    high_div = sorted(
+        zip(pc.filter(table.column('symbol'), high_mask).to_pylist(), pc.filter(dy, high_mask).to_pylist()),
+        key=lambda x: x[1],
+        reverse=True
+    )
+    
+    signal_counts = pc.fill_null(pc.list_value_length(table.column('signals')), 0)
+    
+    return {
+        "generated_at": (table.schema.metadata or {}).get(b'generated_at', b'').decode(),
+        "total_symbols": table.num_rows,
+        "successful": table.num_rows - failed,
+        "failed": failed,
+        "high_dividend_tickers": [
+            {"symbol": sym, "dy_pct": dy} for sym, dy in high_div
+        ],
+        "tickers_with_signals": pc.sum(pc.greater(signal_counts, 0)).as_py() or 0,
+        "total_signals": pc.sum(signal_counts).as_py() or 0
+    }
+
+
 @app.get("/report/summary")
 async def get_report_summary():
     """
     Получить краткую сводку по отчёту.
     
+    Сводка считается по таблице бинарной формы отчёта (Arrow, memory map),
+    если она соответствует текущей версии analysis.json, иначе — по JSON.
+    
     Returns:
         Dict: Статистика по отчёту
     """
@@ -706,6 +1123,13 @@ async def get_report_summary():
                 "error": "No report found"
             }
         
+        table = load_report_table(analysis_file)
+        if table is not None:
+            return {
+                "ok": True,
+                "data": _summary_from_table(table, config.dividend_target_pct)
+            }
+        
         report_data = load_analysis_report(analysis_file)
         
         # Вычисляем статистику
@@ -2,7 +2,7 @@
 
 import os
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 import yaml
 from pydantic import BaseModel, Field, field_validator
@@ -24,6 +24,9 @@ class OutputConfig(BaseModel):
     analysis_file: str = "data/analysis.json"
     reports_dir: str = "data/reports"
     raw_data_dir: str = "data/raw"
+    history_db: str = "data/history.sqlite"
+    runs_dir: str = "data/runs"  # Контрольные точки незавершённых прогонов
+    run_ledger: str = "data/run_ledger.jsonl"  # Журнал прогонов: телеметрия, строка на прогон
 
 
 class ScheduleConfig(BaseModel):
@@ -37,6 +40,56 @@ class RateLimitConfig(BaseModel):
     per_symbol_sleep_sec: float = 0.4
 
 
+class RetryConfig(BaseModel):
+    """Настройки повторов загрузки данных по тикерам."""
+    inline_attempts: int = Field(default=1, ge=1)  # Попытки запроса внутри клиента MOEX (1 — без повторов)
+    deferred_attempts: int = Field(default=2, ge=0)  # Повторные проходы по упавшим тикерам после основного (0 — выкл.)
+    backoff_sec: float = Field(default=2.0, ge=0)  # Пауза перед первым повторным проходом (далее удваивается)
+    backoff_max_sec: float = Field(default=30.0, ge=0)  # Максимальная пауза между проходами
+    workers: int = Field(default=2, ge=1)  # Параллельных загрузок в повторном проходе
+
+
+class ComputeConfig(BaseModel):
+    """Настройки выполнения расчётов."""
+    mode: Literal["inline", "process"] = "inline"  # process — метрики в пуле процессов
+    workers: Optional[int] = None  # Количество процессов (None — все ядра)
+    fetch_workers: int = 1  # Потоки для загрузки данных с MOEX
+    memory_budget_mb: Optional[float] = None  # Лимит памяти под свечи в прогоне (None — без лимита)
+    write_behind: bool = True  # Запись свечей и карантина в фоновом потоке пакетами
+    time_budget_sec: Optional[float] = Field(default=None, gt=0)  # Бюджет времени прогона (None — без ограничения)
+    symbol_timeout_sec: Optional[float] = Field(default=None, gt=0)  # Лимит на один тикер (None — без ограничения)
+
+
+class AnalyticsConfig(BaseModel):
+    """Настройки SQL-аналитики по хранилищам."""
+    max_rows: int = 10000  # Максимум строк в результате запроса
+    timeout_sec: float = 10.0  # Таймаут выполнения запроса
+    batch_rows: int = 1000  # Размер пачки строк при потоковой выдаче
+
+
+class RetentionConfig(BaseModel):
+    """Настройки хранения отчётов и свечей."""
+    enabled: bool = False  # Ежедневный прогон хранения в планировщике (удаляет и архивирует отчёты)
+    time: str = "03:30"  # Время запуска (HH:MM, часовой пояс расписания)
+    keep_daily_days: int = Field(default=90, ge=1)  # Сколько дней хранить JSON отчёты
+    archive_dir: str = "data/reports/archive"  # Месячные Parquet архивы отчётов
+    dedupe_reports: bool = True  # Удалять отчёты, повторяющие предыдущий
+    archive_candles_after_months: Optional[int] = Field(default=3, ge=1)  # Старше — сжатие zstd (None — не трогать)
+
+
+class RefreshConfig(BaseModel):
+    """Внутридневное обновление данных: отдельные задачи по срезам."""
+    enabled: bool = False  # Задачи котировок, свечей и дивидендов в планировщике
+    dir: str = "data/refresh"  # Кэши котировок, дивидендов и внутридневная сводка
+    session_days: str = "mon-fri"  # Дни торговой сессии (формат cron day_of_week)
+    session_start: str = "10:00"  # Начало сессии (HH:MM, часовой пояс расписания)
+    session_end: str = "18:50"  # Конец сессии
+    quotes_interval_min: int = Field(default=5, ge=1)  # Котировки — каждые N минут в сессию
+    candles_interval_min: int = Field(default=60, ge=1)  # Свечи — каждые N минут в сессию
+    dividends_day: str = "sun"  # Дивиденды — раз в неделю в этот день
+    dividends_time: str = "06:00"  # Время обновления дивидендов (HH:MM)
+
+
 class AppConfig(BaseModel):
     """Главная конфигурация приложения."""
     base_currency: str = "RUB"
@@ -46,6 +99,11 @@ class AppConfig(BaseModel):
     output: OutputConfig = Field(default_factory=OutputConfig)
     schedule: ScheduleConfig = Field(default_factory=ScheduleConfig)
     rate_limit: RateLimitConfig = Field(default_factory=RateLimitConfig)
+    retry: RetryConfig = Field(default_factory=RetryConfig)
+    compute: ComputeConfig = Field(default_factory=ComputeConfig)
+    analytics: AnalyticsConfig = Field(default_factory=AnalyticsConfig)
+    retention: RetentionConfig = Field(default_factory=RetentionConfig)
+    refresh: RefreshConfig = Field(default_factory=RefreshConfig)
 
     @field_validator('universe')
     @classmethod
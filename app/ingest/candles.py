@@ -0,0 +1,255 @@
+"""Компактное представление свечей для горячего пути расчёта отчёта."""
+
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+try:
+    import resource
+except ImportError:  # Windows: пиковый RSS через GetProcessMemoryInfo
+    resource = None
+
+
+PRICE_COLUMNS: Tuple[str, ...] = ('open', 'high', 'low', 'close')
+
+# Максимальное число знаков после запятой, при котором проверяем float32
+MAX_PRICE_DECIMALS = 6
+
+
+def _price_decimals(values: np.ndarray) -> Optional[int]:
+    """
+    Определить число знаков после запятой (шаг цены), которым представимы все цены.
+
+    Args:
+        values: Цены (float64)
+
+    Returns:
+        Optional[int]: Число знаков или None, если цены не укладываются в MAX_PRICE_DECIMALS
+    """
+    finite = values[np.isfinite(values)]
+    # Допуск на погрешность представления десятичных цен в float64
+    tolerance = 1e-9 * np.maximum(np.abs(finite), 1.0)
+    for decimals in range(MAX_PRICE_DECIMALS + 1):
+        if np.all(np.abs(np.round(finite, decimals) - finite) <= tolerance):
+            return decimals
+    return None
+
+
+def compact_prices(values) -> np.ndarray:
+    """
+    Сжать цены до float32, если это не теряет шага цены.
+
+    float32 выбирается, только когда после обратного преобразования и
+    округления до шага цены получаются ровно исходные цены.
+
+    Args:
+        values: Цены
+
+    Returns:
+        np.ndarray: Массив float32 или float64
+    """
+    values = np.asarray(values, dtype=np.float64)
+    decimals = _price_decimals(values)
+    if decimals is None:
+        return values
+
+    compact = values.astype(np.float32)
+    restored = np.round(compact.astype(np.float64), decimals)
+    if np.array_equal(restored, np.round(values, decimals), equal_nan=True):
+        return compact
+    return values
+
+
+def compact_volume(series: pd.Series) -> np.ndarray:
+    """
+    Привести объём к int64, если в нём нет пропусков.
+
+    Пропуск объёма (NaN) при приведении к int64 превратился бы в
+    -9223372036854775808 и испортил бы средние объёмы, поэтому колонка
+    с пропусками остаётся в float64 — NaN учитываются как пропуски.
+
+    Args:
+        series: Колонка объёма
+
+    Returns:
+        np.ndarray: Объём (int64 или float64 с NaN)
+    """
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    if np.isnan(values).any():
+        return values
+    return values.astype(np.int64)
+
+
+@dataclass(slots=True)
+class CompactCandles:
+    """
+    Свечи в виде структуры массивов (structure-of-arrays).
+
+    Одна колонка времени (begin в секундах) вместо пары begin/end, цены
+    в float32 там, где это не теряет точности, объём в int64 (в float64,
+    если в нём есть пропуски). Используется
+    для удержания свечей в памяти во время прогона отчёта.
+    """
+    begin: np.ndarray
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: Optional[Iterable[str]] = None) -> 'CompactCandles':
+        """
+        Построить компактное представление из DataFrame со свечами.
+
+        Args:
+            df: DataFrame со свечами (begin, open, high, low, close, volume)
+            columns: Какие колонки сохранить (по умолчанию все OHLCV, что есть в df)
+
+        Returns:
+            CompactCandles: Компактные свечи
+        """
+        if columns is None:
+            columns = (*PRICE_COLUMNS, 'volume')
+
+        if 'begin' in df.columns:
+            begin = pd.to_datetime(df['begin']).to_numpy(dtype='datetime64[s]')
+        else:
+            begin = np.full(len(df), np.datetime64('NaT'), dtype='datetime64[s]')
+
+        arrays = {}
+        for col in columns:
+            if col not in df.columns:
+                continue
+            if col == 'volume':
+                arrays[col] = compact_volume(df[col])
+            else:
+                arrays[col] = compact_prices(df[col])
+
+        return cls(begin=begin, columns=arrays)
+
+    def __len__(self) -> int:
+        return len(self.begin)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name == 'begin':
+            return self.begin
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name == 'begin' or name in self.columns
+
+    @property
+    def nbytes(self) -> int:
+        """Объём памяти, занимаемый массивами."""
+        return self.begin.nbytes + sum(arr.nbytes for arr in self.columns.values())
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Преобразовать обратно в DataFrame (цены в float64).
+
+        Returns:
+            pd.DataFrame: Свечи
+        """
+        data = {
+            col: arr.astype(np.float64) if col != 'volume' else arr
+            for col, arr in self.columns.items()
+        }
+        data['begin'] = self.begin.astype('datetime64[ns]')
+        return pd.DataFrame(data)
+
+
+def _windows_peak_rss_bytes() -> Optional[int]:
+    """Пиковый рабочий набор процесса на Windows (GetProcessMemoryInfo)."""
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD),
+            ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t),
+            ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t),
+            ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    kernel32 = ctypes.WinDLL('kernel32')
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    get_info = kernel32.K32GetProcessMemoryInfo
+    get_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+    get_info.restype = wintypes.BOOL
+    if not get_info(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Пиковое потребление памяти процессом (RSS) в мегабайтах.
+
+    Returns:
+        Optional[float]: Пиковый RSS или None, если платформа не поддерживает
+    """
+    if resource is not None:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # На macOS ru_maxrss в байтах, на Linux — в килобайтах
+        return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+
+    if os.name == 'nt':
+        try:
+            peak = _windows_peak_rss_bytes()
+        except (AttributeError, OSError) as e:
+            logger.debug(f"Failed to get peak working set: {e}")
+            return None
+        return peak / (1024 * 1024) if peak is not None else None
+
+    return None
+
+
+class MemoryBudget:
+    """Учёт памяти, удерживаемой свечами во время прогона отчёта."""
+
+    def __init__(self, limit_mb: Optional[float] = None):
+        """
+        Инициализация учёта.
+
+        Args:
+            limit_mb: Лимит в мегабайтах (None — без лимита, только учёт)
+        """
+        self.limit_bytes = int(limit_mb * 1024 * 1024) if limit_mb else None
+        self.used_bytes = 0
+        self.peak_bytes = 0
+        self.flushes = 0
+
+    def add(self, nbytes: int) -> None:
+        """Учесть новые удерживаемые данные."""
+        self.used_bytes += nbytes
+        self.peak_bytes = max(self.peak_bytes, self.used_bytes)
+
+    def release(self) -> None:
+        """Учесть освобождение всех удерживаемых данных."""
+        if self.used_bytes:
+            self.flushes += 1
+        self.used_bytes = 0
+
+    @property
+    def exceeded(self) -> bool:
+        """Превышен ли лимит."""
+        return self.limit_bytes is not None and self.used_bytes >= self.limit_bytes
+
+    def log_summary(self) -> None:
+        """Вывести итоговую статистику в лог."""
+        rss = peak_rss_mb()
+        logger.info(
+            f"Candle memory: peak held {self.peak_bytes / 1024 / 1024:.1f} MB, "
+            f"flushes={self.flushes}, "
+            f"peak RSS {f'{rss:.0f} MB' if rss is not None else 'n/a'}"
+        )
@@ -1,12 +1,12 @@
 """Клиент для получения данных с Московской биржи через moexalgo."""
 
 import time
-from typing import Optional, Dict, Any, List
+from typing import Callable, Optional, Dict, Any, List
 from datetime import datetime, timedelta
 
 import pandas as pd
 from loguru import logger
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, wait_exponential, retry_if_exception_type
 import moexalgo
 
 from app.config.loader import get_config
@@ -17,18 +17,49 @@ class MOEXClientError(Exception):
     pass
 
 
+def _stop_after_client_attempts(retry_state) -> bool:
+    """Условие остановки повторов: число попыток из настроек клиента (retry_attempts)."""
+    client = retry_state.args[0]
+    return retry_state.attempt_number >= client.retry_attempts
+
+
+def _count_client_retry(retry_state) -> None:
+    """Учесть повтор запроса в счётчиках клиента."""
+    retry_state.args[0]._count('retries')
+
+
 class MOEXClient:
     """Клиент для работы с данными MOEX через moexalgo."""
     
-    def __init__(self, rate_limit_sleep: Optional[float] = None):
+    def __init__(self, rate_limit_sleep: Optional[float] = None, retry_attempts: Optional[int] = None):
         """
         Инициализация клиента.
         
         Args:
             rate_limit_sleep: Пауза между запросами в секундах (если None, берётся из конфига)
+            retry_attempts: Попыток на запрос при сетевых ошибках (если None, берётся из конфига);
+                повторы по упавшим тикерам выполняет отложенный проход генератора отчётов
         """
         self.config = get_config()
         self.rate_limit_sleep = rate_limit_sleep or self.config.rate_limit.per_symbol_sleep_sec
+        self.retry_attempts = retry_attempts or self.config.retry.inline_attempts
+        # Приёмник счётчиков запросов: callable(name, value), например RunTelemetry.count
+        self.request_hook: Optional[Callable[[str, int], None]] = None
+    
+    def _count(self, name: str, value: int = 1) -> None:
+        """Передать счётчик (requests, bytes_downloaded, frame_bytes, retries) приёмнику, если он задан."""
+        if self.request_hook is not None:
+            self.request_hook(name, value)
+    
+    def _count_frame(self, frame: pd.DataFrame) -> None:
+        """
+        Учесть запрос moexalgo.
+
+        moexalgo не отдаёт размер ответа, поэтому учитывается размер
+        полученной таблицы в памяти (frame_bytes), а не скачанные байты.
+        """
+        self._count('requests')
+        self._count('frame_bytes', int(frame.memory_usage(index=False).sum()))
         
     def _sleep_rate_limit(self):
         """Пауза для соблюдения rate limit."""
@@ -36,9 +67,10 @@ class MOEXClient:
             time.sleep(self.rate_limit_sleep)
     
     @retry(
-        stop=stop_after_attempt(3),
+        stop=_stop_after_client_attempts,
         wait=wait_exponential(multiplier=1, min=2, max=10),
         retry=retry_if_exception_type((ConnectionError, TimeoutError)),
+        before_sleep=_count_client_retry,
         reraise=True
     )
     def get_quote(self, symbol: str) -> Dict[str, Any]:
@@ -52,7 +84,8 @@ class MOEXClient:
             dict: {
                 'price': float,       # Текущая цена
                 'lot': int,          # Размер лота
-                'board': str         # Режим торгов
+                'board': str,        # Режим торгов
+                'last_bar_at': str   # Время начала последней часовой свечи (ISO)
             }
             
         Raises:
@@ -73,6 +106,7 @@ class MOEXClient:
                 end=end_date.strftime('%Y-%m-%d'),
                 period='1h'
             )
+            self._count_frame(candles)
             
             if candles.empty:
                 raise MOEXClientError(f"No candle data found for {symbol}")
@@ -89,7 +123,8 @@ class MOEXClient:
             result = {
                 'price': price,
                 'lot': lot,
-                'board': board
+                'board': board,
+                'last_bar_at': pd.Timestamp(latest['begin']).isoformat() if 'begin' in latest else None
             }
             
             logger.info(f"Quote for {symbol}: {result}")
@@ -102,12 +137,95 @@ class MOEXClient:
             raise MOEXClientError(f"Failed to fetch quote for {symbol}: {e}")
     
     @retry(
-        stop=stop_after_attempt(3),
+        stop=_stop_after_client_attempts,
         wait=wait_exponential(multiplier=1, min=2, max=10),
         retry=retry_if_exception_type((ConnectionError, TimeoutError)),
+        before_sleep=_count_client_retry,
         reraise=True
     )
-    def get_dividends(self, symbol: str) -> float:
+    def get_quotes(self, symbols: List[str], board: str = 'TQBR') -> Dict[str, Dict[str, Any]]:
+        """
+        Получить текущие котировки нескольких тикеров одним запросом.
+        
+        Использует ISS API (marketdata режима торгов): один запрос на весь
+        список вместо загрузки свечей по каждому тикеру, как в get_quote.
+        До начала торгов (LAST ещё нет) берётся цена закрытия прошлого дня.
+        
+        Args:
+            symbols: Тикеры инструментов
+            board: Режим торгов
+            
+        Returns:
+            Dict[str, dict]: Тикер -> {
+                'price': float,       # Последняя цена
+                'lot': int,           # Размер лота
+                'board': str,         # Режим торгов
+                'quote_at': str       # Время котировки биржи (HH:MM:SS) или None
+            } (тикеры без цены отсутствуют)
+            
+        Raises:
+            MOEXClientError: Если не удалось получить данные
+        """
+        try:
+            logger.info(f"Fetching quotes for {len(symbols)} symbols")
+            
+            import requests
+            
+            url = f"https://iss.moex.com/iss/engines/stock/markets/shares/boards/{board}/securities.json"
+            response = requests.get(url, params={
+                'securities': ','.join(symbols),
+                'iss.meta': 'off',
+                'iss.only': 'securities,marketdata',
+                'securities.columns': 'SECID,LOTSIZE,PREVPRICE',
+                'marketdata.columns': 'SECID,LAST,UPDATETIME'
+            }, timeout=10)
+            self._count('requests')
+            self._count('bytes_downloaded', len(response.content))
+            
+            if response.status_code != 200:
+                raise MOEXClientError(f"HTTP {response.status_code}")
+            
+            data = response.json()
+            securities = {
+                row['SECID']: row
+                for row in (dict(zip(data['securities']['columns'], values)) for values in data['securities']['data'])
+            }
+            marketdata = {
+                row['SECID']: row
+                for row in (dict(zip(data['marketdata']['columns'], values)) for values in data['marketdata']['data'])
+            }
+            
+            result = {}
+            for symbol in symbols:
+                security = securities.get(symbol, {})
+                market = marketdata.get(symbol, {})
+                price = market.get('LAST') or security.get('PREVPRICE')
+                if not price:
+                    continue
+                result[symbol] = {
+                    'price': float(price),
+                    'lot': int(security.get('LOTSIZE') or 10),
+                    'board': board,
+                    'quote_at': market.get('UPDATETIME')
+                }
+            
+            logger.info(f"Fetched quotes for {len(result)} of {len(symbols)} symbols")
+            self._sleep_rate_limit()
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error fetching quotes: {e}")
+            raise MOEXClientError(f"Failed to fetch quotes: {e}")
+    
+    @retry(
+        stop=_stop_after_client_attempts,
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception_type((ConnectionError, TimeoutError)),
+        before_sleep=_count_client_retry,
+        reraise=True
+    )
+    def get_dividends(self, symbol: str, strict: bool = False) -> float:
         """
         Получить сумму дивидендов за последние 12 месяцев (TTM).
         
@@ -115,9 +233,13 @@ class MOEXClient:
         
         Args:
             symbol: Тикер инструмента
+            strict: Сообщать об ошибке загрузки исключением вместо 0
             
         Returns:
-            float: Сумма дивидендов TTM (0 если дивидендов нет)
+            float: Сумма дивидендов TTM (0 если дивидендов нет или, без strict, при ошибке)
+            
+        Raises:
+            MOEXClientError: При ошибке загрузки, если задан strict
         """
         try:
             logger.info(f"Fetching dividends for {symbol}")
@@ -128,19 +250,17 @@ class MOEXClient:
             
             url = f"https://iss.moex.com/iss/securities/{symbol}/dividends.json"
             response = requests.get(url, timeout=10)
+            self._count('requests')
+            self._count('bytes_downloaded', len(response.content))
             
             if response.status_code != 200:
-                logger.warning(f"Failed to fetch dividends for {symbol}: HTTP {response.status_code}")
-                self._sleep_rate_limit()
-                return 0.0
+                raise MOEXClientError(f"HTTP {response.status_code}")
             
             data = response.json()
             
             # Проверяем наличие данных
             if 'dividends' not in data or 'data' not in data['dividends']:
-                logger.warning(f"No dividends data structure for {symbol}")
-                self._sleep_rate_limit()
-                return 0.0
+                raise MOEXClientError("no dividends data structure")
             
             columns = data['dividends']['columns']
             rows = data['dividends']['data']
@@ -158,9 +278,7 @@ class MOEXClient:
             value_col = 'value'
             
             if date_col not in df.columns or value_col not in df.columns:
-                logger.warning(f"Missing required columns in dividends for {symbol}")
-                self._sleep_rate_limit()
-                return 0.0
+                raise MOEXClientError("missing required columns")
             
             # Преобразуем даты
             df[date_col] = pd.to_datetime(df[date_col])
@@ -184,14 +302,17 @@ class MOEXClient:
             
         except Exception as e:
             logger.warning(f"Error fetching dividends for {symbol}: {e}")
-            # Дивиденды не критичны, возвращаем 0
             self._sleep_rate_limit()
+            if strict:
+                raise MOEXClientError(f"Failed to fetch dividends for {symbol}: {e}")
+            # Дивиденды не критичны, возвращаем 0
             return 0.0
     
     @retry(
-        stop=stop_after_attempt(3),
+        stop=_stop_after_client_attempts,
         wait=wait_exponential(multiplier=1, min=2, max=10),
         retry=retry_if_exception_type((ConnectionError, TimeoutError)),
+        before_sleep=_count_client_retry,
         reraise=True
     )
     def get_candles(
@@ -231,6 +352,7 @@ class MOEXClient:
                 end=end_date.strftime('%Y-%m-%d'),
                 period=60  # 1 hour
             )
+            self._count_frame(candles)
             
             if candles.empty:
                 raise MOEXClientError(f"No candles data for {symbol}")
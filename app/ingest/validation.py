@@ -0,0 +1,135 @@
+"""Векторная проверка свечей при загрузке (аналог валидаторов модели Candle)."""
+
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+
+# Колонка с причинами отбраковки в карантинном наборе
+REASON_COLUMN = 'reason'
+
+
+@dataclass
+class CandleValidation:
+    """Результат проверки свечей."""
+    valid: pd.DataFrame
+    rejected: pd.DataFrame
+
+    @property
+    def rejected_count(self) -> int:
+        """Количество отбракованных свечей."""
+        return len(self.rejected)
+
+
+def _rule_masks(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Построить маски нарушений для каждого правила.
+
+    Правила повторяют модель Candle: цены и объём >= 0, high >= low,
+    плюс требования к ряду: время начала задано, строго возрастает и
+    не повторяется. NaN в ценах считается нарушением.
+
+    Args:
+        df: DataFrame со свечами
+
+    Returns:
+        Dict[str, np.ndarray]: Имя правила -> булева маска нарушивших строк
+    """
+    masks: Dict[str, np.ndarray] = {}
+
+    for col in PRICE_COLUMNS:
+        if col in df.columns:
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            # ~(x >= 0) ловит и отрицательные значения, и NaN
+            masks[f'{col}_negative'] = ~(values >= 0)
+
+    if 'high' in df.columns and 'low' in df.columns:
+        high = df['high'].to_numpy(dtype=np.float64, na_value=np.nan)
+        low = df['low'].to_numpy(dtype=np.float64, na_value=np.nan)
+        masks['high_below_low'] = high < low
+
+    for col in ('volume', 'value'):
+        if col in df.columns:
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            masks[f'{col}_negative'] = values < 0
+
+    if 'begin' in df.columns:
+        begin = pd.to_datetime(df['begin']).to_numpy(dtype='datetime64[ns]')
+        missing = np.isnat(begin)
+        # NaT заменяем минимальным временем, чтобы не ломать накопленный максимум
+        ns = np.where(missing, np.iinfo(np.int64).min, begin.view(np.int64))
+        previous_max = np.maximum.accumulate(np.concatenate(([np.iinfo(np.int64).min], ns[:-1])))
+
+        masks['begin_missing'] = missing
+        masks['begin_duplicate'] = ~missing & pd.Series(ns).duplicated(keep='first').to_numpy()
+        masks['begin_not_monotonic'] = ~missing & ~masks['begin_duplicate'] & (ns < previous_max)
+
+    return masks
+
+
+def _no_rejections(df: pd.DataFrame) -> pd.DataFrame:
+    """Пустой набор отбракованных свечей с той же схемой, что и df."""
+    return df.iloc[0:0].assign(**{REASON_COLUMN: pd.Series(dtype=object)})
+
+
+def validate_candles(df: pd.DataFrame) -> CandleValidation:
+    """
+    Проверить свечи векторно и отделить некорректные строки.
+
+    Работает масками по колонкам, без создания объектов Candle, поэтому
+    стоимость проверки несущественна по сравнению с загрузкой.
+
+    Args:
+        df: DataFrame со свечами (open, high, low, close, volume, begin, ...)
+
+    Returns:
+        CandleValidation: Корректные свечи (индекс сброшен) и отбракованные с колонкой reason
+    """
+    if df is None or df.empty:
+        df = df if df is not None else pd.DataFrame()
+        return CandleValidation(valid=df, rejected=_no_rejections(df))
+
+    masks = _rule_masks(df)
+    bad = np.zeros(len(df), dtype=bool)
+    for mask in masks.values():
+        bad |= mask
+
+    if not bad.any():
+        return CandleValidation(valid=df, rejected=_no_rejections(df))
+
+    # Причины собираем только для отбракованных строк — их обычно единицы
+    bad_positions = np.flatnonzero(bad)
+    reasons = [
+        ','.join(name for name, mask in masks.items() if mask[pos])
+        for pos in bad_positions
+    ]
+
+    rejected = df.iloc[bad_positions].copy()
+    rejected[REASON_COLUMN] = reasons
+    valid = df.iloc[np.flatnonzero(~bad)].reset_index(drop=True)
+
+    return CandleValidation(valid=valid, rejected=rejected.reset_index(drop=True))
+
+
+def log_rejections(symbol: str, result: CandleValidation) -> None:
+    """
+    Вывести в лог сводку по отбракованным свечам.
+
+    Args:
+        symbol: Тикер
+        result: Результат проверки
+    """
+    if not result.rejected_count:
+        return
+
+    counts = result.rejected[REASON_COLUMN].str.split(',').explode().value_counts()
+    summary = ', '.join(f"{reason}={count}" for reason, count in counts.items())
+    logger.warning(
+        f"Quarantined {result.rejected_count} of "
+        f"{result.rejected_count + len(result.valid)} candles for {symbol}: {summary}"
+    )
@@ -1,11 +1,12 @@
 """Главный модуль приложения с интеграцией API и планировщика."""
 
+import asyncio
 import sys
 import signal
 from contextlib import asynccontextmanager
 
 from pathlib import Path
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from loguru import logger
@@ -119,22 +120,38 @@ async def scheduler_status():
 
 
 @app.post("/scheduler/run-now")
-async def run_job_now():
-    """Запустить задачу генерации отчёта немедленно."""
+async def run_job_now(
+    incremental: bool = Query(default=True),
+    wait: bool = Query(default=False, description="Дождаться завершения задачи")
+):
+    """
+    Запустить задачу генерации отчёта немедленно.
+    
+    Задача выполняется в фоновом потоке, ответ с идентификатором задачи
+    возвращается сразу (wait=true — после завершения, без блокировки
+    остальных запросов). Если отчёт уже генерируется, новая задача не
+    создаётся: возвращается выполняющаяся (joined: true).
+    
+    По умолчанию пересчитываются только тикеры, у которых с прошлого
+    отчёта появилась новая свеча, изменились дивиденды или настройки
+    (incremental=false — полный пересчёт).
+    """
     if not scheduler:
         return {
             "ok": False,
             "error": "Scheduler not initialized"
         }
     
-    logger.info("Manual job trigger requested via API")
+    logger.info(f"Manual job trigger requested via API (incremental={incremental})")
     
     try:
-        success = scheduler.run_once()
+        job, joined = scheduler.submit_report_job(incremental=incremental)
+        if wait:
+            await asyncio.to_thread(job.wait)
         
         return {
-            "ok": success,
-            "message": "Job completed successfully" if success else "Job failed, check logs"
+            "ok": True,
+            "data": {**job.to_dict(), "joined": joined}
         }
     except Exception as e:
         logger.error(f"Error running job manually: {e}")
@@ -144,6 +161,64 @@ async def run_job_now():
         }
 
 
+@app.get("/scheduler/jobs")
+async def list_jobs():
+    """Список фоновых задач (от новых к старым)."""
+    if not scheduler:
+        return {
+            "ok": False,
+            "error": "Scheduler not initialized"
+        }
+    
+    return {
+        "ok": True,
+        "data": {"items": [job.to_dict() for job in scheduler.jobs.list()]}
+    }
+
+
+@app.get("/scheduler/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Состояние задачи: статус, прогресс (done/total/pct), ошибка."""
+    if not scheduler:
+        return {
+            "ok": False,
+            "error": "Scheduler not initialized"
+        }
+    
+    job = scheduler.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    return {
+        "ok": True,
+        "data": job.to_dict()
+    }
+
+
+@app.post("/scheduler/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """
+    Отменить задачу.
+    
+    Отмена кооперативная: прогон останавливается после текущего тикера,
+    отчёт не публикуется, контрольная точка прогона удаляется.
+    """
+    if not scheduler:
+        return {
+            "ok": False,
+            "error": "Scheduler not initialized"
+        }
+    
+    job = scheduler.jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    return {
+        "ok": True,
+        "data": job.to_dict()
+    }
+
+
 # === Модуль предсказаний (без префикса /api) ===
 
 @app.get("/predictor/signal")
@@ -175,32 +250,18 @@ async def get_predictor_signal(tickers: Optional[List[str]] = Query(default=None
 async def get_predictor_history(limit: int = 10):
     """Получить историю сигналов предсказаний."""
     try:
-        import json
-        from pathlib import Path
-        
-        history_file = Path("data/events_history.json")
-        
-        if not history_file.exists():
-            return {
-                "ok": True,
-                "data": {
-                    "items": [],
-                    "count": 0
-                }
-            }
-        
-        with open(history_file, 'r', encoding='utf-8') as f:
-            history = json.load(f)
+        from app.predictor.config import PredictorConfig
+        from app.predictor.event_log import EventLog
         
-        recent = history[-limit:] if len(history) > limit else history
-        recent.reverse()
+        event_log = EventLog(PredictorConfig.load().events_log_path)
+        recent = event_log.tail(limit)
         
         return {
             "ok": True,
             "data": {
                 "items": recent,
                 "count": len(recent),
-                "total": len(history)
+                "total": event_log.count()
             }
         }
     except Exception as e:
@@ -1,7 +1,7 @@
 """Pydantic модели для данных приложения."""
 
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 from enum import Enum
 
 from pydantic import BaseModel, Field, field_validator, model_validator
@@ -24,6 +24,23 @@ class SymbolMeta(BaseModel):
     board: Optional[str] = None
     error: Optional[str] = None
     updated_at: Optional[datetime] = None
+    fingerprint: Optional[str] = None  # Отпечаток входных данных (инкрементальная генерация)
+    stale: bool = False  # Не обновлён в этом прогоне (исчерпан бюджет времени), значения прошлого отчёта
+    attempts: Optional[int] = None  # Попыток обработки в прогоне (с учётом отложенных повторов)
+    status: Optional[Literal["ok", "recovered", "failed"]] = None  # Итог: сразу, после повтора, с ошибкой
+
+
+class SymbolFeatures(BaseModel):
+    """Признаки доходности и риска по тикеру (рассчитываются за один проход по universe)."""
+    ret_1d_pct: Optional[float] = None
+    ret_5d_pct: Optional[float] = None
+    ret_20d_pct: Optional[float] = None
+    ret_60d_pct: Optional[float] = None
+    ret_250d_pct: Optional[float] = None
+    volatility_20d_pct: Optional[float] = None
+    max_drawdown_250d_pct: Optional[float] = None
+    vol_avg_20d: Optional[float] = None
+    adv_rub_20d: Optional[float] = None
 
 
 class SymbolData(BaseModel):
@@ -40,6 +57,7 @@ class SymbolData(BaseModel):
     dist_52w_low_pct: Optional[float] = None
     dist_52w_high_pct: Optional[float] = None
     signals: List[SignalType] = Field(default_factory=list)
+    features: Optional[SymbolFeatures] = None
     meta: SymbolMeta = Field(default_factory=SymbolMeta)
 
 
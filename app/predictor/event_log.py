@@ -0,0 +1,254 @@
+"""
+Append-only журнал событийных сигналов (JSONL) с индексом смещений.
+"""
+import json
+import logging
+import struct
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Запись индекса: время сигнала (микросекунды от эпохи) и смещение строки в .jsonl
+INDEX_RECORD = struct.Struct('<qq')
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_micros(value: datetime | str) -> int:
+    """Время в микросекундах от эпохи (время с зоной приводится к UTC)."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+class EventLog:
+    """
+    Журнал сигналов с помесячной ротацией.
+
+    Каждый месяц — пара файлов в директории журнала:
+        YYYY-MM.jsonl — по одному сигналу на строку
+        YYYY-MM.idx   — записи фиксированной длины (время, смещение строки)
+
+    Добавление дописывает строку и запись индекса (O(1)). Последние N
+    сигналов читаются позиционированием по индексу, выборка по времени —
+    бинарным поиском по индексу. Ничего не переписывается, поэтому
+    история хранится без ограничения по объёму.
+    """
+
+    def __init__(self, path: str | Path = "data/events_history.json"):
+        """
+        Инициализация журнала.
+
+        Args:
+            path: Директория журнала. Для пути к старому JSON файлу
+                (events_history.json) журнал ведётся в одноимённой
+                директории без расширения, а старая история переносится в него.
+        """
+        path = Path(path)
+        self.legacy_file = path if path.suffix == '.json' else None
+        self.directory = path.with_suffix('') if path.suffix == '.json' else path
+        self._lock = threading.Lock()
+        self._checked: set = set()
+
+    # --- сегменты ---
+
+    def _segments(self) -> List[str]:
+        """Имена месяцев (YYYY-MM), для которых есть журнал, по возрастанию."""
+        if not self.directory.exists():
+            return []
+        return sorted(p.stem for p in self.directory.glob("*.idx"))
+
+    def _paths(self, segment: str) -> Tuple[Path, Path]:
+        return self.directory / f"{segment}.jsonl", self.directory / f"{segment}.idx"
+
+    def _read_index(self, segment: str, first: int = 0, last: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Записи индекса с номерами [first, last)."""
+        _, idx_path = self._paths(segment)
+        with open(idx_path, 'rb') as f:
+            f.seek(first * INDEX_RECORD.size)
+            size = -1 if last is None else (last - first) * INDEX_RECORD.size
+            data = f.read(size)
+        return [INDEX_RECORD.unpack_from(data, pos) for pos in range(0, len(data), INDEX_RECORD.size)]
+
+    def _index_count(self, segment: str) -> int:
+        _, idx_path = self._paths(segment)
+        return idx_path.stat().st_size // INDEX_RECORD.size
+
+    def _read_lines(self, segment: str, first: int, last: int) -> List[Dict]:
+        """Сигналы с номерами [first, last) сегмента — одно позиционирование и одно чтение."""
+        if first >= last:
+            return []
+
+        log_path, _ = self._paths(segment)
+        start = self._read_index(segment, first, first + 1)[0][1]
+        count = self._index_count(segment)
+        end = self._read_index(segment, last, last + 1)[0][1] if last < count else None
+
+        with open(log_path, 'rb') as f:
+            f.seek(start)
+            data = f.read() if end is None else f.read(end - start)
+
+        return [json.loads(line) for line in data.splitlines() if line.strip()][:last - first]
+
+    def _repair(self, segment: str) -> None:
+        """
+        Доиндексировать строки, записанные в .jsonl без записи в индекс (сбой между записями).
+        """
+        log_path, idx_path = self._paths(segment)
+        if not log_path.exists():
+            return
+
+        count = self._index_count(segment) if idx_path.exists() else 0
+        offset = self._read_index(segment, count - 1, count)[0][1] if count else 0
+
+        with open(log_path, 'rb') as f:
+            f.seek(offset)
+            if count:
+                f.readline()
+            missing = []
+            while True:
+                position = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith(b'\n'):
+                    # Оборванная последняя строка — отрезаем
+                    with open(log_path, 'r+b') as w:
+                        w.truncate(position)
+                    break
+                record = json.loads(line)
+                missing.append(INDEX_RECORD.pack(_to_micros(record.get('timestamp', _EPOCH)), position))
+
+        if missing:
+            with open(idx_path, 'ab') as f:
+                f.write(b''.join(missing))
+            logger.warning(f"Журнал {log_path.name}: доиндексировано записей: {len(missing)}")
+
+    # --- запись ---
+
+    def append(self, record: Dict) -> None:
+        """
+        Добавить сигнал в журнал.
+
+        Сигналы должны добавляться в порядке времени — на этом основан
+        бинарный поиск по индексу.
+
+        Args:
+            record: Сигнал (поле timestamp в ISO формате; если нет — текущее время)
+        """
+        with self._lock:
+            self._migrate_legacy()
+            self._write(record)
+
+    def _write(self, record: Dict) -> None:
+        """Дописать строку в сегмент месяца сигнала и запись в его индекс."""
+        timestamp = str(record.get('timestamp') or datetime.now().isoformat())
+        segment = datetime.fromisoformat(timestamp).strftime('%Y-%m')
+        line = json.dumps(record, ensure_ascii=False, default=str).encode('utf-8') + b'\n'
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if segment not in self._checked:
+            self._repair(segment)
+            self._checked.add(segment)
+
+        log_path, idx_path = self._paths(segment)
+        with open(log_path, 'ab') as f:
+            offset = f.tell()
+            f.write(line)
+        with open(idx_path, 'ab') as f:
+            f.write(INDEX_RECORD.pack(_to_micros(timestamp), offset))
+
+    def _migrate_legacy(self) -> None:
+        """Перенести историю из старого JSON файла (один раз)."""
+        if self.legacy_file is None or not self.legacy_file.exists() or self._segments():
+            return
+
+        with open(self.legacy_file, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+
+        for record in history:
+            self._write(record)
+
+        self.legacy_file.rename(self.legacy_file.with_suffix('.json.migrated'))
+        logger.info(f"История сигналов перенесена в журнал {self.directory}: {len(history)} записей")
+
+    # --- чтение ---
+
+    def count(self) -> int:
+        """Общее число сигналов в журнале."""
+        self._migrate_legacy_locked()
+        return sum(self._index_count(segment) for segment in self._segments())
+
+    def tail(self, limit: int = 10) -> List[Dict]:
+        """
+        Последние сигналы, новые первыми.
+
+        Args:
+            limit: Количество сигналов
+
+        Returns:
+            List[Dict]: Сигналы
+        """
+        self._migrate_legacy_locked()
+
+        result: List[Dict] = []
+        for segment in reversed(self._segments()):
+            if len(result) >= limit:
+                break
+            count = self._index_count(segment)
+            need = min(limit - len(result), count)
+            result.extend(reversed(self._read_lines(segment, count - need, count)))
+        return result
+
+    def range(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[Dict]:
+        """
+        Сигналы с timestamp в интервале [start, end], по возрастанию времени.
+
+        Args:
+            start: Начало интервала (None — с начала журнала)
+            end: Конец интервала (None — до конца журнала)
+
+        Yields:
+            Dict: Сигналы
+        """
+        self._migrate_legacy_locked()
+
+        low = _to_micros(start) if start is not None else None
+        high = _to_micros(end) if end is not None else None
+        first_segment = start.strftime('%Y-%m') if start is not None else None
+        last_segment = end.strftime('%Y-%m') if end is not None else None
+
+        for segment in self._segments():
+            if (first_segment and segment < first_segment) or (last_segment and segment > last_segment):
+                continue
+
+            count = self._index_count(segment)
+            first = self._bisect(segment, low, right=False) if low is not None else 0
+            last = self._bisect(segment, high, right=True) if high is not None else count
+            yield from self._read_lines(segment, first, last)
+
+    def _bisect(self, segment: str, micros: int, right: bool) -> int:
+        """Бинарный поиск по индексу сегмента с чтением отдельных записей."""
+        _, idx_path = self._paths(segment)
+        low, high = 0, self._index_count(segment)
+        with open(idx_path, 'rb') as f:
+            while low < high:
+                middle = (low + high) // 2
+                f.seek(middle * INDEX_RECORD.size)
+                ts, _ = INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))
+                if ts < micros or (right and ts == micros):
+                    low = middle + 1
+                else:
+                    high = middle
+        return low
+
+    def _migrate_legacy_locked(self) -> None:
+        if self.legacy_file is not None and self.legacy_file.exists():
+            with self._lock:
+                self._migrate_legacy()
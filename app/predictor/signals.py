@@ -5,13 +5,13 @@ import asyncio
 from typing import Dict, List, Optional
 from datetime import datetime
 import logging
-import json
 from pathlib import Path
 
 from .collector import NewsCollector
 from .analyzer import NewsAnalyzer
 from .llm_analyzer import LLMNewsAnalyzer
 from .config import PredictorConfig
+from .event_log import EventLog
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +40,7 @@ class EventSignalGenerator:
             )
         
         self.history_file = Path(config.events_log_path)
+        self.event_log = EventLog(self.history_file)
         
     def _calculate_signal_level(self, stats: Dict) -> str:
         """
@@ -73,28 +74,10 @@ class EventSignalGenerator:
         return "LOW"
     
     def _save_to_history(self, signal_data: Dict):
-        """Сохранение результата в историю."""
+        """Сохранение результата в журнал сигналов (дописывание, без перезаписи файла)."""
         try:
-            # Создаём директорию если не существует
-            self.history_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Загружаем существующую историю
-            history = []
-            if self.history_file.exists():
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    history = json.load(f)
-            
-            # Добавляем новую запись
-            history.append(signal_data)
-            
-            # Ограничиваем размер истории (последние 100 записей)
-            history = history[-100:]
-            
-            # Сохраняем
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(history, f, ensure_ascii=False, indent=2)
-            
-            logger.info(f"Сигнал сохранён в {self.history_file}")
+            self.event_log.append(signal_data)
+            logger.info(f"Сигнал сохранён в {self.event_log.directory}")
             
         except Exception as e:
             logger.error(f"Ошибка при сохранении истории: {e}")
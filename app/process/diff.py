@@ -0,0 +1,134 @@
+"""Изменения отчёта относительно предыдущего: новые сигналы, сдвиги dy_pct, пересечения SMA200, ошибки."""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+# Суффикс файла изменений рядом с analysis.json
+DIFF_SUFFIX = ".diff.json"
+
+# Минимальное изменение дивидендной доходности (п.п.), попадающее в изменения
+DY_PCT_MIN_CHANGE = 0.1
+
+
+def diff_path(analysis_file: str | Path) -> Path:
+    """Путь к файлу изменений: data/analysis.json -> data/analysis.diff.json."""
+    path = Path(analysis_file)
+    return path.with_name(f"{path.stem}{DIFF_SUFFIX}")
+
+
+def _sma200_side(entry: Dict[str, Any]) -> Optional[int]:
+    """Положение цены относительно SMA200: 1 выше, -1 ниже, None — нет данных."""
+    price = entry.get('price')
+    sma_200 = entry.get('sma_200')
+    if price is None or sma_200 is None or price == sma_200:
+        return None
+    return 1 if price > sma_200 else -1
+
+
+def diff_symbol(
+    previous: Dict[str, Any],
+    current: Dict[str, Any],
+    dy_min_change: float = DY_PCT_MIN_CHANGE
+) -> Dict[str, Any]:
+    """
+    Изменения тикера между двумя отчётами.
+
+    Args:
+        previous: Данные тикера в прошлом отчёте
+        current: Данные тикера в текущем отчёте
+        dy_min_change: Минимальное изменение dy_pct (п.п.)
+
+    Returns:
+        Dict: Изменившиеся поля (пустой, если значимых изменений нет)
+    """
+    change: Dict[str, Any] = {}
+
+    previous_error = (previous.get('meta') or {}).get('error')
+    current_error = (current.get('meta') or {}).get('error')
+    if current_error is not None:
+        # Тикер с ошибкой не сравнивается по значениям
+        if previous_error is None:
+            change['status'] = 'failing'
+            change['error'] = current_error
+        return change
+    if previous_error is not None:
+        change['status'] = 'recovered'
+
+    previous_signals = previous.get('signals') or []
+    current_signals = current.get('signals') or []
+    added = [signal for signal in current_signals if signal not in previous_signals]
+    removed = [signal for signal in previous_signals if signal not in current_signals]
+    if added:
+        change['signals_added'] = added
+    if removed:
+        change['signals_removed'] = removed
+
+    previous_dy = previous.get('dy_pct')
+    current_dy = current.get('dy_pct')
+    if previous_dy is not None and current_dy is not None:
+        if abs(current_dy - previous_dy) >= dy_min_change:
+            change['dy_pct'] = [previous_dy, current_dy]
+    elif previous_dy != current_dy:
+        change['dy_pct'] = [previous_dy, current_dy]
+
+    previous_side = _sma200_side(previous)
+    current_side = _sma200_side(current)
+    if previous_side is not None and current_side is not None and previous_side != current_side:
+        change['sma200_cross'] = 'up' if current_side > 0 else 'down'
+
+    return change
+
+
+def diff_reports(
+    previous: Optional[Dict[str, Any]],
+    current: Dict[str, Any],
+    dy_min_change: float = DY_PCT_MIN_CHANGE
+) -> Dict[str, Any]:
+    """
+    Компактные изменения отчёта относительно предыдущего.
+
+    Тикеры, не обновлённые в текущем прогоне (meta.stale), не
+    сравниваются — их значения взяты из прошлого отчёта.
+
+    Args:
+        previous: Предыдущий отчёт (None — сравнивать не с чем)
+        current: Текущий отчёт
+        dy_min_change: Минимальное изменение dy_pct (п.п.)
+
+    Returns:
+        Dict: generated_at, previous_generated_at, added, removed,
+            changes (тикер -> изменения) и summary (счётчики)
+    """
+    current_symbols = current.get('by_symbol') or {}
+    previous_symbols = (previous or {}).get('by_symbol') or {}
+
+    added: List[str] = []
+    changes: Dict[str, Dict[str, Any]] = {}
+    if previous is not None:
+        for symbol, entry in current_symbols.items():
+            if symbol not in previous_symbols:
+                added.append(symbol)
+                continue
+            if (entry.get('meta') or {}).get('stale'):
+                continue
+            change = diff_symbol(previous_symbols[symbol], entry, dy_min_change)
+            if change:
+                changes[symbol] = change
+    removed = [symbol for symbol in previous_symbols if symbol not in current_symbols]
+
+    return {
+        'generated_at': current.get('generated_at'),
+        'previous_generated_at': (previous or {}).get('generated_at'),
+        'added': added,
+        'removed': removed,
+        'changes': changes,
+        'summary': {
+            'changed': len(changes),
+            'signals_added': sum(len(change.get('signals_added', [])) for change in changes.values()),
+            'signals_removed': sum(len(change.get('signals_removed', [])) for change in changes.values()),
+            'sma200_crosses': sum(1 for change in changes.values() if 'sma200_cross' in change),
+            'failing': sum(1 for change in changes.values() if change.get('status') == 'failing'),
+            'recovered': sum(1 for change in changes.values() if change.get('status') == 'recovered')
+        }
+    }
@@ -0,0 +1,238 @@
+"""Модуль расчёта признаков доходности и риска по всему universe за один проход."""
+
+import warnings
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from app.ingest.candles import CompactCandles, MemoryBudget
+
+
+# Горизонты доходности (в торговых днях; свечи сводятся к дневным барам)
+RETURN_HORIZONS = (1, 5, 20, 60, 250)
+
+# Окна для риск-метрик (в торговых днях)
+VOLATILITY_WINDOW = 20
+DRAWDOWN_WINDOW = 250
+VOLUME_WINDOW = 20
+
+# Количество торговых дней в году для аннуализации волатильности
+PERIODS_PER_YEAR = 252
+
+# Колонки свечей, которые нужны этапу признаков (begin CompactCandles хранит всегда)
+FEATURE_COLUMNS = ('close', 'volume')
+
+# Имена всех признаков в порядке расчёта
+FEATURE_NAMES = (
+    *(f'ret_{h}d_pct' for h in RETURN_HORIZONS),
+    'volatility_20d_pct',
+    'max_drawdown_250d_pct',
+    'vol_avg_20d',
+    'adv_rub_20d',
+)
+
+
+def _right_aligned_panel(columns: List[np.ndarray], length: int) -> np.ndarray:
+    """
+    Собрать матрицу тикеры x свечи, выровненную по последней свече.
+
+    Более короткие истории дополняются NaN слева, поэтому столбец -1
+    всегда соответствует последней свече каждого тикера.
+
+    Args:
+        columns: Массивы значений по тикерам
+        length: Длина самой длинной истории
+
+    Returns:
+        np.ndarray: Матрица формы (len(columns), length)
+    """
+    panel = np.full((len(columns), length), np.nan, dtype=np.float64)
+    for i, values in enumerate(columns):
+        if len(values):
+            panel[i, length - len(values):] = values
+    return panel
+
+
+def _daily_bars(candles: Any) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Свести свечи тикера к дневным барам.
+
+    Клиент MOEX отдаёт часовые свечи, а горизонты признаков заданы в
+    торговых днях: за день берётся последняя цена закрытия, объём и
+    оборот (close * volume по свечам) суммируются. Свечи без времени
+    начала считаются дневными.
+
+    Args:
+        candles: Свечи тикера (DataFrame или CompactCandles с колонками close, volume, begin)
+
+    Returns:
+        Tuple: Цены закрытия, объёмы и обороты в рублях по дням
+    """
+    close = np.asarray(candles['close'], dtype=np.float64)
+    if 'volume' in candles.columns:
+        volume = np.asarray(candles['volume'], dtype=np.float64)
+    else:
+        volume = np.full(len(close), np.nan)
+    turnover = close * volume
+
+    begin = pd.to_datetime(np.asarray(candles['begin'])) if 'begin' in candles else None
+    if begin is None or begin.isna().all():
+        return close, volume, turnover
+
+    bars = pd.DataFrame(
+        {'close': close, 'volume': volume, 'turnover': turnover},
+        index=begin.normalize()
+    )
+    days = bars[bars.index.notna()].groupby(level=0, sort=True)
+    return (
+        days['close'].last().to_numpy(),
+        days['volume'].sum(min_count=1).to_numpy(),
+        days['turnover'].sum(min_count=1).to_numpy(),
+    )
+
+
+def _to_optional(value: float) -> Optional[float]:
+    """Преобразовать NaN/inf в None, остальное округлить."""
+    if value is None or not np.isfinite(value):
+        return None
+    return round(float(value), 4)
+
+
+def compute_features(candles_by_symbol: Mapping[str, Any]) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Рассчитать признаки доходности и риска для всех тикеров одним векторным проходом.
+
+    Свечи (часовые) предварительно сводятся к дневным барам, все окна —
+    в торговых днях.
+
+    Признаки:
+        - ret_{1,5,20,60,250}d_pct: доходность за N торговых дней, %
+        - volatility_20d_pct: аннуализированная волатильность дневных лог-доходностей за 20 дней, %
+        - max_drawdown_250d_pct: максимальная просадка по дневным закрытиям за 250 дней, % (<= 0)
+        - vol_avg_20d: средний дневной объём за 20 дней
+        - adv_rub_20d: средний дневной оборот в рублях (сумма close * volume свечей дня) за 20 дней
+
+    Args:
+        candles_by_symbol: Свечи по тикерам (нужны колонки 'close', 'volume' и 'begin')
+
+    Returns:
+        Dict[str, Dict]: Признаки по тикерам (None, если не хватает истории)
+    """
+    symbols = [
+        symbol for symbol, candles in candles_by_symbol.items()
+        if candles is not None and len(candles) and 'close' in candles.columns
+    ]
+    result: Dict[str, Dict[str, Optional[float]]] = {
+        symbol: dict.fromkeys(FEATURE_NAMES) for symbol in candles_by_symbol
+    }
+
+    if not symbols:
+        return result
+
+    daily = [_daily_bars(candles_by_symbol[s]) for s in symbols]
+    length = max(len(bars[0]) for bars in daily)
+
+    close = _right_aligned_panel([bars[0] for bars in daily], length)
+    volume = _right_aligned_panel([bars[1] for bars in daily], length)
+    turnover = _right_aligned_panel([bars[2] for bars in daily], length)
+    last = close[:, -1]
+
+    features: Dict[str, np.ndarray] = {}
+
+    with warnings.catch_warnings(), np.errstate(divide='ignore', invalid='ignore'):
+        # Пустые окна (короткая история) дают NaN — это ожидаемо
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+
+        # Доходности по горизонтам
+        for horizon in RETURN_HORIZONS:
+            if length > horizon:
+                features[f'ret_{horizon}d_pct'] = (last / close[:, -1 - horizon] - 1) * 100
+            else:
+                features[f'ret_{horizon}d_pct'] = np.full(len(symbols), np.nan)
+
+        # Реализованная волатильность
+        log_returns = np.log(close[:, 1:] / close[:, :-1])
+        window = log_returns[:, -VOLATILITY_WINDOW:]
+        enough = np.sum(np.isfinite(window), axis=1) >= VOLATILITY_WINDOW
+        volatility = np.nanstd(window, axis=1, ddof=1) * np.sqrt(PERIODS_PER_YEAR) * 100
+        features['volatility_20d_pct'] = np.where(enough, volatility, np.nan)
+
+        # Максимальная просадка
+        window = close[:, -DRAWDOWN_WINDOW:]
+        running_max = np.fmax.accumulate(window, axis=1)
+        features['max_drawdown_250d_pct'] = np.nanmin(window / running_max - 1, axis=1) * 100
+
+        # Объём и оборот в рублях
+        features['vol_avg_20d'] = np.nanmean(volume[:, -VOLUME_WINDOW:], axis=1)
+        features['adv_rub_20d'] = np.nanmean(turnover[:, -VOLUME_WINDOW:], axis=1)
+
+    for i, symbol in enumerate(symbols):
+        result[symbol] = {name: _to_optional(features[name][i]) for name in FEATURE_NAMES}
+
+    logger.debug(f"Computed features for {len(symbols)} symbols over {length} daily bars")
+
+    return result
+
+
+class FeatureStage:
+    """
+    Этап признаков в прогоне отчёта.
+
+    Удерживает свечи обработанных тикеров в компактном виде (только нужные
+    колонки, float32 где возможно) и считает признаки векторно. Если задан
+    бюджет памяти, при его превышении признаки считаются по накопленной
+    пачке тикеров, а свечи освобождаются — пиковая память не растёт с
+    размером universe.
+    """
+
+    def __init__(self, memory_budget_mb: Optional[float] = None):
+        """
+        Инициализация этапа.
+
+        Args:
+            memory_budget_mb: Лимит памяти под удерживаемые свечи (None — без лимита)
+        """
+        self.budget = MemoryBudget(memory_budget_mb)
+        self._held: Dict[str, CompactCandles] = {}
+        self._features: Dict[str, Dict[str, Optional[float]]] = {}
+
+    def add(self, symbol: str, candles: pd.DataFrame) -> None:
+        """
+        Добавить свечи тикера.
+
+        Args:
+            symbol: Тикер
+            candles: DataFrame со свечами
+        """
+        compact = CompactCandles.from_frame(candles, columns=FEATURE_COLUMNS)
+        self._held[symbol] = compact
+        self.budget.add(compact.nbytes)
+
+        if self.budget.exceeded:
+            self.flush()
+
+    def flush(self) -> None:
+        """Рассчитать признаки по накопленным тикерам и освободить свечи."""
+        if not self._held:
+            return
+
+        try:
+            self._features.update(compute_features(self._held))
+        except Exception as e:
+            logger.error(f"Failed to compute features for {len(self._held)} symbols: {e}")
+
+        self._held = {}
+        self.budget.release()
+
+    def finish(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Завершить этап: досчитать остаток и вернуть признаки.
+
+        Returns:
+            Dict[str, Dict]: Признаки по тикерам
+        """
+        self.flush()
+        self.budget.log_summary()
+        return self._features
@@ -0,0 +1,118 @@
+"""Отпечатки входных данных тикеров для инкрементальной генерации отчёта."""
+
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import orjson
+from loguru import logger
+
+from app.store.io import StorageError, load_analysis_report
+
+
+# Версия расчёта: увеличивается при изменении логики метрик или признаков,
+# чтобы отпечатки прежних отчётов перестали совпадать
+FINGERPRINT_VERSION = 1
+
+
+def _digest(payload: Any) -> str:
+    """Короткий SHA-256 от канонического JSON."""
+    return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()[:32]
+
+
+def config_fingerprint(config: Any, history_days: int) -> str:
+    """
+    Отпечаток настроек, влияющих на расчёт данных тикера.
+
+    Args:
+        config: AppConfig
+        history_days: Глубина загружаемой истории свечей
+
+    Returns:
+        str: Отпечаток
+    """
+    return _digest({
+        'version': FINGERPRINT_VERSION,
+        'sma': list(config.windows.sma),
+        'dividend_target_pct': config.dividend_target_pct,
+        'history_days': history_days
+    })
+
+
+def symbol_fingerprint(quote: Dict[str, Any], divs: Optional[float], config_hash: str) -> Optional[str]:
+    """
+    Отпечаток входных данных тикера: время последней свечи, дивиденды, настройки.
+
+    Args:
+        quote: Котировка (нужно поле last_bar_at)
+        divs: Дивиденды TTM
+        config_hash: Отпечаток настроек (config_fingerprint)
+
+    Returns:
+        Optional[str]: Отпечаток или None, если время последней свечи неизвестно
+    """
+    last_bar_at = quote.get('last_bar_at')
+    if not last_bar_at:
+        return None
+
+    return _digest({
+        'last_bar_at': str(last_bar_at),
+        'price': quote.get('price'),
+        'lot': quote.get('lot'),
+        'board': quote.get('board'),
+        'divs': _digest(divs),
+        'config': config_hash
+    })
+
+
+def load_previous_report(analysis_file: str | Path) -> Optional[Dict[str, Any]]:
+    """
+    Предыдущий опубликованный отчёт.
+
+    Args:
+        analysis_file: Путь к analysis.json
+
+    Returns:
+        Optional[Dict]: Отчёт (общий для читателей, изменять нельзя) или None, если его нет
+    """
+    if not Path(analysis_file).exists():
+        return None
+
+    try:
+        return load_analysis_report(analysis_file)
+    except StorageError as e:
+        logger.warning(f"Previous report is unavailable: {e}")
+        return None
+
+
+def load_previous_entries(analysis_file: str | Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Данные тикеров предыдущего отчёта.
+
+    Args:
+        analysis_file: Путь к analysis.json
+
+    Returns:
+        Dict[str, Dict]: Тикер -> данные SymbolData (пустой, если отчёта нет)
+    """
+    previous = load_previous_report(analysis_file)
+    return previous.get('by_symbol', {}) if previous else {}
+
+
+def load_reusable_entries(analysis_file: str | Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Данные тикеров предыдущего отчёта, пригодные для повторного использования.
+
+    Пригодны только успешно рассчитанные тикеры с сохранённым отпечатком.
+
+    Args:
+        analysis_file: Путь к analysis.json
+
+    Returns:
+        Dict[str, Dict]: Тикер -> данные SymbolData из предыдущего отчёта
+    """
+    return {
+        symbol: data
+        for symbol, data in load_previous_entries(analysis_file).items()
+        if (data.get('meta') or {}).get('fingerprint') and not (data.get('meta') or {}).get('error')
+    }
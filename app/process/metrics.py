@@ -7,6 +7,7 @@ from loguru import logger
 
 from app.models import SignalType
 from app.config.loader import get_config
+from app.store.range_index import RangeIndex
 
 
 class MetricsCalculator:
@@ -47,13 +48,19 @@ class MetricsCalculator:
         
         return result
     
-    def calculate_52w_range(self, candles: pd.DataFrame, current_price: float) -> Dict[str, Optional[float]]:
+    def calculate_52w_range(
+        self,
+        candles: pd.DataFrame,
+        current_price: float,
+        range_index: Optional[RangeIndex] = None
+    ) -> Dict[str, Optional[float]]:
         """
         Рассчитать диапазон 52 недель и расстояния от текущей цены.
         
         Args:
             candles: DataFrame со свечами
             current_price: Текущая цена
+            range_index: Готовый индекс диапазонов по этим свечам (запрос за O(1))
             
         Returns:
             Dict с high_52w, low_52w, dist_52w_low_pct, dist_52w_high_pct
@@ -76,8 +83,11 @@ class MetricsCalculator:
             logger.debug(f"Not enough data for 52W range: have {len(recent_candles)} candles")
             return result
         
-        high_52w = float(recent_candles['high'].max())
-        low_52w = float(recent_candles['low'].min())
+        if range_index is not None and len(range_index) == len(candles):
+            high_52w, low_52w = range_index.query_last(len(recent_candles))
+        else:
+            high_52w = float(recent_candles['high'].max())
+            low_52w = float(recent_candles['low'].min())
         
         # Расстояние от минимума: (price / low52 - 1) * 100
         dist_from_low = ((current_price / low_52w) - 1) * 100 if low_52w > 0 else None
@@ -249,7 +259,8 @@ class MetricsCalculator:
         self,
         candles: pd.DataFrame,
         current_price: float,
-        div_ttm: float
+        div_ttm: float,
+        range_index: Optional[RangeIndex] = None
     ) -> Dict[str, Any]:
         """
         Рассчитать все метрики для тикера.
@@ -258,6 +269,7 @@ class MetricsCalculator:
             candles: DataFrame со свечами
             current_price: Текущая цена
             div_ttm: Дивиденды TTM
+            range_index: Готовый индекс диапазонов high/low по этим свечам
             
         Returns:
             Dict с всеми метриками и сигналами
@@ -266,7 +278,7 @@ class MetricsCalculator:
         sma_data = self.calculate_sma(candles)
         
         # Рассчитываем 52W диапазон
-        range_52w = self.calculate_52w_range(candles, current_price)
+        range_52w = self.calculate_52w_range(candles, current_price, range_index)
         
         # Рассчитываем дивидендную доходность
         dy_pct = self.calculate_dividend_yield(div_ttm, current_price)
@@ -0,0 +1,171 @@
+"""Параллельный расчёт метрик в пуле процессов."""
+
+import atexit
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from app.process.metrics import MetricsCalculator
+
+
+# Колонки свечей, которые нужны MetricsCalculator
+SHARED_COLUMNS: Tuple[str, ...] = ('open', 'high', 'low', 'close', 'volume')
+
+# Калькулятор внутри процесса-воркера (создаётся один раз при старте воркера)
+_worker_calculator: Optional[MetricsCalculator] = None
+
+
+def _init_worker() -> None:
+    """Инициализация процесса-воркера."""
+    global _worker_calculator
+    _worker_calculator = MetricsCalculator()
+
+
+def _compute_from_shared(
+    shm_name: str,
+    n_rows: int,
+    columns: Tuple[str, ...],
+    current_price: float,
+    div_ttm: float
+) -> Dict[str, Any]:
+    """
+    Рассчитать метрики по свечам из разделяемой памяти (выполняется в воркере).
+
+    Args:
+        shm_name: Имя блока разделяемой памяти
+        n_rows: Количество свечей
+        columns: Имена колонок в порядке строк блока
+        current_price: Текущая цена
+        div_ttm: Дивиденды TTM
+
+    Returns:
+        Dict с метриками (как у MetricsCalculator.calculate_all_metrics)
+    """
+    calculator = _worker_calculator or MetricsCalculator()
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray((len(columns), n_rows), dtype=np.float64, buffer=shm.buf)
+        candles = pd.DataFrame({col: block[i] for i, col in enumerate(columns)})
+        del block
+    finally:
+        shm.close()
+
+    return calculator.calculate_all_metrics(
+        candles=candles,
+        current_price=current_price,
+        div_ttm=div_ttm
+    )
+
+
+class MetricsPool:
+    """
+    Постоянный пул процессов для CPU-нагруженного расчёта метрик.
+
+    Свечи передаются воркерам через разделяемую память (один float64 блок
+    на тикер), а не пиклингом DataFrame. Блок освобождается, как только
+    воркер вернул результат.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Инициализация пула.
+
+        Args:
+            workers: Количество процессов (по умолчанию — все ядра)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Получить (и при необходимости создать) пул процессов."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_worker
+                )
+                logger.info(f"Started metrics process pool with {self.workers} workers")
+            return self._executor
+
+    def _release(self, name: str) -> None:
+        """Освободить блок разделяемой памяти."""
+        with self._lock:
+            shm = self._segments.pop(name, None)
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    def submit(self, candles: pd.DataFrame, current_price: float, div_ttm: float) -> Future:
+        """
+        Отправить расчёт метрик по тикеру в пул.
+
+        Args:
+            candles: DataFrame со свечами
+            current_price: Текущая цена
+            div_ttm: Дивиденды TTM
+
+        Returns:
+            Future: Результат calculate_all_metrics
+        """
+        columns = tuple(col for col in SHARED_COLUMNS if col in candles.columns)
+        n_rows = len(candles) if columns else 0
+
+        shm = shared_memory.SharedMemory(create=True, size=max(len(columns) * n_rows * 8, 1))
+        block = np.ndarray((len(columns), n_rows), dtype=np.float64, buffer=shm.buf)
+        for i, col in enumerate(columns):
+            block[i] = candles[col].to_numpy(dtype=np.float64)
+        del block
+
+        with self._lock:
+            self._segments[shm.name] = shm
+
+        try:
+            future = self._get_executor().submit(
+                _compute_from_shared, shm.name, n_rows, columns, current_price, div_ttm
+            )
+        except Exception:
+            self._release(shm.name)
+            raise
+
+        future.add_done_callback(lambda _: self._release(shm.name))
+        return future
+
+    def shutdown(self) -> None:
+        """Остановить пул и освободить разделяемую память."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info("Metrics process pool stopped")
+        for name in list(self._segments):
+            self._release(name)
+
+
+# Глобальный пул (ленивое создание, живёт между запусками отчёта)
+_pool: Optional[MetricsPool] = None
+
+
+def get_metrics_pool(workers: Optional[int] = None) -> MetricsPool:
+    """
+    Получить глобальный пул процессов для расчёта метрик.
+
+    Args:
+        workers: Количество процессов (учитывается только при первом вызове)
+
+    Returns:
+        MetricsPool: Пул процессов
+    """
+    global _pool
+    if _pool is None:
+        _pool = MetricsPool(workers)
+        atexit.register(_pool.shutdown)
+    return _pool
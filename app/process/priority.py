@@ -0,0 +1,114 @@
+"""Порядок обработки тикеров и бюджет времени прогона."""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# Уровни приоритета: позиции портфеля, тикеры с сигналами, остальные
+PRIORITY_HELD = 0
+PRIORITY_SIGNALS = 1
+PRIORITY_REST = 2
+
+
+def symbol_priority(symbol: str, held: set, previous: Dict[str, Dict[str, Any]]) -> Tuple[int, float]:
+    """
+    Ключ сортировки тикера (меньше — раньше).
+
+    Внутри уровня тикеры упорядочены по ликвидности (средний оборот
+    за 20 дней из прошлого отчёта, по убыванию).
+
+    Args:
+        symbol: Тикер
+        held: Тикеры позиций портфеля
+        previous: Данные тикеров из прошлого отчёта
+
+    Returns:
+        Tuple[int, float]: (уровень, минус оборот)
+    """
+    entry = previous.get(symbol) or {}
+    adv = (entry.get('features') or {}).get('adv_rub_20d') or 0.0
+
+    if symbol in held:
+        tier = PRIORITY_HELD
+    elif entry.get('signals'):
+        tier = PRIORITY_SIGNALS
+    else:
+        tier = PRIORITY_REST
+    return tier, -adv
+
+
+def prioritize(
+    universe: List[str],
+    held: Iterable[str],
+    previous: Dict[str, Dict[str, Any]]
+) -> List[str]:
+    """
+    Упорядочить тикеры для обработки.
+
+    Args:
+        universe: Тикеры прогона
+        held: Тикеры позиций портфеля
+        previous: Данные тикеров из прошлого отчёта
+
+    Returns:
+        List[str]: Тикеры в порядке обработки (при равенстве — порядок universe)
+    """
+    held = set(held)
+    return sorted(universe, key=lambda symbol: symbol_priority(symbol, held, previous))
+
+
+class Deadline:
+    """Общий бюджет времени прогона (с возможностью отмены прогона)."""
+
+    def __init__(self, budget_sec: Optional[float] = None, cancel_event: Optional[threading.Event] = None):
+        """
+        Инициализация.
+
+        Args:
+            budget_sec: Бюджет в секундах от текущего момента (None — без ограничения)
+            cancel_event: Событие отмены прогона: после него бюджет считается исчерпанным
+        """
+        self.budget_sec = budget_sec
+        self.expires_at = None if budget_sec is None else time.monotonic() + budget_sec
+        self.cancel_event = cancel_event
+
+    @property
+    def cancelled(self) -> bool:
+        """Прогон отменён."""
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Оставшееся время в секундах (None — без ограничения)."""
+        if self.cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        """Бюджет исчерпан (или прогон отменён)."""
+        if self.cancelled:
+            return True
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def timeout(self, per_item_sec: Optional[float] = None) -> Optional[float]:
+        """
+        Таймаут очередного шага: меньшее из остатка бюджета и лимита на шаг.
+
+        Args:
+            per_item_sec: Лимит на один тикер (None — без лимита)
+
+        Returns:
+            Optional[float]: Таймаут в секундах (None — ждать без ограничения)
+        """
+        limits = [limit for limit in (self.remaining(), per_item_sec) if limit is not None]
+        return min(limits) if limits else None
+
+    def sleep(self, seconds: float) -> None:
+        """Пауза, прерываемая отменой прогона."""
+        if self.cancel_event is not None:
+            self.cancel_event.wait(seconds)
+        else:
+            time.sleep(seconds)
@@ -0,0 +1,309 @@
+"""Внутридневное обновление срезов данных: котировки, свечи, дивиденды."""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+from loguru import logger
+
+from app.config.loader import AppConfig, get_config
+from app.ingest.moex_client import MOEXClient, MOEXClientError
+from app.ingest.validation import log_rejections, validate_candles
+from app.process.incremental import load_previous_report
+from app.process.report import CANDLES_HISTORY_DAYS
+from app.store.io import StorageError, load_json, save_candles, save_json, write_hot_candles_panel
+from app.store.partitioned import PartitionedCandleStore
+
+
+# Срезы исходных данных
+SLICE_QUOTES = "quotes"
+SLICE_CANDLES = "candles"
+SLICE_DIVIDENDS = "dividends"
+SLICE_REPORT = "report"
+
+# Производные данные
+INTRADAY = "intraday"
+CANDLES_PANEL = "candles_panel"
+
+# Граф зависимостей: срез -> производные данные, которые устаревают после его обновления
+DEPENDENTS: Dict[str, tuple] = {
+    SLICE_QUOTES: (INTRADAY,),
+    SLICE_DIVIDENDS: (INTRADAY,),
+    SLICE_CANDLES: (CANDLES_PANEL,),
+    SLICE_REPORT: (INTRADAY,)
+}
+
+# Файлы кэшей в директории refresh.dir
+QUOTES_FILE = "quotes.json"
+DIVIDENDS_FILE = "dividends.json"
+INTRADAY_FILE = "intraday.json"
+STATE_FILE = "state.json"
+
+# Дни недели в cron-формате (индекс совпадает с datetime.weekday)
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+
+def _load_cache(path: Path) -> Dict[str, Any]:
+    """Прочитать кэш среза (пустой, если его нет или он повреждён)."""
+    if not path.exists():
+        return {}
+    try:
+        return load_json(path)
+    except StorageError as e:
+        logger.warning(f"Ignoring unreadable refresh cache {path}: {e}")
+        return {}
+
+
+def in_session(refresh: Any, now: datetime) -> bool:
+    """
+    Идёт ли торговая сессия.
+
+    Args:
+        refresh: Настройки обновления (session_days, session_start, session_end)
+        now: Текущее время в часовом поясе расписания
+
+    Returns:
+        bool: True, если now попадает в дни и часы сессии
+    """
+    days = _session_weekdays(refresh.session_days)
+    start = datetime.strptime(refresh.session_start, "%H:%M").time()
+    end = datetime.strptime(refresh.session_end, "%H:%M").time()
+    return now.weekday() in days and start <= now.time() <= end
+
+
+def _session_weekdays(session_days: str) -> set:
+    """Дни недели (0 — понедельник) из cron-формата: "mon-fri", "mon,wed,fri"."""
+    weekdays = []
+    for part in session_days.lower().split(','):
+        first, _, last = part.strip().partition('-')
+        first_index = WEEKDAYS.index(first)
+        last_index = WEEKDAYS.index(last) if last else first_index
+        weekdays.extend(range(first_index, last_index + 1))
+    return set(weekdays)
+
+
+def intraday_entry(
+    quote: Optional[Dict[str, Any]],
+    div_ttm: Optional[float],
+    report_entry: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Внутридневные значения тикера: свежая цена поверх метрик ночного отчёта.
+
+    Метрики, зависящие только от цены и дивидендов (dy_pct, расстояния
+    до 52-недельных границ, положение относительно SMA200), пересчитываются;
+    скользящие средние и границы берутся из отчёта.
+
+    Args:
+        quote: Котировка из кэша котировок (None — цена из отчёта)
+        div_ttm: Дивиденды TTM из кэша дивидендов (None — из отчёта)
+        report_entry: Данные тикера в последнем отчёте
+
+    Returns:
+        Dict: price, quote_at, div_ttm, dy_pct, dist_52w_low_pct,
+            dist_52w_high_pct, sma_200, above_sma200
+    """
+    price = quote['price'] if quote else report_entry.get('price')
+    if div_ttm is None:
+        div_ttm = report_entry.get('div_ttm')
+    high_52w = report_entry.get('high_52w')
+    low_52w = report_entry.get('low_52w')
+    sma_200 = report_entry.get('sma_200')
+
+    valid_price = price is not None and price > 0
+    return {
+        'price': price,
+        'quote_at': quote.get('quote_at') if quote else None,
+        'div_ttm': div_ttm,
+        'dy_pct': round(div_ttm / price * 100, 2) if valid_price and div_ttm is not None else None,
+        'dist_52w_low_pct': (price / low_52w - 1) * 100 if valid_price and low_52w else None,
+        'dist_52w_high_pct': (high_52w / price - 1) * 100 if valid_price and high_52w else None,
+        'sma_200': sma_200,
+        'above_sma200': price > sma_200 if valid_price and sma_200 is not None else None
+    }
+
+
+class RefreshService:
+    """
+    Обновление отдельных срезов данных между ночными отчётами.
+
+    Каждый срез загружает только свои данные и перестраивает только
+    зависящие от него производные данные (см. DEPENDENTS): котировки и
+    дивиденды — внутридневную сводку intraday.json, свечи — хранилище
+    сырых данных, индексы диапазонов и панель свечей горячего кэша.
+    """
+
+    def __init__(self, config: Optional[AppConfig] = None, client: Optional[MOEXClient] = None):
+        """
+        Инициализация.
+
+        Args:
+            config: Конфигурация (по умолчанию общая)
+            client: Клиент MOEX (по умолчанию новый)
+        """
+        self.config = config or get_config()
+        self.client = client or MOEXClient()
+        self.dir = Path(self.config.refresh.dir)
+        self._builders: Dict[str, Callable[[], Any]] = {
+            INTRADAY: self.rebuild_intraday,
+            CANDLES_PANEL: self.rebuild_candles_panel
+        }
+
+    def universe(self) -> List[str]:
+        """Тикеры последнего отчёта (с тикерами портфеля), иначе тикеры конфигурации."""
+        report = load_previous_report(self.config.output.analysis_file)
+        if report and report.get('universe'):
+            return list(report['universe'])
+        return [ticker.symbol for ticker in self.config.universe]
+
+    def state(self) -> Dict[str, Any]:
+        """Время и итог последнего обновления каждого среза."""
+        return _load_cache(self.dir / STATE_FILE)
+
+    def _mark(self, slice_name: str, summary: Dict[str, Any]) -> Dict[str, Any]:
+        """Записать итог обновления среза и перестроить зависящие от него данные."""
+        summary = {'updated_at': datetime.now().isoformat(), **summary}
+        state = self.state()
+        state[slice_name] = summary
+        save_json(self.dir / STATE_FILE, state)
+        self.invalidate(slice_name)
+        return summary
+
+    def invalidate(self, slice_name: str) -> List[str]:
+        """
+        Перестроить производные данные, зависящие от среза.
+
+        Args:
+            slice_name: Обновлённый срез
+
+        Returns:
+            List[str]: Перестроенные производные данные
+        """
+        rebuilt = []
+        for dependent in DEPENDENTS.get(slice_name, ()):
+            try:
+                self._builders[dependent]()
+                rebuilt.append(dependent)
+            except Exception as e:
+                logger.warning(f"Failed to rebuild {dependent} after {slice_name} refresh: {e}")
+        return rebuilt
+
+    def refresh_quotes(self) -> Dict[str, Any]:
+        """
+        Обновить котировки universe одним запросом.
+
+        Returns:
+            Dict: Итог обновления (updated_at, symbols)
+        """
+        universe = self.universe()
+        quotes = self.client.get_quotes(universe)
+        save_json(self.dir / QUOTES_FILE, {'updated_at': datetime.now().isoformat(), 'quotes': quotes})
+        logger.info(f"Refreshed quotes for {len(quotes)} of {len(universe)} symbols")
+        return self._mark(SLICE_QUOTES, {'symbols': len(quotes)})
+
+    def refresh_dividends(self) -> Dict[str, Any]:
+        """
+        Обновить дивиденды TTM universe.
+
+        Для тикеров, дивиденды которых загрузить не удалось, остаётся
+        прежнее значение кэша (или None — тогда берётся значение из отчёта).
+
+        Returns:
+            Dict: Итог обновления (updated_at, symbols, failed)
+        """
+        previous = _load_cache(self.dir / DIVIDENDS_FILE).get('dividends') or {}
+        dividends, failed = {}, []
+        for symbol in self.universe():
+            try:
+                dividends[symbol] = self.client.get_dividends(symbol, strict=True)
+            except MOEXClientError as e:
+                logger.warning(f"Failed to refresh dividends for {symbol}, keeping cached value: {e}")
+                dividends[symbol] = previous.get(symbol)
+                failed.append(symbol)
+        save_json(self.dir / DIVIDENDS_FILE, {'updated_at': datetime.now().isoformat(), 'dividends': dividends})
+        logger.info(f"Refreshed dividends for {len(dividends) - len(failed)} symbols")
+        return self._mark(SLICE_DIVIDENDS, {'symbols': len(dividends) - len(failed), 'failed': failed})
+
+    def refresh_candles(self) -> Dict[str, Any]:
+        """
+        Догрузить свечи, появившиеся после последней сохранённой.
+
+        Загружаются только последние дни; тикеры без истории в хранилище
+        пропускаются — полную историю загружает ночной отчёт. Индекс
+        диапазонов перестраивается по всей истории хранилища (save_candles).
+
+        Returns:
+            Dict: Итог обновления (updated_at, symbols, candles, failed)
+        """
+        base_dir = self.config.output.raw_data_dir
+        store = PartitionedCandleStore(base_dir)
+        now = datetime.now()
+
+        updated, written, failed = 0, 0, []
+        for symbol in self.universe():
+            last_ts = store.read_manifest(symbol)['last_ts']
+            if last_ts is None:
+                continue
+            days = max((now - pd.Timestamp(last_ts).to_pydatetime().replace(tzinfo=None)).days + 1, 1)
+
+            try:
+                validation = validate_candles(self.client.get_candles(symbol, days=days))
+                log_rejections(symbol, validation)
+                fresh = validation.valid
+                if fresh.empty:
+                    continue
+
+                save_candles(symbol, fresh, base_dir)
+            except Exception as e:
+                logger.warning(f"Failed to refresh candles for {symbol}: {e}")
+                failed.append(symbol)
+                continue
+
+            updated += 1
+            written += len(fresh)
+
+        logger.info(f"Refreshed candles for {updated} symbols ({written} candles fetched)")
+        return self._mark(SLICE_CANDLES, {'symbols': updated, 'candles': written, 'failed': failed})
+
+    def rebuild_intraday(self) -> Dict[str, Any]:
+        """
+        Перестроить внутридневную сводку из отчёта и кэшей котировок и дивидендов.
+
+        Returns:
+            Dict: Сводка (записывается в intraday.json)
+        """
+        report = load_previous_report(self.config.output.analysis_file) or {}
+        quotes = _load_cache(self.dir / QUOTES_FILE)
+        dividends = _load_cache(self.dir / DIVIDENDS_FILE)
+        report_symbols = report.get('by_symbol') or {}
+        quote_map = quotes.get('quotes') or {}
+        dividend_map = dividends.get('dividends') or {}
+
+        symbols = list(report.get('universe') or report_symbols)
+        symbols += [symbol for symbol in quote_map if symbol not in report_symbols]
+
+        intraday = {
+            'generated_at': datetime.now().isoformat(),
+            'report_generated_at': report.get('generated_at'),
+            'quotes_updated_at': quotes.get('updated_at'),
+            'dividends_updated_at': dividends.get('updated_at'),
+            'by_symbol': {
+                symbol: intraday_entry(quote_map.get(symbol), dividend_map.get(symbol), report_symbols.get(symbol) or {})
+                for symbol in symbols
+            }
+        }
+        save_json(self.dir / INTRADAY_FILE, intraday)
+        return intraday
+
+    def rebuild_candles_panel(self) -> None:
+        """Перестроить панель свечей universe в горячем кэше."""
+        write_hot_candles_panel(
+            self.universe(),
+            base_dir=self.config.output.raw_data_dir,
+            start=datetime.now() - timedelta(days=CANDLES_HISTORY_DAYS)
+        )
+
+    def load_intraday(self) -> Optional[Dict[str, Any]]:
+        """Внутридневная сводка (None — ещё не строилась)."""
+        return _load_cache(self.dir / INTRADAY_FILE) or None
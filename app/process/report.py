@@ -1,16 +1,62 @@
 """Модуль генерации отчётов анализа."""
 
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 import json
+import threading
+import time
+
+import pandas as pd
 from loguru import logger
 
 from app.config.loader import get_config
 from app.ingest.moex_client import MOEXClient, MOEXClientError
+from app.ingest.validation import log_rejections, validate_candles
+from app.process.diff import diff_path, diff_reports
+from app.process.features import FeatureStage
+from app.process.incremental import (
+    config_fingerprint,
+    load_previous_entries,
+    load_previous_report,
+    load_reusable_entries,
+    symbol_fingerprint
+)
 from app.process.metrics import MetricsCalculator
-from app.store.io import save_analysis_report, save_daily_report
-from app.models import AnalysisReport, SymbolData, SymbolMeta
+from app.process.parallel import get_metrics_pool
+from app.process.priority import Deadline, prioritize
+from app.process.telemetry import RunTelemetry
+from app.store.checkpoint import CheckpointError, RunCheckpoint
+from app.store.history import get_history_store
+from app.store.partial import PartialReport, get_partial_report
+from app.store.io import (
+    load_candles,
+    save_analysis_report,
+    save_candles,
+    save_daily_report,
+    save_json,
+    save_quarantine,
+    StorageError,
+    write_hot_candles_panel
+)
+from app.store.range_index import RangeIndex
+from app.store.report_binary import write_report_binary
+from app.store.report_json import report_to_json, symbol_to_json
+from app.store.run_ledger import append_run
+from app.store.snapshot import encode_json
+from app.store.write_behind import WriteBehindQueue
+from app.models import AnalysisReport, SymbolData, SymbolFeatures, SymbolMeta
+
+
+# Глубина истории свечей, загружаемой с MOEX и публикуемой в горячий кэш
+CANDLES_HISTORY_DAYS = 400
+
+
+class ReportCancelled(Exception):
+    """Прогон отменён до публикации отчёта."""
+    pass
 
 
 class ReportGenerator:
@@ -19,8 +65,30 @@ class ReportGenerator:
     def __init__(self):
         """Инициализация генератора."""
         self.config = get_config()
-        self.client = MOEXClient()
+        # Повторы упавших тикеров — в отложенном проходе, а не внутри клиента
+        self.client = MOEXClient(retry_attempts=self.config.retry.inline_attempts)
         self.calculator = MetricsCalculator()
+        # Очередь отложенной записи артефактов (активна на время прогона)
+        self._persist_queue: Optional[WriteBehindQueue] = None
+        self.persist_stats: Optional[Dict[str, Any]] = None
+        # Отпечаток настроек и котировки, уже полученные при проверке отпечатков
+        self._config_hash = config_fingerprint(self.calculator.config, CANDLES_HISTORY_DAYS)
+        self._prefetched: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self.incremental_stats: Optional[Dict[str, int]] = None
+        self.retry_stats: Optional[Dict[str, int]] = None
+        # Сериализованные тикеры прогона: общие для частичного отчёта,
+        # контрольной точки и итогового отчёта (удаляются при изменении тикера)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        # Телеметрия текущего (или последнего) прогона
+        self.telemetry = RunTelemetry()
+        # Контекст потока тикера с таймаутом: его телеметрия и признак отказа от результата
+        self._local = threading.local()
+        self.last_run: Optional[Dict[str, Any]] = None
+        # Изменения последнего сохранённого отчёта относительно предыдущего
+        self.last_diff: Optional[Dict[str, Any]] = None
+        # Частичный отчёт и контрольная точка текущего прогона
+        self._partial: Optional[PartialReport] = None
+        self._checkpoint: Optional[RunCheckpoint] = None
     
     def _load_portfolio_tickers(self) -> List[str]:
         """
@@ -59,10 +127,13 @@ class ReportGenerator:
             logger.warning(f"Failed to load portfolio tickers: {e}")
             return []
     
-    def _get_combined_universe(self) -> List[str]:
+    def _get_combined_universe(self, portfolio_tickers: Optional[List[str]] = None) -> List[str]:
         """
         Получить объединённый список тикеров из config и портфеля.
         
+        Args:
+            portfolio_tickers: Уже загруженные тикеры портфеля (None — загрузить)
+        
         Returns:
             List[str]: Уникальный список тикеров
         """
@@ -70,7 +141,8 @@ class ReportGenerator:
         config_tickers = [ticker.symbol for ticker in self.config.universe]
         
         # Тикеры из портфеля
-        portfolio_tickers = self._load_portfolio_tickers()
+        if portfolio_tickers is None:
+            portfolio_tickers = self._load_portfolio_tickers()
         
         # Объединяем и убираем дубликаты, сохраняя порядок
         seen = set()
@@ -91,105 +163,1024 @@ class ReportGenerator:
         
         return combined
     
-    def _process_symbol(self, symbol: str) -> SymbolData:
+    def _fetch_symbol(self, symbol: str) -> Dict[str, Any]:
         """
-        Обработать один тикер: получить данные и рассчитать метрики.
+        Получить исходные данные по тикеру с MOEX.
+        
+        Свечи проходят векторную проверку: некорректные строки уходят
+        в карантин и не участвуют в расчётах.
         
         Args:
             symbol: Тикер для обработки
             
         Returns:
-            SymbolData: Данные по тикеру (с ошибкой если что-то пошло не так)
+            Dict: {'quote': dict, 'divs': float, 'candles': pd.DataFrame}
+        """
+        telemetry = self._run_telemetry()
+        prefetched = self._prefetched.pop(symbol, None)
+        if prefetched is not None:
+            quote, divs = prefetched
+            telemetry.count('prefetch_hits')
+        else:
+            with telemetry.stage('fetch_quote', symbol):
+                quote = self.client.get_quote(symbol)
+            with telemetry.stage('fetch_dividends', symbol):
+                divs = self.client.get_dividends(symbol)
+        with telemetry.stage('fetch_candles', symbol):
+            candles = self.client.get_candles(symbol, days=CANDLES_HISTORY_DAYS)
+        
+        with telemetry.stage('validate', symbol):
+            validation = validate_candles(candles)
+        if validation.rejected_count:
+            log_rejections(symbol, validation)
+            self._persist('quarantine', symbol, validation.rejected)
+        candles = validation.valid
+        
+        return {
+            'quote': quote,
+            'divs': divs,
+            'candles': candles
+        }
+    
+    def _persist_candles(self, symbol: str, candles: pd.DataFrame) -> Optional[RangeIndex]:
+        """
+        Сохранить свечи тикера и индекс диапазонов в хранилище сырых данных.
+        
+        Ошибка сохранения не прерывает обработку тикера.
+        
+        Args:
+            symbol: Тикер
+            candles: DataFrame со свечами
+            
+        Returns:
+            Optional[RangeIndex]: Построенный индекс (None, если построить не удалось)
+        """
+        try:
+            range_index = RangeIndex.from_candles(candles)
+        except Exception as e:
+            logger.warning(f"Failed to build range index for {symbol}: {e}")
+            return None
+        
+        self._persist('candles', symbol, (candles, range_index))
+        return range_index
+    
+    def _write_candles_batch(self, items: Dict[str, Tuple[pd.DataFrame, RangeIndex]]) -> None:
+        """Записать свечи и индексы диапазонов пакета тикеров."""
+        for symbol, (candles, range_index) in items.items():
+            try:
+                save_candles(symbol, candles, self.config.output.raw_data_dir, index=range_index)
+            except Exception as e:
+                logger.warning(f"Failed to persist candles for {symbol}: {e}")
+    
+    def _write_quarantine_batch(self, items: Dict[str, pd.DataFrame]) -> None:
+        """Дописать отбракованные свечи пакета тикеров в карантин."""
+        for symbol, rejected in items.items():
+            try:
+                save_quarantine(symbol, rejected, self.config.output.raw_data_dir)
+            except Exception as e:
+                logger.warning(f"Failed to save quarantined candles for {symbol}: {e}")
+    
+    def _write_checkpoint_batch(self, items: Dict[str, Dict[str, Any]]) -> None:
+        """Записать результаты завершённых тикеров в контрольную точку прогона."""
+        if self._checkpoint is None:
+            return
+        try:
+            self._checkpoint.record_batch(items)
+        except OSError as e:
+            # Без контрольной точки тикер просто пересчитается при возобновлении
+            logger.warning(f"Failed to checkpoint {len(items)} symbols: {e}")
+    
+    def _persist_writers(self) -> Dict[str, Any]:
+        """Пакетные писатели артефактов по видам."""
+        return {
+            'candles': self._write_candles_batch,
+            'quarantine': self._write_quarantine_batch,
+            'checkpoint': self._write_checkpoint_batch
+        }
+    
+    def _persist(self, kind: str, symbol: str, payload: Any) -> None:
+        """
+        Сохранить артефакт тикера: через очередь отложенной записи, если идёт прогон, иначе сразу.
+        
+        Args:
+            kind: Вид артефакта ('candles', 'quarantine' или 'checkpoint')
+            symbol: Тикер
+            payload: Данные артефакта
+        """
+        if self._abandoned():
+            logger.debug(f"Dropping {kind} of abandoned {symbol}")
+            return
+        if self._persist_queue is not None:
+            self._persist_queue.submit(kind, symbol, payload)
+            return
+        
+        self._persist_writers()[kind]({symbol: payload})
+    
+    def _open_persist_queue(self) -> Optional[WriteBehindQueue]:
+        """Запустить очередь отложенной записи на время прогона (если включена)."""
+        if not self.config.compute.write_behind:
+            return None
+        
+        return WriteBehindQueue(
+            writers=self._persist_writers(),
+            name='report-persist'
+        ).start()
+    
+    def _close_persist_queue(self) -> None:
+        """Дописать всё из очереди и сохранить её статистику."""
+        queue, self._persist_queue = self._persist_queue, None
+        if queue is None:
+            return
+        
+        with self.telemetry.stage('persist_drain'):
+            queue.close()
+        self.persist_stats = queue.stats()
+        self.telemetry.count('persisted', self.persist_stats['written'])
+        logger.info(
+            f"Persisted {self.persist_stats['written']} artifacts in {self.persist_stats['batches']} batches "
+            f"(max depth {self.persist_stats['max_depth']}, avg flush {self.persist_stats['avg_flush_ms']:.1f} ms, "
+            f"failed {self.persist_stats['failed']})"
+        )
+    
+    def _build_symbol_data(self, quote: Dict[str, Any], divs: float, metrics: Dict[str, Any]) -> SymbolData:
+        """
+        Собрать данные по тикеру из котировки и рассчитанных метрик.
+        
+        Args:
+            quote: Котировка (price, lot, board, last_bar_at)
+            divs: Дивиденды TTM
+            metrics: Результат MetricsCalculator.calculate_all_metrics
+            
+        Returns:
+            SymbolData: Данные по тикеру (с отпечатком входных данных)
+        """
+        return SymbolData(
+            price=quote['price'],
+            lot=quote['lot'],
+            div_ttm=divs,
+            dy_pct=metrics['dy_pct'],
+            sma_20=metrics['sma_20'],
+            sma_50=metrics['sma_50'],
+            sma_200=metrics['sma_200'],
+            high_52w=metrics['high_52w'],
+            low_52w=metrics['low_52w'],
+            dist_52w_low_pct=metrics['dist_52w_low_pct'],
+            dist_52w_high_pct=metrics['dist_52w_high_pct'],
+            signals=metrics['signals'],
+            meta=SymbolMeta(
+                board=quote['board'],
+                error=None,
+                updated_at=datetime.now(),
+                fingerprint=symbol_fingerprint(quote, divs, self._config_hash)
+            )
+        )
+    
+    def _failed_symbol_data(self, error: Exception) -> SymbolData:
+        """
+        Сформировать пустые данные по тикеру с ошибкой.
+        
+        Args:
+            error: Исключение, из-за которого тикер не обработан
+            
+        Returns:
+            SymbolData: Пустой объект с ошибкой
+        """
+        return SymbolData(
+            price=None,
+            lot=None,
+            div_ttm=None,
+            dy_pct=None,
+            sma_20=None,
+            sma_50=None,
+            sma_200=None,
+            high_52w=None,
+            low_52w=None,
+            dist_52w_low_pct=None,
+            dist_52w_high_pct=None,
+            signals=[],
+            meta=SymbolMeta(
+                board=None,
+                error=str(error),
+                updated_at=None
+            )
+        )
+    
+    def _stale_symbol_data(self, previous: Optional[Dict[str, Any]], reason: str) -> SymbolData:
+        """
+        Сформировать данные тикера, не обработанного в этом прогоне.
+        
+        Args:
+            previous: Данные тикера из прошлого отчёта (None — нет)
+            reason: Причина, если прошлых данных нет
+            
+        Returns:
+            SymbolData: Прошлые значения (или пустой объект с ошибкой) с пометкой stale
+        """
+        symbol_data = SymbolData(**previous) if previous else self._failed_symbol_data(reason)
+        symbol_data.meta.stale = True
+        return symbol_data
+    
+    def _process_symbol_with_candles(self, symbol: str) -> Tuple[SymbolData, Optional[pd.DataFrame]]:
+        """
+        Обработать один тикер и вернуть загруженные свечи для этапа признаков.
+        
+        Args:
+            symbol: Тикер для обработки
+            
+        Returns:
+            Tuple[SymbolData, Optional[pd.DataFrame]]: Данные по тикеру и свечи (None при ошибке)
         """
         logger.info(f"Processing symbol: {symbol}")
         
         try:
             # Получаем данные с MOEX
-            quote = self.client.get_quote(symbol)
-            divs = self.client.get_dividends(symbol)
-            candles = self.client.get_candles(symbol, days=400)
+            fetched = self._fetch_symbol(symbol)
+            quote = fetched['quote']
+            
+            # Индекс диапазонов строится один раз и сохраняется вместе со свечами
+            range_index = self._persist_candles(symbol, fetched['candles'])
             
             # Рассчитываем метрики
-            metrics = self.calculator.calculate_all_metrics(
-                candles=candles,
-                current_price=quote['price'],
-                div_ttm=divs
-            )
+            with self._run_telemetry().stage('metrics', symbol):
+                metrics = self.calculator.calculate_all_metrics(
+                    candles=fetched['candles'],
+                    current_price=quote['price'],
+                    div_ttm=fetched['divs'],
+                    range_index=range_index
+                )
             
             # Формируем данные по тикеру
-            symbol_data = SymbolData(
-                price=quote['price'],
-                lot=quote['lot'],
-                div_ttm=divs,
-                dy_pct=metrics['dy_pct'],
-                sma_20=metrics['sma_20'],
-                sma_50=metrics['sma_50'],
-                sma_200=metrics['sma_200'],
-                high_52w=metrics['high_52w'],
-                low_52w=metrics['low_52w'],
-                dist_52w_low_pct=metrics['dist_52w_low_pct'],
-                dist_52w_high_pct=metrics['dist_52w_high_pct'],
-                signals=metrics['signals'],
-                meta=SymbolMeta(
-                    board=quote['board'],
-                    error=None,
-                    updated_at=datetime.now()
-                )
-            )
+            symbol_data = self._build_symbol_data(quote, fetched['divs'], metrics)
             
             logger.info(f"Successfully processed {symbol}: price={quote['price']}, signals={len(metrics['signals'])}")
-            return symbol_data
+            return symbol_data, fetched['candles']
             
         except Exception as e:
             logger.error(f"Failed to process {symbol}: {e}")
             
             # Возвращаем пустой объект с ошибкой
-            return SymbolData(
-                price=None,
-                lot=None,
-                div_ttm=None,
-                dy_pct=None,
-                sma_20=None,
-                sma_50=None,
-                sma_200=None,
-                high_52w=None,
-                low_52w=None,
-                dist_52w_low_pct=None,
-                dist_52w_high_pct=None,
-                signals=[],
-                meta=SymbolMeta(
-                    board=None,
-                    error=str(e),
-                    updated_at=None
+            return self._failed_symbol_data(e), None
+    
+    def _process_symbol(self, symbol: str) -> SymbolData:
+        """
+        Обработать один тикер: получить данные и рассчитать метрики.
+        
+        Args:
+            symbol: Тикер для обработки
+            
+        Returns:
+            SymbolData: Данные по тикеру (с ошибкой если что-то пошло не так)
+        """
+        symbol_data, _ = self._process_symbol_with_candles(symbol)
+        return symbol_data
+    
+    def _run_telemetry(self) -> RunTelemetry:
+        """Телеметрия прогона, к которому относится текущий поток."""
+        return getattr(self._local, 'telemetry', None) or self.telemetry
+    
+    def _abandoned(self) -> bool:
+        """От результата текущего потока отказались (тикер не уложился в лимит)."""
+        token = getattr(self._local, 'token', None)
+        return token is not None and token.is_set()
+    
+    def _count_request(self, name: str, value: int = 1) -> None:
+        """Счётчик запросов клиента MOEX: в телеметрию прогона потока, брошенные потоки не считаются."""
+        if not self._abandoned():
+            self._run_telemetry().count(name, value)
+    
+    def _detached(self, target: Callable[[str], Any], symbol: str, token: threading.Event,
+                  telemetry: RunTelemetry, started_at: Optional[Dict[str, float]] = None) -> Any:
+        """
+        Обработать тикер в отдельном потоке, от результата которого можно отказаться.
+        
+        После установки token поток доделывает работу без побочных
+        эффектов: артефакты не сохраняются, запросы не попадают в
+        телеметрию следующего прогона.
+        
+        Args:
+            target: Обработка тикера
+            symbol: Тикер
+            token: Признак отказа от результата
+            telemetry: Телеметрия прогона, запустившего поток
+            started_at: Куда записать время начала работы (для лимита на тикер)
+            
+        Returns:
+            Any: Результат target
+        """
+        self._local.token = token
+        self._local.telemetry = telemetry
+        if started_at is not None:
+            started_at[symbol] = time.monotonic()
+        try:
+            return target(symbol)
+        finally:
+            self._local.token = None
+            self._local.telemetry = None
+    
+    def _process_universe_inline(
+        self,
+        symbols: List[str],
+        feature_stage: FeatureStage,
+        deadline: Deadline
+    ) -> Dict[str, SymbolData]:
+        """
+        Обработать тикеры по очереди в текущем процессе.
+        
+        При заданных бюджете или лимите на тикер каждый тикер выполняется
+        в отдельном потоке с таймаутом: не уложившийся тикер пропускается
+        (его результат и побочные эффекты отбрасываются), и прогон идёт дальше.
+        
+        Args:
+            symbols: Тикеры в порядке обработки
+            feature_stage: Этап признаков, которому передаются загруженные свечи
+            deadline: Бюджет времени прогона
+            
+        Returns:
+            Dict[str, SymbolData]: Данные по обработанным тикерам
+        """
+        symbol_timeout = self.config.compute.symbol_timeout_sec
+        computed = {}
+        executor: Optional[ThreadPoolExecutor] = None
+        
+        try:
+            for symbol in symbols:
+                if deadline.expired:
+                    break
+                
+                timeout = deadline.timeout(symbol_timeout)
+                if timeout is None:
+                    symbol_data, candles = self._process_symbol_with_candles(symbol)
+                else:
+                    if executor is None:
+                        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="symbol")
+                    token = threading.Event()
+                    future = executor.submit(
+                        self._detached, self._process_symbol_with_candles, symbol, token, self.telemetry
+                    )
+                    try:
+                        symbol_data, candles = future.result(timeout=timeout)
+                    except FutureTimeoutError:
+                        logger.warning(f"{symbol} did not finish in {timeout:.1f}s, keeping previous values")
+                        # Поток доработает без побочных эффектов: ни записи свечей, ни телеметрии
+                        token.set()
+                        # Зависший поток не должен задерживать следующие тикеры
+                        executor.shutdown(wait=False)
+                        executor = None
+                        continue
+                
+                computed[symbol] = symbol_data
+                self._complete_symbol(symbol, symbol_data)
+                if candles is not None:
+                    feature_stage.add(symbol, candles)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+        
+        return computed
+    
+    def _process_universe_parallel(
+        self,
+        symbols: List[str],
+        feature_stage: FeatureStage,
+        deadline: Deadline
+    ) -> Dict[str, SymbolData]:
+        """
+        Обработать тикеры: загрузка в потоках, расчёт метрик в пуле процессов.
+        
+        Загрузка следующего тикера идёт параллельно с расчётом метрик
+        по уже загруженным, поэтому CPU-работа не блокирует сеть. Тикер
+        публикуется в частичный отчёт, как только готовы его метрики,
+        пока остальные ещё загружаются. Тикеры, не загруженные или не
+        рассчитанные до исчерпания бюджета или лимита на тикер, пропускаются.
+        
+        Args:
+            symbols: Тикеры в порядке обработки
+            feature_stage: Этап признаков, которому передаются загруженные свечи
+            deadline: Бюджет времени прогона
+            
+        Returns:
+            Dict[str, SymbolData]: Данные по обработанным тикерам
+        """
+        compute = self.config.compute
+        pool = get_metrics_pool(compute.workers)
+        telemetry = self.telemetry
+        
+        by_symbol: Dict[str, SymbolData] = {}
+        fetched: Dict[str, Dict[str, Any]] = {}
+        # Задача -> (этап, тикер): загрузки и расчёты метрик ожидаются вместе,
+        # поэтому тикер публикуется сразу после расчёта, не дожидаясь остальных загрузок
+        pending: Dict[Future, Tuple[str, str]] = {}
+        # Начало загрузки (записывает поток загрузки) или отправки расчёта метрик —
+        # лимит на тикер действует на каждый этап; для метрик время идёт и в телеметрию
+        started_at: Dict[str, float] = {}
+        # Признаки отказа от загрузок, не уложившихся в лимит
+        tokens = {symbol: threading.Event() for symbol in symbols}
+        
+        fetch_executor = ThreadPoolExecutor(max_workers=max(compute.fetch_workers, 1))
+        timed_out = False
+        abandoned = False
+        try:
+            for symbol in symbols:
+                future = fetch_executor.submit(
+                    self._detached, self._fetch_symbol, symbol, tokens[symbol], telemetry, started_at
                 )
+                pending[future] = ('fetch', symbol)
+            
+            while pending:
+                if deadline.cancelled:
+                    timed_out = True
+                    break
+                
+                timeout = self._next_wait(started_at, deadline, compute.symbol_timeout_sec)
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if deadline.expired:
+                    timed_out = True
+                    break
+                
+                for future in done:
+                    stage, symbol = pending.pop(future)
+                    if stage == 'fetch':
+                        started_at.pop(symbol, None)
+                        metrics_future = self._submit_metrics(pool, symbol, future, feature_stage, fetched, by_symbol)
+                        if metrics_future is not None:
+                            pending[metrics_future] = ('metrics', symbol)
+                            started_at[symbol] = time.monotonic()
+                        continue
+                    
+                    data = fetched.pop(symbol)
+                    telemetry.record('metrics', (time.monotonic() - started_at.pop(symbol)) * 1000, symbol)
+                    try:
+                        metrics = future.result()
+                        by_symbol[symbol] = self._build_symbol_data(data['quote'], data['divs'], metrics)
+                        logger.info(f"Successfully processed {symbol}: price={data['quote']['price']}, "
+                                    f"signals={len(metrics['signals'])}")
+                    except Exception as e:
+                        logger.error(f"Failed to process {symbol}: {e}")
+                        by_symbol[symbol] = self._failed_symbol_data(e)
+                    self._complete_symbol(symbol, by_symbol[symbol])
+                
+                for stage, symbol in self._drop_overdue(pending, started_at, compute.symbol_timeout_sec):
+                    if stage == 'fetch':
+                        # Зависшая загрузка доработает без побочных эффектов, ждать её не будем
+                        tokens[symbol].set()
+                        abandoned = True
+                    fetched.pop(symbol, None)
+            
+            if timed_out:
+                not_done = {symbol for stage, symbol in pending.values()}
+                logger.warning(f"Time budget exhausted, {len(not_done)} symbols not processed")
+        finally:
+            # По исчерпании бюджета не ждём оставшиеся загрузки
+            if timed_out:
+                for token in tokens.values():
+                    token.set()
+            fetch_executor.shutdown(wait=not (timed_out or abandoned), cancel_futures=timed_out)
+        
+        return {symbol: by_symbol[symbol] for symbol in symbols if symbol in by_symbol}
+    
+    def _submit_metrics(
+        self,
+        pool: Any,
+        symbol: str,
+        fetch_future: Future,
+        feature_stage: FeatureStage,
+        fetched: Dict[str, Dict[str, Any]],
+        by_symbol: Dict[str, SymbolData]
+    ) -> Optional[Future]:
+        """
+        Принять загруженные данные тикера и отправить расчёт метрик в пул процессов.
+        
+        Args:
+            pool: Пул процессов для метрик
+            symbol: Тикер
+            fetch_future: Завершённая загрузка тикера
+            feature_stage: Этап признаков
+            fetched: Котировки и дивиденды загруженных тикеров (дополняется)
+            by_symbol: Данные по тикерам (дополняется упавшими загрузками)
+            
+        Returns:
+            Optional[Future]: Расчёт метрик или None, если загрузка упала
+        """
+        try:
+            data = fetch_future.result()
+            candles = data.pop('candles')
+            self._persist_candles(symbol, candles)
+            metrics_future = pool.submit(
+                candles,
+                current_price=data['quote']['price'],
+                div_ttm=data['divs']
             )
+            # Свечи уже скопированы в разделяемую память — DataFrame больше не держим
+            feature_stage.add(symbol, candles)
+            del candles
+        except Exception as e:
+            logger.error(f"Failed to fetch {symbol}: {e}")
+            by_symbol[symbol] = self._failed_symbol_data(e)
+            self._complete_symbol(symbol, by_symbol[symbol])
+            return None
+        
+        fetched[symbol] = data
+        return metrics_future
     
-    def generate_report(self, include_portfolio: bool = True) -> AnalysisReport:
+    @staticmethod
+    def _drop_overdue(
+        pending: Dict[Future, Tuple[str, str]],
+        started_at: Dict[str, float],
+        limit_sec: Optional[float]
+    ) -> List[Tuple[str, str]]:
+        """
+        Снять с ожидания тикеры, превысившие лимит на тикер (их значения берутся из прошлого отчёта).
+        
+        Args:
+            pending: Задача -> (этап, тикер) (обновляется)
+            started_at: Тикер -> время начала ограниченного этапа (обновляется)
+            limit_sec: Лимит на тикер (None — без лимита)
+            
+        Returns:
+            List[Tuple[str, str]]: Снятые (этап, тикер)
+        """
+        dropped = []
+        if limit_sec is None:
+            return dropped
+        now = time.monotonic()
+        for future, (stage, symbol) in list(pending.items()):
+            started = started_at.get(symbol)
+            if started is not None and now - started >= limit_sec:
+                logger.warning(f"{stage.capitalize()} for {symbol} did not finish in {limit_sec:.1f}s, "
+                               f"keeping previous values")
+                del pending[future]
+                del started_at[symbol]
+                dropped.append((stage, symbol))
+        return dropped
+    
+    @staticmethod
+    def _next_wait(started_at: Dict[str, float], deadline: Deadline, limit_sec: Optional[float] = None) -> Optional[float]:
+        """
+        Сколько ждать следующего завершения: до конца бюджета или до ближайшего лимита тикера.
+        
+        Args:
+            started_at: Тикер -> время начала ограниченного этапа (time.monotonic)
+            deadline: Бюджет времени прогона
+            limit_sec: Лимит на тикер (None — без лимита)
+            
+        Returns:
+            Optional[float]: Таймаут ожидания (None — без ограничения)
+        """
+        if limit_sec is None or not started_at:
+            return deadline.remaining()
+        # Потоки загрузки дописывают started_at параллельно — берём копию значений
+        nearest = min(list(started_at.values())) + limit_sec - time.monotonic()
+        return deadline.timeout(max(nearest, 0.0))
+    
+    def _retry_round(
+        self,
+        pending: List[str],
+        processed: Dict[str, SymbolData],
+        attempts: Dict[str, int],
+        feature_stage: FeatureStage,
+        deadline: Deadline
+    ) -> List[str]:
+        """
+        Один повторный проход по упавшим тикерам в пуле потоков.
+        
+        Args:
+            pending: Тикеры для повтора
+            processed: Данные по тикерам (обновляются результатами повтора)
+            attempts: Счётчик попыток по тикерам (обновляется)
+            feature_stage: Этап признаков
+            deadline: Бюджет времени прогона
+            
+        Returns:
+            List[str]: Тикеры, снова завершившиеся ошибкой
+        """
+        executor = ThreadPoolExecutor(max_workers=self.config.retry.workers, thread_name_prefix="retry")
+        futures = {executor.submit(self._process_symbol_with_candles, symbol): symbol for symbol in pending}
+        failed = set()
+        timed_out = False
+        try:
+            for future in as_completed(futures, timeout=deadline.remaining()):
+                symbol = futures[future]
+                symbol_data, candles = future.result()
+                attempts[symbol] += 1
+                processed[symbol] = symbol_data
+                if symbol_data.meta.error is not None:
+                    failed.add(symbol)
+                    continue
+                
+                logger.info(f"Recovered {symbol} on attempt {attempts[symbol]}")
+                self._complete_symbol(symbol, symbol_data)
+                if candles is not None:
+                    feature_stage.add(symbol, candles)
+        except FutureTimeoutError:
+            timed_out = True
+            logger.warning("Time budget exhausted during retry pass")
+        finally:
+            executor.shutdown(wait=not timed_out, cancel_futures=timed_out)
+        
+        return [symbol for symbol in pending if symbol in failed]
+    
+    def _retry_failed(
+        self,
+        processed: Dict[str, SymbolData],
+        feature_stage: FeatureStage,
+        deadline: Deadline
+    ) -> Dict[str, int]:
+        """
+        Отложенные повторы тикеров, упавших в основном проходе.
+        
+        Повторы выполняются после основного прохода, поэтому временные
+        сбои не задерживают остальные тикеры. Перед каждым проходом —
+        пауза retry.backoff_sec с удвоением (не больше retry.backoff_max_sec);
+        проходы не выходят за бюджет времени прогона.
+        
+        Args:
+            processed: Данные по обработанным тикерам (обновляются)
+            feature_stage: Этап признаков
+            deadline: Бюджет времени прогона
+            
+        Returns:
+            Dict[str, int]: Число попыток по тикерам
+        """
+        retry = self.config.retry
+        attempts = {symbol: 1 for symbol in processed}
+        pending = [symbol for symbol, data in processed.items() if data.meta.error is not None]
+        initially_failed = len(pending)
+        
+        for round_number in range(1, retry.deferred_attempts + 1):
+            if not pending or deadline.expired:
+                break
+            
+            delay = min(retry.backoff_sec * 2 ** (round_number - 1), retry.backoff_max_sec)
+            remaining = deadline.remaining()
+            if remaining is not None and delay >= remaining:
+                break
+            
+            logger.info(f"Retry pass {round_number}: {len(pending)} failed symbols after {delay:.1f}s backoff")
+            deadline.sleep(delay)
+            if deadline.expired:
+                break
+            pending = self._retry_round(pending, processed, attempts, feature_stage, deadline)
+        
+        if initially_failed:
+            self.retry_stats = {
+                'failed': initially_failed,
+                'recovered': initially_failed - len(pending),
+                'attempts': sum(attempts.values()) - len(attempts)
+            }
+            logger.info(f"Retry passes recovered {self.retry_stats['recovered']} of {initially_failed} failed symbols")
+        return attempts
+    
+    def _attach_features(self, by_symbol: Dict[str, SymbolData], features: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Записать рассчитанные признаки доходности и риска в отчёт.
+        
+        Args:
+            by_symbol: Данные по тикерам (дополняются полем features)
+            features: Признаки по тикерам (результат FeatureStage.finish)
+        """
+        for symbol, values in features.items():
+            if symbol in by_symbol:
+                by_symbol[symbol].features = SymbolFeatures(**values)
+                self._entries.pop(symbol, None)
+    
+    def _write_hot_cache(self, report_dict: Dict[str, Any], generated_at: datetime, version: int) -> None:
+        """
+        Опубликовать бинарную форму отчёта (Arrow + MessagePack) и панель свечей universe.
+        
+        Ошибка записи кэша не прерывает сохранение отчёта — читатели
+        в этом случае используют JSON и Parquet.
+        
+        Args:
+            report_dict: Сериализованный отчёт
+            generated_at: Время генерации отчёта
+            version: Версия снимка analysis.json
+        """
+        try:
+            write_report_binary(report_dict, self.config.output.analysis_file, version)
+            
+            write_hot_candles_panel(
+                report_dict['universe'],
+                base_dir=self.config.output.raw_data_dir,
+                start=generated_at - timedelta(days=CANDLES_HISTORY_DAYS)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to write hot cache: {e}")
+    
+    def _write_diff(
+        self,
+        previous_report: Optional[Dict[str, Any]],
+        report_dict: Dict[str, Any],
+        version: int
+    ) -> Dict[str, Any]:
+        """
+        Сохранить изменения отчёта относительно предыдущего рядом с analysis.json.
+        
+        Ошибка записи не прерывает сохранение отчёта.
+        
+        Args:
+            previous_report: Предыдущий опубликованный отчёт (None — первый отчёт)
+            report_dict: Сериализованный отчёт
+            version: Версия снимка analysis.json
+            
+        Returns:
+            Dict: Изменения (см. diff_reports) с версией снимка
+        """
+        diff = diff_reports(previous_report, report_dict)
+        diff['snapshot_version'] = version
+        
+        try:
+            save_json(diff_path(self.config.output.analysis_file), diff)
+        except StorageError as e:
+            logger.warning(f"Failed to save report diff: {e}")
+        
+        summary = diff['summary']
+        logger.info(
+            f"Changes since previous report: {summary['changed']} symbols changed, "
+            f"+{summary['signals_added']}/-{summary['signals_removed']} signals, "
+            f"{summary['sma200_crosses']} SMA200 crosses, {summary['failing']} failing, "
+            f"{len(diff['added'])} added, {len(diff['removed'])} removed"
+        )
+        return diff
+    
+    def _reuse_unchanged(self, universe: List[str]) -> Dict[str, SymbolData]:
+        """
+        Найти тикеры, входные данные которых не изменились с прошлого отчёта.
+        
+        Для тикеров предыдущего отчёта запрашиваются только котировка
+        и дивиденды (без истории свечей). Совпавший отпечаток — данные
+        тикера берутся из прошлого отчёта; для остальных полученные
+        котировка и дивиденды используются при полном расчёте.
+        
+        Args:
+            universe: Список тикеров
+            
+        Returns:
+            Dict[str, SymbolData]: Переиспользуемые данные по тикерам
+        """
+        previous = load_reusable_entries(self.config.output.analysis_file)
+        candidates = [symbol for symbol in universe if symbol in previous]
+        if not candidates:
+            return {}
+        
+        def probe(symbol: str) -> Tuple[Dict[str, Any], float]:
+            with self.telemetry.stage('fingerprint_probe', symbol):
+                return self.client.get_quote(symbol), self.client.get_dividends(symbol)
+        
+        reused = {}
+        with ThreadPoolExecutor(max_workers=max(self.config.compute.fetch_workers, 1)) as executor:
+            futures = {executor.submit(probe, symbol): symbol for symbol in candidates}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    quote, divs = future.result()
+                except Exception as e:
+                    # Тикер пересчитывается полностью — там ошибка и попадёт в отчёт
+                    logger.debug(f"Fingerprint probe failed for {symbol}: {e}")
+                    continue
+                
+                fingerprint = symbol_fingerprint(quote, divs, self._config_hash)
+                if fingerprint is not None and fingerprint == previous[symbol]['meta']['fingerprint']:
+                    reused[symbol] = SymbolData(**previous[symbol])
+                    reused[symbol].meta.stale = False
+                else:
+                    self._prefetched[symbol] = (quote, divs)
+        
+        return reused
+    
+    def _complete_symbol(self, symbol: str, symbol_data: SymbolData, checkpoint: bool = True) -> None:
+        """
+        Зафиксировать результат тикера: частичный отчёт и контрольная точка прогона.
+        
+        В контрольную точку попадают только успешно рассчитанные тикеры:
+        тикеры с ошибкой или stale при возобновлении обрабатываются заново.
+        
+        Args:
+            symbol: Тикер
+            symbol_data: Данные по тикеру
+            checkpoint: Записать ли тикер в контрольную точку
+        """
+        data = symbol_to_json(symbol_data)
+        self._entries[symbol] = data
+        if self._partial is not None:
+            self._partial.publish(symbol, data)
+        if checkpoint and self._checkpoint is not None and symbol_data.meta.error is None and not symbol_data.meta.stale:
+            self._persist('checkpoint', symbol, data)
+    
+    def _restore_checkpoint(self, feature_stage: FeatureStage) -> Dict[str, SymbolData]:
+        """
+        Восстановить тикеры, завершённые до остановки возобновляемого прогона.
+        
+        Для тикеров без признаков свечи читаются из хранилища сырых данных
+        и передаются этапу признаков; если свечей там нет (не успели
+        записаться), тикер пересчитывается.
+        
+        Args:
+            feature_stage: Этап признаков текущего прогона
+            
+        Returns:
+            Dict[str, SymbolData]: Восстановленные данные по тикерам
+        """
+        history_start = datetime.now() - timedelta(days=CANDLES_HISTORY_DAYS)
+        restored = {}
+        for symbol, data in self._checkpoint.completed().items():
+            symbol_data = SymbolData(**data)
+            if symbol_data.features is None:
+                candles = load_candles(symbol, self.config.output.raw_data_dir, start=history_start)
+                if candles is None or candles.empty:
+                    continue
+                feature_stage.add(symbol, candles)
+            restored[symbol] = symbol_data
+        
+        logger.info(f"Resuming run {self._checkpoint.run_id}: "
+                    f"{len(restored)} of {len(self._checkpoint.universe)} symbols restored from checkpoint")
+        return restored
+    
+    def _compute_universe(
+        self,
+        universe: List[str],
+        incremental: bool,
+        held: List[str],
+        resume: bool = False,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Dict[str, SymbolData]:
+        """
+        Получить данные по всем тикерам прогона.
+        
+        Тикеры обрабатываются в порядке приоритета и в пределах бюджета
+        времени compute.time_budget_sec; не обработанные к его исчерпанию
+        тикеры сохраняют значения прошлого отчёта с пометкой meta.stale.
+        
+        Args:
+            universe: Список тикеров
+            incremental: Переиспользовать тикеры с неизменившимися входными данными
+            held: Тикеры позиций портфеля (обрабатываются первыми)
+            resume: Восстановить завершённые тикеры из контрольной точки прогона
+            cancel_event: Событие отмены: обработка останавливается между тикерами
+            
+        Returns:
+            Dict[str, SymbolData]: Данные по тикерам в порядке universe
+            
+        Raises:
+            ReportCancelled: Если прогон отменён
+        """
+        self._config_hash = config_fingerprint(self.calculator.config, CANDLES_HISTORY_DAYS)
+        self._prefetched = {}
+        # Бюджет времени отсчитывается от начала прогона, включая проверку отпечатков
+        deadline = Deadline(self.config.compute.time_budget_sec, cancel_event)
+        previous = load_previous_entries(self.config.output.analysis_file)
+        
+        # Свечи удерживаются только в компактном виде и в пределах бюджета памяти
+        feature_stage = FeatureStage(self.config.compute.memory_budget_mb)
+        
+        # Запись свечей, карантина и контрольных точек — в фоне, вне пути загрузки и расчёта
+        self._persist_queue = self._open_persist_queue()
+        try:
+            # Тикеры, завершённые до остановки прерванного прогона
+            restored = self._restore_checkpoint(feature_stage) if resume else {}
+            for symbol, symbol_data in restored.items():
+                self._complete_symbol(symbol, symbol_data, checkpoint=False)
+            pending = [symbol for symbol in universe if symbol not in restored]
+            
+            # Тикеры без новых данных берутся из прошлого отчёта
+            reused = self._reuse_unchanged(pending) if incremental else {}
+            for symbol, symbol_data in reused.items():
+                self._complete_symbol(symbol, symbol_data)
+            dirty = [symbol for symbol in pending if symbol not in reused]
+            if incremental:
+                self.incremental_stats = {'reused': len(reused), 'recomputed': len(dirty)}
+                logger.info(f"Incremental run: reusing {len(reused)} unchanged symbols, recomputing {len(dirty)}")
+            
+            # Сначала позиции портфеля, затем тикеры с сигналами, затем по ликвидности
+            ordered = prioritize(dirty, held, previous)
+            
+            # Обрабатываем каждый тикер
+            if not ordered:
+                processed = {}
+            elif self.config.compute.mode == "process":
+                processed = self._process_universe_parallel(ordered, feature_stage, deadline)
+            else:
+                processed = self._process_universe_inline(ordered, feature_stage, deadline)
+            
+            # Упавшие тикеры — в отложенные повторные проходы
+            self.retry_stats = None
+            attempts = self._retry_failed(processed, feature_stage, deadline)
+            if deadline.cancelled:
+                raise ReportCancelled("Report run cancelled")
+        finally:
+            self._close_persist_queue()
+            self._prefetched = {}
+        
+        # Число попыток и итог по тикерам прогона
+        for symbol, symbol_data in processed.items():
+            self._entries.pop(symbol, None)
+            symbol_data.meta.attempts = attempts[symbol]
+            if symbol_data.meta.error is not None:
+                symbol_data.meta.status = "failed"
+            else:
+                symbol_data.meta.status = "ok" if attempts[symbol] == 1 else "recovered"
+        
+        # Признаки доходности и риска — векторный проход по пересчитанным и восстановленным тикерам
+        computed = {**restored, **processed}
+        with self.telemetry.stage('features'):
+            self._attach_features(computed, feature_stage.finish())
+        
+        self.telemetry.count('reused', len(reused))
+        self.telemetry.count('restored', len(restored))
+        # Попадания в кэш: тикеры, взятые из прошлого отчёта или контрольной точки без загрузки
+        self.telemetry.count('cache_hits', len(reused) + len(restored))
+        self.telemetry.count('retry_attempts', sum(attempts.values()) - len(attempts))
+        
+        # Не уложившиеся в бюджет тикеры сохраняют прошлые значения с пометкой stale
+        stale = [symbol for symbol in ordered if symbol not in computed]
+        if stale:
+            logger.warning(f"Time budget exhausted: {len(stale)} symbols keep previous values: {', '.join(stale)}")
+        for symbol in stale:
+            computed[symbol] = self._stale_symbol_data(previous.get(symbol), "Not processed: time budget exhausted")
+            self._complete_symbol(symbol, computed[symbol])
+        
+        return {symbol: reused[symbol] if symbol in reused else computed[symbol] for symbol in universe}
+    
+    def generate_report(
+        self,
+        include_portfolio: bool = True,
+        incremental: bool = False,
+        checkpoint: bool = False,
+        resume: Optional[RunCheckpoint] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> AnalysisReport:
         """
         Сгенерировать полный отчёт по всем тикерам из universe и портфеля.
         
         Args:
             include_portfolio: Включить ли тикеры из портфеля (по умолчанию True)
+            incremental: Пересчитать только тикеры, входные данные которых
+                изменились с прошлого отчёта (последняя свеча, дивиденды,
+                настройки); остальные берутся из analysis.json
+            checkpoint: Записывать завершённые тикеры в контрольную точку прогона
+            resume: Незавершённый прогон для возобновления (его universe,
+                уже завершённые тикеры не пересчитываются)
+            cancel_event: Событие отмены прогона
         
         Returns:
             AnalysisReport: Итоговый отчёт
+            
+        Raises:
+            ReportCancelled: Если прогон отменён (отчёт не публикуется)
+            CheckpointError: Если возобновляемый прогон ведёт другой процесс
         """
         logger.info("Starting report generation")
         start_time = datetime.now()
         
+        # Новая телеметрия на каждый прогон; клиент MOEX считает запросы, байты и повторы
+        self.telemetry = RunTelemetry()
+        self.client.request_hook = self._count_request
+        self._entries = {}
+        
+        # Тикеры позиций портфеля обрабатываются первыми
+        held = self._load_portfolio_tickers()
+        
         # Получаем объединённый список тикеров
-        if include_portfolio:
-            universe = self._get_combined_universe()
+        if resume is not None:
+            universe = resume.universe
+            logger.info(f"Resuming run {resume.run_id} with {len(universe)} symbols")
+        elif include_portfolio:
+            universe = self._get_combined_universe(held)
             logger.info(f"Processing {len(universe)} symbols (config + portfolio): {', '.join(universe)}")
         else:
             universe = [ticker.symbol for ticker in self.config.universe]
             logger.info(f"Processing {len(universe)} symbols (config only): {', '.join(universe)}")
         
-        # Обрабатываем каждый тикер
-        by_symbol = {}
-        for symbol in universe:
-            symbol_data = self._process_symbol(symbol)
-            by_symbol[symbol] = symbol_data
+        # Контрольная точка: завершённые тикеры переживают падение процесса
+        if resume is not None and not resume.acquire():
+            raise CheckpointError(f"Run {resume.run_id} is owned by another process")
+        self._checkpoint = resume
+        if resume is None and checkpoint:
+            try:
+                self._checkpoint = RunCheckpoint.create(
+                    self.config.output.runs_dir,
+                    universe,
+                    options={'include_portfolio': include_portfolio, 'incremental': incremental}
+                )
+            except CheckpointError as e:
+                logger.warning(f"Running without checkpoint: {e}")
+        
+        # Результаты тикеров публикуются по мере готовности (частичный отчёт)
+        self._partial = get_partial_report(self.config.output.analysis_file)
+        self._partial.start(universe)
+        try:
+            by_symbol = self._compute_universe(
+                universe, incremental, held, resume=resume is not None, cancel_event=cancel_event
+            )
+        except Exception as e:
+            self._partial.finish(error=str(e))
+            # Отменённый прогон не возобновляется, упавший — остаётся свободным для возобновления
+            if self._checkpoint is not None:
+                if isinstance(e, ReportCancelled):
+                    self._checkpoint.discard()
+                else:
+                    self._checkpoint.release()
+                self._checkpoint = None
+            raise
         
         # Формируем итоговый отчёт
         report = AnalysisReport(
@@ -203,16 +1194,32 @@ class ReportGenerator:
         
         return report
     
-    def generate_and_save(self, save_daily: bool = True, include_portfolio: bool = True) -> Dict[str, Any]:
+    def generate_and_save(
+        self,
+        save_daily: bool = True,
+        include_portfolio: bool = True,
+        incremental: bool = False,
+        resume: Optional[RunCheckpoint] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
         """
         Сгенерировать отчёт и сохранить его.
         
+        Завершённые тикеры записываются в контрольную точку прогона; после
+        атомарной публикации analysis.json она удаляется.
+        
         Args:
             save_daily: Сохранить ли копию в daily reports
             include_portfolio: Включить ли тикеры из портфеля
+            incremental: Пересчитать только тикеры с изменившимися входными данными
+            resume: Незавершённый прогон для возобновления
+            cancel_event: Событие отмены прогона (проверяется до публикации отчёта)
             
         Returns:
             Dict[str, Any]: Сериализованный отчёт
+            
+        Raises:
+            ReportCancelled: Если прогон отменён
         """
         logger.info("=" * 80)
         logger.info("GENERATING ANALYSIS REPORT")
@@ -221,31 +1228,66 @@ class ReportGenerator:
         logger.info("=" * 80)
         
         # Генерируем отчёт
-        report = self.generate_report(include_portfolio=include_portfolio)
+        report = self.generate_report(
+            include_portfolio=include_portfolio,
+            incremental=incremental,
+            checkpoint=True,
+            resume=resume,
+            cancel_event=cancel_event
+        )
         
-        # Сериализуем в dict (Pydantic model_dump)
-        report_dict = report.model_dump(mode='json')
+        telemetry = self.telemetry
         
-        # Преобразуем datetime в ISO string
-        report_dict['generated_at'] = report.generated_at.isoformat()
+        # Предыдущий опубликованный отчёт — база для изменений (читается до публикации нового)
+        previous_report = load_previous_report(self.config.output.analysis_file)
         
-        # Преобразуем enum сигналов в строки
-        for symbol, data in report_dict['by_symbol'].items():
-            if data['signals']:
-                data['signals'] = [sig if isinstance(sig, str) else sig for sig in data['signals']]
-            if data['meta']['updated_at']:
-                data['meta']['updated_at'] = data['meta']['updated_at']
+        # Сериализуем один раз: тикеры, не менявшиеся после публикации в частичный
+        # отчёт, берутся готовыми; байты JSON общие для analysis.json и daily копии
+        with telemetry.stage('serialize'):
+            report_dict = report_to_json(report, self._entries)
+            payload = encode_json(report_dict)
+        self._entries = {}
         
         # Сохраняем основной отчёт
-        save_analysis_report(report_dict, self.config.output.analysis_file)
+        try:
+            with telemetry.stage('save_snapshot'):
+                version = save_analysis_report(report_dict, self.config.output.analysis_file, payload=payload)
+        except Exception as e:
+            self._partial.finish(error=str(e))
+            if self._checkpoint is not None:
+                self._checkpoint.release()
+                self._checkpoint = None
+            raise
+        # Полный отчёт опубликован — частичный отчёт и контрольная точка больше не нужны
+        self._partial.finish()
+        run_id = None
+        if self._checkpoint is not None:
+            run_id = self._checkpoint.run_id
+            self._checkpoint.finish()
+            self._checkpoint = None
+        with telemetry.stage('hot_cache'):
+            self._write_hot_cache(report_dict, report.generated_at, version)
+        with telemetry.stage('diff'):
+            self.last_diff = self._write_diff(previous_report, report_dict, version)
         
         # Сохраняем копию в daily reports
         if save_daily:
-            save_daily_report(
-                report_dict,
-                date=report.generated_at,
-                reports_dir=self.config.output.reports_dir
-            )
+            with telemetry.stage('daily_report'):
+                save_daily_report(
+                    report_dict,
+                    date=report.generated_at,
+                    reports_dir=self.config.output.reports_dir,
+                    payload=payload
+                )
+            
+            # Метрики дня — в историю для запросов по датам
+            try:
+                with telemetry.stage('history'):
+                    get_history_store(self.config.output.history_db).record_report(
+                        report_dict, report.generated_at.date()
+                    )
+            except Exception as e:
+                logger.warning(f"Failed to record report history: {e}")
         
         # Статистика
         successful = sum(1 for data in report.by_symbol.values() if data.meta.error is None)
@@ -271,8 +1313,51 @@ class ReportGenerator:
         
         logger.info("=" * 80)
         
+        self.last_run = self._record_run(report, run_id, incremental)
+        
         return report_dict
     
+    def _record_run(self, report: AnalysisReport, run_id: Optional[str], incremental: bool) -> Dict[str, Any]:
+        """
+        Записать телеметрию прогона строкой в журнал прогонов.
+        
+        Args:
+            report: Итоговый отчёт
+            run_id: Идентификатор прогона (контрольной точки)
+            incremental: Был ли прогон инкрементальным
+            
+        Returns:
+            Dict: Строка журнала
+        """
+        metas = [data.meta for data in report.by_symbol.values()]
+        row = {
+            'run_id': run_id,
+            'generated_at': report.generated_at.isoformat(),
+            'mode': self.config.compute.mode,
+            'incremental': incremental,
+            'symbols': len(metas),
+            'successful': sum(1 for meta in metas if meta.error is None),
+            'failed': sum(1 for meta in metas if meta.error is not None),
+            'stale': sum(1 for meta in metas if meta.stale),
+            **self.telemetry.summary()
+        }
+        
+        try:
+            append_run(self.config.output.run_ledger, row)
+        except OSError as e:
+            logger.warning(f"Failed to append run ledger: {e}")
+        
+        slowest = sorted(row['stages'].items(), key=lambda item: item[1]['total_ms'], reverse=True)[:3]
+        logger.info(
+            f"Run telemetry: {row['duration_sec']:.1f}s, "
+            f"{row['counters'].get('requests', 0)} requests, "
+            f"{row['counters'].get('bytes_downloaded', 0) / 1024:.0f} KB downloaded, "
+            f"{row['counters'].get('frame_bytes', 0) / 1024:.0f} KB of candle frames, "
+            f"{row['counters'].get('cache_hits', 0)} cache hits; slowest stages: "
+            + ", ".join(f"{name} {stats['total_ms'] / 1000:.1f}s (p90 {stats['p90_ms']:.0f} ms)" for name, stats in slowest)
+        )
+        return row
+    
     def get_summary(self, report: AnalysisReport) -> Dict[str, Any]:
         """
         Получить краткую сводку по отчёту.
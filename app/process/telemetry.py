@@ -0,0 +1,114 @@
+"""Телеметрия прогона отчёта: длительности этапов по тикерам и счётчики."""
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+
+# Сколько самых медленных тикеров сохранять в сводке
+SLOWEST_SYMBOLS = 5
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    """Перцентили длительностей в миллисекундах."""
+    data = np.asarray(values, dtype=float)
+    p50, p90, p99 = np.percentile(data, [50, 90, 99])
+    return {
+        'count': int(data.size),
+        'total_ms': round(float(data.sum()), 1),
+        'p50_ms': round(float(p50), 1),
+        'p90_ms': round(float(p90), 1),
+        'p99_ms': round(float(p99), 1),
+        'max_ms': round(float(data.max()), 1)
+    }
+
+
+class RunTelemetry:
+    """
+    Телеметрия одного прогона.
+
+    Этапы замеряются контекстным менеджером stage (из любых потоков),
+    длительность этапа тикера добавляется и к общему времени тикера.
+    Счётчики (запросы, байты, повторы, попадания в кэш) увеличиваются
+    через count. summary сворачивает замеры в перцентили.
+    """
+
+    def __init__(self):
+        """Инициализация: отсчёт времени прогона начинается сейчас."""
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stages: Dict[str, List[float]] = {}
+        self._symbols: Dict[str, float] = {}
+        self._counters: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str, symbol: Optional[str] = None) -> Iterator[None]:
+        """
+        Замерить этап.
+
+        Args:
+            name: Этап (fetch_candles, metrics, save, ...)
+            symbol: Тикер, если этап относится к тикеру
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000, symbol)
+
+    def record(self, name: str, elapsed_ms: float, symbol: Optional[str] = None) -> None:
+        """
+        Записать длительность этапа.
+
+        Args:
+            name: Этап
+            elapsed_ms: Длительность в миллисекундах
+            symbol: Тикер, если этап относится к тикеру
+        """
+        with self._lock:
+            self._stages.setdefault(name, []).append(elapsed_ms)
+            if symbol is not None:
+                self._symbols[symbol] = self._symbols.get(symbol, 0.0) + elapsed_ms
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Увеличить счётчик.
+
+        Args:
+            name: Счётчик (requests, bytes_downloaded, frame_bytes, retries, cache_hits, ...)
+            value: Прибавка
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + int(value)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Сводка прогона.
+
+        Returns:
+            Dict: started_at, duration_sec, перцентили по этапам (stages) и по
+                времени тикеров (symbol_ms, со списком самых медленных), счётчики
+        """
+        with self._lock:
+            stages = {name: _distribution(values) for name, values in self._stages.items()}
+            symbols = dict(self._symbols)
+            counters = dict(self._counters)
+
+        symbol_summary: Dict[str, Any] = {'count': 0}
+        if symbols:
+            symbol_summary = _distribution(list(symbols.values()))
+            slowest = sorted(symbols.items(), key=lambda item: item[1], reverse=True)[:SLOWEST_SYMBOLS]
+            symbol_summary['slowest'] = [[symbol, round(ms, 1)] for symbol, ms in slowest]
+
+        return {
+            'started_at': self.started_at.isoformat(),
+            'duration_sec': round(time.perf_counter() - self._started, 3),
+            'stages': stages,
+            'symbol_ms': symbol_summary,
+            'counters': counters
+        }
@@ -1,10 +1,12 @@
 """Сервис для генерации рекомендаций."""
 
-import json
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 from loguru import logger
 
+from app.store.report_binary import load_report_binary
+from app.store.snapshot import read_snapshot
+
 from .models import TickerSnapshot, Recommendation
 from .engine import make_reco
 from .config import get_reco_config
@@ -12,7 +14,12 @@ from .config import get_reco_config
 
 def load_analysis_report(path: Optional[str] = None) -> Dict[str, Any]:
     """
-    Загружает отчёт анализа из JSON файла.
+    Загружает отчёт анализа.
+    
+    Отчёт берётся из бинарной формы (Arrow + MessagePack), если она
+    соответствует текущей версии analysis.json, иначе — из JSON снимка.
+    В обоих случаях повторно не разбирается, пока не опубликована
+    новая версия.
     
     Args:
         path: Путь к файлу. По умолчанию data/analysis.json
@@ -30,8 +37,11 @@ def load_analysis_report(path: Optional[str] = None) -> Dict[str, Any]:
         logger.warning(f"Analysis file not found: {path}")
         return {"by_symbol": {}}
     
-    with open(path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    report = load_report_binary(path)
+    if report is not None:
+        return report
+    
+    return read_snapshot(path).data
 
 
 def build_snapshot(symbol: str, data: Dict[str, Any]) -> TickerSnapshot:
@@ -45,9 +55,12 @@ def build_snapshot(symbol: str, data: Dict[str, Any]) -> TickerSnapshot:
     Returns:
         TickerSnapshot: Снимок данных
     """
-    # Вычисляем тренд за 20 дней (если есть SMA20)
-    trend_pct_20d = None
-    if data.get('sma_20') and data.get('price'):
+    features = data.get('features') or {}
+    
+    # Тренд за 20 дней: предрасчитанная доходность из отчёта,
+    # для старых отчётов без признаков — оценка по SMA20
+    trend_pct_20d = features.get('ret_20d_pct')
+    if trend_pct_20d is None and data.get('sma_20') and data.get('price'):
         trend_pct_20d = ((data['price'] - data['sma_20']) / data['sma_20']) * 100.0
     
     return TickerSnapshot(
@@ -60,6 +73,7 @@ def build_snapshot(symbol: str, data: Dict[str, Any]) -> TickerSnapshot:
         trend_pct_20d=trend_pct_20d,
         high_52w=data.get('high_52w'),
         low_52w=data.get('low_52w'),
+        vol_avg_20d=features.get('vol_avg_20d'),
         signals=data.get('signals', [])
     )
 
@@ -1,13 +1,36 @@
 """Планировщик ежедневных задач."""
 
 import sys
+import threading
 from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from loguru import logger
 
 from app.config.loader import get_config
-from app.process.report import ReportGenerator
+from app.process.refresh import (
+    SLICE_CANDLES,
+    SLICE_DIVIDENDS,
+    SLICE_QUOTES,
+    SLICE_REPORT,
+    RefreshService,
+    in_session
+)
+from app.process.report import ReportCancelled, ReportGenerator
+from app.scheduler.jobs import JOB_SUCCEEDED, Job, JobRunner
+from app.store.checkpoint import RunCheckpoint, find_incomplete_run
+from app.store.partial import get_partial_report
+from app.store.retention import run_retention
+
+
+# Вид задачи генерации отчёта: ручные и плановые запуски не выполняются одновременно
+REPORT_JOB_KIND = "report"
+
+# Вид задачи обновления среза: refresh_quotes, refresh_candles, refresh_dividends
+REFRESH_JOB_KIND = "refresh_{slice}"
 
 
 class DailyJobScheduler:
@@ -18,8 +41,18 @@ class DailyJobScheduler:
         self.config = get_config()
         self.scheduler = BackgroundScheduler(timezone=self.config.schedule.tz)
         self.report_generator = ReportGenerator()
+        # Фоновые задачи: генерация отчёта вне потока API, с прогрессом и отменой
+        self.jobs = JobRunner()
+        # Внутридневное обновление срезов: свой клиент MOEX, его запросы не попадают в телеметрию отчёта
+        self.refresh = RefreshService(self.config)
     
-    def run_daily_job(self):
+    def run_daily_job(
+        self,
+        incremental: bool = False,
+        resume: Optional[RunCheckpoint] = None,
+        cancel_event: Optional[threading.Event] = None,
+        raise_errors: bool = False
+    ):
         """
         Выполнить ежедневную задачу генерации отчёта.
         
@@ -28,16 +61,38 @@ class DailyJobScheduler:
         2. Расчёт метрик
         3. Сохранение отчёта в data/analysis.json
         4. Сохранение копии в data/reports/DATE.json
+        
+        Args:
+            incremental: Пересчитать только тикеры с изменившимися входными данными
+            resume: Незавершённый прогон для возобновления
+            cancel_event: Событие отмены прогона
+            raise_errors: Пробросить ошибку прогона вместо результата False
+                (задача в очереди сохраняет её текст в job.error)
+            
+        Returns:
+            bool: True при успехе, False при ошибке (если не raise_errors)
+            
+        Raises:
+            ReportCancelled: Если прогон отменён
         """
         logger.info("=" * 80)
-        logger.info("STARTING DAILY JOB")
+        logger.info("STARTING DAILY JOB" if resume is None else f"RESUMING DAILY JOB {resume.run_id}")
         logger.info("=" * 80)
         
         start_time = datetime.now()
         
         try:
             # Генерируем и сохраняем отчёт
-            report_dict = self.report_generator.generate_and_save(save_daily=True)
+            report_dict = self.report_generator.generate_and_save(
+                save_daily=True,
+                incremental=incremental,
+                resume=resume,
+                cancel_event=cancel_event
+            )
+            
+            # Внутридневная сводка строится поверх нового отчёта
+            if self.config.refresh.enabled:
+                self.refresh.invalidate(SLICE_REPORT)
             
             # Статистика
             successful = sum(
@@ -63,6 +118,10 @@ class DailyJobScheduler:
             
             return True
             
+        except ReportCancelled:
+            elapsed = (datetime.now() - start_time).total_seconds()
+            logger.warning(f"DAILY JOB CANCELLED after {elapsed:.1f}s")
+            raise
         except Exception as e:
             elapsed = (datetime.now() - start_time).total_seconds()
             
@@ -73,8 +132,151 @@ class DailyJobScheduler:
             logger.error("=" * 80)
             logger.exception("Full traceback:")
             
+            if raise_errors:
+                raise
             return False
     
+    def submit_report_job(
+        self,
+        incremental: bool = False,
+        resume: Optional[RunCheckpoint] = None
+    ) -> Tuple[Job, bool]:
+        """
+        Запустить генерацию отчёта в фоновом потоке.
+        
+        Если отчёт уже генерируется, новая задача не создаётся —
+        возвращается выполняющаяся.
+        
+        Args:
+            incremental: Пересчитать только тикеры с изменившимися входными данными
+            resume: Незавершённый прогон для возобновления
+            
+        Returns:
+            Tuple[Job, bool]: Задача и признак, что запуск присоединён к уже активной
+        """
+        params = {'incremental': incremental}
+        if resume is not None:
+            params['resume'] = resume.run_id
+        
+        def target(cancel_event: threading.Event) -> bool:
+            return self.run_daily_job(
+                incremental=incremental, resume=resume, cancel_event=cancel_event, raise_errors=True
+            )
+        
+        # Частичный отчёт удаляется при успешном завершении — итоговый прогресс берётся отдельно
+        partial = get_partial_report(self.config.output.analysis_file)
+        return self.jobs.submit(
+            REPORT_JOB_KIND,
+            target,
+            params=params,
+            progress=partial.progress,
+            final_progress=partial.final_progress
+        )
+    
+    def run_scheduled_job(self):
+        """
+        Плановая генерация отчёта: через очередь задач, с ожиданием завершения.
+        
+        Returns:
+            Optional[bool]: Результат задачи (None — задача отменена или упала)
+        """
+        job, joined = self.submit_report_job()
+        if joined:
+            logger.info(f"Report job {job.id} is already running, scheduled run joins it")
+        job.wait()
+        return job.result
+    
+    def run_refresh_job(self, slice_name: str, session_only: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Обновить срез данных через очередь задач, с ожиданием завершения.
+        
+        Args:
+            slice_name: Срез (quotes, candles, dividends)
+            session_only: Пропустить запуск вне торговой сессии
+            
+        Returns:
+            Optional[Dict]: Итог обновления (None — пропущено, отменено или упало)
+        """
+        now = datetime.now(ZoneInfo(self.config.schedule.tz))
+        if session_only and not in_session(self.config.refresh, now):
+            logger.debug(f"Skipping {slice_name} refresh outside trading session")
+            return None
+        
+        refreshers = {
+            SLICE_QUOTES: self.refresh.refresh_quotes,
+            SLICE_CANDLES: self.refresh.refresh_candles,
+            SLICE_DIVIDENDS: self.refresh.refresh_dividends
+        }
+        refresher = refreshers[slice_name]
+        
+        job, joined = self.jobs.submit(
+            REFRESH_JOB_KIND.format(slice=slice_name),
+            lambda cancel_event: refresher(),
+            params={'slice': slice_name}
+        )
+        if joined:
+            logger.info(f"Refresh job {job.id} is already running, scheduled run joins it")
+        job.wait()
+        return job.result
+    
+    def _schedule_refresh_jobs(self):
+        """Добавить задачи обновления котировок, свечей и дивидендов."""
+        refresh = self.config.refresh
+        tz = self.config.schedule.tz
+        
+        # Котировки и свечи — с интервалом, но только в торговую сессию
+        for slice_name, interval in (
+            (SLICE_QUOTES, refresh.quotes_interval_min),
+            (SLICE_CANDLES, refresh.candles_interval_min)
+        ):
+            self.scheduler.add_job(
+                self.run_refresh_job,
+                trigger=IntervalTrigger(minutes=interval, timezone=tz),
+                kwargs={'slice_name': slice_name, 'session_only': True},
+                id=f'{slice_name}_refresh_job',
+                name=f'Intraday {slice_name.capitalize()} Refresh',
+                replace_existing=True
+            )
+            logger.info(f"Scheduled {slice_name} refresh every {interval} min during session")
+        
+        dividends_hour, dividends_minute = (int(part) for part in refresh.dividends_time.split(':'))
+        self.scheduler.add_job(
+            self.run_refresh_job,
+            trigger=CronTrigger(
+                day_of_week=refresh.dividends_day,
+                hour=dividends_hour,
+                minute=dividends_minute,
+                timezone=tz
+            ),
+            kwargs={'slice_name': SLICE_DIVIDENDS},
+            id='dividends_refresh_job',
+            name='Weekly Dividends Refresh',
+            replace_existing=True
+        )
+        logger.info(
+            f"Scheduled dividends refresh on {refresh.dividends_day} "
+            f"at {dividends_hour:02d}:{dividends_minute:02d}"
+        )
+    
+    def run_retention_job(self):
+        """
+        Выполнить прогон хранения: повторы отчётов, месячные архивы, архив свечей.
+        
+        Returns:
+            Optional[Dict]: Итог прогона (в том числе bytes_reclaimed) или None при ошибке
+        """
+        logger.info("STARTING RETENTION JOB")
+        
+        try:
+            result = run_retention(self.config)
+        except Exception as e:
+            logger.error(f"RETENTION JOB FAILED: {e}")
+            logger.exception("Full traceback:")
+            return None
+        
+        logger.info(f"RETENTION JOB COMPLETED: {result.bytes_reclaimed / 1024:.0f} KB reclaimed")
+        return result.to_dict()
+    
     def start(self, run_immediately: bool = False):
         """
         Запустить планировщик.
@@ -96,7 +298,7 @@ class DailyJobScheduler:
         
         # Добавляем задачу в планировщик
         self.scheduler.add_job(
-            self.run_daily_job,
+            self.run_scheduled_job,
             trigger=trigger,
             id='daily_report_job',
             name='Daily Stock Analysis Report',
@@ -105,20 +307,50 @@ class DailyJobScheduler:
         
         logger.info(f"Scheduled daily job at {hour:02d}:{minute:02d} {self.config.schedule.tz}")
         
+        # Прогон хранения — отдельно от отчёта, в своё время
+        if self.config.retention.enabled:
+            retention_hour, retention_minute = (int(part) for part in self.config.retention.time.split(':'))
+            self.scheduler.add_job(
+                self.run_retention_job,
+                trigger=CronTrigger(hour=retention_hour, minute=retention_minute, timezone=self.config.schedule.tz),
+                id='retention_job',
+                name='Reports and Candles Retention',
+                replace_existing=True
+            )
+            logger.info(f"Scheduled retention job at {retention_hour:02d}:{retention_minute:02d}")
+        
+        # Внутридневные срезы — отдельными задачами со своей частотой
+        if self.config.refresh.enabled:
+            self._schedule_refresh_jobs()
+        
         # Запускаем планировщик
         self.scheduler.start()
         logger.info("Scheduler started")
         
+        # Прерванный сегодняшний прогон дозавершается вместо нового
+        checkpoint = find_incomplete_run(self.config.output.runs_dir)
+        if checkpoint is not None and not run_immediately:
+            logger.info(f"Found incomplete run {checkpoint.run_id}, resuming in background")
+            self.scheduler.add_job(
+                self.resume_incomplete_run,
+                kwargs={'checkpoint': checkpoint},
+                id='resume_report_job',
+                name='Resume Interrupted Report',
+                replace_existing=True
+            )
+        
         # Выполняем задачу сразу, если требуется
         if run_immediately:
             logger.info("Running job immediately as requested")
-            self.run_daily_job()
+            if checkpoint is not None:
+                self.resume_incomplete_run(checkpoint)
+            else:
+                self.run_scheduled_job()
         else:
             # Показываем когда будет следующий запуск
-            jobs = self.scheduler.get_jobs()
-            if jobs:
-                next_run = jobs[0].next_run_time
-                logger.info(f"Next scheduled run: {next_run}")
+            job = self.scheduler.get_job('daily_report_job')
+            if job:
+                logger.info(f"Next scheduled run: {job.next_run_time}")
     
     def stop(self):
         """Остановить планировщик."""
@@ -126,10 +358,43 @@ class DailyJobScheduler:
             self.scheduler.shutdown()
             logger.info("Scheduler stopped")
     
-    def run_once(self):
-        """Выполнить задачу один раз без планировщика."""
+    def resume_incomplete_run(self, checkpoint: Optional[RunCheckpoint] = None) -> Optional[bool]:
+        """
+        Дозавершить прерванный прогон: пересчитываются только оставшиеся тикеры.
+        
+        Args:
+            checkpoint: Прогон для возобновления (None — найти незавершённый прогон сегодняшнего дня)
+            
+        Returns:
+            Optional[bool]: Результат задачи (False — упала или отменена) или None,
+                если возобновлять нечего
+        """
+        if checkpoint is None:
+            checkpoint = find_incomplete_run(self.config.output.runs_dir)
+        if checkpoint is None:
+            return None
+        
+        job, joined = self.submit_report_job(incremental=checkpoint.options.get('incremental', False), resume=checkpoint)
+        if joined:
+            # Прогон не возобновлён — отпускаем его для следующей попытки
+            checkpoint.release()
+        job.wait()
+        return job.result if job.status == JOB_SUCCEEDED else False
+    
+    def run_once(self, incremental: bool = False):
+        """
+        Выполнить задачу один раз без планировщика.
+        
+        Args:
+            incremental: Пересчитать только тикеры с изменившимися входными данными
+            
+        Returns:
+            bool: Результат задачи (False — упала или отменена, причина в job.error)
+        """
         logger.info("Running job once (manual trigger)")
-        return self.run_daily_job()
+        job, _ = self.submit_report_job(incremental=incremental)
+        job.wait()
+        return job.result if job.status == JOB_SUCCEEDED else False
     
     def get_job_info(self):
         """
@@ -0,0 +1,239 @@
+"""Фоновое выполнение задач с идентификаторами, прогрессом и отменой."""
+
+import secrets
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+# Состояния задачи
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+# Сколько завершённых задач хранить для запросов статуса
+KEEP_FINISHED_JOBS = 50
+
+
+class Job:
+    """Задача, выполняемая в фоновом потоке."""
+
+    def __init__(
+        self,
+        kind: str,
+        params: Optional[Dict[str, Any]] = None,
+        progress: Optional[Callable[[], Optional[Dict[str, Any]]]] = None,
+        final_progress: Optional[Callable[[], Optional[Dict[str, Any]]]] = None
+    ):
+        """
+        Инициализация.
+
+        Args:
+            kind: Вид задачи (задачи одного вида не выполняются одновременно)
+            params: Параметры запуска (для отображения)
+            progress: Источник прогресса выполняющейся задачи
+            final_progress: Источник итогового прогресса после завершения задачи
+                (по умолчанию — последнее значение progress)
+        """
+        self.id = f"{kind}-{datetime.now().strftime('%Y%m%dT%H%M%S')}-{secrets.token_hex(3)}"
+        self.kind = kind
+        self.params = dict(params or {})
+        self.status = JOB_QUEUED
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.result: Any = None
+        self.cancel_event = threading.Event()
+        self._progress = progress
+        self._final_source = final_progress
+        self._final_progress: Optional[Dict[str, Any]] = None
+        self._done = threading.Event()
+
+    @property
+    def active(self) -> bool:
+        """Задача ещё не завершена."""
+        return self.status in ACTIVE_STATES
+
+    def progress(self) -> Optional[Dict[str, Any]]:
+        """Прогресс: текущий для выполняющейся задачи, последний известный — для завершённой."""
+        if self.status == JOB_RUNNING and self._progress is not None:
+            try:
+                return self._progress()
+            except Exception as e:
+                logger.debug(f"Failed to get progress of job {self.id}: {e}")
+                return None
+        return self._final_progress
+
+    def _capture_final_progress(self) -> None:
+        """Запомнить итоговый прогресс (вызывается, пока задача ещё в состоянии running)."""
+        if self._final_source is not None:
+            try:
+                self._final_progress = self._final_source()
+                return
+            except Exception as e:
+                logger.debug(f"Failed to get final progress of job {self.id}: {e}")
+        self._final_progress = self.progress()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Дождаться завершения задачи.
+
+        Args:
+            timeout: Таймаут в секундах (None — без ограничения)
+
+        Returns:
+            bool: Задача завершилась
+        """
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Состояние задачи для API."""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'params': self.params,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'cancel_requested': self.cancel_event.is_set(),
+            'progress': self.progress(),
+            'error': self.error
+        }
+
+
+class JobRunner:
+    """
+    Выполнение задач вне потока вызывающего (например, цикла событий API).
+
+    Задача получает идентификатор сразу, а выполняется в отдельном потоке.
+    Пока задача вида kind активна, новые запуски того же вида не создают
+    задачу, а возвращают уже выполняющуюся. Отмена кооперативная: задача
+    получает threading.Event и сама проверяет его между шагами.
+    """
+
+    def __init__(self, keep_finished: int = KEEP_FINISHED_JOBS):
+        """
+        Инициализация.
+
+        Args:
+            keep_finished: Сколько завершённых задач хранить
+        """
+        self.keep_finished = keep_finished
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        kind: str,
+        target: Callable[[threading.Event], Any],
+        params: Optional[Dict[str, Any]] = None,
+        progress: Optional[Callable[[], Optional[Dict[str, Any]]]] = None,
+        final_progress: Optional[Callable[[], Optional[Dict[str, Any]]]] = None
+    ) -> Tuple[Job, bool]:
+        """
+        Запустить задачу или присоединиться к активной задаче того же вида.
+
+        Args:
+            kind: Вид задачи
+            target: Функция задачи, принимает событие отмены; результат False
+                считается неуспехом, причина — в исключении задачи
+            params: Параметры запуска
+            progress: Источник прогресса
+            final_progress: Источник итогового прогресса (см. Job)
+
+        Returns:
+            Tuple[Job, bool]: Задача и признак, что запуск присоединён к уже активной
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.kind == kind and job.active:
+                    logger.info(f"Job {job.id} is already {job.status}, joining it")
+                    return job, True
+
+            job = Job(kind, params, progress, final_progress)
+            self._jobs[job.id] = job
+            self._prune()
+
+        thread = threading.Thread(target=self._run, args=(job, target), name=f"job-{kind}", daemon=True)
+        thread.start()
+        logger.info(f"Started job {job.id}")
+        return job, False
+
+    def _run(self, job: Job, target: Callable[[threading.Event], Any]) -> None:
+        """Выполнить задачу в фоновом потоке."""
+        try:
+            if job.cancel_event.is_set():
+                job.status = JOB_CANCELLED
+                return
+
+            job.started_at = datetime.now()
+            job.status = JOB_RUNNING
+            try:
+                job.result = target(job.cancel_event)
+            except Exception as e:
+                job._capture_final_progress()
+                job.error = str(e)
+                job.status = JOB_CANCELLED if job.cancel_event.is_set() else JOB_FAILED
+                if job.status == JOB_FAILED:
+                    logger.error(f"Job {job.id} failed: {e}")
+                return
+
+            job._capture_final_progress()
+            if job.result is False:
+                job.error = "Job failed, check logs"
+                job.status = JOB_FAILED
+            else:
+                job.status = JOB_SUCCEEDED
+        finally:
+            job.finished_at = datetime.now()
+            job._done.set()
+            logger.info(f"Job {job.id} {job.status}")
+
+    def _prune(self) -> None:
+        """Удалить самые старые завершённые задачи сверх keep_finished (под блокировкой)."""
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Задача по идентификатору (None — нет такой задачи)."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        """Задачи от новых к старым."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def active(self, kind: str) -> Optional[Job]:
+        """Активная задача вида kind."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.kind == kind and job.active:
+                    return job
+        return None
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Запросить отмену задачи.
+
+        Args:
+            job_id: Идентификатор задачи
+
+        Returns:
+            Optional[Job]: Задача (None — нет такой задачи)
+        """
+        job = self.get(job_id)
+        if job is not None and job.active:
+            logger.info(f"Cancellation requested for job {job.id}")
+            job.cancel_event.set()
+        return job
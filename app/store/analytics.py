@@ -0,0 +1,306 @@
+"""Встроенная SQL-аналитика (DuckDB) по хранилищам свечей, истории отчётов и портфеля."""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+import orjson
+import pandas as pd
+import pyarrow as pa
+from loguru import logger
+
+from app.config.loader import get_config
+from app.store.history import HISTORY_COLUMNS
+from app.store.hot_cache import hot_report_path, read_hot_table
+
+
+# Колонки таблицы portfolio
+PORTFOLIO_COLUMNS = ('symbol', 'quantity', 'avg_price', 'market', 'type', 'name')
+
+# Представление свечей: символ берётся из пути {SYMBOL}/{YYYY}/{MM}/part-*.parquet,
+# из повторов свечи остаётся запись из самого позднего файла
+_CANDLES_VIEW = """
+CREATE VIEW candles AS
+SELECT * EXCLUDE (filename) FROM (
+    SELECT
+        regexp_extract(filename, '([^/\\\\]+)[/\\\\][0-9]{{4}}[/\\\\][0-9]{{2}}[/\\\\]part-[^/\\\\]+$', 1) AS symbol,
+        *
+    FROM read_parquet('{pattern}', filename = true, union_by_name = true)
+    QUALIFY row_number() OVER (PARTITION BY symbol, "begin" ORDER BY filename DESC) = 1
+)
+"""
+
+_EMPTY_CANDLES_VIEW = """
+CREATE VIEW candles AS
+SELECT
+    NULL::VARCHAR AS symbol, NULL::TIMESTAMP AS "begin", NULL::TIMESTAMP AS "end",
+    NULL::DOUBLE AS open, NULL::DOUBLE AS high, NULL::DOUBLE AS low,
+    NULL::DOUBLE AS close, NULL::BIGINT AS volume
+LIMIT 0
+"""
+
+
+class AnalyticsError(Exception):
+    """Ошибка выполнения аналитического запроса."""
+    pass
+
+
+def _import_duckdb():
+    """Импортировать duckdb (необязательная зависимость)."""
+    try:
+        import duckdb
+    except ImportError:
+        raise AnalyticsError("Библиотека duckdb не установлена. Установите: pip install duckdb")
+    return duckdb
+
+
+class SqlResult:
+    """
+    Результат запроса, выдаваемый пачками строк.
+
+    Соединение закрывается после выдачи последней пачки (или при close()).
+    """
+
+    def __init__(self, conn, reader: pa.RecordBatchReader, limit: int, timer: threading.Timer, timeout_sec: float):
+        self._conn = conn
+        self._reader = reader
+        self._limit = limit
+        self._timer = timer
+        self._timeout_sec = timeout_sec
+        self.columns: List[str] = reader.schema.names
+        self.rows = 0
+        self.truncated = False
+
+    def batches(self) -> Iterator[pa.RecordBatch]:
+        """
+        Пачки строк результата (не более limit строк суммарно).
+
+        Raises:
+            AnalyticsError: Если запрос прерван по таймауту или упал
+        """
+        duckdb = _import_duckdb()
+        try:
+            for batch in self._reader:
+                remaining = self._limit - self.rows
+                if batch.num_rows > remaining:
+                    batch = batch.slice(0, remaining)
+                    self.truncated = True
+                if batch.num_rows:
+                    self.rows += batch.num_rows
+                    yield batch
+                if self.truncated:
+                    break
+        except duckdb.InterruptException:
+            raise AnalyticsError(f"Query timed out after {self._timeout_sec:g}s")
+        except duckdb.Error as e:
+            raise AnalyticsError(str(e))
+        finally:
+            self.close()
+
+    def to_frame(self) -> pd.DataFrame:
+        """Собрать весь результат в DataFrame."""
+        batches = list(self.batches())
+        if not batches:
+            return pd.DataFrame(columns=self.columns)
+        return pa.Table.from_batches(batches).to_pandas()
+
+    def close(self) -> None:
+        """Остановить таймер и закрыть соединение."""
+        self._timer.cancel()
+        self._conn.close()
+
+
+class AnalyticsEngine:
+    """
+    Встроенный SQL-движок только для чтения поверх файлов хранилища.
+
+    Таблицы:
+        - candles: свечи из партиционированного Parquet (symbol, begin, OHLCV, ...)
+        - report_history: история метрик ежедневных отчётов
+        - report: последний отчёт (строка на тикер), если есть горячий кэш
+        - portfolio: позиции портфеля
+
+    Каждый запрос выполняется в отдельном соединении в памяти. Доступ
+    к файловой системе ограничен директорией свечей, конфигурация
+    блокируется, разрешён только один SELECT.
+    """
+
+    def __init__(
+        self,
+        raw_data_dir: str | Path = "data/raw",
+        history_db: str | Path = "data/history.sqlite",
+        analysis_file: str | Path = "data/analysis.json",
+        portfolio_file: str | Path = "data/portfolio.json",
+        max_rows: int = 10000,
+        timeout_sec: float = 10.0,
+        batch_rows: int = 1000
+    ):
+        """
+        Инициализация движка.
+
+        Args:
+            raw_data_dir: Директория хранилища свечей
+            history_db: База истории метрик
+            analysis_file: Файл последнего отчёта (таблица берётся из горячего кэша рядом)
+            portfolio_file: Файл портфеля
+            max_rows: Максимум строк в результате
+            timeout_sec: Таймаут запроса
+            batch_rows: Размер пачки строк
+        """
+        self.raw_data_dir = Path(raw_data_dir)
+        self.history_db = Path(history_db)
+        self.analysis_file = Path(analysis_file)
+        self.portfolio_file = Path(portfolio_file)
+        self.max_rows = max_rows
+        self.timeout_sec = timeout_sec
+        self.batch_rows = batch_rows
+
+    @classmethod
+    def from_config(cls, config, portfolio_file: str | Path = "data/portfolio.json") -> 'AnalyticsEngine':
+        """
+        Создать движок по конфигурации приложения.
+
+        Args:
+            config: AppConfig
+            portfolio_file: Файл портфеля
+
+        Returns:
+            AnalyticsEngine: Движок
+        """
+        return cls(
+            raw_data_dir=config.output.raw_data_dir,
+            history_db=config.output.history_db,
+            analysis_file=config.output.analysis_file,
+            portfolio_file=portfolio_file,
+            max_rows=config.analytics.max_rows,
+            timeout_sec=config.analytics.timeout_sec,
+            batch_rows=config.analytics.batch_rows
+        )
+
+    def _history_frame(self) -> pd.DataFrame:
+        if not self.history_db.exists():
+            return pd.DataFrame(columns=list(HISTORY_COLUMNS))
+
+        with sqlite3.connect(f"file:{self.history_db.as_posix()}?mode=ro", uri=True) as conn:
+            return pd.read_sql_query("SELECT * FROM symbol_metrics", conn)
+
+    def _portfolio_frame(self) -> pd.DataFrame:
+        if not self.portfolio_file.exists():
+            return pd.DataFrame(columns=list(PORTFOLIO_COLUMNS))
+
+        positions = orjson.loads(self.portfolio_file.read_bytes()).get('positions', [])
+        rows = [
+            {
+                'symbol': p.get('symbol'),
+                'quantity': p.get('quantity') if p.get('quantity') is not None else p.get('qty'),
+                'avg_price': p.get('avg_price'),
+                'market': p.get('market', 'moex'),
+                'type': p.get('type', 'stock'),
+                'name': p.get('name')
+            }
+            for p in positions
+        ]
+        return pd.DataFrame(rows, columns=list(PORTFOLIO_COLUMNS))
+
+    def _connect(self):
+        """Открыть соединение с зарегистрированными таблицами и заблокированной конфигурацией."""
+        duckdb = _import_duckdb()
+        conn = duckdb.connect(":memory:")
+
+        try:
+            raw_dir = self.raw_data_dir.resolve()
+            raw_path = raw_dir.as_posix().replace("'", "''")
+            if any(raw_dir.glob("*/[0-9][0-9][0-9][0-9]/[0-9][0-9]/part-*.parquet")):
+                conn.execute(_CANDLES_VIEW.format(pattern=f"{raw_path}/*/*/*/part-*.parquet"))
+            else:
+                conn.execute(_EMPTY_CANDLES_VIEW)
+
+            conn.register('report_history', self._history_frame())
+            conn.register('portfolio', self._portfolio_frame())
+
+            report = read_hot_table(hot_report_path(self.analysis_file))
+            if report is not None:
+                conn.register('report', report)
+
+            # Только чтение: файлы — лишь из хранилища свечей, настройки не меняются
+            conn.execute(f"SET allowed_directories = ['{raw_path}']")
+            conn.execute("SET enable_external_access = false")
+            conn.execute("SET lock_configuration = true")
+        except Exception:
+            conn.close()
+            raise
+
+        return conn
+
+    def execute(self, sql: str, limit: Optional[int] = None) -> SqlResult:
+        """
+        Выполнить запрос только для чтения.
+
+        Args:
+            sql: Один оператор SELECT (можно с WITH)
+            limit: Максимум строк (не больше max_rows)
+
+        Returns:
+            SqlResult: Результат для потокового чтения
+
+        Raises:
+            AnalyticsError: Если запрос не SELECT, некорректен или упал
+        """
+        duckdb = _import_duckdb()
+        limit = min(limit or self.max_rows, self.max_rows)
+
+        try:
+            conn = self._connect()
+        except duckdb.Error as e:
+            raise AnalyticsError(f"Failed to open analytics session: {e}")
+
+        try:
+            statements = conn.extract_statements(sql)
+            if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+                raise AnalyticsError("Only a single read-only SELECT statement is allowed")
+
+            timer = threading.Timer(self.timeout_sec, conn.interrupt)
+            timer.daemon = True
+            timer.start()
+
+            # +1 строка, чтобы отличить ровно limit строк от обрезанного результата
+            query = statements[0].query.strip().rstrip(";")
+            wrapped = f"SELECT * FROM ({query}) AS q LIMIT {limit + 1}"
+            relation = conn.execute(wrapped)
+            # to_arrow_reader появился в DuckDB 1.4, раньше — fetch_record_batch
+            to_reader = getattr(relation, 'to_arrow_reader', None) or relation.fetch_record_batch
+            reader = to_reader(self.batch_rows)
+        except AnalyticsError:
+            conn.close()
+            raise
+        except duckdb.InterruptException:
+            conn.close()
+            raise AnalyticsError(f"Query timed out after {self.timeout_sec:g}s")
+        except duckdb.Error as e:
+            conn.close()
+            raise AnalyticsError(str(e))
+
+        logger.debug(f"Running analytics query (limit={limit}): {sql[:200]}")
+        return SqlResult(conn, reader, limit, timer, self.timeout_sec)
+
+
+def run_sql(sql: str, limit: Optional[int] = None, config: Any = None) -> pd.DataFrame:
+    """
+    Выполнить аналитический запрос и вернуть результат целиком.
+
+    Args:
+        sql: Запрос SELECT по таблицам candles, report_history, report, portfolio
+        limit: Максимум строк
+        config: Конфигурация (по умолчанию get_config())
+
+    Returns:
+        pd.DataFrame: Результат
+
+    Raises:
+        AnalyticsError: Если запрос некорректен или не выполнился
+    """
+    if config is None:
+        config = get_config()
+
+    return AnalyticsEngine.from_config(config).execute(sql, limit=limit).to_frame()
@@ -0,0 +1,234 @@
+"""Контрольные точки прогона отчёта: возобновление после падения процесса."""
+
+import secrets
+import shutil
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import orjson
+from loguru import logger
+
+from app.store.locks import FileLock
+from app.store.snapshot import write_atomic
+
+
+# Файл описания прогона и директория результатов тикеров внутри run-директории
+MANIFEST_NAME = "run.json"
+SYMBOLS_DIR_NAME = "symbols"
+
+# Блокировка владельца прогона: пока она занята, прогон идёт в живом процессе
+LOCK_NAME = "run.lock"
+
+
+class CheckpointError(Exception):
+    """Ошибка чтения или записи контрольной точки."""
+    pass
+
+
+class RunCheckpoint:
+    """
+    Контрольная точка прогона в директории runs_dir/<run_id>.
+
+    run.json описывает прогон (universe и параметры запуска), каждый
+    завершённый тикер записывается отдельным файлом symbols/<SYMBOL>.json
+    (атомарно, поэтому недописанных результатов не бывает). Свечи тикера
+    к этому моменту уже в хранилище сырых данных. После публикации
+    отчёта директория прогона удаляется; оставшаяся директория означает
+    незавершённый прогон.
+
+    Процесс, ведущий прогон, держит блокировку run.lock (её снимает и
+    операционная система при падении процесса), поэтому прогон, идущий
+    в другом процессе, не возобновляется и не удаляется.
+    """
+
+    def __init__(self, run_dir: str | Path, manifest: Dict[str, Any]):
+        """
+        Инициализация.
+
+        Args:
+            run_dir: Директория прогона
+            manifest: Содержимое run.json
+        """
+        self.run_dir = Path(run_dir)
+        self.manifest = manifest
+        self._lock = FileLock(self.run_dir / LOCK_NAME)
+
+    @property
+    def run_id(self) -> str:
+        return self.manifest['run_id']
+
+    @property
+    def universe(self) -> List[str]:
+        return list(self.manifest['universe'])
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        return dict(self.manifest.get('options') or {})
+
+    @property
+    def symbols_dir(self) -> Path:
+        return self.run_dir / SYMBOLS_DIR_NAME
+
+    @classmethod
+    def create(
+        cls,
+        runs_dir: str | Path,
+        universe: List[str],
+        options: Optional[Dict[str, Any]] = None
+    ) -> 'RunCheckpoint':
+        """
+        Начать новый прогон.
+
+        Args:
+            runs_dir: Директория прогонов
+            universe: Тикеры прогона
+            options: Параметры запуска (для возобновления с теми же параметрами)
+
+        Returns:
+            RunCheckpoint: Контрольная точка
+
+        Raises:
+            CheckpointError: Если директорию прогона не удалось создать
+        """
+        started_at = datetime.now()
+        run_id = f"{started_at.strftime('%Y%m%dT%H%M%S')}-{secrets.token_hex(3)}"
+        manifest = {
+            'run_id': run_id,
+            'started_at': started_at.isoformat(),
+            'universe': list(universe),
+            'options': dict(options or {})
+        }
+
+        checkpoint = cls(Path(runs_dir) / run_id, manifest)
+        try:
+            checkpoint.symbols_dir.mkdir(parents=True, exist_ok=True)
+            checkpoint.acquire()
+            write_atomic(checkpoint.run_dir / MANIFEST_NAME, orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
+        except OSError as e:
+            raise CheckpointError(f"Failed to create run directory {checkpoint.run_dir}: {e}")
+
+        logger.info(f"Started run {run_id} ({len(universe)} symbols)")
+        return checkpoint
+
+    @classmethod
+    def load(cls, run_dir: str | Path) -> 'RunCheckpoint':
+        """
+        Открыть существующий прогон.
+
+        Args:
+            run_dir: Директория прогона
+
+        Returns:
+            RunCheckpoint: Контрольная точка
+
+        Raises:
+            CheckpointError: Если run.json отсутствует или повреждён
+        """
+        run_dir = Path(run_dir)
+        try:
+            manifest = orjson.loads((run_dir / MANIFEST_NAME).read_bytes())
+        except (OSError, orjson.JSONDecodeError) as e:
+            raise CheckpointError(f"Invalid run directory {run_dir}: {e}")
+        return cls(run_dir, manifest)
+
+    def acquire(self) -> bool:
+        """
+        Стать владельцем прогона.
+
+        Returns:
+            bool: False, если прогон ведёт другой процесс (или другой объект этого процесса)
+        """
+        return self._lock.acquire()
+
+    def release(self) -> None:
+        """Перестать быть владельцем прогона (директория остаётся для возобновления)."""
+        self._lock.release()
+
+    def record_batch(self, items: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Записать результаты завершённых тикеров.
+
+        Args:
+            items: Тикер -> данные SymbolData в JSON-совместимом виде
+        """
+        for symbol, data in items.items():
+            write_atomic(self.symbols_dir / f"{symbol}.json", orjson.dumps(data))
+
+    def completed(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Результаты тикеров, завершённых до остановки прогона.
+
+        Returns:
+            Dict[str, Dict]: Тикер -> данные SymbolData (только тикеры universe)
+        """
+        universe = set(self.manifest['universe'])
+        result = {}
+        for path in sorted(self.symbols_dir.glob("*.json")):
+            if path.stem not in universe:
+                continue
+            try:
+                result[path.stem] = orjson.loads(path.read_bytes())
+            except (OSError, orjson.JSONDecodeError) as e:
+                logger.warning(f"Skipping unreadable checkpoint {path}: {e}")
+        return result
+
+    def finish(self) -> None:
+        """Завершить прогон: отчёт опубликован, контрольная точка не нужна."""
+        self._lock.release()
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+        logger.info(f"Run {self.run_id} finalized")
+
+    def discard(self) -> None:
+        """Удалить прогон, который не будет возобновлён."""
+        self._lock.release()
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+        logger.info(f"Discarded incomplete run {self.run_id}")
+
+
+def find_incomplete_run(runs_dir: str | Path, today: Optional[date] = None) -> Optional[RunCheckpoint]:
+    """
+    Найти незавершённый прогон текущего дня.
+
+    Возобновляется только самый поздний прогон, начатый сегодня; более
+    старые незавершённые прогоны удаляются — их данные уже неактуальны.
+    Прогоны, которые ещё ведёт другой процесс (блокировка run.lock
+    занята), не трогаются. Возвращённый прогон уже захвачен вызывающим.
+
+    Args:
+        runs_dir: Директория прогонов
+        today: Текущая дата (по умолчанию сегодня)
+
+    Returns:
+        Optional[RunCheckpoint]: Прогон для возобновления (захваченный) или None
+    """
+    runs_dir = Path(runs_dir)
+    if not runs_dir.exists():
+        return None
+
+    today = today or date.today()
+    candidates = []
+    for run_dir in sorted(path for path in runs_dir.iterdir() if path.is_dir()):
+        owner = FileLock(run_dir / LOCK_NAME)
+        if not owner.acquire():
+            logger.info(f"Run {run_dir.name} is still running in another process, skipping")
+            continue
+        try:
+            checkpoint = RunCheckpoint.load(run_dir)
+            started_at = datetime.fromisoformat(checkpoint.manifest['started_at'])
+        except (CheckpointError, KeyError, ValueError) as e:
+            logger.warning(f"Removing broken run directory {run_dir}: {e}")
+            owner.release()
+            shutil.rmtree(run_dir, ignore_errors=True)
+            continue
+        checkpoint._lock = owner
+
+        if started_at.date() == today:
+            candidates.append(checkpoint)
+        else:
+            checkpoint.discard()
+
+    # Имена прогонов начинаются со времени старта — последний по сортировке самый свежий
+    for stale in candidates[:-1]:
+        stale.discard()
+    return candidates[-1] if candidates else None
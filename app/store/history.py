@@ -0,0 +1,281 @@
+"""История метрик ежедневных отчётов во встроенной базе SQLite."""
+
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+import pandas as pd
+from loguru import logger
+
+
+# Числовые поля тикера, сохраняемые в истории (верхний уровень SymbolData)
+METRIC_FIELDS = (
+    'price', 'lot', 'div_ttm', 'dy_pct',
+    'sma_20', 'sma_50', 'sma_200',
+    'high_52w', 'low_52w', 'dist_52w_low_pct', 'dist_52w_high_pct',
+)
+
+# Признаки из SymbolFeatures
+FEATURE_FIELDS = (
+    'ret_1d_pct', 'ret_5d_pct', 'ret_20d_pct', 'ret_60d_pct', 'ret_250d_pct',
+    'volatility_20d_pct', 'max_drawdown_250d_pct', 'vol_avg_20d', 'adv_rub_20d',
+)
+
+# Все поля, доступные в запросах истории
+HISTORY_FIELDS = (*METRIC_FIELDS, *FEATURE_FIELDS, 'signals', 'error')
+
+# Колонки таблицы symbol_metrics
+HISTORY_COLUMNS = ('symbol', 'date', 'generated_at', *HISTORY_FIELDS)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS symbol_metrics (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    generated_at TEXT,
+    {', '.join(f'{name} REAL' for name in (*METRIC_FIELDS, *FEATURE_FIELDS))},
+    signals TEXT,
+    error TEXT,
+    PRIMARY KEY (symbol, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS symbol_metrics_date ON symbol_metrics (date);
+"""
+
+
+class HistoryStoreError(Exception):
+    """Ошибка хранилища истории метрик."""
+    pass
+
+
+def report_rows(report: Dict[str, Any], report_date: Optional[date] = None) -> List[Tuple]:
+    """
+    Строки symbol_metrics для отчёта (в порядке HISTORY_COLUMNS).
+
+    Args:
+        report: Сериализованный отчёт (analysis.json)
+        report_date: Дата отчёта (по умолчанию дата generated_at)
+
+    Returns:
+        List[Tuple]: Строка на тикер
+    """
+    generated_at = str(report.get('generated_at', ''))
+    if report_date is None:
+        report_date = datetime.fromisoformat(generated_at).date()
+    day = report_date.isoformat()
+
+    rows = []
+    for symbol, data in report.get('by_symbol', {}).items():
+        features = data.get('features') or {}
+        rows.append((
+            symbol,
+            day,
+            generated_at,
+            *(data.get(name) for name in METRIC_FIELDS),
+            *(features.get(name) for name in FEATURE_FIELDS),
+            orjson.dumps(data.get('signals') or []).decode(),
+            (data.get('meta') or {}).get('error'),
+        ))
+    return rows
+
+
+class HistoryStore:
+    """
+    Хранилище истории метрик: одна строка на (тикер, дата отчёта).
+
+    Первичный ключ (symbol, date) делает запрос истории одного тикера
+    за N дней чтением одного диапазона индекса.
+    """
+
+    def __init__(self, db_path: str | Path = "data/history.sqlite"):
+        """
+        Инициализация хранилища.
+
+        Args:
+            db_path: Путь к файлу базы SQLite
+        """
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Соединение текущего потока (создаётся при первом обращении)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        """Закрыть соединение текущего потока."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def record_report(self, report: Dict[str, Any], report_date: Optional[date] = None) -> int:
+        """
+        Записать метрики всех тикеров отчёта (повторная запись за ту же дату заменяет строки).
+
+        Args:
+            report: Сериализованный отчёт (analysis.json)
+            report_date: Дата отчёта (по умолчанию дата generated_at)
+
+        Returns:
+            int: Количество записанных строк
+
+        Raises:
+            HistoryStoreError: Если не удалось записать
+        """
+        if report_date is None:
+            report_date = datetime.fromisoformat(str(report.get('generated_at', ''))).date()
+        day = report_date.isoformat()
+        rows = report_rows(report, report_date)
+
+        try:
+            self._insert(rows)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to record report history for {day}: {e}")
+            raise HistoryStoreError(f"Failed to record report history: {e}")
+
+        logger.debug(f"Recorded {len(rows)} history rows for {day}")
+        return len(rows)
+
+    def _insert(self, rows: Sequence[Tuple]) -> None:
+        """Записать строки (повтор по (symbol, date) заменяет строку)."""
+        sql = (
+            f"INSERT OR REPLACE INTO symbol_metrics ({', '.join(HISTORY_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(HISTORY_COLUMNS))})"
+        )
+        conn = self._connect()
+        with conn:
+            conn.executemany(sql, rows)
+
+    def import_daily_reports(self, reports_dir: str | Path = "data/reports") -> int:
+        """
+        Загрузить в историю ранее сохранённые ежедневные JSON отчёты.
+
+        Args:
+            reports_dir: Директория с файлами YYYY-MM-DD.json
+
+        Returns:
+            int: Количество импортированных отчётов
+        """
+        imported = 0
+        for path in sorted(Path(reports_dir).glob("*.json")):
+            try:
+                report_date = date.fromisoformat(path.stem)
+                self.record_report(orjson.loads(path.read_bytes()), report_date)
+                imported += 1
+            except (ValueError, HistoryStoreError) as e:
+                logger.warning(f"Skipping daily report {path.name}: {e}")
+
+        logger.info(f"Imported {imported} daily reports into history")
+        return imported
+
+    def import_archives(self, archive_dir: str | Path = "data/reports/archive") -> int:
+        """
+        Загрузить в историю месячные Parquet архивы отчётов (см. app.store.retention).
+
+        Args:
+            archive_dir: Директория с файлами YYYY-MM.parquet
+
+        Returns:
+            int: Количество импортированных строк
+
+        Raises:
+            HistoryStoreError: Если не удалось записать
+        """
+        imported = 0
+        for path in sorted(Path(archive_dir).glob("*.parquet")):
+            df = pd.read_parquet(path, columns=list(HISTORY_COLUMNS))
+            df = df.astype(object).where(df.notna(), None)
+            try:
+                self._insert(list(df.itertuples(index=False, name=None)))
+            except sqlite3.Error as e:
+                raise HistoryStoreError(f"Failed to import archive {path.name}: {e}")
+            imported += len(df)
+
+        logger.info(f"Imported {imported} archived history rows")
+        return imported
+
+    def query(
+        self,
+        symbols: Sequence[str],
+        fields: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        days: Optional[int] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        История метрик по тикерам.
+
+        Args:
+            symbols: Тикеры
+            fields: Поля из HISTORY_FIELDS (None — все)
+            start: Первая дата (включительно)
+            end: Последняя дата (включительно)
+            days: Последние N дней до end (или до сегодня), вместо start
+
+        Returns:
+            Dict[str, List[Dict]]: Тикер -> строки {date, <поля>} по возрастанию даты
+
+        Raises:
+            ValueError: Если запрошено неизвестное поле
+        """
+        fields = list(fields) if fields else list(HISTORY_FIELDS)
+        unknown = [name for name in fields if name not in HISTORY_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown history fields: {', '.join(unknown)}")
+
+        if days is not None:
+            start = (end or date.today()) - timedelta(days=days)
+
+        where = [f"symbol IN ({', '.join('?' * len(symbols))})"]
+        params: List[Any] = list(symbols)
+        if start is not None:
+            where.append("date >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            where.append("date <= ?")
+            params.append(end.isoformat())
+
+        sql = (
+            f"SELECT symbol, date, {', '.join(fields)} FROM symbol_metrics "
+            f"WHERE {' AND '.join(where)} ORDER BY symbol, date"
+        )
+
+        result: Dict[str, List[Dict[str, Any]]] = {symbol: [] for symbol in symbols}
+        for row in self._connect().execute(sql, params):
+            item = {'date': row['date']}
+            for name in fields:
+                item[name] = orjson.loads(row[name]) if name == 'signals' else row[name]
+            result[row['symbol']].append(item)
+
+        return result
+
+
+# Хранилища по путям к базе (соединения внутри — по потокам)
+_stores: Dict[Path, HistoryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_history_store(db_path: str | Path = "data/history.sqlite") -> HistoryStore:
+    """
+    Получить хранилище истории для файла базы.
+
+    Args:
+        db_path: Путь к файлу базы SQLite
+
+    Returns:
+        HistoryStore: Хранилище
+    """
+    path = Path(db_path)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = HistoryStore(path)
+        return _stores[path]
@@ -0,0 +1,184 @@
+"""Горячий кэш в формате Arrow IPC (Feather v2) для чтения через memory map."""
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from loguru import logger
+
+from app.store.snapshot import KEEP_VERSIONS, version_path, write_atomic
+
+
+# Имя директории горячего кэша свечей внутри хранилища сырых данных
+HOT_DIR_NAME = "_hot"
+
+# Файл панели свечей universe
+HOT_CANDLES_FILE = "candles.arrow"
+
+
+def hot_candles_path(raw_data_dir: str | Path) -> Path:
+    """Путь к панели свечей в горячем кэше."""
+    return Path(raw_data_dir) / HOT_DIR_NAME / HOT_CANDLES_FILE
+
+
+def hot_report_path(analysis_file: str | Path) -> Path:
+    """Путь к таблице отчёта в горячем кэше (рядом с analysis.json)."""
+    return Path(analysis_file).with_suffix(".arrow")
+
+
+def hot_pointer_path(path: str | Path) -> Path:
+    """Путь к указателю на текущую версию таблицы (candles.arrow -> candles.arrow.version)."""
+    path = Path(path)
+    return path.with_name(f"{path.name}.version")
+
+
+def _read_pointer(path: Path) -> Optional[Dict[str, Any]]:
+    """Прочитать указатель версии таблицы (None, если таблица ещё не публиковалась)."""
+    try:
+        return orjson.loads(hot_pointer_path(path).read_bytes())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+_write_lock = threading.Lock()
+
+
+def write_hot_table(path: str | Path, data: pa.Table | pd.DataFrame) -> Path:
+    """
+    Записать таблицу в горячий кэш.
+
+    Пишется несжатый Feather v2, чтобы читатели могли отображать файл
+    в память без декодирования. Каждая запись создаёт новый файл версии
+    (snapshots/candles.000042.arrow) и атомарно переключает указатель
+    на него: файл, уже отображённый читателями, не заменяется (на Windows
+    os.replace поверх отображённого файла не проходит). Старые версии
+    сверх KEEP_VERSIONS удаляются, если их больше никто не держит.
+
+    Args:
+        path: Путь к таблице (по нему таблица читается через read_hot_table)
+        data: Таблица Arrow или DataFrame
+
+    Returns:
+        Path: Путь к таблице (тот же path)
+    """
+    path = Path(path)
+    table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+
+    with _write_lock:
+        pointer = _read_pointer(path)
+        version = int(pointer['version']) + 1 if pointer else 1
+        target = version_path(path, version)
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        try:
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+            os.replace(tmp_path, target)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        write_atomic(hot_pointer_path(path), orjson.dumps({
+            'version': version,
+            'file': target.relative_to(path.parent).as_posix()
+        }))
+        _prune_versions(path, version)
+
+    logger.debug(f"Wrote hot cache {path} v{version} ({table.num_rows} rows, {table.nbytes / 1024:.0f} KB)")
+    return path
+
+
+def _prune_versions(path: Path, version: int) -> None:
+    """Удалить версии старше KEEP_VERSIONS последних и файл без версий от прежних записей."""
+    stale = [path]
+    for old in version_path(path, version).parent.glob(f"{path.stem}.*{path.suffix}"):
+        try:
+            old_version = int(old.name[len(path.stem) + 1:len(old.name) - len(path.suffix)])
+        except ValueError:
+            continue
+        if old_version <= version - KEEP_VERSIONS:
+            stale.append(old)
+
+    for old in stale:
+        try:
+            old.unlink(missing_ok=True)
+        except OSError:
+            # Файл ещё отображён читателем (Windows) — удалится при следующей записи
+            pass
+
+
+# Открытые таблицы: путь -> (версия, таблица)
+_hot_tables: Dict[Path, Tuple[int, pa.Table]] = {}
+_hot_tables_lock = threading.Lock()
+
+
+def read_hot_table(path: str | Path) -> Optional[pa.Table]:
+    """
+    Прочитать таблицу из горячего кэша через memory map.
+
+    Буферы таблицы ссылаются прямо на отображённый файл версии (zero-copy),
+    страницы делятся между процессами через page cache ОС. Читается
+    только маленький указатель версии; пока версия не изменилась,
+    повторный вызов возвращает ту же таблицу без выделения памяти и
+    декодирования.
+
+    Args:
+        path: Путь к таблице
+
+    Returns:
+        Optional[pa.Table]: Таблица или None, если таблица не публиковалась
+    """
+    path = Path(path)
+
+    for _ in range(2):
+        pointer = _read_pointer(path)
+        if pointer is None:
+            return None
+        version = int(pointer['version'])
+
+        with _hot_tables_lock:
+            cached = _hot_tables.get(path)
+            if cached and cached[0] == version:
+                return cached[1]
+
+        try:
+            source = pa.memory_map(str(path.parent / pointer['file']), "r")
+            table = pa.ipc.open_file(source).read_all()
+        except FileNotFoundError:
+            # Версию удалили между чтением указателя и файла — читаем указатель заново
+            continue
+        except Exception as e:
+            logger.warning(f"Failed to map hot cache {path}: {e}")
+            return None
+
+        with _hot_tables_lock:
+            current = _hot_tables.get(path)
+            if current is None or current[0] < version:
+                _hot_tables[path] = (version, table)
+
+        logger.debug(f"Mapped hot cache {path} v{version} ({table.num_rows} rows)")
+        return table
+
+    return None
+
+
+def report_to_table(report: Dict[str, Any]) -> pa.Table:
+    """
+    Преобразовать сериализованный отчёт в таблицу: одна строка на тикер.
+
+    Вложенные поля (signals, features, meta) сохраняются как list/struct.
+
+    Args:
+        report: Отчёт (AnalysisReport.model_dump(mode='json'))
+
+    Returns:
+        pa.Table: Таблица отчёта с колонкой symbol и метаданными generated_at
+    """
+    rows = [{'symbol': symbol, **data} for symbol, data in report['by_symbol'].items()]
+    table = pa.Table.from_pylist(rows)
+    return table.replace_schema_metadata({'generated_at': str(report.get('generated_at', ''))})
@@ -1,13 +1,24 @@
 """Модуль для сохранения и загрузки данных."""
 
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Sequence
 from datetime import datetime
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import orjson
 from loguru import logger
 
+from app.store.hot_cache import hot_candles_path, read_hot_table, write_hot_table
+from app.store.partitioned import LEGACY_FILE_NAME, PartitionedCandleStore, panel_layout
+from app.store.range_index import RangeIndex
+from app.store.snapshot import SnapshotError, encode_json, publish_snapshot, read_snapshot, write_atomic
+
+
+# Колонки панели свечей в горячем кэше
+HOT_PANEL_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
 
 class StorageError(Exception):
     """Базовое исключение для ошибок хранилища."""
@@ -27,29 +38,28 @@ def ensure_dir(path: Path) -> None:
         path.mkdir(parents=True, exist_ok=True)
 
 
-def save_json(path: str | Path, data: Dict[str, Any]) -> None:
+def save_json(path: str | Path, data: Dict[str, Any], payload: Optional[bytes] = None) -> None:
     """
     Сохранить данные в JSON файл используя orjson для скорости.
     
+    Запись атомарная (временный файл, fsync, os.replace): читатели
+    не видят частично записанный файл.
+    
     Args:
         path: Путь к файлу
         data: Данные для сохранения
+        payload: Уже сериализованные данные (encode_json(data)) — не сериализуются повторно
         
     Raises:
         StorageError: Если не удалось сохранить файл
     """
     try:
         path = Path(path)
-        ensure_dir(path)
         
         # orjson.dumps возвращает bytes, поэтому пишем в бинарном режиме
-        json_bytes = orjson.dumps(
-            data,
-            option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
-        )
+        json_bytes = payload if payload is not None else encode_json(data)
         
-        with open(path, 'wb') as f:
-            f.write(json_bytes)
+        write_atomic(path, json_bytes)
         
         logger.debug(f"Saved JSON to {path}")
         
@@ -141,65 +151,359 @@ def load_table_parquet(path: str | Path) -> pd.DataFrame:
         raise StorageError(f"Failed to load Parquet: {e}")
 
 
-def save_candles(symbol: str, df: pd.DataFrame, base_dir: str | Path = "data/raw") -> Path:
+def _covers(index: Optional[RangeIndex], history: pd.DataFrame) -> bool:
+    """Индекс построен ровно по этим свечам (те же первая и последняя свечи и их число)."""
+    if index is None or len(index) != len(history) or len(history) == 0:
+        return False
+    begin = pd.to_datetime(history['begin']).to_numpy(dtype='datetime64[ns]')
+    return index.timestamps[0] == begin[0] and index.timestamps[-1] == begin[-1]
+
+
+def save_candles(
+    symbol: str,
+    df: pd.DataFrame,
+    base_dir: str | Path = "data/raw",
+    index: Optional[RangeIndex] = None
+) -> Path:
     """
-    Сохранить свечи для тикера.
+    Сохранить свечи для тикера вместе с индексом диапазонов high/low.
+    
+    Свечи дописываются в партиционированное хранилище: на диск попадают
+    только свечи новее последней сохранённой, история не переписывается.
     
     Args:
         symbol: Тикер инструмента
         df: DataFrame со свечами
         base_dir: Базовая директория для сырых данных
+        index: Готовый индекс диапазонов; используется, только если покрывает
+            всю сохранённую историю, иначе индекс строится по хранилищу
+        
+    Returns:
+        Path: Директория тикера в хранилище
+        
+    Raises:
+        StorageError: Если не удалось сохранить свечи
+    """
+    store = PartitionedCandleStore(base_dir)
+    
+    try:
+        written = store.append(symbol, df)
+    except Exception as e:
+        logger.error(f"Failed to save candles for {symbol}: {e}")
+        raise StorageError(f"Failed to save candles: {e}")
+    
+    # Индекс диапазонов перестраивается один раз на каждое обновление свечей
+    # и покрывает всю сохранённую историю, а не только загруженное окно
+    if {'begin', 'high', 'low'}.issubset(df.columns):
+        history = store.read(symbol, columns=['high', 'low'])
+        if history is None:
+            history = df
+        if not _covers(index, history):
+            index = RangeIndex.from_candles(history)
+        save_range_index(symbol, index, base_dir)
+    
+    logger.info(f"Saved {written} new candles for {symbol} to {store.symbol_dir(symbol)}")
+    return store.symbol_dir(symbol)
+
+
+def load_candles(
+    symbol: str,
+    base_dir: str | Path = "data/raw",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Загрузить свечи для тикера.
+    
+    Читаются только партиции, пересекающиеся с [start, end]. Для данных
+    в старом формате (один candles.parquet) читается весь файл.
+    
+    Args:
+        symbol: Тикер инструмента
+        base_dir: Базовая директория для сырых данных
+        start: Начало интервала (включительно), None — с начала истории
+        end: Конец интервала (включительно), None — до последней свечи
+        
+    Returns:
+        Optional[pd.DataFrame]: DataFrame со свечами или None если данных нет
+    """
+    store = PartitionedCandleStore(base_dir)
+    
+    try:
+        df = store.read(symbol, start=start, end=end)
+    except Exception as e:
+        logger.error(f"Failed to load candles for {symbol}: {e}")
+        raise StorageError(f"Failed to load candles: {e}")
+    
+    if df is None:
+        legacy_path = store.symbol_dir(symbol) / LEGACY_FILE_NAME
+        if not legacy_path.exists():
+            logger.warning(f"No candles found for {symbol} in {store.symbol_dir(symbol)}")
+            return None
+        df = load_table_parquet(legacy_path)
+        if start is not None:
+            df = df[df['begin'] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df['begin'] <= pd.Timestamp(end)]
+    
+    logger.info(f"Loaded {len(df)} candles for {symbol}")
+    
+    return df
+
+
+def load_candles_panel(
+    symbols: Sequence[str],
+    base_dir: str | Path = "data/raw",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    columns: Optional[Sequence[str]] = None,
+    layout: str = "long"
+) -> pd.DataFrame:
+    """
+    Загрузить свечи нескольких тикеров одной панелью.
+    
+    Вместо load_candles по каждому тикеру выполняется один скан
+    pyarrow.dataset с фильтром по begin и выбором колонок на уровне Parquet.
+    
+    Args:
+        symbols: Тикеры
+        base_dir: Базовая директория для сырых данных
+        start: Начало интервала (включительно)
+        end: Конец интервала (включительно)
+        columns: Колонки свечей (None — все)
+        layout: 'long' или 'wide' (индекс begin, колонки по тикерам)
+        
+    Returns:
+        pd.DataFrame: Панель свечей
+        
+    Raises:
+        StorageError: Если не удалось прочитать свечи
+    """
+    if layout not in ('long', 'wide'):
+        raise StorageError(f"Unknown panel layout: {layout}")
+    
+    hot = _hot_candles_panel(symbols, base_dir, start, end, columns)
+    if hot is not None:
+        logger.debug(f"Loaded candles panel for {len(symbols)} symbols from hot cache ({len(hot)} rows)")
+        return panel_layout(hot, columns, layout)
+    
+    store = PartitionedCandleStore(base_dir)
+    
+    try:
+        panel = store.scan(symbols, start=start, end=end, columns=columns, layout=layout)
+    except Exception as e:
+        logger.error(f"Failed to load candles panel for {len(symbols)} symbols: {e}")
+        raise StorageError(f"Failed to load candles panel: {e}")
+    
+    logger.info(f"Loaded candles panel for {len(symbols)} symbols ({len(panel)} rows, layout={layout})")
+    return panel
+
+
+def write_hot_candles_panel(
+    symbols: Sequence[str],
+    base_dir: str | Path = "data/raw",
+    start: Optional[datetime] = None
+) -> Path:
+    """
+    Опубликовать панель свечей universe в горячий кэш.
+    
+    В метаданных таблицы сохраняются начало окна и время последней свечи
+    каждого тикера по манифестам: load_candles_panel отдаёт панель из кэша,
+    только пока манифесты не изменились.
+    
+    Args:
+        symbols: Тикеры
+        base_dir: Базовая директория для сырых данных
+        start: Начало окна панели (None — вся история)
+        
+    Returns:
+        Path: Путь к таблице в горячем кэше
+    """
+    store = PartitionedCandleStore(base_dir)
+    # Манифесты читаются до скана: свеча, дописанная во время скана, делает панель устаревшей, а не неполной
+    last_ts = {symbol: store.read_manifest(symbol)['last_ts'] for symbol in symbols}
+    panel = store.scan(symbols, start=start, columns=list(HOT_PANEL_COLUMNS))
+    
+    table = pa.Table.from_pandas(panel, preserve_index=False)
+    table = table.replace_schema_metadata({
+        'start': pd.Timestamp(start).isoformat() if start is not None else '',
+        'last_ts': orjson.dumps(last_ts)
+    })
+    return write_hot_table(hot_candles_path(base_dir), table)
+
+
+def _hot_candles_panel(
+    symbols: Sequence[str],
+    base_dir: str | Path,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    columns: Optional[Sequence[str]]
+) -> Optional[pd.DataFrame]:
+    """
+    Длинная панель свечей из горячего кэша, если он покрывает запрос.
+    
+    Returns:
+        Optional[pd.DataFrame]: Панель или None (кэша нет, он устарел или не покрывает
+            тикеры, интервал или колонки) — тогда читается Parquet
+    """
+    if columns is None or not set(columns) <= set(HOT_PANEL_COLUMNS):
+        return None
+    
+    table = read_hot_table(hot_candles_path(base_dir))
+    if table is None:
+        return None
+    
+    try:
+        metadata = table.schema.metadata or {}
+        panel_start = metadata[b'start'].decode()
+        last_ts = orjson.loads(metadata[b'last_ts'])
+        if panel_start and (start is None or pd.Timestamp(start) < pd.Timestamp(panel_start)):
+            return None
+        
+        store = PartitionedCandleStore(base_dir)
+        for symbol in symbols:
+            if symbol not in last_ts or store.read_manifest(symbol)['last_ts'] != last_ts[symbol]:
+                return None
+        
+        begin = table.column('begin')
+        mask = pc.is_in(table.column('symbol'), value_set=pa.array(list(symbols), type=pa.string()))
+        if start is not None:
+            mask = pc.and_(mask, pc.greater_equal(begin, pa.scalar(pd.Timestamp(start), type=begin.type)))
+        if end is not None:
+            mask = pc.and_(mask, pc.less_equal(begin, pa.scalar(pd.Timestamp(end), type=begin.type)))
+        return table.filter(mask).select(['symbol', 'begin', *columns]).to_pandas()
+    except (KeyError, ValueError, TypeError, pa.ArrowException) as e:
+        logger.debug(f"Hot candles panel not usable, reading Parquet: {e}")
+        return None
+
+
+def save_quarantine(symbol: str, rejected: pd.DataFrame, base_dir: str | Path = "data/raw") -> Optional[Path]:
+    """
+    Дописать отбракованные свечи тикера в карантинный файл.
+    
+    Ранее отбракованные строки сохраняются, повторы одной и той же свечи
+    с той же причиной не дублируются.
+    
+    Args:
+        symbol: Тикер инструмента
+        rejected: DataFrame с отбракованными свечами (колонка reason)
+        base_dir: Базовая директория для сырых данных
+        
+    Returns:
+        Optional[Path]: Путь к карантинному файлу или None, если сохранять нечего
+    """
+    if rejected is None or rejected.empty:
+        return None
+    
+    file_path = Path(base_dir) / symbol / "quarantine.parquet"
+    
+    rejected = rejected.assign(quarantined_at=pd.Timestamp.now())
+    if file_path.exists():
+        previous = load_table_parquet(file_path)
+        rejected = pd.concat([previous, rejected], ignore_index=True)
+        key = [col for col in rejected.columns if col != 'quarantined_at']
+        rejected = rejected.drop_duplicates(subset=key, keep='first')
+    
+    save_table_parquet(file_path, rejected)
+    logger.debug(f"Quarantine for {symbol} now holds {len(rejected)} candles")
+    return file_path
+
+
+def save_range_index(symbol: str, index: RangeIndex, base_dir: str | Path = "data/raw") -> Path:
+    """
+    Сохранить индекс диапазонов high/low для тикера.
+    
+    Args:
+        symbol: Тикер инструмента
+        index: Индекс диапазонов
+        base_dir: Базовая директория для сырых данных
         
     Returns:
         Path: Путь к сохранённому файлу
+        
+    Raises:
+        StorageError: Если не удалось сохранить индекс
     """
-    base_dir = Path(base_dir)
-    file_path = base_dir / symbol / "candles.parquet"
+    file_path = Path(base_dir) / symbol / "range_index.npz"
     
-    save_table_parquet(file_path, df)
+    try:
+        index.save(file_path)
+    except Exception as e:
+        logger.error(f"Failed to save range index to {file_path}: {e}")
+        raise StorageError(f"Failed to save range index: {e}")
     
-    logger.info(f"Saved {len(df)} candles for {symbol} to {file_path}")
     return file_path
 
 
-def load_candles(symbol: str, base_dir: str | Path = "data/raw") -> Optional[pd.DataFrame]:
+# Кэш загруженных индексов: путь -> (mtime_ns, индекс)
+_range_index_cache: Dict[Path, tuple] = {}
+
+
+def load_range_index(symbol: str, base_dir: str | Path = "data/raw") -> Optional[RangeIndex]:
     """
-    Загрузить свечи для тикера.
+    Загрузить индекс диапазонов high/low для тикера.
+    
+    Индекс кэшируется в памяти до следующего обновления файла.
     
     Args:
         symbol: Тикер инструмента
         base_dir: Базовая директория для сырых данных
         
     Returns:
-        Optional[pd.DataFrame]: DataFrame со свечами или None если файл не найден
+        Optional[RangeIndex]: Индекс или None если файл не найден
     """
-    base_dir = Path(base_dir)
-    file_path = base_dir / symbol / "candles.parquet"
+    file_path = Path(base_dir) / symbol / "range_index.npz"
     
-    if not file_path.exists():
-        logger.warning(f"No candles file found for {symbol} at {file_path}")
+    try:
+        mtime = file_path.stat().st_mtime_ns
+    except FileNotFoundError:
         return None
     
-    df = load_table_parquet(file_path)
-    logger.info(f"Loaded {len(df)} candles for {symbol} from {file_path}")
+    cached = _range_index_cache.get(file_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
     
-    return df
+    try:
+        index = RangeIndex.load(file_path)
+    except Exception as e:
+        logger.error(f"Failed to load range index from {file_path}: {e}")
+        raise StorageError(f"Failed to load range index: {e}")
+    
+    _range_index_cache[file_path] = (mtime, index)
+    return index
 
 
-def save_analysis_report(data: Dict[str, Any], file_path: str | Path = "data/analysis.json") -> None:
+def save_analysis_report(
+    data: Dict[str, Any],
+    file_path: str | Path = "data/analysis.json",
+    payload: Optional[bytes] = None
+) -> int:
     """
-    Сохранить отчёт анализа.
+    Сохранить отчёт анализа новой версией снимка.
     
     Args:
         data: Данные отчёта
         file_path: Путь к файлу
+        payload: Уже сериализованный отчёт (encode_json(data))
+        
+    Returns:
+        int: Версия опубликованного отчёта
+        
+    Raises:
+        StorageError: Если не удалось сохранить отчёт
     """
-    save_json(file_path, data)
-    logger.info(f"Saved analysis report to {file_path}")
+    try:
+        version = publish_snapshot(file_path, data, payload)
+    except SnapshotError as e:
+        raise StorageError(str(e))
+    
+    logger.info(f"Saved analysis report to {file_path} (version {version})")
+    return version
 
 
 def save_daily_report(data: Dict[str, Any], date: Optional[datetime] = None, 
-                     reports_dir: str | Path = "data/reports") -> Path:
+                     reports_dir: str | Path = "data/reports",
+                     payload: Optional[bytes] = None) -> Path:
     """
     Сохранить ежедневный отчёт.
     
@@ -207,6 +511,7 @@ def save_daily_report(data: Dict[str, Any], date: Optional[datetime] = None,
         data: Данные отчёта
         date: Дата отчёта (по умолчанию сегодня)
         reports_dir: Директория для отчётов
+        payload: Уже сериализованный отчёт (тот же буфер, что и для analysis.json)
         
     Returns:
         Path: Путь к сохранённому файлу
@@ -218,7 +523,7 @@ def save_daily_report(data: Dict[str, Any], date: Optional[datetime] = None,
     file_name = f"{date.strftime('%Y-%m-%d')}.json"
     file_path = reports_dir / file_name
     
-    save_json(file_path, data)
+    save_json(file_path, data, payload)
     logger.info(f"Saved daily report to {file_path}")
     
     return file_path
@@ -228,15 +533,26 @@ def load_analysis_report(file_path: str | Path = "data/analysis.json") -> Dict[s
     """
     Загрузить отчёт анализа.
     
+    Пока версия снимка не изменилась, возвращается уже разобранный
+    отчёт (общий для всех читателей, изменять его нельзя).
+    
     Args:
         file_path: Путь к файлу
         
     Returns:
         Dict[str, Any]: Данные отчёта
+        
+    Raises:
+        StorageError: Если не удалось загрузить отчёт
     """
-    data = load_json(file_path)
-    logger.info(f"Loaded analysis report from {file_path}")
-    return data
+    try:
+        snapshot = read_snapshot(file_path)
+    except SnapshotError as e:
+        logger.error(f"Failed to load analysis report from {file_path}: {e}")
+        raise StorageError(f"Failed to load JSON: {e}")
+    
+    logger.info(f"Loaded analysis report from {file_path} (version {snapshot.version})")
+    return snapshot.data
 
 
 def save_portfolio(data: Dict[str, Any], file_path: str | Path = "data/portfolio.json") -> None:
@@ -0,0 +1,112 @@
+"""Межпроцессные блокировки на файлах: признак того, что владелец прогона жив."""
+
+import os
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+def _try_lock(f: BinaryIO) -> bool:
+    """Захватить блокировку открытого файла без ожидания."""
+    try:
+        if os.name == 'nt':
+            # Блокируется первый байт файла (позиция после открытия в режиме 'a' — конец)
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(f: BinaryIO) -> None:
+    """Снять блокировку открытого файла."""
+    if os.name == 'nt':
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class FileLock:
+    """
+    Эксклюзивная блокировка файла на время жизни владельца.
+
+    Блокировку держит операционная система: при падении или
+    принудительном завершении процесса она снимается сама, поэтому
+    занятая блокировка означает, что владелец жив. Повторный захват
+    из того же процесса (другим объектом) тоже не проходит.
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        Инициализация.
+
+        Args:
+            path: Путь к файлу блокировки
+        """
+        self.path = Path(path)
+        self._file: Optional[BinaryIO] = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        """
+        Захватить блокировку без ожидания.
+
+        Returns:
+            bool: True, если блокировка захвачена (или уже принадлежит этому объекту)
+        """
+        if self._file is not None:
+            return True
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(self.path, 'a+b')
+        if not _try_lock(f):
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self) -> None:
+        """Снять блокировку."""
+        if self._file is None:
+            return
+        try:
+            _unlock(self._file)
+        except OSError:
+            pass
+        finally:
+            self._file.close()
+            self._file = None
+
+
+def is_locked(path: str | Path) -> bool:
+    """
+    Занята ли блокировка файла живым владельцем.
+
+    Args:
+        path: Путь к файлу блокировки
+
+    Returns:
+        bool: True, если блокировку держит другой владелец (в том числе этот процесс)
+    """
+    path = Path(path)
+    if not path.exists():
+        return False
+    try:
+        f = open(path, 'a+b')
+    except OSError:
+        return False
+    with f:
+        if not _try_lock(f):
+            return True
+        _unlock(f)
+    return False
@@ -0,0 +1,276 @@
+"""Частичный отчёт: потоковая публикация результатов тикеров во время прогона."""
+
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional
+
+import orjson
+from loguru import logger
+
+from app.store.locks import FileLock, is_locked
+
+
+# Суффикс промежуточного NDJSON файла рядом с analysis.json
+PARTIAL_SUFFIX = ".partial.ndjson"
+
+
+def partial_path(analysis_file: str | Path) -> Path:
+    """Путь к промежуточному файлу: data/analysis.json -> data/analysis.partial.ndjson."""
+    path = Path(analysis_file)
+    return path.with_name(f"{path.stem}{PARTIAL_SUFFIX}")
+
+
+def _lock_path(path: Path) -> Path:
+    """Файл блокировки владельца прогона: analysis.partial.ndjson -> analysis.partial.lock."""
+    return path.with_suffix(".lock")
+
+
+def _is_stale(path: Path) -> bool:
+    """Промежуточный файл старше опубликованного analysis.json (остался от прошлого прогона)."""
+    analysis_file = path.with_name(f"{path.name[:-len(PARTIAL_SUFFIX)]}.json")
+    try:
+        return analysis_file.stat().st_mtime >= path.stat().st_mtime
+    except OSError:
+        return False
+
+
+def _progress(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Прогресс прогона: готовые тикеры из общего числа."""
+    total = len(state['universe'])
+    done = len(state['by_symbol'])
+    return {
+        'done': done,
+        'total': total,
+        'pct': round(done / total * 100, 1) if total else 100.0
+    }
+
+
+def _view(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Представление частичного отчёта для API (с прогрессом)."""
+    return {
+        'started_at': state['started_at'],
+        'complete': False,
+        'error': state.get('error'),
+        'progress': _progress(state),
+        'universe': list(state['universe']),
+        'by_symbol': dict(state['by_symbol'])
+    }
+
+
+def read_partial(path: str | Path) -> Optional[Dict[str, Any]]:
+    """
+    Прочитать частичный отчёт из промежуточного NDJSON файла.
+
+    Используется процессом, который сам не ведёт прогон (например, API
+    при запуске задачи через run_job_once.py). Недописанная последняя
+    строка пропускается. Файл прогона без завершающей записи, владелец
+    которого не жив (процесс упал или был перезапущен), и файл старше
+    analysis.json не считаются частичным отчётом.
+
+    Args:
+        path: Путь к промежуточному файлу
+
+    Returns:
+        Optional[Dict]: Частичный отчёт или None, если прогона нет
+    """
+    path = Path(path)
+    try:
+        lines = path.read_bytes().splitlines()
+    except OSError:
+        return None
+    if _is_stale(path):
+        return None
+
+    ended = False
+    state: Optional[Dict[str, Any]] = None
+    for line in lines:
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            break
+        kind = record.get('type')
+        if kind == 'start':
+            state = {'started_at': record['started_at'], 'universe': record['universe'], 'by_symbol': {}}
+        elif state is None:
+            continue
+        elif kind == 'symbol':
+            state['by_symbol'][record['symbol']] = record['data']
+        elif kind == 'end':
+            if record.get('complete'):
+                return None
+            ended = True
+            state['error'] = record.get('error')
+
+    if state is None:
+        return None
+    if not ended and not is_locked(_lock_path(path)):
+        logger.warning(f"Ignoring partial report {path}: its run is no longer alive")
+        return None
+    return _view(state)
+
+
+class PartialReport:
+    """
+    Частичный отчёт текущего прогона.
+
+    Результат каждого тикера сразу дописывается строкой в NDJSON файл
+    и в снимок в памяти, так что API отдаёт первые тикеры вскоре после
+    старта задачи, а не после записи analysis.json. После публикации
+    полного отчёта промежуточный файл удаляется; при ошибке прогона
+    он остаётся с пометкой об ошибке. Пока прогон идёт, владелец держит
+    блокировку analysis.partial.lock — по ней другие процессы отличают
+    идущий прогон от файла, оставшегося после падения процесса.
+    """
+
+    def __init__(self, analysis_file: str | Path):
+        """
+        Инициализация.
+
+        Args:
+            analysis_file: Путь к analysis.json
+        """
+        self.path = partial_path(analysis_file)
+        self._lock = threading.Lock()
+        self._state: Optional[Dict[str, Any]] = None
+        self._final_progress: Optional[Dict[str, Any]] = None
+        self._file: Optional[BinaryIO] = None
+        self._owner = FileLock(_lock_path(self.path))
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        """Дописать строку в промежуточный файл (вызывается под блокировкой)."""
+        if self._file is None:
+            return
+        try:
+            self._file.write(orjson.dumps(record) + b"\n")
+            self._file.flush()
+        except OSError as e:
+            # Файл нужен только для других процессов — снимок в памяти остаётся
+            logger.warning(f"Failed to write partial report {self.path}: {e}")
+
+    def _close_file(self) -> None:
+        """Закрыть промежуточный файл (вызывается под блокировкой)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def start(self, universe: List[str]) -> None:
+        """
+        Начать прогон: очистить прошлый частичный отчёт.
+
+        Args:
+            universe: Тикеры прогона
+        """
+        with self._lock:
+            self._close_file()
+            self._state = {
+                'started_at': datetime.now().isoformat(),
+                'universe': list(universe),
+                'by_symbol': {}
+            }
+            self._final_progress = None
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if self._owner.acquire():
+                    self._file = open(self.path, 'wb')
+                else:
+                    # Файл ведёт живой прогон другого процесса — состояние только в памяти
+                    logger.warning(f"Partial report {self.path} is owned by another run, keeping it in memory")
+            except OSError as e:
+                logger.warning(f"Failed to open partial report {self.path}: {e}")
+            self._write({'type': 'start', 'started_at': self._state['started_at'], 'universe': self._state['universe']})
+
+    def publish(self, symbol: str, data: Dict[str, Any]) -> None:
+        """
+        Опубликовать результат тикера.
+
+        Args:
+            symbol: Тикер
+            data: Данные тикера в JSON-совместимом виде
+        """
+        with self._lock:
+            if self._state is None:
+                return
+            self._state['by_symbol'][symbol] = data
+            self._write({'type': 'symbol', 'symbol': symbol, 'data': data})
+
+    def finish(self, error: Optional[str] = None) -> None:
+        """
+        Завершить прогон.
+
+        Args:
+            error: Ошибка прогона (None — полный отчёт опубликован)
+        """
+        with self._lock:
+            if self._state is None:
+                return
+            self._write({'type': 'end', 'complete': error is None, 'error': error})
+            self._final_progress = _progress(self._state)
+            self._close_file()
+            owned = self._owner.held
+            self._owner.release()
+            if error is None:
+                self._state = None
+                if owned:
+                    self.path.unlink(missing_ok=True)
+            else:
+                self._state['error'] = error
+
+    def progress(self) -> Optional[Dict[str, Any]]:
+        """
+        Прогресс текущего прогона без копирования данных тикеров.
+
+        Returns:
+            Optional[Dict]: done, total, pct или None, если прогона нет
+        """
+        with self._lock:
+            if self._state is not None:
+                return _progress(self._state)
+        partial = read_partial(self.path)
+        return partial['progress'] if partial is not None else None
+
+    def final_progress(self) -> Optional[Dict[str, Any]]:
+        """
+        Прогресс последнего прогона, завершённого этим объектом.
+
+        После успешного завершения частичный отчёт удаляется и progress()
+        возвращает None — итог прогона берётся отсюда.
+
+        Returns:
+            Optional[Dict]: done, total, pct или None, если прогон не завершался
+        """
+        with self._lock:
+            return self._final_progress
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Текущий частичный отчёт.
+
+        Returns:
+            Optional[Dict]: Частичный отчёт с прогрессом или None, если прогона нет
+        """
+        with self._lock:
+            if self._state is not None:
+                return _view(self._state)
+        return read_partial(self.path)
+
+
+_reports: Dict[Path, PartialReport] = {}
+_reports_lock = threading.Lock()
+
+
+def get_partial_report(analysis_file: str | Path = "data/analysis.json") -> PartialReport:
+    """
+    Получить частичный отчёт для файла analysis.json.
+
+    Args:
+        analysis_file: Путь к analysis.json
+
+    Returns:
+        PartialReport: Частичный отчёт (общий для генератора и API в процессе)
+    """
+    path = Path(analysis_file)
+    with _reports_lock:
+        if path not in _reports:
+            _reports[path] = PartialReport(path)
+        return _reports[path]
@@ -0,0 +1,390 @@
+"""Партиционированное append-only хранилище свечей."""
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import orjson
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from loguru import logger
+
+
+# Имя манифеста в директории тикера
+MANIFEST_NAME = "_manifest.json"
+
+# Старый формат: вся история в одном файле
+LEGACY_FILE_NAME = "candles.parquet"
+
+# Сколько файлов в месячной партиции допускается до автоматического уплотнения
+COMPACT_THRESHOLD = 8
+
+# Схема раскладки директорий: {SYMBOL}/{YYYY}/{MM}
+PARTITIONING = ds.DirectoryPartitioning(
+    pa.schema([('symbol', pa.string()), ('year', pa.string()), ('month', pa.string())])
+)
+
+
+def _partition_key(ts: pd.Timestamp) -> str:
+    """Ключ партиции вида 'YYYY/MM'."""
+    return f"{ts.year:04d}/{ts.month:02d}"
+
+
+class PartitionedCandleStore:
+    """
+    Хранилище свечей с раскладкой {base}/{SYMBOL}/{YYYY}/{MM}/part-*.parquet.
+
+    Новые свечи дописываются отдельными небольшими файлами в партицию
+    своего месяца, старые файлы не переписываются. Манифест тикера хранит
+    время последней свечи, поэтому обновление пишет только свечи новее
+    неё. Последняя сохранённая свеча перезаписывается (она могла быть
+    незавершённой): при чтении и уплотнении из повторов по begin
+    остаётся самая поздняя запись.
+    """
+
+    # Тикеры сохраняются из потоков загрузки — запись по одному тикеру сериализуем
+    _locks: Dict[Path, threading.Lock] = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, base_dir: str | Path = "data/raw", compact_threshold: int = COMPACT_THRESHOLD):
+        """
+        Инициализация хранилища.
+
+        Args:
+            base_dir: Базовая директория для сырых данных
+            compact_threshold: Порог числа файлов в партиции для уплотнения
+        """
+        self.base_dir = Path(base_dir)
+        self.compact_threshold = compact_threshold
+
+    def symbol_dir(self, symbol: str) -> Path:
+        """Директория тикера."""
+        return self.base_dir / symbol
+
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        key = self.symbol_dir(symbol).resolve()
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def read_manifest(self, symbol: str) -> Dict[str, Any]:
+        """
+        Прочитать манифест тикера.
+
+        Args:
+            symbol: Тикер инструмента
+
+        Returns:
+            Dict: {'last_ts': str | None, 'partitions': {'YYYY/MM': число файлов},
+                'archived': ['YYYY/MM', ...]} (archived — если есть архивные партиции)
+        """
+        path = self.symbol_dir(symbol) / MANIFEST_NAME
+        if not path.exists():
+            return {'last_ts': None, 'partitions': {}}
+        return orjson.loads(path.read_bytes())
+
+    def _write_manifest(self, symbol: str, manifest: Dict[str, Any]) -> None:
+        path = self.symbol_dir(symbol) / MANIFEST_NAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
+
+    def partition_files(self, symbol: str, key: str) -> List[Path]:
+        """
+        Файлы партиции в порядке записи.
+
+        Args:
+            symbol: Тикер инструмента
+            key: Ключ партиции 'YYYY/MM'
+
+        Returns:
+            List[Path]: Файлы партиции (имена отсортированы по времени записи)
+        """
+        return sorted((self.symbol_dir(symbol) / key).glob("part-*.parquet"))
+
+    def files(self, symbol: str, start=None, end=None) -> List[Path]:
+        """
+        Файлы тикера, партиции которых пересекаются с интервалом [start, end].
+
+        Args:
+            symbol: Тикер инструмента
+            start: Начало интервала (None — без ограничения)
+            end: Конец интервала (None — без ограничения)
+
+        Returns:
+            List[Path]: Файлы в порядке партиций и записи
+        """
+        low = _partition_key(pd.Timestamp(start)) if start is not None else None
+        high = _partition_key(pd.Timestamp(end)) if end is not None else None
+
+        result = []
+        for month_dir in sorted(self.symbol_dir(symbol).glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]")):
+            key = f"{month_dir.parent.name}/{month_dir.name}"
+            if (low and key < low) or (high and key > high):
+                continue
+            result.extend(self.partition_files(symbol, key))
+        return result
+
+    def _write_part(self, symbol: str, key: str, df: pd.DataFrame, compression: str = 'snappy') -> Path:
+        path = self.symbol_dir(symbol) / key / f"part-{time.time_ns()}.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, compression=compression)
+        return path
+
+    def _migrate_legacy(self, symbol: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Добавить к новым свечам историю из старого единого файла (один раз)."""
+        legacy = self.symbol_dir(symbol) / LEGACY_FILE_NAME
+        if not legacy.exists():
+            return df
+
+        history = pd.read_parquet(legacy, engine='pyarrow')
+        logger.info(f"Migrating {len(history)} legacy candles for {symbol} to partitioned layout")
+        return pd.concat([history, df], ignore_index=True)
+
+    def append(self, symbol: str, df: pd.DataFrame) -> int:
+        """
+        Дописать свечи тикера, которых ещё нет в хранилище.
+
+        Args:
+            symbol: Тикер инструмента
+            df: DataFrame со свечами (колонка begin обязательна)
+
+        Returns:
+            int: Количество записанных свечей
+        """
+        with self._symbol_lock(symbol):
+            manifest = self.read_manifest(symbol)
+
+            if manifest['last_ts'] is None:
+                df = self._migrate_legacy(symbol, df)
+
+            begin = pd.to_datetime(df['begin'])
+            if manifest['last_ts'] is not None:
+                # Последнюю сохранённую свечу пишем заново — она могла быть незавершённой
+                fresh = begin >= pd.Timestamp(manifest['last_ts'])
+                df, begin = df[fresh], begin[fresh]
+
+            if df.empty:
+                return 0
+
+            df = df.assign(begin=begin)
+            keys = begin.dt.strftime('%Y/%m')
+            for key, part in df.groupby(keys, sort=True):
+                self._write_part(symbol, key, part)
+                manifest['partitions'][key] = manifest['partitions'].get(key, 0) + 1
+
+                if manifest['partitions'][key] > self.compact_threshold:
+                    self._compact_partition(symbol, key)
+                    manifest['partitions'][key] = 1
+
+            last_ts = begin.max()
+            if manifest['last_ts'] is not None:
+                last_ts = max(last_ts, pd.Timestamp(manifest['last_ts']))
+            manifest['last_ts'] = last_ts.isoformat()
+            self._write_manifest(symbol, manifest)
+
+            legacy = self.symbol_dir(symbol) / LEGACY_FILE_NAME
+            if legacy.exists():
+                legacy.unlink()
+
+        logger.debug(f"Appended {len(df)} candles for {symbol} to {self.symbol_dir(symbol)}")
+        return len(df)
+
+    def _compact_partition(self, symbol: str, key: str, compression: Optional[str] = None) -> None:
+        """Слить файлы партиции в один, убрав повторы свечей (с compression — даже единственный файл)."""
+        files = self.partition_files(symbol, key)
+        if not files or (len(files) == 1 and compression is None):
+            return
+
+        df = _dedupe(pq.read_table(files).to_pandas())
+        # Новый файл пишется до удаления старых: повторы при сбое снимаются при чтении
+        self._write_part(symbol, key, df, compression=compression or 'snappy')
+        for path in files:
+            path.unlink()
+
+        logger.debug(f"Compacted {len(files)} files of {symbol} {key} into one")
+
+    def compact(self, symbol: str) -> int:
+        """
+        Уплотнить все партиции тикера, где больше одного файла.
+
+        Args:
+            symbol: Тикер инструмента
+
+        Returns:
+            int: Количество уплотнённых партиций
+        """
+        compacted = 0
+        with self._symbol_lock(symbol):
+            manifest = self.read_manifest(symbol)
+            for key in sorted(manifest['partitions']):
+                if len(self.partition_files(symbol, key)) > 1:
+                    self._compact_partition(symbol, key)
+                    manifest['partitions'][key] = 1
+                    compacted += 1
+
+            if compacted:
+                self._write_manifest(symbol, manifest)
+
+        return compacted
+
+    def archive(self, symbol: str, before: str, compression: str = 'zstd') -> int:
+        """
+        Перевести партиции старше месяца before в архивный уровень.
+
+        Партиция переписывается одним файлом с более сильным сжатием и
+        отмечается в манифесте (поле archived), повторно не переписывается.
+        В архивную партицию свечи уже не дописываются — месяц закрыт.
+
+        Args:
+            symbol: Тикер инструмента
+            before: Ключ 'YYYY/MM' первого месяца, который остаётся как есть
+            compression: Кодек Parquet для архива
+
+        Returns:
+            int: Количество переведённых в архив партиций
+        """
+        archived = 0
+        with self._symbol_lock(symbol):
+            manifest = self.read_manifest(symbol)
+            done = set(manifest.get('archived', []))
+            for key in sorted(manifest['partitions']):
+                if key >= before or key in done:
+                    continue
+                self._compact_partition(symbol, key, compression=compression)
+                manifest['partitions'][key] = 1
+                done.add(key)
+                archived += 1
+
+            if archived:
+                manifest['archived'] = sorted(done)
+                self._write_manifest(symbol, manifest)
+
+        if archived:
+            logger.debug(f"Archived {archived} partitions of {symbol} with {compression}")
+        return archived
+
+    def read(
+        self,
+        symbol: str,
+        start=None,
+        end=None,
+        columns: Optional[Sequence[str]] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Прочитать свечи тикера, открывая только затронутые партиции.
+
+        Args:
+            symbol: Тикер инструмента
+            start: Начало интервала по begin (включительно)
+            end: Конец интервала по begin (включительно)
+            columns: Колонки для чтения (None — все)
+
+        Returns:
+            Optional[pd.DataFrame]: Свечи по возрастанию begin или None, если данных нет
+        """
+        files = self.files(symbol, start, end)
+        if not files:
+            return None
+
+        if columns is not None and 'begin' not in columns:
+            columns = ['begin', *columns]
+
+        df = _dedupe(pq.read_table(files, columns=columns).to_pandas())
+
+        if start is not None:
+            df = df[df['begin'] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df['begin'] <= pd.Timestamp(end)]
+
+        return df.reset_index(drop=True)
+
+    def scan(
+        self,
+        symbols: Sequence[str],
+        start=None,
+        end=None,
+        columns: Optional[Sequence[str]] = None,
+        layout: str = 'long'
+    ) -> pd.DataFrame:
+        """
+        Прочитать свечи нескольких тикеров одним многопоточным сканом.
+
+        Список файлов собирается по партициям, пересекающимся с [start, end],
+        фильтр по begin и выбор колонок передаются в сканер Parquet, поэтому
+        лишние row group и колонки не читаются.
+
+        Args:
+            symbols: Тикеры
+            start: Начало интервала по begin (включительно)
+            end: Конец интервала по begin (включительно)
+            columns: Колонки свечей (None — все)
+            layout: 'long' — колонки symbol, begin, ...; 'wide' — индекс begin,
+                колонки по тикерам (для нескольких колонок — MultiIndex (колонка, тикер))
+
+        Returns:
+            pd.DataFrame: Панель свечей (пустая, если данных нет)
+
+        Raises:
+            ValueError: Если указан неизвестный layout
+        """
+        if layout not in ('long', 'wide'):
+            raise ValueError(f"Unknown panel layout: {layout}")
+
+        files = [str(path) for symbol in symbols for path in self.files(symbol, start, end)]
+        if not files:
+            return pd.DataFrame(columns=['symbol', 'begin', *(columns or [])])
+
+        dataset = ds.dataset(
+            files,
+            format='parquet',
+            partitioning=PARTITIONING,
+            partition_base_dir=str(self.base_dir)
+        )
+
+        predicate = None
+        if start is not None:
+            predicate = ds.field('begin') >= pd.Timestamp(start).to_datetime64()
+        if end is not None:
+            upper = ds.field('begin') <= pd.Timestamp(end).to_datetime64()
+            predicate = upper if predicate is None else predicate & upper
+
+        value_columns = list(columns) if columns is not None else [
+            name for name in dataset.schema.names if name not in PARTITIONING.schema.names
+        ]
+        projection = ['symbol', 'begin', *(c for c in value_columns if c != 'begin')]
+
+        table = dataset.to_table(columns=projection, filter=predicate, use_threads=True)
+        df = _dedupe(table.to_pandas(), keys=['symbol', 'begin'])
+
+        logger.debug(f"Scanned {len(df)} candles for {df['symbol'].nunique()} symbols from {len(files)} files")
+
+        return panel_layout(df, projection[2:], layout)
+
+
+def panel_layout(df: pd.DataFrame, values: Sequence[str], layout: str) -> pd.DataFrame:
+    """
+    Привести длинную панель свечей (symbol, begin, ...) к нужному формату.
+
+    Args:
+        df: Длинная панель
+        values: Колонки значений
+        layout: 'long' или 'wide' (см. PartitionedCandleStore.scan)
+
+    Returns:
+        pd.DataFrame: Панель в нужном формате
+    """
+    if layout == 'long':
+        return df
+    values = list(values)
+    return df.pivot(index='begin', columns='symbol', values=values[0] if len(values) == 1 else values)
+
+
+def _dedupe(df: pd.DataFrame, keys: Sequence[str] = ('begin',)) -> pd.DataFrame:
+    """Убрать повторы свечей (остаётся последняя запись) и отсортировать по ключу."""
+    return (
+        df.drop_duplicates(subset=list(keys), keep='last')
+        .sort_values(list(keys), kind='stable')
+        .reset_index(drop=True)
+    )
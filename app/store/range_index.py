@@ -0,0 +1,174 @@
+"""Индекс диапазонов high/low (sparse table) для запросов по произвольным окнам."""
+
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+
+class RangeIndex:
+    """
+    Sparse table по максимумам high и минимумам low одного тикера.
+
+    Строится один раз за O(n log n) при обновлении свечей и отвечает на
+    запрос min/max по любому окну свечей за O(1): окно покрывается двумя
+    перекрывающимися блоками длиной 2^k.
+    """
+
+    def __init__(self, timestamps: np.ndarray, max_table: np.ndarray, min_table: np.ndarray):
+        """
+        Инициализация индекса из готовых таблиц.
+
+        Args:
+            timestamps: Время начала свечей (datetime64[ns], по возрастанию)
+            max_table: Таблица максимумов high формы (levels, n)
+            min_table: Таблица минимумов low формы (levels, n)
+        """
+        self.timestamps = timestamps
+        self.max_table = max_table
+        self.min_table = min_table
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def build(cls, timestamps, highs, lows) -> 'RangeIndex':
+        """
+        Построить индекс по массивам свечей.
+
+        Args:
+            timestamps: Время начала свечей (по возрастанию)
+            highs: Максимумы свечей
+            lows: Минимумы свечей
+
+        Returns:
+            RangeIndex: Построенный индекс
+        """
+        timestamps = np.asarray(pd.to_datetime(timestamps), dtype='datetime64[ns]')
+        highs = np.asarray(highs, dtype=np.float64)
+        lows = np.asarray(lows, dtype=np.float64)
+
+        n = len(highs)
+        levels = max(n, 1).bit_length()
+
+        max_table = np.full((levels, n), np.nan, dtype=np.float64)
+        min_table = np.full((levels, n), np.nan, dtype=np.float64)
+        max_table[0] = highs
+        min_table[0] = lows
+
+        for k in range(1, levels):
+            half = 1 << (k - 1)
+            width = n - (1 << k) + 1
+            max_table[k, :width] = np.fmax(max_table[k - 1, :width], max_table[k - 1, half:half + width])
+            min_table[k, :width] = np.fmin(min_table[k - 1, :width], min_table[k - 1, half:half + width])
+
+        return cls(timestamps, max_table, min_table)
+
+    @classmethod
+    def from_candles(cls, candles: pd.DataFrame) -> 'RangeIndex':
+        """
+        Построить индекс по DataFrame со свечами (колонки begin, high, low).
+
+        Args:
+            candles: DataFrame со свечами, отсортированный по begin
+
+        Returns:
+            RangeIndex: Построенный индекс
+        """
+        return cls.build(candles['begin'], candles['high'], candles['low'])
+
+    def query_positions(self, start: int, end: int) -> Optional[Tuple[float, float]]:
+        """
+        Максимум high и минимум low по свечам с номерами [start, end] включительно.
+
+        Args:
+            start: Номер первой свечи
+            end: Номер последней свечи
+
+        Returns:
+            Optional[Tuple[float, float]]: (high, low) или None для пустого окна
+        """
+        start = max(int(start), 0)
+        end = min(int(end), len(self) - 1)
+        if start > end:
+            return None
+
+        k = (end - start + 1).bit_length() - 1
+        right = end - (1 << k) + 1
+
+        # Как и при построении, пропуски (NaN) не участвуют в сравнении
+        high = np.fmax(self.max_table[k, start], self.max_table[k, right])
+        low = np.fmin(self.min_table[k, start], self.min_table[k, right])
+        return float(high), float(low)
+
+    def query(self, start=None, end=None) -> Optional[Tuple[float, float]]:
+        """
+        Максимум high и минимум low по свечам в интервале дат [start, end].
+
+        Args:
+            start: Начало окна (включительно), None — с первой свечи
+            end: Конец окна (включительно), None — до последней свечи
+
+        Returns:
+            Optional[Tuple[float, float]]: (high, low) или None, если в окне нет свечей
+        """
+        left = 0
+        right = len(self) - 1
+        if start is not None:
+            left = int(np.searchsorted(self.timestamps, np.datetime64(pd.Timestamp(start), 'ns'), side='left'))
+        if end is not None:
+            right = int(np.searchsorted(self.timestamps, np.datetime64(pd.Timestamp(end), 'ns'), side='right')) - 1
+        return self.query_positions(left, right)
+
+    def query_last(self, bars: int) -> Optional[Tuple[float, float]]:
+        """
+        Максимум high и минимум low по последним N свечам.
+
+        Args:
+            bars: Количество последних свечей
+
+        Returns:
+            Optional[Tuple[float, float]]: (high, low) или None для пустого индекса
+        """
+        return self.query_positions(len(self) - bars, len(self) - 1)
+
+    def save(self, path: str | Path) -> None:
+        """
+        Сохранить индекс в файл .npz.
+
+        Args:
+            path: Путь к файлу
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # np.savez сам добавляет .npz, поэтому пишем через открытый файл
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                timestamps=self.timestamps.astype('datetime64[ns]').view(np.int64),
+                max_table=self.max_table,
+                min_table=self.min_table
+            )
+
+        logger.debug(f"Saved range index to {path} ({len(self)} candles)")
+
+    @classmethod
+    def load(cls, path: str | Path) -> 'RangeIndex':
+        """
+        Загрузить индекс из файла .npz.
+
+        Args:
+            path: Путь к файлу
+
+        Returns:
+            RangeIndex: Загруженный индекс
+        """
+        with np.load(Path(path)) as data:
+            return cls(
+                data['timestamps'].view('datetime64[ns]'),
+                data['max_table'],
+                data['min_table']
+            )
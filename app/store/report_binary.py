@@ -0,0 +1,172 @@
+"""Компактная бинарная форма отчёта для внутренних потребителей: таблица Arrow + метаданные MessagePack."""
+
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import pyarrow as pa
+from loguru import logger
+
+from app.store.hot_cache import hot_report_path, read_hot_table, report_to_table, write_hot_table
+from app.store.snapshot import current_version, write_atomic
+
+
+# Версия схемы бинарного отчёта: меняется при несовместимом изменении
+# колонок таблицы или полей метаданных
+REPORT_SCHEMA_VERSION = 1
+
+
+def _import_msgpack():
+    """Импортировать msgpack (без него потребители читают JSON)."""
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+
+def report_meta_path(analysis_file: str | Path) -> Path:
+    """Путь к метаданным отчёта (рядом с analysis.json)."""
+    return Path(analysis_file).with_suffix(".msgpack")
+
+
+def write_report_binary(report: Dict[str, Any], analysis_file: str | Path, snapshot_version: int) -> Optional[Path]:
+    """
+    Записать бинарную форму отчёта рядом с analysis.json.
+
+    Таблица (строка на тикер) пишется в горячий кэш Arrow, метаданные
+    уровня отчёта (generated_at, universe, версии) — в MessagePack.
+    Обе части помечены версией снимка JSON, по которой читатели
+    проверяют, что бинарная форма соответствует текущему отчёту.
+
+    Args:
+        report: Сериализованный отчёт
+        analysis_file: Путь к analysis.json
+        snapshot_version: Версия снимка, под которой опубликован JSON
+
+    Returns:
+        Optional[Path]: Путь к файлу метаданных или None, если msgpack не установлен
+    """
+    msgpack = _import_msgpack()
+    if msgpack is None:
+        logger.warning("msgpack is not installed, binary report is not written")
+        return None
+
+    table = report_to_table(report)
+    table = table.replace_schema_metadata({
+        **table.schema.metadata,
+        'schema_version': str(REPORT_SCHEMA_VERSION),
+        'snapshot_version': str(snapshot_version)
+    })
+    write_hot_table(hot_report_path(analysis_file), table)
+
+    meta = {
+        'schema_version': REPORT_SCHEMA_VERSION,
+        'snapshot_version': snapshot_version,
+        'generated_at': str(report.get('generated_at', '')),
+        'universe': list(report.get('universe', [])),
+        'extra': {k: v for k, v in report.items() if k not in ('generated_at', 'universe', 'by_symbol')}
+    }
+    meta_path = write_atomic(report_meta_path(analysis_file), msgpack.packb(meta, use_bin_type=True))
+
+    logger.debug(f"Wrote binary report v{snapshot_version} ({table.num_rows} symbols)")
+    return meta_path
+
+
+def _read_meta(analysis_file: Path) -> Optional[Dict[str, Any]]:
+    """Метаданные бинарного отчёта, если они совпадают со схемой и текущей версией JSON."""
+    msgpack = _import_msgpack()
+    if msgpack is None:
+        return None
+
+    try:
+        meta = msgpack.unpackb(report_meta_path(analysis_file).read_bytes(), raw=False)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Failed to read binary report metadata: {e}")
+        return None
+
+    if meta.get('schema_version') != REPORT_SCHEMA_VERSION:
+        return None
+    if meta.get('snapshot_version') != current_version(analysis_file):
+        return None
+    return meta
+
+
+def _load_parts(analysis_file: Path) -> Optional[Tuple[Dict[str, Any], pa.Table]]:
+    """Метаданные и таблица отчёта, если обе части соответствуют текущему analysis.json."""
+    meta = _read_meta(analysis_file)
+    if meta is None:
+        return None
+
+    table = read_hot_table(hot_report_path(analysis_file))
+    if table is None:
+        return None
+
+    table_version = (table.schema.metadata or {}).get(b'snapshot_version', b'').decode()
+    if table_version != str(meta['snapshot_version']):
+        return None
+    return meta, table
+
+
+def load_report_table(analysis_file: str | Path) -> Optional[pa.Table]:
+    """
+    Таблица отчёта (memory map), если бинарная форма соответствует текущему analysis.json.
+
+    Args:
+        analysis_file: Путь к analysis.json
+
+    Returns:
+        Optional[pa.Table]: Таблица или None (нужно читать JSON)
+    """
+    parts = _load_parts(Path(analysis_file))
+    return parts[1] if parts else None
+
+
+# Собранные отчёты: путь -> (версия снимка, отчёт)
+_reports: Dict[Path, Tuple[int, Dict[str, Any]]] = {}
+_reports_lock = threading.Lock()
+
+
+def load_report_binary(analysis_file: str | Path) -> Optional[Dict[str, Any]]:
+    """
+    Отчёт в том же виде, что analysis.json, собранный из бинарной формы.
+
+    Собранный отчёт кэшируется по версии снимка и общий для всех
+    читателей — изменять его нельзя.
+
+    Args:
+        analysis_file: Путь к analysis.json
+
+    Returns:
+        Optional[Dict[str, Any]]: Отчёт или None (нужно читать JSON)
+    """
+    analysis_file = Path(analysis_file)
+    parts = _load_parts(analysis_file)
+    if parts is None:
+        return None
+
+    meta, table = parts
+    version = meta['snapshot_version']
+    with _reports_lock:
+        cached = _reports.get(analysis_file)
+        if cached and cached[0] == version:
+            return cached[1]
+
+    by_symbol = {}
+    for row in table.to_pylist():
+        by_symbol[row.pop('symbol')] = row
+
+    report = {
+        'generated_at': meta['generated_at'],
+        'universe': meta['universe'],
+        'by_symbol': by_symbol,
+        **meta.get('extra', {})
+    }
+
+    with _reports_lock:
+        _reports[analysis_file] = (version, report)
+
+    logger.debug(f"Loaded binary report v{version} ({len(by_symbol)} symbols)")
+    return report
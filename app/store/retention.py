@@ -0,0 +1,273 @@
+"""Хранение данных: сроки жизни ежедневных отчётов, месячные архивы и архивный уровень свечей."""
+
+import hashlib
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+
+from app.config.loader import get_config
+from app.store.history import HISTORY_COLUMNS, get_history_store, report_rows
+from app.store.partitioned import MANIFEST_NAME, PartitionedCandleStore
+
+
+# Кодек сжатия архивов (отчётов и свечей)
+ARCHIVE_COMPRESSION = "zstd"
+
+
+@dataclass
+class RetentionResult:
+    """Итог прогона хранения."""
+    reports_deduped: List[str] = field(default_factory=list)
+    reports_archived: List[str] = field(default_factory=list)
+    archives_written: List[str] = field(default_factory=list)
+    candle_partitions_archived: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        """Освобождено байт на диске."""
+        return self.bytes_before - self.bytes_after
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'bytes_reclaimed': self.bytes_reclaimed}
+
+
+def _dir_size(path: Path) -> int:
+    """Суммарный размер файлов директории."""
+    if not path.exists():
+        return 0
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def report_content_hash(report: Dict[str, Any]) -> str:
+    """
+    Хэш содержимого отчёта без меток времени прогона.
+
+    generated_at и meta.updated_at меняются при каждом прогоне, поэтому
+    в хэш не входят: два отчёта с одинаковыми данными (например, за
+    выходные) дают одинаковый хэш.
+
+    Args:
+        report: Сериализованный отчёт
+
+    Returns:
+        str: SHA-256 в hex
+    """
+    by_symbol = {}
+    for symbol, data in report.get('by_symbol', {}).items():
+        meta = {k: v for k, v in (data.get('meta') or {}).items() if k != 'updated_at'}
+        by_symbol[symbol] = {**data, 'meta': meta}
+
+    payload = orjson.dumps(
+        {'universe': report.get('universe'), 'by_symbol': by_symbol},
+        option=orjson.OPT_SORT_KEYS
+    )
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _daily_reports(reports_dir: Path) -> List[Tuple[date, Path]]:
+    """Ежедневные отчёты (дата, путь) по возрастанию даты."""
+    result = []
+    for path in reports_dir.glob("*.json"):
+        try:
+            result.append((date.fromisoformat(path.stem), path))
+        except ValueError:
+            continue
+    return sorted(result)
+
+
+def dedupe_reports(reports_dir: str | Path) -> List[str]:
+    """
+    Удалить ежедневные отчёты, совпадающие по содержимому с предыдущим.
+
+    Из серии одинаковых подряд отчётов остаётся первый.
+
+    Args:
+        reports_dir: Директория ежедневных отчётов
+
+    Returns:
+        List[str]: Даты удалённых отчётов
+    """
+    removed = []
+    previous_hash: Optional[str] = None
+
+    for day, path in _daily_reports(Path(reports_dir)):
+        try:
+            content_hash = report_content_hash(orjson.loads(path.read_bytes()))
+        except (OSError, orjson.JSONDecodeError) as e:
+            logger.warning(f"Skipping unreadable report {path.name}: {e}")
+            previous_hash = None
+            continue
+
+        if content_hash == previous_hash:
+            path.unlink()
+            removed.append(day.isoformat())
+        else:
+            previous_hash = content_hash
+
+    if removed:
+        logger.info(f"Removed {len(removed)} duplicate daily reports")
+    return removed
+
+
+def _write_month_archive(path: Path, rows: List[tuple]) -> None:
+    """Дописать строки в месячный архив (повтор по (symbol, date) заменяет строку)."""
+    df = pd.DataFrame(rows, columns=list(HISTORY_COLUMNS))
+    if path.exists():
+        df = pd.concat([pd.read_parquet(path), df], ignore_index=True)
+    df = df.drop_duplicates(subset=['symbol', 'date'], keep='last').sort_values(['date', 'symbol'])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path, compression=ARCHIVE_COMPRESSION)
+    tmp_path.replace(path)
+
+
+def archive_reports(
+    reports_dir: str | Path,
+    archive_dir: str | Path,
+    keep_days: int,
+    history_db: Optional[str | Path] = None,
+    today: Optional[date] = None
+) -> Tuple[List[str], List[str]]:
+    """
+    Свернуть ежедневные отчёты старше keep_days в месячные Parquet архивы.
+
+    Архив YYYY-MM.parquet содержит строки истории метрик (колонки
+    symbol_metrics). Перед удалением JSON строки записываются и в
+    хранилище истории, поэтому архивные дни остаются доступны через
+    /history/metrics; HistoryStore.import_archives восстанавливает их
+    из архивов.
+
+    Args:
+        reports_dir: Директория ежедневных отчётов
+        archive_dir: Директория месячных архивов
+        keep_days: Сколько дней хранить JSON отчёты
+        history_db: База истории метрик (None — не записывать)
+        today: Текущая дата (по умолчанию сегодня)
+
+    Returns:
+        Tuple[List[str], List[str]]: Даты архивированных отчётов и имена записанных архивов
+    """
+    cutoff = (today or date.today()) - timedelta(days=keep_days)
+    archive_dir = Path(archive_dir)
+    store = get_history_store(history_db) if history_db else None
+
+    by_month: Dict[str, List[Tuple[date, Path]]] = {}
+    for day, path in _daily_reports(Path(reports_dir)):
+        if day >= cutoff:
+            break
+        by_month.setdefault(day.strftime('%Y-%m'), []).append((day, path))
+
+    archived, written = [], []
+    for month, reports in by_month.items():
+        rows, done = [], []
+        for day, path in reports:
+            try:
+                report_data = orjson.loads(path.read_bytes())
+            except (OSError, orjson.JSONDecodeError) as e:
+                logger.warning(f"Skipping unreadable report {path.name}: {e}")
+                continue
+            rows.extend(report_rows(report_data, day))
+            if store is not None:
+                store.record_report(report_data, day)
+            done.append((day, path))
+
+        if not done:
+            continue
+
+        archive_path = archive_dir / f"{month}.parquet"
+        _write_month_archive(archive_path, rows)
+        written.append(archive_path.name)
+
+        # JSON удаляем только после записи архива
+        for day, path in done:
+            path.unlink(missing_ok=True)
+            archived.append(day.isoformat())
+
+    if archived:
+        logger.info(f"Archived {len(archived)} daily reports into {len(written)} monthly archives")
+    return archived, written
+
+
+def archive_candles(raw_data_dir: str | Path, after_months: int, today: Optional[date] = None) -> int:
+    """
+    Перевести месячные партиции свечей старше after_months в архивный уровень (zstd).
+
+    Args:
+        raw_data_dir: Директория хранилища свечей
+        after_months: Сколько последних месяцев не трогать
+        today: Текущая дата (по умолчанию сегодня)
+
+    Returns:
+        int: Количество переведённых партиций
+    """
+    today = today or date.today()
+    month_index = today.year * 12 + today.month - 1 - after_months
+    before = f"{month_index // 12:04d}/{month_index % 12 + 1:02d}"
+
+    store = PartitionedCandleStore(raw_data_dir)
+    archived = 0
+    for manifest in sorted(Path(raw_data_dir).glob(f"*/{MANIFEST_NAME}")):
+        archived += store.archive(manifest.parent.name, before, compression=ARCHIVE_COMPRESSION)
+    return archived
+
+
+def run_retention(config: Any = None, today: Optional[date] = None) -> RetentionResult:
+    """
+    Выполнить прогон хранения по настройкам config.retention.
+
+    Этапы: удаление повторяющихся отчётов, сворачивание старых
+    отчётов в месячные архивы, перевод старых партиций свечей в
+    архивный уровень.
+
+    Args:
+        config: Конфигурация (по умолчанию get_config())
+        today: Текущая дата (по умолчанию сегодня)
+
+    Returns:
+        RetentionResult: Итог прогона с освобождённым объёмом
+    """
+    if config is None:
+        config = get_config()
+
+    rules = config.retention
+    reports_dir = Path(config.output.reports_dir)
+    raw_data_dir = Path(config.output.raw_data_dir)
+
+    result = RetentionResult()
+    result.bytes_before = _dir_size(reports_dir) + _dir_size(raw_data_dir)
+
+    if rules.dedupe_reports:
+        result.reports_deduped = dedupe_reports(reports_dir)
+
+    result.reports_archived, result.archives_written = archive_reports(
+        reports_dir,
+        rules.archive_dir,
+        rules.keep_daily_days,
+        history_db=config.output.history_db,
+        today=today
+    )
+
+    if rules.archive_candles_after_months is not None:
+        result.candle_partitions_archived = archive_candles(
+            raw_data_dir, rules.archive_candles_after_months, today=today
+        )
+
+    result.bytes_after = _dir_size(reports_dir) + _dir_size(raw_data_dir)
+
+    logger.info(
+        f"Retention: {len(result.reports_deduped)} duplicates removed, "
+        f"{len(result.reports_archived)} reports archived, "
+        f"{result.candle_partitions_archived} candle partitions archived, "
+        f"{result.bytes_reclaimed / 1024:.0f} KB reclaimed"
+    )
+    return result
@@ -0,0 +1,58 @@
+"""Журнал прогонов отчёта: одна строка JSONL на прогон."""
+
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import orjson
+from loguru import logger
+
+
+_lock = threading.Lock()
+
+
+def append_run(path: str | Path, row: Dict[str, Any]) -> None:
+    """
+    Дописать строку прогона в журнал.
+
+    Args:
+        path: Путь к журналу
+        row: Сводка прогона
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _lock, open(path, 'ab') as f:
+        f.write(orjson.dumps(row) + b"\n")
+
+
+def read_runs(path: str | Path, limit: Optional[int] = None, since: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Прочитать прогоны из журнала (от старых к новым).
+
+    Повреждённые строки (например, недописанная при падении) пропускаются.
+
+    Args:
+        path: Путь к журналу
+        limit: Только последние N прогонов
+        since: Только прогоны, начатые не раньше этого момента (ISO)
+
+    Returns:
+        List[Dict]: Строки прогонов
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+
+    rows = []
+    with open(path, 'rb') as f:
+        for line_number, line in enumerate(f, 1):
+            try:
+                row = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                logger.warning(f"Skipping malformed run ledger line {line_number} in {path}")
+                continue
+            if since and row.get('started_at', '') < since:
+                continue
+            rows.append(row)
+
+    return rows[-limit:] if limit else rows
@@ -0,0 +1,233 @@
+"""Версионная атомарная публикация JSON снимков (analysis.json) и их чтение с кэшем по версии."""
+
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+from loguru import logger
+
+
+# Директория версионных файлов (рядом с публикуемым файлом)
+SNAPSHOTS_DIR_NAME = "snapshots"
+
+# Сколько последних версий хранить: читатель, прочитавший указатель,
+# успевает открыть файл, даже если за это время вышли новые версии
+KEEP_VERSIONS = 3
+
+
+class SnapshotError(Exception):
+    """Ошибка публикации или чтения снимка."""
+    pass
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Опубликованный снимок: версия и разобранные данные."""
+    version: int
+    data: Dict[str, Any]
+
+
+def pointer_path(path: str | Path) -> Path:
+    """Путь к указателю на текущую версию (analysis.json -> analysis.version)."""
+    return Path(path).with_suffix(".version")
+
+
+def version_path(path: str | Path, version: int) -> Path:
+    """Путь к файлу версии (analysis.json -> snapshots/analysis.000042.json)."""
+    path = Path(path)
+    return path.parent / SNAPSHOTS_DIR_NAME / f"{path.stem}.{version:06d}{path.suffix}"
+
+
+def write_atomic(path: str | Path, payload: bytes) -> Path:
+    """
+    Записать файл атомарно: во временный файл, fsync, затем os.replace.
+
+    Читатели видят либо прежнее содержимое, либо новое целиком.
+
+    Args:
+        path: Путь к файлу
+        payload: Содержимое
+
+    Returns:
+        Path: Путь к записанному файлу
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return path
+
+
+def _read_pointer(path: Path) -> Optional[Dict[str, Any]]:
+    """Прочитать указатель версии (None, если снимки ещё не публиковались)."""
+    try:
+        return orjson.loads(pointer_path(path).read_bytes())
+    except FileNotFoundError:
+        return None
+
+
+def current_version(path: str | Path) -> int:
+    """
+    Текущая опубликованная версия снимка.
+
+    Args:
+        path: Путь к публикуемому файлу
+
+    Returns:
+        int: Версия (0, если снимков ещё не было)
+    """
+    pointer = _read_pointer(Path(path))
+    return int(pointer['version']) if pointer else 0
+
+
+_publish_lock = threading.Lock()
+
+
+def encode_json(data: Dict[str, Any]) -> bytes:
+    """
+    Сериализовать данные в JSON для записи на диск (с отступами, перевод строки в конце).
+
+    Args:
+        data: Данные
+
+    Returns:
+        bytes: JSON
+    """
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+
+
+def publish_snapshot(path: str | Path, data: Dict[str, Any], payload: Optional[bytes] = None) -> int:
+    """
+    Опубликовать новую версию снимка.
+
+    Порядок: файл версии пишется и синхронизируется с диском, затем
+    публикуемый файл атомарно заменяется на него (жёсткая ссылка или
+    копия + os.replace), затем атомарно переключается указатель версии.
+    Старые версии сверх KEEP_VERSIONS удаляются.
+
+    Args:
+        path: Путь к публикуемому файлу (например, data/analysis.json)
+        data: Данные снимка
+        payload: Уже сериализованные данные (encode_json(data))
+
+    Returns:
+        int: Номер опубликованной версии
+
+    Raises:
+        SnapshotError: Если не удалось опубликовать снимок
+    """
+    path = Path(path)
+    if payload is None:
+        payload = encode_json(data)
+
+    with _publish_lock:
+        try:
+            version = current_version(path) + 1
+            target = version_path(path, version)
+            write_atomic(target, payload)
+
+            # Публикуемый файл — тот же снимок для читателей без поддержки версий
+            link_tmp = path.with_name(f".{path.name}.{os.getpid()}.link")
+            link_tmp.unlink(missing_ok=True)
+            try:
+                os.link(target, link_tmp)
+                os.replace(link_tmp, path)
+            except OSError:
+                link_tmp.unlink(missing_ok=True)
+                write_atomic(path, payload)
+
+            pointer = {
+                'version': version,
+                'file': target.relative_to(path.parent).as_posix(),
+                'published_at': datetime.now().isoformat()
+            }
+            write_atomic(pointer_path(path), orjson.dumps(pointer))
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to publish snapshot {path}: {e}")
+            raise SnapshotError(f"Failed to publish snapshot: {e}")
+
+        _prune_versions(path, version)
+
+    logger.debug(f"Published snapshot {path} v{version} ({len(payload) / 1024:.0f} KB)")
+    return version
+
+
+def _prune_versions(path: Path, version: int) -> None:
+    """Удалить версии старше KEEP_VERSIONS последних."""
+    for old in (path.parent / SNAPSHOTS_DIR_NAME).glob(f"{path.stem}.*{path.suffix}"):
+        try:
+            old_version = int(old.name[len(path.stem) + 1:len(old.name) - len(path.suffix)])
+        except ValueError:
+            continue
+        if old_version <= version - KEEP_VERSIONS:
+            old.unlink(missing_ok=True)
+
+
+# Разобранные снимки: путь -> (версия, данные)
+_snapshots: Dict[Path, Tuple[int, Dict[str, Any]]] = {}
+_snapshots_lock = threading.Lock()
+
+
+def read_snapshot(path: str | Path) -> Snapshot:
+    """
+    Прочитать текущий снимок.
+
+    Читается только маленький указатель версии; пока версия не
+    изменилась, возвращаются уже разобранные данные без повторного
+    парсинга. Данные общие для всех читателей — их нельзя изменять.
+    Файлы без указателя (снимки не публиковались) читаются целиком.
+
+    Args:
+        path: Путь к публикуемому файлу
+
+    Returns:
+        Snapshot: Версия (0 для файла без указателя) и данные
+
+    Raises:
+        SnapshotError: Если снимка нет или его не удалось прочитать
+    """
+    path = Path(path)
+
+    for _ in range(2):
+        try:
+            pointer = _read_pointer(path)
+            if pointer is None:
+                return Snapshot(0, orjson.loads(path.read_bytes()))
+
+            version = int(pointer['version'])
+            with _snapshots_lock:
+                cached = _snapshots.get(path)
+                if cached and cached[0] == version:
+                    return Snapshot(version, cached[1])
+
+            data = orjson.loads((path.parent / pointer['file']).read_bytes())
+        except FileNotFoundError as e:
+            # Версию могли удалить между чтением указателя и файла — читаем указатель заново
+            error = e
+            continue
+        except (OSError, ValueError, KeyError) as e:
+            raise SnapshotError(f"Failed to read snapshot {path}: {e}")
+
+        with _snapshots_lock:
+            current = _snapshots.get(path)
+            if current is None or current[0] < version:
+                _snapshots[path] = (version, data)
+
+        logger.debug(f"Loaded snapshot {path} v{version}")
+        return Snapshot(version, data)
+
+    raise SnapshotError(f"Snapshot not found: {error}")
@@ -0,0 +1,243 @@
+"""Отложенная (write-behind) пакетная запись артефактов тикеров в фоновом потоке."""
+
+import atexit
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+
+# Пакетный писатель вида: {symbol: payload} -> None
+BatchWriter = Callable[[Dict[str, Any]], None]
+
+
+class WriteBehindError(Exception):
+    """Ошибка очереди отложенной записи."""
+    pass
+
+
+@dataclass
+class WriteBehindStats:
+    """Статистика очереди отложенной записи."""
+    submitted: int = 0
+    coalesced: int = 0
+    written: int = 0
+    failed: int = 0
+    batches: int = 0
+    depth: int = 0
+    max_depth: int = 0
+    last_flush_ms: float = 0.0
+    max_flush_ms: float = 0.0
+    total_flush_ms: float = 0.0
+
+    @property
+    def avg_flush_ms(self) -> float:
+        """Средняя длительность записи пакета."""
+        return self.total_flush_ms / self.batches if self.batches else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'avg_flush_ms': round(self.avg_flush_ms, 2)}
+
+
+class WriteBehindQueue:
+    """
+    Очередь отложенной записи артефактов по тикерам.
+
+    Артефакт ставится в очередь под ключом (вид, тикер); новая запись
+    с тем же ключом до сброса заменяет предыдущую. Фоновый поток
+    забирает накопленное пакетом и передаёт писателю вида все тикеры
+    сразу, так что загрузка и расчёт не ждут диска. Очередь
+    ограничена: при max_pending ожидающих записей submit ждёт
+    освобождения места.
+
+    Ошибка писателя не останавливает очередь: пакет учитывается
+    в failed, ошибка пишется в лог.
+    """
+
+    def __init__(
+        self,
+        writers: Dict[str, BatchWriter],
+        flush_interval_sec: float = 0.5,
+        max_batch: int = 32,
+        max_pending: int = 256,
+        name: str = "write-behind"
+    ):
+        """
+        Инициализация очереди.
+
+        Args:
+            writers: Пакетные писатели по видам артефактов
+            flush_interval_sec: Сколько ждать накопления пакета
+            max_batch: Размер пакета, при котором запись начинается сразу
+            max_pending: Максимум ожидающих записей (дальше submit ждёт)
+            name: Имя фонового потока
+        """
+        self.writers = dict(writers)
+        self.flush_interval_sec = flush_interval_sec
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.name = name
+
+        self._pending: Dict[Tuple[str, str], Any] = {}
+        self._in_flight = 0
+        self._flushing = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats = WriteBehindStats()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'WriteBehindQueue':
+        """Запустить фоновый поток (очередь сбрасывается и при завершении процесса)."""
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+        return self
+
+    def submit(self, kind: str, symbol: str, payload: Any) -> None:
+        """
+        Поставить артефакт в очередь.
+
+        Args:
+            kind: Вид артефакта (ключ в writers)
+            symbol: Тикер
+            payload: Данные для писателя
+
+        Raises:
+            WriteBehindError: Если вид неизвестен или очередь закрыта
+        """
+        if kind not in self.writers:
+            raise WriteBehindError(f"Unknown artifact kind: {kind}")
+
+        with self._cond:
+            while len(self._pending) >= self.max_pending and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                raise WriteBehindError("Write-behind queue is closed")
+
+            key = (kind, symbol)
+            if key in self._pending:
+                self._stats.coalesced += 1
+            self._pending[key] = payload
+            self._stats.submitted += 1
+            self._stats.depth = len(self._pending)
+            self._stats.max_depth = max(self._stats.max_depth, self._stats.depth)
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Дождаться записи всего, что поставлено в очередь.
+
+        Args:
+            timeout: Максимальное ожидание в секундах (None — без ограничения)
+
+        Returns:
+            bool: True, если всё записано
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            # Фоновый поток не ждёт накопления пакета, пока кто-то ждёт сброса
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                return self._wait_written(deadline)
+            finally:
+                self._flushing -= 1
+
+    def _wait_written(self, deadline: Optional[float]) -> bool:
+        """Ждать, пока очередь опустеет (вызывается под блокировкой)."""
+        while self._pending or self._in_flight:
+            if self._thread is None:
+                # Поток не запущен — пишем в вызывающем потоке
+                self._cond.release()
+                try:
+                    self._write_batch()
+                finally:
+                    self._cond.acquire()
+                continue
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Записать оставшееся и остановить фоновый поток.
+
+        Args:
+            timeout: Максимальное ожидание записи
+        """
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            atexit.unregister(self.close)
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика: глубина очереди, пакеты, длительность записи."""
+        with self._cond:
+            return self._stats.to_dict()
+
+    def _run(self) -> None:
+        """Цикл фонового потока: ждать пакет, записать, повторить."""
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+
+                # Даём пакету накопиться, если он ещё мал
+                deadline = time.monotonic() + self.flush_interval_sec
+                while len(self._pending) < self.max_batch and not self._closed and not self._flushing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+            self._write_batch()
+
+    def _write_batch(self) -> None:
+        """Забрать накопленное и записать пакетами по видам."""
+        with self._cond:
+            batch, self._pending = self._pending, {}
+            self._in_flight += len(batch)
+            self._stats.depth = 0
+            self._cond.notify_all()
+
+        if not batch:
+            return
+
+        by_kind: Dict[str, Dict[str, Any]] = {}
+        for (kind, symbol), payload in batch.items():
+            by_kind.setdefault(kind, {})[symbol] = payload
+
+        started = time.perf_counter()
+        written = failed = 0
+        for kind, items in by_kind.items():
+            try:
+                self.writers[kind](items)
+                written += len(items)
+            except Exception as e:
+                failed += len(items)
+                logger.error(f"Write-behind {kind} batch of {len(items)} failed: {e}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._cond:
+            self._in_flight -= len(batch)
+            self._stats.written += written
+            self._stats.failed += failed
+            self._stats.batches += 1
+            self._stats.last_flush_ms = elapsed_ms
+            self._stats.max_flush_ms = max(self._stats.max_flush_ms, elapsed_ms)
+            self._stats.total_flush_ms += elapsed_ms
+            self._cond.notify_all()
+
+        logger.debug(f"Write-behind flushed {len(batch)} artifacts in {elapsed_ms:.1f} ms")
@@ -11,8 +11,10 @@ if __name__ == "__main__":
     # Создаём планировщик (но не запускаем)
     scheduler = DailyJobScheduler()
     
-    # Выполняем задачу один раз
-    success = scheduler.run_once()
+    # Дозавершаем прерванный прогон, если он есть, иначе выполняем задачу один раз
+    success = scheduler.resume_incomplete_run()
+    if success is None:
+        success = scheduler.run_once()
     
     if success:
         logger.info("=" * 80)
@@ -278,28 +278,41 @@ async function runJobNow() {
         return;
     }
     
+    const button = event.target;
     try {
-        const button = event.target;
         button.disabled = true;
         button.textContent = '⏳ Генерация...';
         
+        // Задача выполняется в фоне: получаем её id и опрашиваем статус
         const response = await fetch('/scheduler/run-now', { method: 'POST' });
         const data = await response.json();
+        if (!data.ok) {
+            throw new Error(data.error);
+        }
+        
+        let job = data.data;
+        while (job.status === 'queued' || job.status === 'running') {
+            if (job.progress) {
+                button.textContent = `⏳ ${job.progress.done}/${job.progress.total}`;
+            }
+            await new Promise(resolve => setTimeout(resolve, 2000));
+            job = (await (await fetch(`/scheduler/jobs/${job.id}`)).json()).data;
+        }
         
-        if (data.ok) {
+        if (job.status === 'succeeded') {
             showSuccess('Отчёт успешно сгенерирован!');
             // Перезагружаем данные
             setTimeout(() => loadReport(), 1000);
         } else {
-            showError('Ошибка генерации: ' + data.error);
+            showError('Ошибка генерации: ' + (job.error || job.status));
         }
         
-        button.disabled = false;
-        button.textContent = '▶️ Запустить сейчас';
-        
     } catch (error) {
         console.error('Error running job:', error);
         showError('Ошибка запуска задачи');
+    } finally {
+        button.disabled = false;
+        button.textContent = '▶️ Запустить сейчас';
     }
 }
 
@@ -0,0 +1,122 @@
+"""Тесты для встроенной SQL-аналитики."""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+pytest.importorskip("duckdb")
+
+from app.store.analytics import AnalyticsEngine, AnalyticsError
+from app.store.history import HistoryStore
+from app.store.io import save_portfolio
+from app.store.partitioned import PartitionedCandleStore
+
+
+def make_candles(periods: int, base: float) -> pd.DataFrame:
+    """Создать дневные свечи."""
+    dates = pd.date_range('2025-01-01', periods=periods, freq='D')
+    close = base + np.arange(periods, dtype=float)
+    return pd.DataFrame({
+        'open': close,
+        'high': close + 1,
+        'low': close - 1,
+        'close': close,
+        'volume': np.full(periods, 1000),
+        'begin': dates,
+        'end': dates
+    })
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Создать движок над заполненными хранилищами."""
+    store = PartitionedCandleStore(tmp_path / 'raw')
+    store.append('SBER', make_candles(60, 100.0))
+    store.append('GAZP', make_candles(30, 200.0))
+    # Перезапись последней свечи — в представлении остаётся одна, последняя
+    store.append('SBER', make_candles(60, 100.0).tail(1).assign(close=999.0))
+    
+    history = HistoryStore(tmp_path / 'history.sqlite')
+    history.record_report({
+        'generated_at': '2025-10-06T19:10:00',
+        'by_symbol': {'SBER': {'dy_pct': 12.0, 'signals': ['DY_GT_TARGET'], 'meta': {'error': None}}}
+    })
+    history.close()
+    
+    save_portfolio(
+        {'positions': [{'symbol': 'SBER', 'quantity': 100, 'avg_price': 250.0}]},
+        tmp_path / 'portfolio.json'
+    )
+    
+    return AnalyticsEngine(
+        raw_data_dir=tmp_path / 'raw',
+        history_db=tmp_path / 'history.sqlite',
+        analysis_file=tmp_path / 'analysis.json',
+        portfolio_file=tmp_path / 'portfolio.json',
+        max_rows=50,
+        batch_rows=16
+    )
+
+
+def test_candles_table(engine):
+    """Тест агрегирующего запроса по свечам."""
+    df = engine.execute(
+        'SELECT symbol, count(*) AS n, max(close) AS max_close FROM candles GROUP BY symbol ORDER BY symbol'
+    ).to_frame()
+    
+    assert df['symbol'].tolist() == ['GAZP', 'SBER']
+    assert df['n'].tolist() == [30, 60]
+    assert df['max_close'].tolist() == [229.0, 999.0]
+
+
+def test_join_history_and_portfolio(engine):
+    """Тест соединения истории отчётов с портфелем."""
+    df = engine.execute(
+        'SELECT p.symbol, p.quantity, h.dy_pct FROM portfolio p JOIN report_history h USING (symbol)'
+    ).to_frame()
+    
+    assert df.to_dict('records') == [{'symbol': 'SBER', 'quantity': 100, 'dy_pct': 12.0}]
+
+
+def test_row_limit_and_batches(engine):
+    """Тест ограничения числа строк и выдачи пачками."""
+    result = engine.execute('SELECT * FROM candles', limit=1000)
+    batches = list(result.batches())
+    
+    assert result.rows == 50
+    assert result.truncated is True
+    assert all(batch.num_rows <= 16 for batch in batches)
+    
+    result = engine.execute('SELECT * FROM candles WHERE symbol = \'GAZP\'')
+    assert len(result.to_frame()) == 30
+    assert result.truncated is False
+
+
+@pytest.mark.parametrize('sql', [
+    "CREATE TABLE x AS SELECT 1",
+    "SELECT 1; SELECT 2",
+    "SET lock_configuration = false",
+    "COPY (SELECT 1) TO '/tmp/out.csv'",
+])
+def test_only_select_allowed(engine, sql):
+    """Тест: разрешён только один SELECT."""
+    with pytest.raises(AnalyticsError):
+        engine.execute(sql)
+
+
+def test_file_access_restricted(engine):
+    """Тест: чтение файлов вне хранилища свечей запрещено."""
+    with pytest.raises(AnalyticsError):
+        engine.execute("SELECT * FROM read_csv('/etc/hostname')").to_frame()
+
+
+def test_timeout(engine):
+    """Тест прерывания запроса по таймауту."""
+    engine.timeout_sec = 0.2
+    
+    with pytest.raises(AnalyticsError, match='timed out'):
+        engine.execute('SELECT count(*) FROM range(1000000000) a, range(1000) b').to_frame()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
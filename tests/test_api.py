@@ -4,6 +4,7 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, Mock
 from datetime import datetime
+import pandas as pd
 
 from app.api.server import app
 from app.models import Portfolio, Position, PositionType
@@ -84,6 +85,36 @@ def test_get_report_not_found(client):
     assert data["error"] is not None
 
 
+@patch('app.api.server.get_config')
+def test_get_ranges(mock_get_config, client, tmp_path):
+    """Тест запроса диапазонов по произвольному окну."""
+    from app.store.io import save_candles
+    
+    dates = pd.date_range('2025-01-01', periods=100, freq='D')
+    candles = pd.DataFrame({
+        'high': [100.0 + i for i in range(100)],
+        'low': [50.0 + i for i in range(100)],
+        'begin': dates
+    })
+    save_candles('SBER', candles, base_dir=tmp_path)
+    
+    config = Mock()
+    config.universe = [Mock(symbol='SBER'), Mock(symbol='GAZP')]
+    config.output.raw_data_dir = str(tmp_path)
+    mock_get_config.return_value = config
+    
+    response = client.get("/ranges", params={"start": "2025-02-01", "end": "2025-02-28"})
+    data = response.json()
+    
+    assert data["ok"] is True
+    assert data["data"]["items"]["SBER"] == {"high": 100.0 + 58, "low": 50.0 + 31}
+    assert data["data"]["items"]["GAZP"] is None
+    
+    response = client.get("/ranges", params={"weeks": 1, "symbols": ["SBER"]})
+    items = response.json()["data"]["items"]
+    assert items["SBER"] == {"high": 199.0, "low": 50.0 + 92}
+
+
 @patch('app.api.server.save_portfolio')
 def test_save_portfolio(mock_save, client):
     """Тест сохранения портфеля."""
@@ -197,6 +228,237 @@ def test_get_report_summary(mock_load, client):
     assert data["data"]["successful"] == 2
 
 
+@patch('app.api.server.get_config')
+def test_get_report_summary_hot_cache(mock_get_config, client, tmp_path):
+    """Тест: сводка считается по таблице отчёта из горячего кэша."""
+    from app.store.io import save_analysis_report
+    from app.store.report_binary import write_report_binary
+    
+    report = {
+        "generated_at": "2025-10-06T19:10:00",
+        "universe": ["SBER", "GAZP", "LKOH"],
+        "by_symbol": {
+            "SBER": {"dy_pct": 12.0, "signals": ["DY_GT_TARGET"], "meta": {"error": None}},
+            "GAZP": {"dy_pct": 9.0, "signals": [], "meta": {"error": None}},
+            "LKOH": {"dy_pct": None, "signals": [], "meta": {"error": "timeout"}}
+        }
+    }
+    analysis_file = tmp_path / "analysis.json"
+    version = save_analysis_report(report, analysis_file)
+    write_report_binary(report, analysis_file, version)
+    
+    config = Mock()
+    config.output.analysis_file = str(analysis_file)
+    config.dividend_target_pct = 8.0
+    mock_get_config.return_value = config
+    
+    with patch('app.api.server.load_analysis_report') as mock_load:
+        response = client.get("/report/summary")
+        assert not mock_load.called
+    
+    data = response.json()["data"]
+    assert data["generated_at"] == "2025-10-06T19:10:00"
+    assert data["total_symbols"] == 3
+    assert data["successful"] == 2
+    assert data["failed"] == 1
+    assert data["high_dividend_tickers"] == [
+        {"symbol": "SBER", "dy_pct": 12.0},
+        {"symbol": "GAZP", "dy_pct": 9.0}
+    ]
+    assert data["tickers_with_signals"] == 1
+    assert data["total_signals"] == 1
+
+
+@patch('app.api.server.get_config')
+def test_get_live_report(mock_get_config, client, tmp_path):
+    """Тест: во время прогона отдаётся частичный отчёт, после — полный."""
+    from app.store.io import save_analysis_report
+    from app.store.partial import get_partial_report
+    
+    analysis_file = tmp_path / "analysis.json"
+    config = Mock()
+    config.output.analysis_file = str(analysis_file)
+    mock_get_config.return_value = config
+    
+    partial = get_partial_report(str(analysis_file))
+    partial.start(["SBER", "GAZP"])
+    partial.publish("SBER", {"price": 290.5, "meta": {"error": None}})
+    
+    data = client.get("/report/live").json()["data"]
+    assert data["complete"] is False
+    assert data["progress"] == {"done": 1, "total": 2, "pct": 50.0}
+    assert list(data["by_symbol"]) == ["SBER"]
+    
+    report = {
+        "generated_at": "2025-10-06T19:10:00",
+        "universe": ["SBER", "GAZP"],
+        "by_symbol": {"SBER": {"price": 290.5}, "GAZP": {"price": 130.1}}
+    }
+    save_analysis_report(report, analysis_file)
+    partial.finish()
+    
+    data = client.get("/report/live").json()["data"]
+    assert data["complete"] is True
+    assert data["progress"]["done"] == 2
+    assert data["generated_at"] == "2025-10-06T19:10:00"
+
+
+@patch('app.api.server.get_config')
+def test_get_metric_history(mock_get_config, client, tmp_path):
+    """Тест запроса истории метрик."""
+    from app.store.history import get_history_store
+    
+    db_path = tmp_path / "history.sqlite"
+    get_history_store(db_path).record_report({
+        "generated_at": "2025-10-06T19:10:00",
+        "by_symbol": {"SBER": {"dy_pct": 12.0, "signals": ["DY_GT_TARGET"], "meta": {"error": None}}}
+    })
+    
+    config = Mock()
+    config.output.history_db = str(db_path)
+    mock_get_config.return_value = config
+    
+    response = client.get("/history/metrics", params={"symbols": ["SBER"], "fields": ["dy_pct", "signals"]})
+    data = response.json()
+    
+    assert data["ok"] is True
+    assert data["data"]["items"]["SBER"] == [
+        {"date": "2025-10-06", "dy_pct": 12.0, "signals": ["DY_GT_TARGET"]}
+    ]
+    
+    response = client.get("/history/metrics", params={"symbols": ["SBER"], "fields": ["bogus"]})
+    assert response.json()["ok"] is False
+
+
+@patch('app.api.server.get_config')
+def test_analytics_sql(mock_get_config, client, tmp_path):
+    """Тест потокового SQL запроса."""
+    pytest.importorskip("duckdb")
+    import orjson
+    
+    config = Mock()
+    config.output.raw_data_dir = str(tmp_path / "raw")
+    config.output.history_db = str(tmp_path / "history.sqlite")
+    config.output.analysis_file = str(tmp_path / "analysis.json")
+    config.analytics.max_rows = 3
+    config.analytics.timeout_sec = 5.0
+    config.analytics.batch_rows = 2
+    mock_get_config.return_value = config
+    
+    response = client.post("/analytics/sql", json={"sql": "SELECT range AS n, range * 1.5 AS x FROM range(10)"})
+    lines = [orjson.loads(line) for line in response.text.splitlines()]
+    
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert lines[0] == {"columns": ["n", "x"]}
+    assert lines[1:4] == [[0, 0.0], [1, 1.5], [2, 3.0]]
+    assert lines[-1] == {"rows": 3, "truncated": True}
+    
+    response = client.post("/analytics/sql", json={"sql": "DROP TABLE candles"})
+    assert response.status_code == 400
+    assert response.json()["ok"] is False
+
+
+def test_event_history_range_returns_newest(client, tmp_path):
+    """Тест: выборка по интервалу отдаёт последние limit сигналов, новые сверху."""
+    from app.predictor.event_log import EventLog
+    
+    events_path = tmp_path / 'events'
+    log = EventLog(events_path)
+    for day in range(1, 11):
+        log.append({'signal_level': 'LOW', 'reason': f'сигнал {day}', 'timestamp': datetime(2025, 9, day, 12).isoformat()})
+    
+    with patch('app.predictor.config.PredictorConfig.load', return_value=Mock(events_log_path=events_path)):
+        response = client.get("/predictor/history", params={"limit": 3, "start": "2025-09-01T00:00:00"})
+    
+    items = response.json()["data"]["items"]
+    assert [item['reason'] for item in items] == ['сигнал 10', 'сигнал 9', 'сигнал 8']
+
+
+@patch('app.api.server.get_config')
+def test_get_run_ledger(mock_get_config, client, tmp_path):
+    """Тест запроса журнала прогонов."""
+    from app.store.run_ledger import append_run
+    
+    ledger = tmp_path / "run_ledger.jsonl"
+    append_run(ledger, {"run_id": "a", "started_at": "2025-10-05T19:10:00", "duration_sec": 250.0})
+    append_run(ledger, {"run_id": "b", "started_at": "2025-10-06T19:10:00", "duration_sec": 240.0})
+    
+    config = Mock()
+    config.output.run_ledger = str(ledger)
+    mock_get_config.return_value = config
+    
+    data = client.get("/runs/ledger").json()
+    assert data["ok"] is True
+    assert [row["run_id"] for row in data["data"]["items"]] == ["a", "b"]
+    
+    data = client.get("/runs/ledger", params={"since": "2025-10-06"}).json()
+    assert [row["run_id"] for row in data["data"]["items"]] == ["b"]
+    
+    assert client.get("/runs/ledger", params={"since": "bogus"}).json()["ok"] is False
+
+
+@patch('app.api.server.get_config')
+def test_get_report_diff(mock_get_config, client, tmp_path):
+    """Тест запроса изменений отчёта: сохранённых и относительно даты."""
+    from app.process.diff import diff_path
+    from app.store.io import save_analysis_report, save_daily_report, save_json
+    
+    analysis_file = tmp_path / "analysis.json"
+    config = Mock()
+    config.output.analysis_file = str(analysis_file)
+    config.output.reports_dir = str(tmp_path / "reports")
+    mock_get_config.return_value = config
+    
+    assert client.get("/report/diff").json()["ok"] is False
+    
+    save_json(diff_path(analysis_file), {
+        "added": ["LKOH"],
+        "removed": [],
+        "changes": {"SBER": {"signals_added": ["DY_GT_TARGET"]}, "GAZP": {"status": "failing", "error": "Timeout"}},
+        "summary": {"changed": 2}
+    })
+    data = client.get("/report/diff", params={"symbols": ["SBER"]}).json()["data"]
+    assert data["changes"] == {"SBER": {"signals_added": ["DY_GT_TARGET"]}}
+    assert data["added"] == []
+    
+    save_daily_report({
+        "generated_at": "2025-10-01T19:10:00",
+        "by_symbol": {"SBER": {"price": 280.0, "sma_200": 285.0, "signals": [], "meta": {"error": None}}}
+    }, date=datetime(2025, 10, 1), reports_dir=config.output.reports_dir)
+    save_analysis_report({
+        "generated_at": "2025-10-06T19:10:00",
+        "universe": ["SBER"],
+        "by_symbol": {"SBER": {"price": 290.0, "sma_200": 286.0, "signals": [], "meta": {"error": None}}}
+    }, analysis_file)
+    
+    data = client.get("/report/diff", params={"base": "2025-10-01"}).json()["data"]
+    assert data["previous_generated_at"] == "2025-10-01T19:10:00"
+    assert data["changes"] == {"SBER": {"sma200_cross": "up"}}
+    
+    assert client.get("/report/diff", params={"base": "2025-09-01"}).json()["ok"] is False
+
+
+@patch('app.api.server.get_config')
+def test_get_report_intraday(mock_get_config, client, tmp_path):
+    """Тест запроса внутридневной сводки."""
+    from app.store.io import save_json
+    
+    config = Mock()
+    config.refresh.dir = str(tmp_path / "refresh")
+    mock_get_config.return_value = config
+    
+    assert client.get("/report/intraday").json()["ok"] is False
+    
+    save_json(tmp_path / "refresh" / "intraday.json", {
+        "generated_at": "2025-10-06T11:05:00",
+        "by_symbol": {"SBER": {"price": 291.0, "dy_pct": 11.5}, "GAZP": {"price": 120.0, "dy_pct": None}}
+    })
+    save_json(tmp_path / "refresh" / "state.json", {"quotes": {"updated_at": "2025-10-06T11:05:00", "symbols": 2}})
+    
+    data = client.get("/report/intraday", params={"symbols": ["SBER"]}).json()["data"]
+    assert data["by_symbol"] == {"SBER": {"price": 291.0, "dy_pct": 11.5}}
+    assert data["refresh"]["quotes"]["symbols"] == 2
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
-
@@ -0,0 +1,105 @@
+"""Тесты для компактного представления свечей."""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.ingest.candles import CompactCandles, MemoryBudget, compact_prices
+
+
+@pytest.fixture
+def candles():
+    """Создать тестовые свечи с ценами в копейках."""
+    n = 400
+    close = np.round(250 + np.sin(np.arange(n)) * 10, 2)
+    dates = pd.date_range('2025-01-01 10:00', periods=n, freq='h')
+    return pd.DataFrame({
+        'open': close,
+        'high': close + 1.5,
+        'low': close - 1.25,
+        'close': close,
+        'volume': np.arange(n) * 100,
+        'begin': dates,
+        'end': dates + pd.Timedelta(minutes=59, seconds=59)
+    })
+
+
+def test_prices_compacted_to_float32(candles):
+    """Тест: цены с шагом 0.01 хранятся в float32 без потерь."""
+    compact = CompactCandles.from_frame(candles)
+    
+    for col in ('open', 'high', 'low', 'close'):
+        assert compact[col].dtype == np.float32
+        restored = np.round(compact[col].astype(np.float64), 2)
+        assert np.array_equal(restored, np.round(candles[col].to_numpy(), 2))
+    
+    assert compact['volume'].dtype == np.int64
+    assert 'end' not in compact
+
+
+def test_precise_prices_stay_float64():
+    """Тест: цены, не представимые в float32, остаются float64."""
+    values = np.array([0.0123456, 12345.678901, 1.5])
+    assert compact_prices(values).dtype == np.float64
+    
+    assert compact_prices(np.array([285.5, 290.25, 0.001])).dtype == np.float32
+
+
+def test_compact_smaller_than_frame(candles):
+    """Тест: компактное представление занимает меньше памяти."""
+    compact = CompactCandles.from_frame(candles)
+    frame_bytes = candles.memory_usage(index=False, deep=True).sum()
+    
+    assert compact.nbytes < frame_bytes * 0.6
+
+
+def test_to_frame_roundtrip(candles):
+    """Тест обратного преобразования в DataFrame."""
+    frame = CompactCandles.from_frame(candles).to_frame()
+    
+    assert len(frame) == len(candles)
+    assert frame['close'].dtype == np.float64
+    assert (frame['begin'] == candles['begin']).all()
+
+
+def test_column_subset(candles):
+    """Тест сохранения только нужных колонок."""
+    compact = CompactCandles.from_frame(candles, columns=('close', 'volume'))
+    
+    assert set(compact.columns) == {'close', 'volume'}
+    assert len(compact) == len(candles)
+
+
+def test_volume_with_missing_values(candles):
+    """Тест: пропуск объёма остаётся NaN, а не превращается в int64 минимум."""
+    assert CompactCandles.from_frame(candles)['volume'].dtype == np.int64
+    
+    candles = candles.copy()
+    candles.loc[3, 'volume'] = np.nan
+    volume = CompactCandles.from_frame(candles)['volume']
+    
+    assert volume.dtype == np.float64
+    assert np.isnan(volume[3])
+    assert (volume[~np.isnan(volume)] >= 0).all()
+
+
+def test_memory_budget():
+    """Тест учёта памяти."""
+    budget = MemoryBudget(limit_mb=1)
+    
+    budget.add(600 * 1024)
+    assert not budget.exceeded
+    
+    budget.add(600 * 1024)
+    assert budget.exceeded
+    
+    budget.release()
+    assert budget.used_bytes == 0
+    assert budget.peak_bytes == 1200 * 1024
+    assert budget.flushes == 1
+    
+    assert not MemoryBudget().exceeded
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,69 @@
+"""Тесты контрольных точек прогона."""
+
+from datetime import date
+
+from app.store.checkpoint import RunCheckpoint, find_incomplete_run
+
+
+def test_record_and_complete(tmp_path):
+    """Тест: записанные тикеры читаются обратно, finish удаляет прогон."""
+    checkpoint = RunCheckpoint.create(tmp_path, ['SBER', 'GAZP'], options={'incremental': True})
+    checkpoint.record_batch({'SBER': {'price': 290.5, 'meta': {'error': None}}})
+
+    loaded = RunCheckpoint.load(checkpoint.run_dir)
+    assert loaded.run_id == checkpoint.run_id
+    assert loaded.universe == ['SBER', 'GAZP']
+    assert loaded.options == {'incremental': True}
+    assert loaded.completed() == {'SBER': {'price': 290.5, 'meta': {'error': None}}}
+
+    checkpoint.finish()
+    assert not checkpoint.run_dir.exists()
+    assert find_incomplete_run(tmp_path) is None
+
+
+def test_find_incomplete_run(tmp_path):
+    """Тест: возобновляется последний прогон текущего дня, прочие удаляются."""
+    assert find_incomplete_run(tmp_path / 'missing') is None
+
+    first = RunCheckpoint.create(tmp_path, ['SBER'])
+    second = RunCheckpoint.create(tmp_path, ['SBER', 'GAZP'])
+    (tmp_path / 'broken').mkdir()
+    # Процессы прогонов завершились, не дойдя до публикации
+    first.release()
+    second.release()
+
+    found = find_incomplete_run(tmp_path)
+    assert found.run_id == max(first.run_id, second.run_id)
+    assert [p.name for p in tmp_path.iterdir()] == [found.run_id]
+
+    # На следующий день прогон уже неактуален
+    found.release()
+    assert find_incomplete_run(tmp_path, today=date(2100, 1, 1)) is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_find_incomplete_run_skips_live_run(tmp_path):
+    """Тест: прогон, который ещё ведёт владелец, не возобновляется и не удаляется."""
+    live = RunCheckpoint.create(tmp_path, ['SBER'])
+
+    assert find_incomplete_run(tmp_path) is None
+    assert find_incomplete_run(tmp_path, today=date(2100, 1, 1)) is None
+    assert live.run_dir.exists()
+
+    # Возобновлённый прогон захвачен: второй поиск его не отдаёт
+    live.release()
+    found = find_incomplete_run(tmp_path)
+    assert found.run_id == live.run_id
+    assert find_incomplete_run(tmp_path) is None
+
+    found.release()
+    assert find_incomplete_run(tmp_path).run_id == live.run_id
+
+
+def test_unreadable_symbol_skipped(tmp_path):
+    """Тест: повреждённый файл тикера не мешает возобновлению."""
+    checkpoint = RunCheckpoint.create(tmp_path, ['SBER', 'GAZP'])
+    checkpoint.record_batch({'SBER': {'price': 290.5}})
+    (checkpoint.symbols_dir / 'GAZP.json').write_bytes(b'{"price": 13')
+
+    assert list(checkpoint.completed()) == ['SBER']
@@ -0,0 +1,75 @@
+"""Тесты изменений отчёта относительно предыдущего."""
+
+from app.process.diff import diff_path, diff_reports, diff_symbol
+
+
+def entry(price=100.0, sma_200=90.0, dy_pct=8.0, signals=None, error=None, stale=False):
+    return {
+        'price': price,
+        'sma_200': sma_200,
+        'dy_pct': dy_pct,
+        'signals': signals or [],
+        'meta': {'error': error, 'stale': stale}
+    }
+
+
+def test_diff_symbol():
+    """Тест: сигналы, сдвиг dy_pct, пересечение SMA200, ошибки."""
+    assert diff_symbol(entry(), entry()) == {}
+    assert diff_symbol(entry(dy_pct=8.0), entry(dy_pct=8.05)) == {}
+
+    change = diff_symbol(
+        entry(price=100.0, dy_pct=8.0, signals=['PRICE_ABOVE_SMA200', 'VOL_SPIKE']),
+        entry(price=85.0, dy_pct=9.4, signals=['PRICE_BELOW_SMA200', 'VOL_SPIKE'])
+    )
+    assert change == {
+        'signals_added': ['PRICE_BELOW_SMA200'],
+        'signals_removed': ['PRICE_ABOVE_SMA200'],
+        'dy_pct': [8.0, 9.4],
+        'sma200_cross': 'down'
+    }
+
+    assert diff_symbol(entry(), entry(price=None, error="Connection error")) == {
+        'status': 'failing',
+        'error': "Connection error"
+    }
+    assert diff_symbol(entry(error="Connection error"), entry(error="Timeout")) == {}
+    assert diff_symbol(entry(price=None, sma_200=None, dy_pct=None, error="Timeout"), entry()) == {
+        'status': 'recovered',
+        'dy_pct': [None, 8.0]
+    }
+
+
+def test_diff_reports():
+    """Тест: добавленные и удалённые тикеры, stale не сравниваются, сводка."""
+    previous = {
+        'generated_at': '2025-10-05T19:10:00',
+        'by_symbol': {'SBER': entry(), 'GAZP': entry(), 'MTSS': entry()}
+    }
+    current = {
+        'generated_at': '2025-10-06T19:10:00',
+        'by_symbol': {
+            'SBER': entry(signals=['DY_GT_TARGET']),
+            'GAZP': entry(price=50.0, stale=True),
+            'LKOH': entry()
+        }
+    }
+
+    diff = diff_reports(previous, current)
+
+    assert diff['generated_at'] == '2025-10-06T19:10:00'
+    assert diff['previous_generated_at'] == '2025-10-05T19:10:00'
+    assert diff['added'] == ['LKOH']
+    assert diff['removed'] == ['MTSS']
+    assert diff['changes'] == {'SBER': {'signals_added': ['DY_GT_TARGET']}}
+    assert diff['summary']['changed'] == 1
+    assert diff['summary']['signals_added'] == 1
+
+    first = diff_reports(None, current)
+    assert first['previous_generated_at'] is None
+    assert first['added'] == [] and first['changes'] == {}
+
+
+def test_diff_path():
+    """Тест: файл изменений лежит рядом с analysis.json."""
+    assert diff_path("data/analysis.json").as_posix() == "data/analysis.diff.json"
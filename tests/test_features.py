@@ -0,0 +1,140 @@
+"""Тесты для этапа расчёта признаков доходности и риска."""
+
+import math
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.process.features import compute_features, FeatureStage, FEATURE_NAMES
+
+
+def make_candles(closes, volumes=None):
+    """Создать свечи из списка цен закрытия."""
+    if volumes is None:
+        volumes = [1000] * len(closes)
+    return pd.DataFrame({'close': closes, 'volume': volumes})
+
+
+def test_returns_by_horizon():
+    """Тест доходностей по горизонтам."""
+    closes = [100.0 + i for i in range(300)]
+    features = compute_features({'SBER': make_candles(closes)})['SBER']
+    
+    last = closes[-1]
+    assert features['ret_1d_pct'] == pytest.approx((last / closes[-2] - 1) * 100, abs=1e-4)
+    assert features['ret_20d_pct'] == pytest.approx((last / closes[-21] - 1) * 100, abs=1e-4)
+    assert features['ret_250d_pct'] == pytest.approx((last / closes[-251] - 1) * 100, abs=1e-4)
+
+
+def test_short_history_gives_none():
+    """Тест: при короткой истории длинные горизонты не рассчитываются."""
+    features = compute_features({
+        'LONG': make_candles([100.0 + i for i in range(300)]),
+        'SHORT': make_candles([50.0, 51.0, 52.0, 53.0, 54.0, 55.0, 56.0])
+    })
+    
+    short = features['SHORT']
+    assert short['ret_1d_pct'] == pytest.approx((56 / 55 - 1) * 100, abs=1e-4)
+    assert short['ret_5d_pct'] == pytest.approx((56 / 51 - 1) * 100, abs=1e-4)
+    assert short['ret_20d_pct'] is None
+    assert short['ret_250d_pct'] is None
+    assert short['volatility_20d_pct'] is None
+    
+    # Длинная история не страдает от выравнивания
+    assert features['LONG']['ret_250d_pct'] is not None
+
+
+def test_risk_features():
+    """Тест волатильности, просадки и оборота."""
+    closes = [100.0, 120.0, 90.0, 110.0] * 10
+    volumes = [10] * 40
+    features = compute_features({'GAZP': make_candles(closes, volumes)})['GAZP']
+    
+    # Просадка от 120 до 90 = -25%
+    assert features['max_drawdown_250d_pct'] == pytest.approx(-25.0)
+    
+    log_returns = np.diff(np.log(closes))[-20:]
+    expected_vol = np.std(log_returns, ddof=1) * math.sqrt(252) * 100
+    assert features['volatility_20d_pct'] == pytest.approx(expected_vol, abs=1e-3)
+    
+    assert features['vol_avg_20d'] == pytest.approx(10.0)
+    assert features['adv_rub_20d'] == pytest.approx(np.mean(np.array(closes[-20:]) * 10))
+
+
+def test_hourly_candles_use_daily_horizons():
+    """Тест: часовые свечи сводятся к дневным барам, окна считаются в днях."""
+    days = pd.bdate_range('2024-01-01', periods=300)
+    hours = [10, 11, 12, 13, 14, 15, 16, 17, 18]
+    rng = np.random.default_rng(7)
+    daily_close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(days)))), 2)
+    
+    rows = []
+    for day, close in zip(days, daily_close):
+        for i, hour in enumerate(hours):
+            # Внутри дня цена дрейфует к закрытию дня, последняя свеча закрывается по нему
+            price = close * (1 + 0.01 * (len(hours) - 1 - i) / len(hours))
+            rows.append({'begin': day + pd.Timedelta(hours=hour), 'close': price, 'volume': 100})
+    hourly = pd.DataFrame(rows)
+    
+    features = compute_features({'SBER': hourly})['SBER']
+    
+    last = daily_close[-1]
+    assert features['ret_1d_pct'] == pytest.approx((last / daily_close[-2] - 1) * 100, abs=1e-3)
+    assert features['ret_20d_pct'] == pytest.approx((last / daily_close[-21] - 1) * 100, abs=1e-3)
+    assert features['ret_250d_pct'] == pytest.approx((last / daily_close[-251] - 1) * 100, abs=1e-3)
+    
+    log_returns = np.diff(np.log(daily_close))[-20:]
+    expected_vol = np.std(log_returns, ddof=1) * math.sqrt(252) * 100
+    assert features['volatility_20d_pct'] == pytest.approx(expected_vol, abs=1e-3)
+    
+    # Объём и оборот — суммы за день
+    assert features['vol_avg_20d'] == pytest.approx(900.0)
+    day_turnover = hourly.assign(value=hourly['close'] * hourly['volume']).groupby(hourly['begin'].dt.date)['value'].sum()
+    assert features['adv_rub_20d'] == pytest.approx(day_turnover.iloc[-20:].mean(), rel=1e-6)
+    
+    # Через компактные свечи этапа признаков — те же значения
+    stage = FeatureStage()
+    stage.add('SBER', hourly)
+    staged = stage.finish()['SBER']
+    assert staged['ret_20d_pct'] == pytest.approx(features['ret_20d_pct'], abs=1e-3)
+    assert staged['adv_rub_20d'] == pytest.approx(features['adv_rub_20d'], rel=1e-5)
+
+
+def test_missing_candles():
+    """Тест тикеров без свечей."""
+    features = compute_features({'SBER': None, 'GAZP': pd.DataFrame()})
+    
+    assert set(features) == {'SBER', 'GAZP'}
+    assert all(v is None for v in features['SBER'].values())
+    assert set(features['GAZP']) == set(FEATURE_NAMES)
+
+
+
+def test_feature_stage_budget_flush():
+    """Тест: расчёт пачками при превышении бюджета даёт те же признаки."""
+    rng = np.random.default_rng(1)
+    candles = {
+        f'T{i}': make_candles(
+            list(np.round(100 + np.cumsum(rng.normal(0, 1, 300)), 2)),
+            list(rng.integers(100, 1000, 300))
+        )
+        for i in range(10)
+    }
+    
+    expected = compute_features(candles)
+    
+    # Бюджет меньше объёма свечей одного тикера — расчёт после каждого добавления
+    stage = FeatureStage(memory_budget_mb=0.001)
+    for symbol, df in candles.items():
+        stage.add(symbol, df)
+    result = stage.finish()
+    
+    assert stage.budget.flushes == 10
+    for symbol in candles:
+        for name in FEATURE_NAMES:
+            assert result[symbol][name] == pytest.approx(expected[symbol][name], rel=1e-5, abs=1e-3)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,94 @@
+"""Тесты для хранилища истории метрик."""
+
+from datetime import date
+
+import pytest
+
+from app.store.history import HistoryStore
+from app.store.io import save_daily_report
+
+
+def make_report(day: int, dy_pct: float, signals=None, error=None):
+    """Создать сериализованный отчёт за день октября 2025."""
+    return {
+        "generated_at": f"2025-10-{day:02d}T19:10:00",
+        "universe": ["SBER", "GAZP"],
+        "by_symbol": {
+            "SBER": {
+                "price": 290.0 + day,
+                "dy_pct": dy_pct,
+                "signals": signals or [],
+                "features": {"ret_20d_pct": 1.5},
+                "meta": {"error": error}
+            },
+            "GAZP": {
+                "price": 120.0,
+                "dy_pct": None,
+                "signals": [],
+                "features": None,
+                "meta": {"error": None}
+            }
+        }
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Создать хранилище во временной директории."""
+    store = HistoryStore(tmp_path / "history.sqlite")
+    yield store
+    store.close()
+
+
+def test_record_and_query(store):
+    """Тест записи отчётов и запроса истории."""
+    store.record_report(make_report(1, 11.0))
+    store.record_report(make_report(2, 12.0, signals=["DY_GT_TARGET"]))
+    
+    history = store.query(["SBER"], fields=["dy_pct", "signals", "ret_20d_pct"])
+    
+    assert history["SBER"] == [
+        {"date": "2025-10-01", "dy_pct": 11.0, "signals": [], "ret_20d_pct": 1.5},
+        {"date": "2025-10-02", "dy_pct": 12.0, "signals": ["DY_GT_TARGET"], "ret_20d_pct": 1.5}
+    ]
+
+
+def test_rewrite_same_date(store):
+    """Тест: повторная запись за ту же дату заменяет строки."""
+    store.record_report(make_report(1, 11.0))
+    store.record_report(make_report(1, 13.0, error="timeout"))
+    
+    history = store.query(["SBER"], fields=["dy_pct", "error"])["SBER"]
+    
+    assert history == [{"date": "2025-10-01", "dy_pct": 13.0, "error": "timeout"}]
+
+
+def test_query_date_range(store):
+    """Тест выборки по интервалу дат и по последним N дням."""
+    for day in range(1, 11):
+        store.record_report(make_report(day, float(day)))
+    
+    window = store.query(["SBER", "LKOH"], fields=["dy_pct"], start=date(2025, 10, 3), end=date(2025, 10, 5))
+    assert [row["dy_pct"] for row in window["SBER"]] == [3.0, 4.0, 5.0]
+    assert window["LKOH"] == []
+    
+    recent = store.query(["SBER"], fields=["price"], days=2, end=date(2025, 10, 10))
+    assert [row["date"] for row in recent["SBER"]] == ["2025-10-08", "2025-10-09", "2025-10-10"]
+    
+    with pytest.raises(ValueError):
+        store.query(["SBER"], fields=["price; DROP TABLE symbol_metrics"])
+
+
+def test_import_daily_reports(tmp_path, store):
+    """Тест импорта ранее сохранённых ежедневных JSON отчётов."""
+    reports_dir = tmp_path / "reports"
+    save_daily_report(make_report(1, 11.0), date=date(2025, 10, 1), reports_dir=reports_dir)
+    save_daily_report(make_report(2, 12.0), date=date(2025, 10, 2), reports_dir=reports_dir)
+    (reports_dir / "notes.json").write_text("{}")
+    
+    assert store.import_daily_reports(reports_dir) == 2
+    assert len(store.query(["GAZP"])["GAZP"]) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,87 @@
+"""Тесты для горячего кэша Arrow IPC."""
+
+import pytest
+import pandas as pd
+
+from app.store.hot_cache import read_hot_table, report_to_table, write_hot_table
+
+
+@pytest.fixture
+def panel():
+    """Создать панель свечей."""
+    dates = pd.date_range('2025-01-01', periods=100, freq='D')
+    return pd.DataFrame({
+        'symbol': ['SBER'] * 100,
+        'begin': dates,
+        'close': [100.0 + i for i in range(100)]
+    })
+
+
+def test_write_read_roundtrip(tmp_path, panel):
+    """Тест записи и чтения через memory map."""
+    path = write_hot_table(tmp_path / 'hot' / 'candles.arrow', panel)
+    
+    table = read_hot_table(path)
+    
+    assert table.num_rows == 100
+    pd.testing.assert_frame_equal(table.to_pandas(), panel, check_dtype=False)
+    assert not list(path.parent.rglob('*.tmp'))
+
+
+def test_repeat_read_reuses_mapping(tmp_path, panel):
+    """Тест: повторное чтение возвращает ту же таблицу, пока не вышла новая версия."""
+    path = write_hot_table(tmp_path / 'candles.arrow', panel)
+    
+    first = read_hot_table(path)
+    assert read_hot_table(path) is first
+    
+    write_hot_table(path, panel.head(10))
+    
+    assert read_hot_table(path).num_rows == 10
+
+
+def test_write_keeps_mapped_version(tmp_path, panel):
+    """Тест: новая запись не заменяет отображённый файл, старые версии удаляются."""
+    path = tmp_path / 'candles.arrow'
+    # Файл прежнего формата (без версий) убирается при первой записи
+    path.write_bytes(b'legacy')
+    write_hot_table(path, panel)
+    assert not path.exists()
+    mapped = read_hot_table(path)
+    
+    for rows in (50, 20, 10):
+        write_hot_table(path, panel.head(rows))
+    
+    # Таблица, отображённая до записей, остаётся читаемой
+    assert mapped.num_rows == 100
+    assert mapped.column('close')[99].as_py() == 199.0
+    assert read_hot_table(path).num_rows == 10
+    assert sorted(p.name for p in (tmp_path / 'snapshots').iterdir()) == [
+        'candles.000002.arrow', 'candles.000003.arrow', 'candles.000004.arrow'
+    ]
+
+
+def test_read_missing(tmp_path):
+    """Тест чтения отсутствующего кэша."""
+    assert read_hot_table(tmp_path / 'missing.arrow') is None
+
+
+def test_report_to_table():
+    """Тест преобразования отчёта в таблицу."""
+    report = {
+        'generated_at': '2025-10-06T19:10:00',
+        'by_symbol': {
+            'SBER': {'price': 290.5, 'signals': ['DY_GT_TARGET'], 'meta': {'error': None}},
+            'GAZP': {'price': 120.0, 'signals': [], 'meta': {'error': 'timeout'}}
+        }
+    }
+    
+    table = report_to_table(report)
+    
+    assert table.column('symbol').to_pylist() == ['SBER', 'GAZP']
+    assert table.column('signals').to_pylist() == [['DY_GT_TARGET'], []]
+    assert table.schema.metadata[b'generated_at'] == b'2025-10-06T19:10:00'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,57 @@
+"""Тесты отпечатков входных данных для инкрементальной генерации."""
+
+from unittest.mock import Mock
+
+from app.process.incremental import config_fingerprint, load_reusable_entries, symbol_fingerprint
+from app.store.io import save_analysis_report
+
+
+QUOTE = {'price': 290.5, 'lot': 10, 'board': 'TQBR', 'last_bar_at': '2025-10-06T18:00:00'}
+
+
+def make_config(sma=(20, 50, 200), target=8.0):
+    config = Mock()
+    config.windows.sma = list(sma)
+    config.dividend_target_pct = target
+    return config
+
+
+def test_config_fingerprint():
+    """Тест: отпечаток настроек меняется вместе с окнами и целевой доходностью."""
+    base = config_fingerprint(make_config(), 400)
+
+    assert config_fingerprint(make_config(), 400) == base
+    assert config_fingerprint(make_config(sma=(20, 50)), 400) != base
+    assert config_fingerprint(make_config(target=9.0), 400) != base
+    assert config_fingerprint(make_config(), 200) != base
+
+
+def test_symbol_fingerprint():
+    """Тест: отпечаток тикера зависит от последней свечи, дивидендов и настроек."""
+    base = symbol_fingerprint(QUOTE, 25.0, 'cfg')
+
+    assert symbol_fingerprint(dict(QUOTE), 25.0, 'cfg') == base
+    assert symbol_fingerprint({**QUOTE, 'last_bar_at': '2025-10-06T19:00:00'}, 25.0, 'cfg') != base
+    assert symbol_fingerprint(QUOTE, 26.0, 'cfg') != base
+    assert symbol_fingerprint(QUOTE, 25.0, 'other') != base
+
+    # Без времени последней свечи тикер всегда пересчитывается
+    assert symbol_fingerprint({**QUOTE, 'last_bar_at': None}, 25.0, 'cfg') is None
+
+
+def test_load_reusable_entries(tmp_path):
+    """Тест: переиспользуются только успешные тикеры с отпечатком."""
+    analysis_file = tmp_path / 'analysis.json'
+    assert load_reusable_entries(analysis_file) == {}
+
+    save_analysis_report({
+        'generated_at': '2025-10-06T19:10:00',
+        'universe': ['SBER', 'GAZP', 'LKOH'],
+        'by_symbol': {
+            'SBER': {'price': 290.5, 'meta': {'error': None, 'fingerprint': 'abc'}},
+            'GAZP': {'price': None, 'meta': {'error': 'timeout', 'fingerprint': None}},
+            'LKOH': {'price': 7000.0, 'meta': {'error': None}}
+        }
+    }, analysis_file)
+
+    assert list(load_reusable_entries(analysis_file)) == ['SBER']
@@ -0,0 +1,100 @@
+"""Тесты фонового выполнения задач."""
+
+import threading
+
+import pytest
+
+from app.scheduler.jobs import (
+    JOB_CANCELLED,
+    JOB_FAILED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    JobRunner
+)
+
+
+def test_job_runner_coalesces_and_reports_progress():
+    """Тест: повторный запуск того же вида присоединяется к активной задаче."""
+    runner = JobRunner()
+    started = threading.Event()
+    release = threading.Event()
+    progress = {'done': 1, 'total': 2, 'pct': 50.0}
+
+    def target(cancel_event):
+        started.set()
+        release.wait(5)
+        return True
+
+    job, joined = runner.submit('report', target, params={'incremental': True}, progress=lambda: progress)
+    assert joined is False
+    assert started.wait(5)
+
+    same, joined = runner.submit('report', target)
+    assert joined is True
+    assert same is job
+    assert job.status == JOB_RUNNING
+    assert job.to_dict()['progress'] == progress
+    assert runner.active('report') is job
+
+    progress = {'done': 2, 'total': 2, 'pct': 100.0}
+    release.set()
+    assert job.wait(5)
+
+    data = job.to_dict()
+    assert data['status'] == JOB_SUCCEEDED
+    assert data['params'] == {'incremental': True}
+    assert data['progress']['done'] == 2
+    assert runner.active('report') is None
+
+    # После завершения запуск создаёт новую задачу
+    next_job, joined = runner.submit('report', lambda cancel_event: True)
+    assert joined is False
+    assert next_job.id != job.id
+    assert next_job.wait(5)
+    assert [item.id for item in runner.list()] == [next_job.id, job.id]
+
+
+def test_job_runner_cancel():
+    """Тест: отмена передаётся задаче через событие."""
+    runner = JobRunner()
+    started = threading.Event()
+
+    def target(cancel_event):
+        started.set()
+        cancel_event.wait(5)
+        raise RuntimeError("cancelled")
+
+    job, _ = runner.submit('report', target)
+    assert started.wait(5)
+    assert runner.cancel(job.id) is job
+    assert job.wait(5)
+    assert job.status == JOB_CANCELLED
+    assert job.to_dict()['cancel_requested'] is True
+
+    assert runner.cancel("missing") is None
+
+
+@pytest.mark.parametrize("target, error", [
+    (lambda cancel_event: False, "Job failed, check logs"),
+    (lambda cancel_event: 1 / 0, "division by zero")
+])
+def test_job_runner_failure(target, error):
+    """Тест: результат False и исключение — неуспех задачи."""
+    runner = JobRunner()
+    job, _ = runner.submit('report', target)
+    assert job.wait(5)
+    assert job.status == JOB_FAILED
+    assert job.error == error
+
+
+def test_job_runner_keeps_recent_jobs():
+    """Тест: хранятся только последние завершённые задачи."""
+    runner = JobRunner(keep_finished=2)
+    jobs = []
+    for _ in range(4):
+        job, _ = runner.submit('report', lambda cancel_event: True)
+        job.wait(5)
+        jobs.append(job)
+
+    assert runner.get(jobs[0].id) is None
+    assert runner.get(jobs[-1].id) is jobs[-1]
@@ -29,6 +29,19 @@ def test_get_quote():
     print(f"\nSBER quote: {result}")
 
 
+def test_get_quotes():
+    """Тест получения котировок одним запросом."""
+    client = MOEXClient(rate_limit_sleep=0.5)
+    
+    result = client.get_quotes(["SBER", "GAZP"])
+    
+    assert set(result) == {"SBER", "GAZP"}
+    assert result["SBER"]['price'] > 0
+    assert result["SBER"]['lot'] > 0
+    
+    print(f"\nQuotes: {result}")
+
+
 def test_get_dividends():
     """Тест получения дивидендов."""
     client = MOEXClient(rate_limit_sleep=0.5)
@@ -0,0 +1,77 @@
+"""Тесты для пула процессов расчёта метрик."""
+
+import time
+
+import pytest
+import pandas as pd
+from datetime import datetime
+
+from app.process.metrics import MetricsCalculator
+from app.process.parallel import MetricsPool
+
+
+@pytest.fixture
+def sample_candles():
+    """Создать тестовые свечи."""
+    dates = pd.date_range(end=datetime.now(), periods=300, freq='D')
+    prices = [100.0 + (i % 30) - i * 0.05 for i in range(300)]
+
+    return pd.DataFrame({
+        'open': [p * 0.99 for p in prices],
+        'high': [p * 1.02 for p in prices],
+        'low': [p * 0.98 for p in prices],
+        'close': prices,
+        'volume': [10000 + i * 100 for i in range(300)],
+        'begin': dates,
+        'end': dates
+    })
+
+
+@pytest.fixture
+def pool():
+    """Создать пул процессов."""
+    pool = MetricsPool(workers=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_matches_inline(pool, sample_candles):
+    """Тест: метрики из пула совпадают с расчётом в текущем процессе."""
+    price = float(sample_candles['close'].iloc[-1])
+
+    expected = MetricsCalculator().calculate_all_metrics(sample_candles, price, 5.0)
+    result = pool.submit(sample_candles, current_price=price, div_ttm=5.0).result(timeout=60)
+
+    assert result.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, float):
+            assert result[key] == pytest.approx(value)
+        else:
+            assert result[key] == value
+
+
+def test_pool_releases_shared_memory(pool, sample_candles):
+    """Тест освобождения разделяемой памяти после расчёта."""
+    futures = [pool.submit(sample_candles, current_price=100.0, div_ttm=0.0) for _ in range(4)]
+    for future in futures:
+        future.result(timeout=60)
+
+    # Освобождение выполняется в done-callback, который может отработать чуть позже result()
+    deadline = time.monotonic() + 5
+    while pool._segments and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert pool._segments == {}
+
+
+def test_pool_empty_candles(pool):
+    """Тест расчёта по пустым свечам."""
+    result = pool.submit(pd.DataFrame(), current_price=100.0, div_ttm=0.0).result(timeout=60)
+
+    assert result['sma_20'] is None
+    assert result['high_52w'] is None
+    assert result['signals'] == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,93 @@
+"""Тесты частичного отчёта во время прогона."""
+
+from app.store.partial import PartialReport, partial_path, read_partial
+
+
+def test_publish_and_finish(tmp_path):
+    """Тест: тикеры видны сразу после публикации, после завершения отчёт пропадает."""
+    analysis_file = tmp_path / 'analysis.json'
+    partial = PartialReport(analysis_file)
+    assert partial.snapshot() is None
+
+    partial.start(['SBER', 'GAZP', 'LKOH'])
+    partial.publish('SBER', {'price': 290.5})
+
+    snapshot = partial.snapshot()
+    assert snapshot['complete'] is False
+    assert snapshot['progress'] == {'done': 1, 'total': 3, 'pct': 33.3}
+    assert snapshot['by_symbol'] == {'SBER': {'price': 290.5}}
+
+    # Другой процесс видит то же состояние через NDJSON файл
+    assert read_partial(partial_path(analysis_file))['by_symbol'] == snapshot['by_symbol']
+
+    partial.finish()
+    assert partial.snapshot() is None
+    assert not partial_path(analysis_file).exists()
+
+
+def test_failed_run_keeps_error(tmp_path):
+    """Тест: при ошибке прогона частичный отчёт остаётся с ошибкой."""
+    partial = PartialReport(tmp_path / 'analysis.json')
+    partial.start(['SBER'])
+    partial.finish(error='MOEX unavailable')
+
+    assert partial.snapshot()['error'] == 'MOEX unavailable'
+    assert read_partial(partial.path)['error'] == 'MOEX unavailable'
+
+
+def test_foreign_run_file_is_not_truncated(tmp_path):
+    """Тест: второй процесс не перезаписывает файл живого прогона, ведёт отчёт в памяти."""
+    owner = PartialReport(tmp_path / 'analysis.json')
+    owner.start(['SBER', 'GAZP'])
+    owner.publish('SBER', {'price': 290.5})
+    before = owner.path.read_bytes()
+
+    other = PartialReport(tmp_path / 'analysis.json')
+    other.start(['LKOH'])
+    other.publish('LKOH', {'price': 7000.0})
+    assert other.snapshot()['by_symbol'] == {'LKOH': {'price': 7000.0}}
+    other.finish()
+
+    assert owner.path.read_bytes() == before
+    assert read_partial(owner.path)['by_symbol'] == {'SBER': {'price': 290.5}}
+
+
+def test_read_partial_skips_truncated_line(tmp_path):
+    """Тест: недописанная последняя строка не ломает чтение."""
+    partial = PartialReport(tmp_path / 'analysis.json')
+    partial.start(['SBER', 'GAZP'])
+    partial.publish('SBER', {'price': 290.5})
+    with open(partial.path, 'ab') as f:
+        f.write(b'{"type": "symbol", "symbol": "GA')
+
+    snapshot = read_partial(partial.path)
+    assert list(snapshot['by_symbol']) == ['SBER']
+    assert snapshot['progress']['done'] == 1
+
+
+def test_read_partial_ignores_dead_run(tmp_path):
+    """Тест: файл прогона, владелец которого не жив, не считается частичным отчётом."""
+    partial = PartialReport(tmp_path / 'analysis.json')
+    partial.start(['SBER', 'GAZP'])
+    partial.publish('SBER', {'price': 290.5})
+    assert read_partial(partial.path) is not None
+
+    # Процесс упал: завершающей записи нет, блокировка снята
+    partial._owner.release()
+    assert read_partial(partial.path) is None
+
+
+def test_read_partial_ignores_file_older_than_report(tmp_path):
+    """Тест: промежуточный файл старше analysis.json не отдаётся."""
+    import os
+
+    analysis_file = tmp_path / 'analysis.json'
+    partial = PartialReport(analysis_file)
+    partial.start(['SBER'])
+    partial.finish(error='MOEX unavailable')
+    assert read_partial(partial.path) is not None
+
+    analysis_file.write_bytes(b'{}')
+    mtime = partial.path.stat().st_mtime
+    os.utime(analysis_file, (mtime + 10, mtime + 10))
+    assert read_partial(partial.path) is None
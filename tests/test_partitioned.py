@@ -0,0 +1,186 @@
+"""Тесты для партиционированного хранилища свечей."""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.store.partitioned import PartitionedCandleStore
+from app.store.io import load_candles, load_candles_panel, save_table_parquet, write_hot_candles_panel
+
+
+def make_candles(start: str, periods: int, base: float = 100.0) -> pd.DataFrame:
+    """Создать дневные свечи."""
+    dates = pd.date_range(start, periods=periods, freq='D')
+    close = base + np.arange(periods, dtype=float)
+    return pd.DataFrame({
+        'open': close,
+        'high': close + 1,
+        'low': close - 1,
+        'close': close,
+        'volume': np.full(periods, 1000),
+        'begin': dates,
+        'end': dates
+    })
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Создать хранилище во временной директории."""
+    return PartitionedCandleStore(tmp_path)
+
+
+def test_append_writes_monthly_partitions(store):
+    """Тест: свечи раскладываются по месяцам, манифест хранит последнюю свечу."""
+    candles = make_candles('2025-01-20', 20)
+    
+    assert store.append('SBER', candles) == 20
+    
+    manifest = store.read_manifest('SBER')
+    assert manifest['last_ts'] == candles['begin'].iloc[-1].isoformat()
+    assert manifest['partitions'] == {'2025/01': 1, '2025/02': 1}
+    
+    loaded = store.read('SBER')
+    pd.testing.assert_frame_equal(loaded, candles, check_dtype=False)
+
+
+def test_append_only_new_candles(store):
+    """Тест: повторное сохранение пишет только свечи с последней сохранённой."""
+    store.append('SBER', make_candles('2025-01-01', 10))
+    
+    # Окно загрузки сдвинулось на 2 дня, последняя свеча обновилась
+    update = make_candles('2025-01-03', 10, base=102.0)
+    update.loc[update.index[7], 'close'] = 555.0
+    
+    assert store.append('SBER', update) == 3
+    assert len(store.partition_files('SBER', '2025/01')) == 2
+    
+    loaded = store.read('SBER')
+    assert len(loaded) == 12
+    assert loaded['begin'].is_unique
+    assert loaded.loc[loaded['begin'] == update['begin'].iloc[7], 'close'].item() == 555.0
+    
+    assert store.append('SBER', make_candles('2024-12-01', 5)) == 0
+
+
+def test_auto_compaction(tmp_path):
+    """Тест: при превышении порога файлы партиции сливаются."""
+    store = PartitionedCandleStore(tmp_path, compact_threshold=3)
+    for day in range(1, 6):
+        store.append('SBER', make_candles(f'2025-03-{day:02d}', 1, base=100.0 + day))
+    
+    files = store.partition_files('SBER', '2025/03')
+    assert len(files) <= 3
+    assert store.read_manifest('SBER')['partitions']['2025/03'] == len(files)
+    assert len(store.read('SBER')) == 5
+    
+    assert store.compact('SBER') == (1 if len(files) > 1 else 0)
+    assert len(store.partition_files('SBER', '2025/03')) == 1
+    assert len(store.read('SBER')) == 5
+
+
+def test_read_prunes_partitions(store):
+    """Тест: чтение по интервалу открывает только нужные партиции."""
+    store.append('SBER', make_candles('2025-01-01', 90))
+    
+    assert len(store.files('SBER', start='2025-02-10', end='2025-02-20')) == 1
+    
+    window = store.read('SBER', start='2025-02-10', end='2025-02-20', columns=['close'])
+    assert list(window.columns) == ['begin', 'close']
+    assert len(window) == 11
+    assert window['begin'].min() == pd.Timestamp('2025-02-10')
+    
+    assert store.read('GAZP') is None
+
+
+def test_legacy_file_migrated(tmp_path, store):
+    """Тест: старый единый файл читается и переносится в партиции при обновлении."""
+    legacy = make_candles('2025-01-01', 10)
+    save_table_parquet(tmp_path / 'SBER' / 'candles.parquet', legacy)
+    
+    assert len(load_candles('SBER', base_dir=tmp_path)) == 10
+    
+    store.append('SBER', make_candles('2025-01-11', 5, base=110.0))
+    
+    assert not (tmp_path / 'SBER' / 'candles.parquet').exists()
+    assert len(load_candles('SBER', base_dir=tmp_path)) == 15
+    assert len(load_candles('SBER', base_dir=tmp_path, start='2025-01-14')) == 2
+
+
+def test_scan_long_panel(tmp_path, store):
+    """Тест: скан нескольких тикеров с фильтром по дате и колонкам."""
+    store.append('SBER', make_candles('2025-01-01', 60, base=100.0))
+    store.append('GAZP', make_candles('2025-01-15', 60, base=200.0))
+    
+    panel = load_candles_panel(
+        ['SBER', 'GAZP', 'LKOH'],
+        base_dir=tmp_path,
+        start='2025-02-01',
+        end='2025-02-10',
+        columns=['close', 'volume']
+    )
+    
+    assert list(panel.columns) == ['symbol', 'begin', 'close', 'volume']
+    assert len(panel) == 20
+    assert set(panel['symbol']) == {'SBER', 'GAZP'}
+    assert panel['begin'].min() == pd.Timestamp('2025-02-01')
+    assert panel['begin'].max() == pd.Timestamp('2025-02-10')
+    
+    sber = panel[panel['symbol'] == 'SBER']
+    assert sber['close'].iloc[0] == 100.0 + 31
+
+
+def test_scan_wide_panel(store):
+    """Тест: широкая панель по одной колонке и повторы свечей."""
+    store.append('SBER', make_candles('2025-01-01', 10, base=100.0))
+    store.append('GAZP', make_candles('2025-01-05', 10, base=200.0))
+    
+    update = make_candles('2025-01-10', 2, base=100.0)
+    update['close'] = [777.0, 778.0]
+    store.append('SBER', update)
+    
+    wide = store.scan(['SBER', 'GAZP'], columns=['close'], layout='wide')
+    
+    assert sorted(wide.columns) == ['GAZP', 'SBER']
+    assert len(wide) == 14
+    assert wide.loc[pd.Timestamp('2025-01-10'), 'SBER'] == 777.0
+    assert np.isnan(wide.loc[pd.Timestamp('2025-01-01'), 'GAZP'])
+    
+    both = store.scan(['SBER'], columns=['high', 'low'], layout='wide')
+    assert both['high']['SBER'].iloc[0] == 101.0
+    
+    assert store.scan(['LKOH']).empty
+    with pytest.raises(ValueError):
+        store.scan(['SBER'], layout='diagonal')
+
+
+
+def test_panel_from_hot_cache(store, tmp_path):
+    """Тест: панель отдаётся из горячего кэша, пока манифесты не изменились."""
+    from unittest.mock import patch
+    
+    store.append('SBER', make_candles('2025-01-01', 60, base=100.0))
+    store.append('GAZP', make_candles('2025-01-15', 60, base=200.0))
+    expected = load_candles_panel(['SBER', 'GAZP'], base_dir=tmp_path, start='2025-02-01', columns=['close'])
+    expected_wide = store.scan(['SBER', 'GAZP'], start='2025-02-01', columns=['close'], layout='wide')
+    
+    write_hot_candles_panel(['SBER', 'GAZP', 'LKOH'], base_dir=tmp_path, start=pd.Timestamp('2025-01-01'))
+    
+    with patch.object(PartitionedCandleStore, 'scan', side_effect=AssertionError("Parquet scanned")):
+        panel = load_candles_panel(['SBER', 'GAZP'], base_dir=tmp_path, start='2025-02-01', columns=['close'])
+        pd.testing.assert_frame_equal(panel, expected, check_dtype=False)
+        
+        wide = load_candles_panel(['SBER', 'GAZP'], base_dir=tmp_path, start='2025-02-01', columns=['close'], layout='wide')
+        pd.testing.assert_frame_equal(wide, expected_wide, check_dtype=False, check_names=False)
+    
+    # Не покрытые кэшем запросы читают Parquet: окно раньше панели, колонка end, новая свеча
+    with patch.object(PartitionedCandleStore, 'scan', wraps=store.scan) as scan:
+        load_candles_panel(['SBER'], base_dir=tmp_path, start='2024-12-01', columns=['close'])
+        load_candles_panel(['SBER'], base_dir=tmp_path, start='2025-02-01', columns=['end'])
+        store.append('SBER', make_candles('2025-03-02', 1, base=500.0))
+        panel = load_candles_panel(['SBER'], base_dir=tmp_path, start='2025-02-01', columns=['close'])
+    assert scan.call_count == 3
+    assert panel['close'].iloc[-1] == 500.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -1,6 +1,8 @@
 """
 Тесты для модуля предсказаний новостных всплесков.
 """
+import json
+
 import pytest
 import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -10,6 +12,7 @@ from app.predictor.collector import NewsCollector
 from app.predictor.analyzer import NewsAnalyzer
 from app.predictor.signals import EventSignalGenerator, generate_event_signals
 from app.predictor.config import PredictorConfig
+from app.predictor.event_log import EventLog, INDEX_RECORD
 
 
 class TestNewsCollector:
@@ -239,6 +242,75 @@ class TestEventSignalGenerator:
             assert 'Нет данных' in signal['reason']
 
 
+class TestEventLog:
+    """Тесты для журнала сигналов."""
+    
+    @staticmethod
+    def make_signal(ts: datetime, n: int) -> dict:
+        return {'signal_level': 'LOW', 'reason': f'сигнал {n}', 'timestamp': ts.isoformat()}
+    
+    def test_append_and_tail(self, tmp_path):
+        """Тест: последние N сигналов, новые первыми, с переходом через месяц."""
+        log = EventLog(tmp_path / 'events')
+        for n in range(5):
+            log.append(self.make_signal(datetime(2025, 9, 28 + n % 3, 10, n), n))
+        for n in range(5, 8):
+            log.append(self.make_signal(datetime(2025, 10, 1, 10, n), n))
+        
+        assert log.count() == 8
+        assert [s['reason'] for s in log.tail(4)] == ['сигнал 7', 'сигнал 6', 'сигнал 5', 'сигнал 4']
+        assert len(log.tail(100)) == 8
+        assert sorted(p.name for p in (tmp_path / 'events').iterdir()) == [
+            '2025-09.idx', '2025-09.jsonl', '2025-10.idx', '2025-10.jsonl'
+        ]
+        assert (tmp_path / 'events' / '2025-10.idx').stat().st_size == 3 * INDEX_RECORD.size
+    
+    def test_range(self, tmp_path):
+        """Тест выборки сигналов по интервалу времени."""
+        log = EventLog(tmp_path / 'events')
+        for day in range(1, 31):
+            log.append(self.make_signal(datetime(2025, 9, day, 12), day))
+        log.append(self.make_signal(datetime(2025, 10, 2, 12), 31))
+        
+        items = list(log.range(datetime(2025, 9, 10, 12), datetime(2025, 9, 12, 23)))
+        assert [s['reason'] for s in items] == ['сигнал 10', 'сигнал 11', 'сигнал 12']
+        
+        items = list(log.range(start=datetime(2025, 9, 30)))
+        assert [s['reason'] for s in items] == ['сигнал 30', 'сигнал 31']
+        
+        assert list(log.range(datetime(2024, 1, 1), datetime(2024, 2, 1))) == []
+    
+    def test_legacy_migration(self, tmp_path):
+        """Тест переноса старого JSON файла истории."""
+        legacy = tmp_path / 'events_history.json'
+        history = [self.make_signal(datetime(2025, 9, 1, 10, n), n) for n in range(3)]
+        legacy.write_text(json.dumps(history, ensure_ascii=False), encoding='utf-8')
+        
+        log = EventLog(legacy)
+        
+        assert log.count() == 3
+        assert not legacy.exists()
+        assert (tmp_path / 'events_history').is_dir()
+        
+        log.append(self.make_signal(datetime(2025, 9, 2), 3))
+        assert log.tail(1)[0]['reason'] == 'сигнал 3'
+    
+    def test_repair_unindexed_line(self, tmp_path):
+        """Тест: строка без записи в индексе доиндексируется, оборванная — отрезается."""
+        log = EventLog(tmp_path / 'events')
+        log.append(self.make_signal(datetime(2025, 9, 1), 0))
+        
+        # Имитация сбоя: строка дописана, индекс нет; затем оборванная запись
+        with open(tmp_path / 'events' / '2025-09.jsonl', 'ab') as f:
+            f.write(json.dumps(self.make_signal(datetime(2025, 9, 2), 1)).encode() + b'\n')
+            f.write(b'{"signal_level": "LO')
+        
+        log = EventLog(tmp_path / 'events')
+        log.append(self.make_signal(datetime(2025, 9, 3), 2))
+        
+        assert [s['reason'] for s in log.tail(10)] == ['сигнал 2', 'сигнал 1', 'сигнал 0']
+
+
 class TestPredictorConfig:
     """Тесты для конфигурации."""
     
@@ -0,0 +1,54 @@
+"""Тесты порядка обработки тикеров и бюджета времени."""
+
+import threading
+import time
+
+from app.process.priority import Deadline, prioritize
+
+
+def test_prioritize():
+    """Тест: портфель, затем сигналы, затем ликвидность; иначе порядок universe."""
+    previous = {
+        'SBER': {'signals': [], 'features': {'adv_rub_20d': 5e9}},
+        'GAZP': {'signals': ['DY_GT_TARGET'], 'features': {'adv_rub_20d': 1e9}},
+        'LKOH': {'signals': [], 'features': {'adv_rub_20d': 8e9}},
+        'MTSS': {'signals': [], 'features': None}
+    }
+    universe = ['SBER', 'GAZP', 'LKOH', 'MTSS', 'NEW', 'TGLD']
+
+    assert prioritize(universe, ['TGLD'], previous) == ['TGLD', 'GAZP', 'LKOH', 'SBER', 'MTSS', 'NEW']
+    assert prioritize(['B', 'A'], [], {}) == ['B', 'A']
+
+
+def test_deadline():
+    """Тест: таймаут шага — меньшее из остатка бюджета и лимита на тикер."""
+    unlimited = Deadline()
+    assert unlimited.remaining() is None
+    assert unlimited.timeout() is None
+    assert unlimited.timeout(5.0) == 5.0
+    assert not unlimited.expired
+
+    deadline = Deadline(0.05)
+    assert deadline.timeout(10.0) <= 0.05
+    time.sleep(0.06)
+    assert deadline.expired
+    assert deadline.timeout(10.0) == 0.0
+
+
+def test_deadline_cancel():
+    """Тест: отменённый прогон считается исчерпавшим бюджет."""
+    cancel_event = threading.Event()
+    deadline = Deadline(cancel_event=cancel_event)
+    assert not deadline.expired
+    assert deadline.remaining() is None
+
+    cancel_event.set()
+    assert deadline.cancelled
+    assert deadline.expired
+    assert deadline.remaining() == 0.0
+    assert deadline.timeout(5.0) == 0.0
+
+    started = time.monotonic()
+    deadline.sleep(5.0)
+    assert time.monotonic() - started < 1.0
+
@@ -0,0 +1,116 @@
+"""Тесты для индекса диапазонов high/low."""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.store.range_index import RangeIndex
+from app.store.io import save_candles, load_range_index
+
+
+@pytest.fixture
+def candles():
+    """Создать тестовые свечи со случайными ценами."""
+    rng = np.random.default_rng(42)
+    n = 500
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'open': close,
+        'high': close + rng.uniform(0, 2, n),
+        'low': close - rng.uniform(0, 2, n),
+        'close': close,
+        'volume': rng.integers(1000, 5000, n),
+        'begin': pd.date_range('2024-01-01', periods=n, freq='D'),
+        'end': pd.date_range('2024-01-01', periods=n, freq='D')
+    })
+
+
+def test_query_positions_matches_brute_force(candles):
+    """Тест: запросы по позициям совпадают с прямым расчётом."""
+    index = RangeIndex.from_candles(candles)
+    rng = np.random.default_rng(0)
+    
+    for _ in range(200):
+        start, end = sorted(rng.integers(0, len(candles), 2))
+        window = candles.iloc[start:end + 1]
+        
+        high, low = index.query_positions(start, end)
+        assert high == window['high'].max()
+        assert low == window['low'].min()
+
+
+def test_query_by_dates(candles):
+    """Тест запроса по интервалу дат."""
+    index = RangeIndex.from_candles(candles)
+    
+    high, low = index.query('2024-03-01', '2024-05-31')
+    mask = (candles['begin'] >= '2024-03-01') & (candles['begin'] <= '2024-05-31')
+    
+    assert high == candles.loc[mask, 'high'].max()
+    assert low == candles.loc[mask, 'low'].min()
+    
+    # Окно без свечей
+    assert index.query('2030-01-01', '2030-12-31') is None
+
+
+def test_query_last(candles):
+    """Тест запроса по последним N свечам."""
+    index = RangeIndex.from_candles(candles)
+    
+    high, low = index.query_last(260)
+    assert high == candles['high'].tail(260).max()
+    assert low == candles['low'].tail(260).min()
+
+
+def test_query_ignores_missing_values():
+    """Тест: пропуски (NaN) в high/low не зависят от порядка блоков запроса."""
+    highs = [np.nan, np.nan, 11.0, 10.0, 13.0]
+    lows = [np.nan, np.nan, 9.0, 7.0, 10.0]
+    index = RangeIndex.build(np.arange(5), highs, lows)
+    
+    # Окно из двух перекрывающихся блоков, первый целиком из NaN
+    assert index.query_positions(0, 2) == (11.0, 9.0)
+    assert index.query_positions(0, 4) == (13.0, 7.0)
+    
+    high, low = index.query_positions(0, 1)
+    assert np.isnan(high) and np.isnan(low)
+
+
+def test_empty_index():
+    """Тест пустого индекса."""
+    index = RangeIndex.build([], [], [])
+    
+    assert len(index) == 0
+    assert index.query() is None
+    assert index.query_last(10) is None
+
+
+def test_index_persisted_with_candles(tmp_path, candles):
+    """Тест: индекс сохраняется вместе со свечами и загружается из хранилища."""
+    save_candles("SBER", candles, base_dir=tmp_path)
+    
+    assert (tmp_path / "SBER" / "range_index.npz").exists()
+    
+    index = load_range_index("SBER", base_dir=tmp_path)
+    assert index is not None
+    assert len(index) == len(candles)
+    assert index.query_last(len(candles)) == (candles['high'].max(), candles['low'].min())
+    
+    assert load_range_index("NONEXISTENT", base_dir=tmp_path) is None
+
+
+
+def test_index_covers_stored_history(tmp_path, candles):
+    """Тест: после догрузки последних свечей индекс покрывает всю историю хранилища."""
+    old, recent = candles.iloc[:-10], candles.iloc[-10:]
+    save_candles("SBER", old, base_dir=tmp_path)
+    
+    # Загрузка покрывает только последнее окно, готовый индекс построен по нему
+    save_candles("SBER", recent, base_dir=tmp_path, index=RangeIndex.from_candles(recent))
+    
+    index = load_range_index("SBER", base_dir=tmp_path)
+    assert len(index) == len(candles)
+    assert index.query(candles['begin'].iloc[0]) == (candles['high'].max(), candles['low'].min())
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
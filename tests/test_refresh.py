@@ -0,0 +1,150 @@
+"""Тесты внутридневного обновления срезов данных."""
+
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ingest.moex_client import MOEXClientError
+from app.process.refresh import RefreshService, in_session, intraday_entry
+from app.store.hot_cache import hot_candles_path, read_hot_table
+from app.store.io import load_json, save_analysis_report, save_candles
+from app.store.partitioned import PartitionedCandleStore
+
+
+def make_candles(start: datetime, periods: int, base: float = 100.0) -> pd.DataFrame:
+    """Создать дневные свечи."""
+    dates = pd.date_range(pd.Timestamp(start).normalize(), periods=periods, freq='D')
+    close = base + np.arange(periods, dtype=float)
+    return pd.DataFrame({
+        'open': close,
+        'high': close + 1,
+        'low': close - 1,
+        'close': close,
+        'volume': np.full(periods, 1000),
+        'begin': dates,
+        'end': dates
+    })
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Мок конфигурации с путями во временной директории."""
+    config = Mock()
+    config.universe = [Mock(symbol='SBER'), Mock(symbol='GAZP')]
+    config.output.analysis_file = str(tmp_path / "analysis.json")
+    config.output.raw_data_dir = str(tmp_path / "raw")
+    config.refresh.dir = str(tmp_path / "refresh")
+    return config
+
+
+def test_in_session():
+    """Тест: дни и часы торговой сессии."""
+    refresh = Mock(session_days="mon-fri", session_start="10:00", session_end="18:50")
+
+    assert in_session(refresh, datetime(2025, 10, 6, 12, 0)) is True  # понедельник
+    assert in_session(refresh, datetime(2025, 10, 6, 9, 59)) is False
+    assert in_session(refresh, datetime(2025, 10, 6, 18, 51)) is False
+    assert in_session(refresh, datetime(2025, 10, 11, 12, 0)) is False  # суббота
+
+    refresh.session_days = "mon,sat"
+    assert in_session(refresh, datetime(2025, 10, 11, 12, 0)) is True
+    assert in_session(refresh, datetime(2025, 10, 7, 12, 0)) is False
+
+
+def test_intraday_entry():
+    """Тест: цена из котировки, метрики отчёта пересчитываются от неё."""
+    report_entry = {'price': 100.0, 'div_ttm': 10.0, 'sma_200': 105.0, 'high_52w': 150.0, 'low_52w': 80.0}
+
+    entry = intraday_entry({'price': 120.0, 'quote_at': '11:05:00'}, None, report_entry)
+    assert entry['price'] == 120.0
+    assert entry['quote_at'] == '11:05:00'
+    assert entry['dy_pct'] == 8.33
+    assert entry['dist_52w_low_pct'] == pytest.approx(50.0)
+    assert entry['dist_52w_high_pct'] == pytest.approx(25.0)
+    assert entry['above_sma200'] is True
+
+    entry = intraday_entry(None, 12.0, report_entry)
+    assert entry['price'] == 100.0
+    assert entry['dy_pct'] == 12.0
+    assert entry['above_sma200'] is False
+
+    assert intraday_entry(None, None, {})['dy_pct'] is None
+
+
+def test_refresh_quotes_and_dividends(config, tmp_path):
+    """Тест: котировки и дивиденды перестраивают внутридневную сводку."""
+    save_analysis_report({
+        'generated_at': '2025-10-06T19:10:00',
+        'universe': ['SBER', 'GAZP'],
+        'by_symbol': {
+            'SBER': {'price': 280.0, 'div_ttm': 30.0, 'sma_200': 285.0, 'high_52w': 320.0, 'low_52w': 240.0},
+            'GAZP': {'price': 120.0, 'div_ttm': 0.0, 'sma_200': 130.0, 'high_52w': 180.0, 'low_52w': 110.0}
+        }
+    }, config.output.analysis_file)
+
+    client = Mock()
+    client.get_quotes.return_value = {'SBER': {'price': 300.0, 'lot': 10, 'board': 'TQBR', 'quote_at': '11:05:00'}}
+    client.get_dividends.side_effect = lambda symbol, strict: {'SBER': 33.0, 'GAZP': 0.0}[symbol]
+    service = RefreshService(config, client)
+
+    assert service.refresh_quotes()['symbols'] == 1
+    client.get_quotes.assert_called_once_with(['SBER', 'GAZP'])
+
+    intraday = service.load_intraday()
+    assert intraday['report_generated_at'] == '2025-10-06T19:10:00'
+    assert intraday['by_symbol']['SBER']['price'] == 300.0
+    assert intraday['by_symbol']['SBER']['dy_pct'] == 10.0
+    assert intraday['by_symbol']['SBER']['above_sma200'] is True
+    assert intraday['by_symbol']['GAZP']['price'] == 120.0
+    assert intraday['by_symbol']['GAZP']['quote_at'] is None
+
+    service.refresh_dividends()
+    intraday = service.load_intraday()
+    assert intraday['by_symbol']['SBER']['dy_pct'] == 11.0
+    assert intraday['dividends_updated_at'] is not None
+    assert set(service.state()) == {'quotes', 'dividends'}
+
+    # Ошибка загрузки не обнуляет дивиденды: остаётся прежнее значение кэша
+    def get_dividends(symbol, strict):
+        raise MOEXClientError("HTTP 503")
+
+    client.get_dividends.side_effect = get_dividends
+    assert service.refresh_dividends()['failed'] == ['SBER', 'GAZP']
+    client.get_dividends.assert_called_with('GAZP', strict=True)
+    intraday = service.load_intraday()
+    assert intraday['by_symbol']['SBER']['dy_pct'] == 11.0
+
+    # Свечи не затрагивают внутридневную сводку
+    rebuild_intraday = service._builders['intraday'] = Mock()
+    service._builders['candles_panel'] = Mock()
+    assert service.invalidate('candles') == ['candles_panel']
+    rebuild_intraday.assert_not_called()
+    assert service.invalidate('report') == ['intraday']
+
+
+def test_refresh_candles(config):
+    """Тест: догружаются только новые свечи тикеров с историей."""
+    start = datetime.now() - timedelta(days=30)
+    history = make_candles(start, 28)
+    save_candles('SBER', history, config.output.raw_data_dir)
+
+    client = Mock()
+    client.get_candles.return_value = make_candles(start + timedelta(days=27), 4, base=127.0)
+    service = RefreshService(config, client)
+
+    summary = service.refresh_candles()
+
+    # GAZP без истории пропущен — полную историю загружает ночной отчёт
+    client.get_candles.assert_called_once()
+    assert client.get_candles.call_args.args == ('SBER',)
+    assert 1 <= client.get_candles.call_args.kwargs['days'] <= 5
+    assert summary['symbols'] == 1
+    assert summary['failed'] == []
+
+    manifest = PartitionedCandleStore(config.output.raw_data_dir).read_manifest('SBER')
+    assert pd.Timestamp(manifest['last_ts']) == pd.Timestamp(start).normalize() + pd.Timedelta(days=30)
+    assert read_hot_table(hot_candles_path(config.output.raw_data_dir)) is not None
+    assert load_json(service.dir / "state.json")['candles']['candles'] == 4
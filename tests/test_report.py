@@ -1,16 +1,29 @@
 """Тесты для генератора отчётов."""
 
 import pytest
+import threading
+import time
 from datetime import datetime
+from pathlib import Path
 from unittest.mock import Mock, patch
+import orjson
 import pandas as pd
 
-from app.process.report import ReportGenerator
+from app.ingest.moex_client import MOEXClientError
+from app.process.diff import diff_path
+from app.process.report import ReportCancelled, ReportGenerator
 from app.models import SymbolData, SymbolMeta
+from app.store.checkpoint import find_incomplete_run
+from app.store.history import get_history_store
+from app.store.io import load_candles, save_analysis_report
+from app.store.hot_cache import hot_candles_path, hot_report_path, read_hot_table
+from app.store.partial import get_partial_report, partial_path
+from app.store.report_binary import report_meta_path
+from app.store.run_ledger import read_runs
 
 
 @pytest.fixture
-def mock_config():
+def mock_config(tmp_path):
     """Мок конфигурации."""
     config = Mock()
     config.universe = [
@@ -18,8 +31,23 @@ def mock_config():
         Mock(symbol='GAZP')
     ]
     config.dividend_target_pct = 8.0
-    config.output.analysis_file = 'data/test_analysis.json'
-    config.output.reports_dir = 'data/test_reports'
+    config.output.analysis_file = str(tmp_path / 'analysis.json')
+    config.output.reports_dir = str(tmp_path / 'reports')
+    config.output.raw_data_dir = str(tmp_path / 'raw')
+    config.output.history_db = str(tmp_path / 'history.sqlite')
+    config.output.runs_dir = str(tmp_path / 'runs')
+    config.output.run_ledger = str(tmp_path / 'run_ledger.jsonl')
+    config.compute.mode = 'inline'
+    config.compute.memory_budget_mb = None
+    config.compute.write_behind = True
+    config.compute.fetch_workers = 2
+    config.compute.time_budget_sec = None
+    config.compute.symbol_timeout_sec = None
+    config.retry.inline_attempts = 1
+    config.retry.deferred_attempts = 2
+    config.retry.backoff_sec = 0.0
+    config.retry.backoff_max_sec = 0.0
+    config.retry.workers = 2
     return config
 
 
@@ -77,6 +105,73 @@ def test_process_symbol_success(mock_client_class, mock_get_config, mock_config,
     assert result.lot == 10
     assert result.div_ttm == 25.0
     assert result.meta.error is None
+    
+    # Свечи и индекс диапазонов сохранены в хранилище
+    raw_dir = Path(mock_config.output.raw_data_dir)
+    assert (raw_dir / 'SBER' / '_manifest.json').exists()
+    assert (raw_dir / 'SBER' / 'range_index.npz').exists()
+
+
+@patch('app.process.report.get_config')
+@patch('app.process.report.MOEXClient')
+def test_process_symbol_quarantines_bad_candles(mock_client_class, mock_get_config, mock_config, mock_candles):
+    """Тест: некорректные свечи уходят в карантин и не участвуют в расчёте."""
+    mock_get_config.return_value = mock_config
+    
+    bad_candles = mock_candles.copy()
+    bad_candles.loc[bad_candles.index[-1], 'low'] = -1.0
+    
+    mock_client = Mock()
+    mock_client.get_quote.return_value = {'price': 290.5, 'lot': 10, 'board': 'TQBR'}
+    mock_client.get_dividends.return_value = 25.0
+    mock_client.get_candles.return_value = bad_candles
+    mock_client_class.return_value = mock_client
+    
+    generator = ReportGenerator()
+    fetched = generator._fetch_symbol('SBER')
+    
+    assert len(fetched['candles']) == len(bad_candles) - 1
+    assert (fetched['candles']['low'] >= 0).all()
+    
+    quarantine = Path(mock_config.output.raw_data_dir) / 'SBER' / 'quarantine.parquet'
+    assert quarantine.exists()
+
+
+@patch('app.process.report.get_config')
+@patch('app.process.report.MOEXClient')
+def test_generate_report_features(mock_client_class, mock_get_config, mock_config, mock_candles):
+    """Тест: признаки доходности и риска попадают в отчёт."""
+    mock_get_config.return_value = mock_config
+    
+    mock_client = Mock()
+    mock_client.get_quote.return_value = {
+        'price': 290.5,
+        'lot': 10,
+        'board': 'TQBR'
+    }
+    mock_client.get_dividends.return_value = 25.0
+    mock_client.get_candles.return_value = mock_candles
+    mock_client_class.return_value = mock_client
+    
+    generator = ReportGenerator()
+    report = generator.generate_report(include_portfolio=False)
+    
+    # Результаты тикеров опубликованы в частичный отчёт по мере расчёта
+    partial = get_partial_report(mock_config.output.analysis_file).snapshot()
+    assert partial['complete'] is False
+    assert partial['progress'] == {'done': 2, 'total': 2, 'pct': 100.0}
+    assert partial['by_symbol']['SBER']['price'] == 290.5
+    
+    features = report.by_symbol['SBER'].features
+    assert features is not None
+    assert features.ret_20d_pct == 0.0
+    assert features.vol_avg_20d == 10000.0
+    assert features.adv_rub_20d == 102.0 * 10000
+    
+    # Свечи записаны очередью отложенной записи до завершения прогона
+    assert generator.persist_stats['written'] == len(mock_config.universe)
+    assert generator.persist_stats['depth'] == 0
+    assert (Path(mock_config.output.raw_data_dir) / 'SBER' / '_manifest.json').exists()
 
 
 @patch('app.process.report.get_config')
@@ -121,6 +216,7 @@ def test_generate_and_save(mock_save_daily, mock_save_analysis,
     mock_client.get_candles.return_value = mock_candles
     
     mock_client_class.return_value = mock_client
+    mock_save_analysis.return_value = 1
     
     generator = ReportGenerator()
     report_dict = generator.generate_and_save(save_daily=True)
@@ -133,6 +229,367 @@ def test_generate_and_save(mock_save_daily, mock_save_analysis,
     # Проверяем, что функции сохранения были вызваны
     assert mock_save_analysis.called
     assert mock_save_daily.called
+    
+    # Отчёт сериализован один раз: оба файла пишутся из одного буфера
+    payload = mock_save_analysis.call_args.kwargs['payload']
+    assert mock_save_daily.call_args.kwargs['payload'] is payload
+    assert orjson.loads(payload) == report_dict
+    
+    # Бинарная форма отчёта и панель свечей в горячем кэше
+    report_table = read_hot_table(hot_report_path(mock_config.output.analysis_file))
+    assert report_table.column('symbol').to_pylist() == ['SBER', 'GAZP']
+    assert report_table.schema.metadata[b'snapshot_version'] == b'1'
+    assert report_meta_path(mock_config.output.analysis_file).exists()
+    
+    panel = read_hot_table(hot_candles_path(mock_config.output.raw_data_dir))
+    assert set(panel.column('symbol').to_pylist()) == {'SBER', 'GAZP'}
+    assert panel.num_rows > 0
+    
+    # Метрики дня записаны в историю
+    history = get_history_store(mock_config.output.history_db).query(['SBER'], fields=['price'])
+    assert history['SBER'][-1]['price'] == 290.5
+    
+    # Полный отчёт опубликован — частичного больше нет
+    assert get_partial_report(mock_config.output.analysis_file).snapshot() is None
+    assert not partial_path(mock_config.output.analysis_file).exists()
+
+
+@patch('app.process.report.get_config')
+@patch('app.process.report.MOEXClient')
+def test_generate_report_process_mode(mock_client_class, mock_get_config, mock_config, mock_candles):
+    """Тест генерации отчёта с расчётом метрик в пуле процессов."""
+    mock_config.compute.mode = 'process'
+    mock_config.compute.workers = 2
+    mock_config.compute.fetch_workers = 2
+    mock_get_config.return_value = mock_config
+    
+    mock_client = Mock()
+    mock_client.get_quote.return_value = {
+        'price': 290.5,
+        'lot': 10,
+        'board': 'TQBR'
+    }
+    mock_client.get_dividends.return_value = 25.0
+    mock_client.get_candles.return_value = mock_candles
+    mock_client_class.return_value = mock_client
+    
+    generator = ReportGenerator()
+    report = generator.generate_report(include_portfolio=False)
+    
+    assert list(report.by_symbol) == ['SBER', 'GAZP']
+    for data in report.by_symbol.values():
+        assert data.meta.error is None
+        assert data.price == 290.5
+        assert data.sma_20 == pytest.approx(102.0)
+
+
+@patch('app.process.report.get_config')
+@patch('app.process.report.MOEXClient')
+def test_process_mode_publishes_before_fetch_finishes(mock_client_class, mock_get_config, mock_config, mock_candles):
+    """Тест: в режиме process тикер публикуется, пока другие ещё загружаются."""
+    import time
+    
+    mock_config.compute.mode = 'process'
+    mock_config.compute.workers = 2
+    mock_config.compute.fetch_workers = 2
+    mock_get_config.return_value = mock_config
+    partial = get_partial_report(mock_config.output.analysis_file)
+    seen_while_fetching = []
+    
+    def get_candles(symbol, days):
+        if symbol == 'GAZP':
+            # Загрузка GAZP ждёт, пока SBER появится в частичном отчёте
+            waited_until = time.monotonic() + 10
+            while time.monotonic() < waited_until:
+                snapshot = partial.snapshot()
+                if snapshot is not None and 'SBER' in snapshot['by_symbol']:
+                    seen_while_fetching.append('SBER')
+                    break
+                time.sleep(0.02)
+        return mock_candles
+    
+    mock_client = Mock()
+    mock_client.get_quote.return_value = {'price': 290.5, 'lot': 10, 'board': 'TQBR'}
+    mock_client.get_dividends.return_value = 25.0
+    mock_client.get_candles.side_effect = get_candles
+    mock_client_class.return_value = mock_client
+    
+    report = ReportGenerator().generate_report(include_portfolio=False)
+    
+    assert seen_while_fetching == ['SBER']
+    assert list(report.by_symbol) == ['SBER', 'GAZP']
+
+
+@patch('app.process.report.get_config')
+@patch('app.process.report.MOEXClient')
+def test_generate_report_incremental(mock_client_class, mock_get_config, mock_config, mock_candles):
+    """Тест: инкрементальный прогон пересчитывает только тикеры с новыми данными."""
+    mock_get_config.return_value = mock_config
+    
+    last_bars = {'SBER': '2025-10-06T18:00:00', 'GAZP': '2025-10-06T18:00:00'}
+    mock_client = Mock()
+    mock_client.get_quote.side_effect = lambda symbol: {
+        'price': 290.5,
+        'lot': 10,
+        'board': 'TQBR',
+        'last_bar_at': last_bars[symbol]
+    }
+    mock_client.get_dividends.return_value = 25.0
+    mock_client.get_candles.return_value = mock_candles
+    mock_client_class.return_value = mock_client
+    
+    generator = ReportGenerator()
+    first = generator.generate_and_save(save_daily=False, include_portfolio=False)
+    assert first['by_symbol']['SBER']['meta']['fingerprint']
+    
+    # Новая свеча появилась только у GAZP
+    last_bars['GAZP'] = '2025-10-06T19:00:00'
+    mock_client.get_candles.reset_mock()
+    mock_client.get_quote.reset_mock()
+    
+    report = generator.generate_report(include_portfolio=False, incremental=True)
+    
+    assert generator.incremental_stats == {'reused': 1, 'recomputed': 1}
+    assert [call.args[0] for call in mock_client.get_candles.call_args_list] == ['GAZP']
+    # Котировка GAZP, полученная при проверке отпечатка, повторно не запрашивается
+    assert mock_client.get_quote.call_count == 2
+    assert list(report.by_symbol) == ['SBER', 'GAZP']
+    counters = generator.telemetry.summary()['counters']
+    assert counters['cache_hits'] == 1
+    assert counters['prefetch_hits'] == 1
+    
+    sber = report.by_symbol['SBER']
+    assert sber.meta.updated_at.isoformat() == first['by_symbol']['SBER']['meta']['updated_at']
+    assert sber.features.vol_avg_20d == 10000.0
+    assert report.by_symbol['GAZP'].meta.fingerprint != first['by_symbol']['GAZP']['meta']['fingerprint']
+
+
+@patch('app.process.report.get_config')
+@patch('app.process.report.MOEXClient')
+def test_generate_and_save_diff(mock_client_class, mock_get_config, mock_config, mock_candles):
+    """Тест: изменения относительно предыдущего отчёта сохраняются рядом с ним."""
+    mock_get_config.return_value = mock_config
+    
+    failing = set()
+    
+    def get_candles(symbol, days):
+        if symbol in failing:
+            raise Exception("Connection reset")
+        return mock_candles
+    
+    mock_client = Mock()
+    mock_client.get_quote.return_value = {'price': 290.5, 'lot': 10, 'board': 'TQBR'}
+    mock_client.get_dividends.return_value = 25.0
+    mock_client.get_candles.side_effect = get_candles
+    mock_client_class.return_value = mock_client
+    
+    generator = ReportGenerator()
+    first = generator.generate_and_save(save_daily=False, include_portfolio=False)
+    assert generator.last_diff['previous_generated_at'] is None
+    
+    # Дивиденды выросли, GAZP перестал загружаться
+    mock_client.get_dividends.return_value = 30.0
+    failing.add('GAZP')
+    generator.generate_and_save(save_daily=False, include_portfolio=False)
+    
+    diff = orjson.loads(diff_path(mock_config.output.analysis_file).read_bytes())
+    assert diff['previous_generated_at'] == first['generated_at']
+    assert diff['changes']['SBER']['dy_pct'] == [first['by_symbol']['SBER']['dy_pct'], pytest.approx(30.0 / 290.5 * 100, abs=0.01)]
+    assert diff['changes']['GAZP']['status'] == 'failing'
+    assert diff['summary']['failing'] == 1
+    assert diff['snapshot_version'] == 2
+    assert generator.last_diff == diff
+
+
+@patch('app.process.report.get_config')
+@patch('app.process.report.MOEXClient')
+def test_generate_report_priority_and_budget(mock_client_class, mock_get_config, mock_config, mock_candles):
+    """Тест: позиции портфеля первыми, зависший тикер сохраняет прошлые значения."""
+    mock_config.compute.symbol_timeout_sec = 0.3
+    mock_get_config.return_value = mock_config
+    save_analysis_report({
+        'generated_at': '2025-10-06T19:10:00',
+        'universe': ['SBER', 'GAZP'],
+        'by_symbol': {'SBER': {'price': 280.0, 'signals': [], 'meta': {'error': None}}}
+    }, mock_config.output.analysis_file)
+    
+    def get_candles(symbol, days):
+        if symbol == 'SBER':
+            time.sleep(1.0)
+        return mock_candles
+    
+    mock_client = Mock()
+    mock_client.get_quote.return_value = {'price': 290.5, 'lot': 10, 'board': 'TQBR'}
+    mock_client.get_dividends.return_value = 25.0
+    mock_client.get_candles.side_effect = get_candles
+    mock_client_class.return_value = mock_client
+    
+    generator = ReportGenerator()
+    with patch.object(generator, '_load_portfolio_tickers', return_value=['GAZP']):
+        report = generator.generate_report(include_portfolio=False)
+    
+    # Позиция портфеля обработана первой, порядок отчёта не изменился
+    assert mock_client.get_quote.call_args_list[0].args[0] == 'GAZP'
+    assert list(report.by_symbol) == ['SBER', 'GAZP']
+    
+    assert report.by_symbol['GAZP'].meta.stale is False
+    assert report.by_symbol['GAZP'].price == 290.5
+    
+    sber = report.by_symbol['SBER']
+    assert sber.meta.stale is True
+    assert sber.price == 280.0
+    
+    # Брошенный поток SBER доработал после прогона без побочных эффектов
+    time.sleep(1.0)
+    assert load_candles('SBER', mock_config.output.raw_data_dir) is None
+    assert load_candles('GAZP', mock_config.output.raw_data_dir) is not None
+
+
+@patch('app.process.report.get_config')
+@patch('app.process.report.MOEXClient')
+def test_process_mode_symbol_timeout_bounds_fetch(mock_client_class, mock_get_config, mock_config, mock_candles):
+    """Тест: в режиме process лимит на тикер ограничивает и зависшую загрузку."""
+    mock_config.compute.mode = 'process'
+    mock_config.compute.workers = 2
+    mock_config.compute.symbol_timeout_sec = 0.5
+    mock_get_config.return_value = mock_config
+    
+    def get_candles(symbol, days):
+        if symbol == 'SBER':
+            time.sleep(3.0)
+        return mock_candles
+    
+    mock_client = Mock()
+    mock_client.get_quote.return_value = {'price': 290.5, 'lot': 10, 'board': 'TQBR'}
+    mock_client.get_dividends.return_value = 25.0
+    mock_client.get_candles.side_effect = get_candles
+    mock_client_class.return_value = mock_client
+    
+    started = time.monotonic()
+    report = ReportGenerator().generate_report(include_portfolio=False)
+    
+    assert time.monotonic() - started < 2.5
+    assert report.by_symbol['SBER'].meta.stale is True
+    assert report.by_symbol['GAZP'].price == 290.5
+
+
+@patch('app.process.report.get_config')
+@patch('app.process.report.MOEXClient')
+def test_generate_and_save_resume(mock_client_class, mock_get_config, mock_config, mock_candles):
+    """Тест: прерванный прогон дозавершается без повторной загрузки готовых тикеров."""
+    mock_get_config.return_value = mock_config
+    
+    def get_candles(symbol, days):
+        if symbol == 'GAZP':
+            raise Exception("Connection reset")
+        return mock_candles
+    
+    mock_client = Mock()
+    mock_client.get_quote.return_value = {'price': 290.5, 'lot': 10, 'board': 'TQBR'}
+    mock_client.get_dividends.return_value = 25.0
+    mock_client.get_candles.side_effect = get_candles
+    mock_client_class.return_value = mock_client
+    
+    # Процесс «падает» до публикации отчёта
+    generator = ReportGenerator()
+    with patch('app.process.report.save_analysis_report', side_effect=RuntimeError("killed")):
+        with pytest.raises(RuntimeError):
+            generator.generate_and_save(save_daily=False, include_portfolio=False)
+    
+    checkpoint = find_incomplete_run(mock_config.output.runs_dir)
+    assert checkpoint is not None
+    assert list(checkpoint.completed()) == ['SBER']
+    
+    mock_client.get_candles.side_effect = None
+    mock_client.get_candles.return_value = mock_candles
+    mock_client.get_candles.reset_mock()
+    
+    report_dict = ReportGenerator().generate_and_save(save_daily=False, resume=checkpoint)
+    
+    assert [call.args[0] for call in mock_client.get_candles.call_args_list] == ['GAZP']
+    assert report_dict['universe'] == ['SBER', 'GAZP']
+    assert report_dict['by_symbol']['GAZP']['meta']['error'] is None
+    # Признаки восстановленного тикера рассчитаны по свечам из хранилища
+    assert report_dict['by_symbol']['SBER']['features']['vol_avg_20d'] == 10000.0
+    assert find_incomplete_run(mock_config.output.runs_dir) is None
+    
+    # Упавший прогон в журнал не попадает, дозавершённый — с телеметрией
+    runs = read_runs(mock_config.output.run_ledger)
+    assert len(runs) == 1
+    assert runs[0]['run_id'] == checkpoint.run_id
+    assert runs[0]['successful'] == 2
+    assert runs[0]['counters']['restored'] == 1
+    assert runs[0]['counters']['cache_hits'] == 1
+    assert runs[0]['stages']['fetch_candles']['count'] == 1
+    assert {'metrics', 'save_snapshot'} <= set(runs[0]['stages'])
+
+
+@patch('app.process.report.get_config')
+@patch('app.process.report.MOEXClient')
+def test_generate_and_save_cancelled(mock_client_class, mock_get_config, mock_config, mock_candles):
+    """Тест: отменённый прогон останавливается между тикерами и не публикует отчёт."""
+    mock_get_config.return_value = mock_config
+    cancel_event = threading.Event()
+    
+    def get_candles(symbol, days):
+        # Отмена приходит во время обработки первого тикера
+        cancel_event.set()
+        return mock_candles
+    
+    mock_client = Mock()
+    mock_client.get_quote.return_value = {'price': 290.5, 'lot': 10, 'board': 'TQBR'}
+    mock_client.get_dividends.return_value = 25.0
+    mock_client.get_candles.side_effect = get_candles
+    mock_client_class.return_value = mock_client
+    
+    generator = ReportGenerator()
+    with pytest.raises(ReportCancelled):
+        generator.generate_and_save(save_daily=False, include_portfolio=False, cancel_event=cancel_event)
+    
+    assert mock_client.get_candles.call_count == 1
+    assert not Path(mock_config.output.analysis_file).exists()
+    assert find_incomplete_run(mock_config.output.runs_dir) is None
+    assert get_partial_report(mock_config.output.analysis_file).snapshot()['error'] == "Report run cancelled"
+
+
+@patch('app.process.report.get_config')
+@patch('app.process.report.MOEXClient')
+def test_generate_report_deferred_retry(mock_client_class, mock_get_config, mock_config, mock_candles):
+    """Тест: упавший тикер повторяется после основного прохода."""
+    mock_config.universe.append(Mock(symbol='LKOH'))
+    mock_get_config.return_value = mock_config
+    
+    calls = []
+    
+    def get_candles(symbol, days):
+        calls.append(symbol)
+        if symbol == 'SBER' and calls.count('SBER') == 1:
+            raise MOEXClientError("Gateway timeout")
+        if symbol == 'LKOH':
+            raise MOEXClientError("Unknown security")
+        return mock_candles
+    
+    mock_client = Mock()
+    mock_client.get_quote.return_value = {'price': 290.5, 'lot': 10, 'board': 'TQBR'}
+    mock_client.get_dividends.return_value = 25.0
+    mock_client.get_candles.side_effect = get_candles
+    mock_client_class.return_value = mock_client
+    
+    generator = ReportGenerator()
+    report = generator.generate_report(include_portfolio=False)
+    
+    # Основной проход не ждёт повторов: GAZP загружен до повтора SBER
+    assert calls[:3] == ['SBER', 'GAZP', 'LKOH']
+    
+    sber = report.by_symbol['SBER'].meta
+    assert (sber.error, sber.attempts, sber.status) == (None, 2, 'recovered')
+    assert report.by_symbol['SBER'].features is not None
+    assert (report.by_symbol['GAZP'].meta.attempts, report.by_symbol['GAZP'].meta.status) == (1, 'ok')
+    
+    lkoh = report.by_symbol['LKOH'].meta
+    assert (lkoh.attempts, lkoh.status) == (3, 'failed')
+    assert 'Unknown security' in lkoh.error
+    assert generator.retry_stats == {'failed': 2, 'recovered': 1, 'attempts': 3}
 
 
 @patch('app.process.report.get_config')
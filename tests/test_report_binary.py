@@ -0,0 +1,66 @@
+"""Тесты бинарной формы отчёта."""
+
+import msgpack
+
+from app.reco.service import load_analysis_report as reco_load_report
+from app.store.io import save_analysis_report
+from app.store.report_binary import (
+    REPORT_SCHEMA_VERSION,
+    load_report_binary,
+    load_report_table,
+    report_meta_path,
+    write_report_binary,
+)
+
+
+REPORT = {
+    "generated_at": "2025-10-06T19:10:00",
+    "universe": ["SBER", "GAZP"],
+    "by_symbol": {
+        "SBER": {"price": 300.5, "dy_pct": 12.0, "signals": ["DY_GT_TARGET"], "meta": {"error": None, "board": "TQBR"}},
+        "GAZP": {"price": 130.1, "dy_pct": None, "signals": [], "meta": {"error": "timeout", "board": "TQBR"}}
+    }
+}
+
+
+def test_roundtrip(tmp_path):
+    """Тест: отчёт из бинарной формы совпадает с JSON."""
+    analysis_file = tmp_path / "analysis.json"
+    version = save_analysis_report(REPORT, analysis_file)
+    write_report_binary(REPORT, analysis_file, version)
+
+    meta = msgpack.unpackb(report_meta_path(analysis_file).read_bytes())
+    assert meta['schema_version'] == REPORT_SCHEMA_VERSION
+    assert meta['snapshot_version'] == version
+
+    report = load_report_binary(analysis_file)
+    assert report == REPORT
+    assert load_report_binary(analysis_file) is report
+    assert reco_load_report(str(analysis_file)) is report
+
+
+def test_stale_binary_ignored(tmp_path):
+    """Тест: бинарная форма предыдущей версии не используется."""
+    analysis_file = tmp_path / "analysis.json"
+    version = save_analysis_report(REPORT, analysis_file)
+    write_report_binary(REPORT, analysis_file, version)
+
+    updated = {**REPORT, "universe": ["SBER"], "by_symbol": {"SBER": REPORT["by_symbol"]["SBER"]}}
+    save_analysis_report(updated, analysis_file)
+
+    assert load_report_table(analysis_file) is None
+    assert load_report_binary(analysis_file) is None
+    assert reco_load_report(str(analysis_file))["universe"] == ["SBER"]
+
+
+def test_schema_version_mismatch(tmp_path):
+    """Тест: метаданные другой версии схемы не используются."""
+    analysis_file = tmp_path / "analysis.json"
+    version = save_analysis_report(REPORT, analysis_file)
+    write_report_binary(REPORT, analysis_file, version)
+
+    meta = msgpack.unpackb(report_meta_path(analysis_file).read_bytes())
+    meta['schema_version'] = REPORT_SCHEMA_VERSION + 1
+    report_meta_path(analysis_file).write_bytes(msgpack.packb(meta))
+
+    assert load_report_binary(analysis_file) is None
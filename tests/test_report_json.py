@@ -0,0 +1,73 @@
+"""Тесты сериализации отчёта без model_dump."""
+
+from datetime import datetime
+
+import orjson
+
+from app.models import AnalysisReport, SignalType, SymbolData, SymbolFeatures, SymbolMeta
+from app.store.io import save_analysis_report, save_daily_report
+from app.store.report_json import report_to_json, symbol_to_json
+from app.store.snapshot import encode_json
+
+
+def make_symbol_data(**overrides) -> SymbolData:
+    values = dict(
+        price=290.5,
+        lot=10,
+        div_ttm=25.0,
+        dy_pct=8.6,
+        signals=[SignalType.DY_GT_TARGET, "VOL_SPIKE"],
+        features=SymbolFeatures(ret_1d_pct=1.5, vol_avg_20d=10000.0),
+        meta=SymbolMeta(board='TQBR', updated_at=datetime(2025, 10, 6, 19, 10, 0, 123456), attempts=2, status='recovered')
+    )
+    values.update(overrides)
+    return SymbolData(**values)
+
+
+def test_symbol_to_json_matches_model_dump():
+    """Тест: результат совпадает с model_dump(mode='json'), включая порядок ключей."""
+    cases = [
+        make_symbol_data(),
+        make_symbol_data(features=None, signals=[]),
+        SymbolData(meta=SymbolMeta(error="Connection error"))
+    ]
+    for symbol_data in cases:
+        expected = symbol_data.model_dump(mode='json')
+        entry = symbol_to_json(symbol_data)
+        assert entry == expected
+        assert orjson.dumps(entry) == orjson.dumps(expected)
+
+    # NaN остаётся в словаре (как у model_dump) и пишется в JSON как null
+    entry = symbol_to_json(make_symbol_data(sma_200=float('nan')))
+    assert orjson.loads(orjson.dumps(entry))['sma_200'] is None
+
+
+def test_report_to_json_reuses_entries():
+    """Тест: готовые тикеры не сериализуются повторно."""
+    report = AnalysisReport(
+        generated_at=datetime(2025, 10, 6, 19, 10),
+        universe=['SBER', 'GAZP'],
+        by_symbol={'SBER': make_symbol_data(), 'GAZP': make_symbol_data(price=130.1)}
+    )
+    cached = {'price': 1.0}
+
+    report_dict = report_to_json(report, {'SBER': cached})
+
+    assert report_dict['generated_at'] == '2025-10-06T19:10:00'
+    assert report_dict['universe'] == ['SBER', 'GAZP']
+    assert report_dict['by_symbol']['SBER'] is cached
+    assert report_dict['by_symbol']['GAZP'] == report.by_symbol['GAZP'].model_dump(mode='json')
+
+
+def test_save_reports_from_payload(tmp_path):
+    """Тест: analysis.json и daily копия пишутся из одного буфера."""
+    report = {'generated_at': '2025-10-06T19:10:00', 'universe': ['SBER'], 'by_symbol': {'SBER': {'price': 290.5}}}
+    payload = encode_json(report)
+
+    analysis_file = tmp_path / "analysis.json"
+    save_analysis_report(report, analysis_file, payload=payload)
+    daily_file = save_daily_report(report, date=datetime(2025, 10, 6), reports_dir=tmp_path / "reports", payload=payload)
+
+    assert analysis_file.read_bytes() == payload
+    assert daily_file.read_bytes() == payload
+    assert orjson.loads(payload) == report
@@ -0,0 +1,134 @@
+"""Тесты хранения: повторы отчётов, месячные архивы, архив свечей."""
+
+from datetime import date, timedelta
+from unittest.mock import Mock
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from app.store.history import HistoryStore
+from app.store.io import load_candles, save_daily_report
+from app.store.partitioned import PartitionedCandleStore
+from app.store.retention import (
+    archive_candles,
+    archive_reports,
+    dedupe_reports,
+    report_content_hash,
+    run_retention,
+)
+from tests.test_partitioned import make_candles
+
+
+def make_report(day: date, price: float, extra_symbols: int = 0) -> dict:
+    """Отчёт по SBER (и extra_symbols тикерам с той же ценой)."""
+    symbols = ['SBER'] + [f'T{n:03d}' for n in range(extra_symbols)]
+    return {
+        'generated_at': f"{day.isoformat()}T19:10:00",
+        'universe': symbols,
+        'by_symbol': {
+            symbol: {
+                'price': price,
+                'dy_pct': 10.0,
+                'signals': ['DY_GT_TARGET'],
+                'meta': {'error': None, 'updated_at': f"{day.isoformat()}T19:10:00"}
+            }
+            for symbol in symbols
+        }
+    }
+
+
+def write_reports(reports_dir, prices, start=date(2025, 1, 30), extra_symbols: int = 0):
+    """Записать ежедневные отчёты с ценами prices начиная с даты start."""
+    for offset, price in enumerate(prices):
+        day = start + timedelta(days=offset)
+        save_daily_report(make_report(day, price, extra_symbols), date=day, reports_dir=reports_dir)
+
+
+def test_content_hash_ignores_timestamps():
+    """Тест: хэш не зависит от времени прогона."""
+    assert report_content_hash(make_report(date(2025, 1, 1), 300.0)) == \
+        report_content_hash(make_report(date(2025, 1, 2), 300.0))
+    assert report_content_hash(make_report(date(2025, 1, 1), 300.0)) != \
+        report_content_hash(make_report(date(2025, 1, 1), 301.0))
+
+
+def test_dedupe_keeps_first_of_run(tmp_path):
+    """Тест: из серии одинаковых подряд отчётов остаётся первый."""
+    write_reports(tmp_path, [300.0, 300.0, 300.0, 301.0, 300.0])
+
+    removed = dedupe_reports(tmp_path)
+
+    assert removed == ['2025-01-31', '2025-02-01']
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ['2025-01-30', '2025-02-02', '2025-02-03']
+
+
+def test_archive_reports_by_month(tmp_path):
+    """Тест: старые отчёты сворачиваются в месячные архивы и остаются в истории."""
+    reports_dir = tmp_path / 'reports'
+    archive_dir = reports_dir / 'archive'
+    db_path = tmp_path / 'history.sqlite'
+    write_reports(reports_dir, [300.0, 301.0, 302.0, 303.0])
+
+    archived, written = archive_reports(
+        reports_dir, archive_dir, keep_days=29, history_db=db_path, today=date(2025, 3, 3)
+    )
+
+    assert archived == ['2025-01-30', '2025-01-31', '2025-02-01']
+    assert written == ['2025-01.parquet', '2025-02.parquet']
+    assert [p.stem for p in reports_dir.glob("*.json")] == ['2025-02-02']
+    assert pq.read_metadata(archive_dir / '2025-01.parquet').row_group(0).column(0).compression == 'ZSTD'
+
+    archive = pd.read_parquet(archive_dir / '2025-01.parquet')
+    assert archive['date'].tolist() == ['2025-01-30', '2025-01-31']
+    assert archive['price'].tolist() == [300.0, 301.0]
+
+    # Архивные дни доступны через историю, в том числе после восстановления из архивов
+    history = HistoryStore(tmp_path / 'restored.sqlite')
+    assert history.import_archives(archive_dir) == 3
+    rows = history.query(['SBER'], fields=['price', 'signals'])['SBER']
+    assert [row['price'] for row in rows] == [300.0, 301.0, 302.0]
+    assert rows[0]['signals'] == ['DY_GT_TARGET']
+    history.close()
+
+
+def test_archive_candles(tmp_path):
+    """Тест: старые партиции свечей переписываются с zstd один раз."""
+    store = PartitionedCandleStore(tmp_path)
+    candles = make_candles('2025-01-01', 120)
+    store.append('SBER', candles.iloc[:50])
+    store.append('SBER', candles.iloc[49:])
+
+    assert archive_candles(tmp_path, after_months=2, today=date(2025, 5, 15)) == 2
+    assert store.read_manifest('SBER')['archived'] == ['2025/01', '2025/02']
+
+    january = store.partition_files('SBER', '2025/01')
+    assert len(january) == 1
+    assert pq.read_metadata(january[0]).row_group(0).column(0).compression == 'ZSTD'
+
+    # Повторный прогон ничего не переписывает
+    assert archive_candles(tmp_path, after_months=2, today=date(2025, 5, 15)) == 0
+
+    loaded = load_candles('SBER', tmp_path)
+    assert len(loaded) == 120
+
+
+def test_run_retention_reports_bytes(tmp_path):
+    """Тест полного прогона с подсчётом освобождённого места."""
+    config = Mock()
+    config.output.reports_dir = str(tmp_path / 'reports')
+    config.output.raw_data_dir = str(tmp_path / 'raw')
+    config.output.history_db = str(tmp_path / 'history.sqlite')
+    config.retention.archive_dir = str(tmp_path / 'reports' / 'archive')
+    config.retention.keep_daily_days = 10
+    config.retention.dedupe_reports = True
+    config.retention.archive_candles_after_months = None
+
+    write_reports(config.output.reports_dir, [300.0] * 20 + [301.0] * 20, start=date(2025, 1, 1), extra_symbols=20)
+
+    result = run_retention(config, today=date(2025, 2, 15))
+
+    assert len(result.reports_deduped) == 38
+    assert result.reports_archived == ['2025-01-01', '2025-01-21']
+    assert result.bytes_reclaimed > 0
+    assert result.to_dict()['bytes_reclaimed'] == result.bytes_reclaimed
+    assert not list((tmp_path / 'reports').glob("*.json"))
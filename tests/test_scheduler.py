@@ -17,6 +17,11 @@ def mock_config():
     config.dividend_target_pct = 8.0
     config.output.analysis_file = 'data/test_analysis.json'
     config.output.reports_dir = 'data/test_reports'
+    config.output.runs_dir = 'data/test_runs'
+    config.retention.enabled = True
+    config.retention.time = "03:30"
+    config.refresh.enabled = False
+    config.refresh.dir = 'data/test_refresh'
     return config
 
 
@@ -31,6 +36,8 @@ def test_scheduler_init(mock_generator, mock_get_config, mock_config):
     assert scheduler.config == mock_config
     assert scheduler.scheduler is not None
     assert scheduler.report_generator is not None
+    # Запросы внутридневного обновления не считаются в телеметрию отчёта
+    assert scheduler.refresh.client is not scheduler.report_generator.client
 
 
 @patch('app.scheduler.daily_job.get_config')
@@ -89,8 +96,7 @@ def test_scheduler_start(mock_generator_class, mock_get_config, mock_config):
     
     # Проверяем, что задача добавлена
     jobs = scheduler.scheduler.get_jobs()
-    assert len(jobs) == 1
-    assert jobs[0].id == 'daily_report_job'
+    assert {job.id for job in jobs} == {'daily_report_job', 'retention_job'}
     
     # Останавливаем
     scheduler.stop()
@@ -130,16 +136,172 @@ def test_get_job_info(mock_generator_class, mock_get_config, mock_config):
     scheduler = DailyJobScheduler()
     scheduler.start(run_immediately=False)
     
-    job_info = scheduler.get_job_info()
+    job_info = {info['id']: info for info in scheduler.get_job_info()}
     
-    assert len(job_info) == 1
-    assert job_info[0]['id'] == 'daily_report_job'
-    assert job_info[0]['name'] == 'Daily Stock Analysis Report'
-    assert 'next_run_time' in job_info[0]
+    assert set(job_info) == {'daily_report_job', 'retention_job'}
+    assert job_info['daily_report_job']['name'] == 'Daily Stock Analysis Report'
+    assert 'next_run_time' in job_info['daily_report_job']
     
     scheduler.stop()
 
 
+@patch('app.scheduler.daily_job.get_config')
+@patch('app.scheduler.daily_job.ReportGenerator')
+def test_submit_report_job(mock_generator_class, mock_get_config, mock_config):
+    """Тест: ручные запуски объединяются в одну задачу, задачу можно отменить."""
+    import threading
+    from app.process.report import ReportCancelled
+    from app.scheduler.jobs import JOB_CANCELLED, JOB_SUCCEEDED
+    
+    mock_get_config.return_value = mock_config
+    started = threading.Event()
+    
+    def generate_and_save(**kwargs):
+        started.set()
+        if kwargs['cancel_event'].wait(5):
+            raise ReportCancelled("Report run cancelled")
+        return {'by_symbol': {}}
+    
+    mock_gen = Mock()
+    mock_gen.generate_and_save.side_effect = generate_and_save
+    mock_generator_class.return_value = mock_gen
+    
+    scheduler = DailyJobScheduler()
+    job, joined = scheduler.submit_report_job(incremental=True)
+    assert joined is False
+    assert started.wait(5)
+    
+    same, joined = scheduler.submit_report_job()
+    assert joined is True and same is job
+    assert mock_gen.generate_and_save.call_count == 1
+    
+    scheduler.jobs.cancel(job.id)
+    assert job.wait(5)
+    assert job.status == JOB_CANCELLED
+    
+    mock_gen.generate_and_save.side_effect = None
+    mock_gen.generate_and_save.return_value = {'by_symbol': {}}
+    assert scheduler.run_once() is True
+    assert scheduler.jobs.list()[0].status == JOB_SUCCEEDED
+
+
+@patch('app.scheduler.daily_job.get_config')
+@patch('app.scheduler.daily_job.ReportGenerator')
+def test_report_job_outcome(mock_generator_class, mock_get_config, mock_config, tmp_path):
+    """Тест: задача хранит итоговый прогресс и причину ошибки прогона."""
+    from app.scheduler.jobs import JOB_FAILED, JOB_SUCCEEDED
+    from app.store.partial import get_partial_report
+    
+    mock_config.output.analysis_file = str(tmp_path / 'analysis.json')
+    mock_get_config.return_value = mock_config
+    
+    def generate_and_save(**kwargs):
+        partial = get_partial_report(mock_config.output.analysis_file)
+        partial.start(['SBER', 'GAZP'])
+        partial.publish('SBER', {'price': 290.5})
+        partial.publish('GAZP', {'price': 120.0})
+        partial.finish()
+        return {'by_symbol': {}}
+    
+    mock_gen = Mock()
+    mock_gen.generate_and_save.side_effect = generate_and_save
+    mock_generator_class.return_value = mock_gen
+    
+    scheduler = DailyJobScheduler()
+    assert scheduler.run_once() is True
+    job = scheduler.jobs.list()[0]
+    assert job.status == JOB_SUCCEEDED
+    assert job.to_dict()['progress'] == {'done': 2, 'total': 2, 'pct': 100.0}
+    
+    mock_gen.generate_and_save.side_effect = RuntimeError("MOEX unavailable")
+    assert scheduler.run_once() is False
+    job = scheduler.jobs.list()[0]
+    assert job.status == JOB_FAILED
+    assert job.error == "MOEX unavailable"
+
+
+@patch('app.scheduler.daily_job.run_retention')
+@patch('app.scheduler.daily_job.get_config')
+@patch('app.scheduler.daily_job.ReportGenerator')
+def test_run_retention_job(mock_generator_class, mock_get_config, mock_run_retention, mock_config):
+    """Тест прогона хранения из планировщика."""
+    mock_get_config.return_value = mock_config
+    mock_run_retention.return_value.bytes_reclaimed = 2048
+    mock_run_retention.return_value.to_dict.return_value = {'bytes_reclaimed': 2048}
+    
+    scheduler = DailyJobScheduler()
+    
+    assert scheduler.run_retention_job() == {'bytes_reclaimed': 2048}
+    mock_run_retention.assert_called_once_with(mock_config)
+    
+    mock_run_retention.side_effect = OSError("disk error")
+    assert scheduler.run_retention_job() is None
+
+
+@patch('app.scheduler.daily_job.get_config')
+@patch('app.scheduler.daily_job.ReportGenerator')
+def test_resume_incomplete_run(mock_generator_class, mock_get_config, mock_config, tmp_path):
+    """Тест: незавершённый прогон дозавершается с его параметрами."""
+    from app.store.checkpoint import RunCheckpoint
+    
+    mock_config.output.runs_dir = str(tmp_path)
+    mock_get_config.return_value = mock_config
+    mock_gen = Mock()
+    mock_gen.generate_and_save.return_value = {'by_symbol': {}}
+    mock_generator_class.return_value = mock_gen
+    
+    scheduler = DailyJobScheduler()
+    assert scheduler.resume_incomplete_run() is None
+    
+    checkpoint = RunCheckpoint.create(tmp_path, ['SBER'], options={'incremental': True})
+    # Прогон ещё идёт у владельца — не возобновляется
+    assert scheduler.resume_incomplete_run() is None
+    
+    checkpoint.release()
+    assert scheduler.resume_incomplete_run() is True
+    
+    kwargs = mock_gen.generate_and_save.call_args.kwargs
+    assert kwargs['incremental'] is True
+    assert kwargs['resume'].run_id == checkpoint.run_id
+
+
+@patch('app.scheduler.daily_job.get_config')
+@patch('app.scheduler.daily_job.ReportGenerator')
+def test_refresh_jobs(mock_generator_class, mock_get_config, mock_config):
+    """Тест задач внутридневного обновления: свои триггеры, пропуск вне сессии."""
+    mock_config.refresh.enabled = True
+    mock_config.refresh.session_days = "mon-fri"
+    mock_config.refresh.session_start = "00:00"
+    mock_config.refresh.session_end = "23:59"
+    mock_config.refresh.quotes_interval_min = 5
+    mock_config.refresh.candles_interval_min = 60
+    mock_config.refresh.dividends_day = "sun"
+    mock_config.refresh.dividends_time = "06:00"
+    mock_get_config.return_value = mock_config
+    
+    scheduler = DailyJobScheduler()
+    scheduler.refresh = Mock()
+    scheduler.refresh.refresh_quotes.return_value = {'symbols': 1}
+    scheduler.refresh.refresh_dividends.return_value = {'symbols': 1}
+    
+    try:
+        scheduler.start(run_immediately=False)
+        job_ids = {job.id for job in scheduler.scheduler.get_jobs()}
+        assert {'quotes_refresh_job', 'candles_refresh_job', 'dividends_refresh_job'} <= job_ids
+    finally:
+        scheduler.stop()
+    
+    # Дивиденды не привязаны к сессии
+    assert scheduler.run_refresh_job('dividends') == {'symbols': 1}
+    
+    with patch('app.scheduler.daily_job.in_session', return_value=False):
+        assert scheduler.run_refresh_job('quotes', session_only=True) is None
+    scheduler.refresh.refresh_quotes.assert_not_called()
+    
+    with patch('app.scheduler.daily_job.in_session', return_value=True):
+        assert scheduler.run_refresh_job('quotes', session_only=True) == {'symbols': 1}
+    assert scheduler.jobs.list()[0].kind == 'refresh_quotes'
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
-
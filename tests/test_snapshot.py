@@ -0,0 +1,79 @@
+"""Тесты версионной публикации снимков."""
+
+import orjson
+
+from app.store.io import load_analysis_report, save_analysis_report, save_json
+from app.store.snapshot import (
+    KEEP_VERSIONS,
+    current_version,
+    pointer_path,
+    publish_snapshot,
+    read_snapshot,
+    version_path,
+)
+
+
+def test_publish_increments_version(tmp_path):
+    """Тест: каждая публикация — новая версия, указатель и файл обновляются."""
+    path = tmp_path / "analysis.json"
+
+    assert current_version(path) == 0
+    assert publish_snapshot(path, {'n': 1}) == 1
+    assert publish_snapshot(path, {'n': 2}) == 2
+
+    assert current_version(path) == 2
+    assert orjson.loads(path.read_bytes()) == {'n': 2}
+    assert orjson.loads(version_path(path, 2).read_bytes()) == {'n': 2}
+
+    pointer = orjson.loads(pointer_path(path).read_bytes())
+    assert pointer['file'] == 'snapshots/analysis.000002.json'
+
+
+def test_old_versions_pruned(tmp_path):
+    """Тест: хранятся только последние KEEP_VERSIONS версий."""
+    path = tmp_path / "analysis.json"
+
+    for n in range(KEEP_VERSIONS + 3):
+        publish_snapshot(path, {'n': n})
+
+    files = sorted(p.name for p in (tmp_path / "snapshots").iterdir())
+    assert len(files) == KEEP_VERSIONS
+    assert files[-1] == version_path(path, KEEP_VERSIONS + 3).name
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_read_snapshot_cached_by_version(tmp_path):
+    """Тест: пока версия не изменилась, снимок повторно не разбирается."""
+    path = tmp_path / "analysis.json"
+    publish_snapshot(path, {'n': 1})
+
+    first = read_snapshot(path)
+    second = read_snapshot(path)
+    assert first.version == 1
+    assert second.data is first.data
+
+    publish_snapshot(path, {'n': 2})
+    third = read_snapshot(path)
+    assert third.version == 2
+    assert third.data == {'n': 2}
+
+
+def test_read_snapshot_without_pointer(tmp_path):
+    """Тест: файл, записанный до появления снимков, читается как версия 0."""
+    path = tmp_path / "analysis.json"
+    save_json(path, {'n': 0})
+
+    snapshot = read_snapshot(path)
+    assert snapshot.version == 0
+    assert snapshot.data == {'n': 0}
+
+    assert publish_snapshot(path, {'n': 1}) == 1
+
+
+def test_analysis_report_roundtrip(tmp_path):
+    """Тест: отчёт сохраняется версиями и читается через снимок."""
+    path = tmp_path / "analysis.json"
+
+    assert save_analysis_report({'universe': ['SBER']}, path) == 1
+    assert save_analysis_report({'universe': ['SBER', 'GAZP']}, path) == 2
+    assert load_analysis_report(path) == {'universe': ['SBER', 'GAZP']}
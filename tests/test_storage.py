@@ -83,7 +83,8 @@ def test_save_load_candles(tmp_path):
     file_path = save_candles(symbol, df, base_dir=tmp_path)
     
     assert file_path.exists()
-    assert file_path == tmp_path / symbol / "candles.parquet"
+    assert file_path == tmp_path / symbol
+    assert (tmp_path / symbol / "2025" / "10").is_dir()
     
     # Загружаем
     loaded_df = load_candles(symbol, base_dir=tmp_path)
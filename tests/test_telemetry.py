@@ -0,0 +1,54 @@
+"""Тесты телеметрии прогона и журнала прогонов."""
+
+from app.process.telemetry import RunTelemetry
+from app.store.run_ledger import append_run, read_runs
+
+
+def test_run_telemetry_summary():
+    """Тест: этапы сворачиваются в перцентили, время тикера суммируется по этапам."""
+    telemetry = RunTelemetry()
+    for ms in range(1, 101):
+        telemetry.record('fetch_candles', float(ms), symbol=f"S{ms}")
+    telemetry.record('metrics', 50.0, symbol='S100')
+    with telemetry.stage('save_snapshot'):
+        pass
+    telemetry.count('requests')
+    telemetry.count('bytes_downloaded', 2048)
+    telemetry.count('requests', 2)
+
+    summary = telemetry.summary()
+
+    stage = summary['stages']['fetch_candles']
+    assert stage['count'] == 100
+    assert stage['total_ms'] == 5050.0
+    assert stage['p50_ms'] == 50.5
+    assert stage['max_ms'] == 100.0
+    assert summary['stages']['save_snapshot']['count'] == 1
+    assert summary['symbol_ms']['count'] == 100
+    assert summary['symbol_ms']['slowest'][0] == ['S100', 150.0]
+    assert len(summary['symbol_ms']['slowest']) == 5
+    assert summary['counters'] == {'requests': 3, 'bytes_downloaded': 2048}
+    assert summary['duration_sec'] >= 0
+
+
+def test_run_telemetry_empty():
+    """Тест: сводка пустого прогона."""
+    summary = RunTelemetry().summary()
+    assert summary['stages'] == {}
+    assert summary['symbol_ms'] == {'count': 0}
+    assert summary['counters'] == {}
+
+
+def test_run_ledger(tmp_path):
+    """Тест: журнал дописывается построчно, повреждённые строки пропускаются."""
+    path = tmp_path / "ledger" / "run_ledger.jsonl"
+    assert read_runs(path) == []
+
+    append_run(path, {'run_id': 'a', 'started_at': '2025-10-05T19:10:00'})
+    append_run(path, {'run_id': 'b', 'started_at': '2025-10-06T19:10:00'})
+    with open(path, 'ab') as f:
+        f.write(b'{"run_id": "c", "sta')
+
+    assert [row['run_id'] for row in read_runs(path)] == ['a', 'b']
+    assert [row['run_id'] for row in read_runs(path, limit=1)] == ['b']
+    assert [row['run_id'] for row in read_runs(path, since='2025-10-06')] == ['b']
@@ -0,0 +1,97 @@
+"""Тесты для векторной проверки свечей."""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.ingest.validation import validate_candles
+from app.store.io import save_quarantine, load_table_parquet
+
+
+@pytest.fixture
+def candles():
+    """Создать корректные тестовые свечи."""
+    n = 50
+    close = 100 + np.arange(n, dtype=float)
+    dates = pd.date_range('2025-01-01 10:00', periods=n, freq='h')
+    return pd.DataFrame({
+        'open': close,
+        'high': close + 1,
+        'low': close - 1,
+        'close': close,
+        'volume': np.full(n, 1000),
+        'begin': dates,
+        'end': dates + pd.Timedelta(minutes=59)
+    })
+
+
+def test_valid_candles_pass_through(candles):
+    """Тест: корректные свечи не отбраковываются."""
+    result = validate_candles(candles)
+    
+    assert result.rejected_count == 0
+    assert len(result.valid) == len(candles)
+    assert 'reason' in result.rejected.columns
+
+
+def test_rules_detected(candles):
+    """Тест: каждое правило отбраковывает свою строку."""
+    candles.loc[3, 'low'] = -1.0
+    candles.loc[5, 'high'] = candles.loc[5, 'low'] - 0.5
+    candles.loc[7, 'volume'] = -10
+    candles.loc[9, 'close'] = np.nan
+    candles.loc[11, 'begin'] = candles.loc[10, 'begin']
+    candles.loc[20, 'begin'] = candles.loc[2, 'begin'] + pd.Timedelta(minutes=30)
+    
+    result = validate_candles(candles)
+    reasons = dict(zip(result.rejected['begin'], result.rejected['reason']))
+    
+    assert result.rejected_count == 6
+    assert len(result.valid) == len(candles) - 6
+    assert reasons[candles.loc[3, 'begin']] == 'low_negative'
+    assert reasons[candles.loc[5, 'begin']] == 'high_below_low'
+    assert reasons[candles.loc[7, 'begin']] == 'volume_negative'
+    assert reasons[candles.loc[9, 'begin']] == 'close_negative'
+    assert 'begin_not_monotonic' in reasons[candles.loc[20, 'begin']]
+    # Первая из повторяющихся свечей остаётся
+    assert candles.loc[10, 'begin'] in set(result.valid['begin'])
+    assert result.valid['begin'].is_monotonic_increasing
+
+
+def test_multiple_reasons(candles):
+    """Тест: все нарушенные правила перечисляются через запятую."""
+    candles.loc[0, 'low'] = -5.0
+    candles.loc[0, 'high'] = -6.0
+    
+    result = validate_candles(candles)
+    
+    assert result.rejected['reason'].iloc[0] == 'high_negative,low_negative,high_below_low'
+
+
+def test_empty_candles():
+    """Тест проверки пустого DataFrame."""
+    result = validate_candles(pd.DataFrame())
+    
+    assert result.valid.empty
+    assert result.rejected_count == 0
+
+
+def test_save_quarantine_appends(tmp_path, candles):
+    """Тест: карантин дополняется без дублей."""
+    candles.loc[1, 'volume'] = -1
+    rejected = validate_candles(candles).rejected
+    
+    save_quarantine('SBER', rejected, tmp_path)
+    save_quarantine('SBER', rejected, tmp_path)
+    
+    candles.loc[2, 'volume'] = -1
+    save_quarantine('SBER', validate_candles(candles).rejected, tmp_path)
+    
+    stored = load_table_parquet(tmp_path / 'SBER' / 'quarantine.parquet')
+    assert len(stored) == 2
+    assert set(stored['reason']) == {'volume_negative'}
+    assert save_quarantine('SBER', rejected.iloc[0:0], tmp_path) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
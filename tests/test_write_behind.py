@@ -0,0 +1,125 @@
+"""Тесты очереди отложенной записи."""
+
+import threading
+
+import pytest
+
+from app.store.write_behind import WriteBehindError, WriteBehindQueue
+
+
+class RecordingWriter:
+    """Писатель, запоминающий пакеты."""
+    
+    def __init__(self, gate: threading.Event = None):
+        self.batches = []
+        self.gate = gate
+    
+    def __call__(self, items):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append(dict(items))
+
+
+def test_batches_and_flush():
+    """Тест: накопленные артефакты пишутся одним пакетом по виду."""
+    candles = RecordingWriter()
+    quarantine = RecordingWriter()
+    queue = WriteBehindQueue({'candles': candles, 'quarantine': quarantine}, flush_interval_sec=10).start()
+    
+    for n, symbol in enumerate(['SBER', 'GAZP', 'LKOH']):
+        queue.submit('candles', symbol, n)
+    queue.submit('quarantine', 'SBER', 'bad')
+    
+    assert queue.flush(timeout=5)
+    queue.close()
+    
+    assert candles.batches == [{'SBER': 0, 'GAZP': 1, 'LKOH': 2}]
+    assert quarantine.batches == [{'SBER': 'bad'}]
+    
+    stats = queue.stats()
+    assert stats['written'] == 4
+    assert stats['batches'] == 1
+    assert stats['max_depth'] == 4
+    assert stats['depth'] == 0
+
+
+def test_coalesces_same_symbol():
+    """Тест: повторная запись тикера до сброса заменяет предыдущую."""
+    writer = RecordingWriter()
+    queue = WriteBehindQueue({'candles': writer}, flush_interval_sec=10).start()
+    
+    queue.submit('candles', 'SBER', 'old')
+    queue.submit('candles', 'SBER', 'new')
+    queue.close()
+    
+    assert writer.batches == [{'SBER': 'new'}]
+    assert queue.stats()['coalesced'] == 1
+
+
+def test_batch_written_without_waiting_interval():
+    """Тест: полный пакет пишется сразу, не дожидаясь интервала."""
+    writer = RecordingWriter()
+    queue = WriteBehindQueue({'candles': writer}, flush_interval_sec=30, max_batch=2).start()
+    
+    queue.submit('candles', 'SBER', 1)
+    queue.submit('candles', 'GAZP', 2)
+    
+    assert queue.flush(timeout=5)
+    queue.close()
+    assert writer.batches == [{'SBER': 1, 'GAZP': 2}]
+
+
+def test_backpressure_and_timeout():
+    """Тест: при заполненной очереди submit ждёт, flush с таймаутом сообщает о незавершённой записи."""
+    gate = threading.Event()
+    writer = RecordingWriter(gate)
+    queue = WriteBehindQueue({'candles': writer}, flush_interval_sec=0, max_pending=1).start()
+    
+    queue.submit('candles', 'SBER', 1)
+    assert not queue.flush(timeout=0.1)
+    
+    gate.set()
+    queue.submit('candles', 'GAZP', 2)
+    queue.close()
+    
+    assert [list(batch) for batch in writer.batches] == [['SBER'], ['GAZP']]
+
+
+def test_writer_error_counted():
+    """Тест: ошибка писателя учитывается и не останавливает очередь."""
+    def failing(items):
+        raise OSError("disk full")
+    
+    writer = RecordingWriter()
+    queue = WriteBehindQueue({'bad': failing, 'candles': writer}, flush_interval_sec=10).start()
+    
+    queue.submit('bad', 'SBER', 1)
+    queue.submit('candles', 'SBER', 2)
+    queue.close()
+    
+    stats = queue.stats()
+    assert stats['failed'] == 1
+    assert stats['written'] == 1
+    assert writer.batches == [{'SBER': 2}]
+
+
+def test_submit_rejected():
+    """Тест: неизвестный вид и запись в закрытую очередь."""
+    queue = WriteBehindQueue({'candles': RecordingWriter()})
+    
+    with pytest.raises(WriteBehindError):
+        queue.submit('unknown', 'SBER', 1)
+    
+    queue.close()
+    with pytest.raises(WriteBehindError):
+        queue.submit('candles', 'SBER', 1)
+
+
+def test_flush_without_thread():
+    """Тест: без фонового потока flush пишет в вызывающем потоке."""
+    writer = RecordingWriter()
+    queue = WriteBehindQueue({'candles': writer})
+    
+    queue.submit('candles', 'SBER', 1)
+    assert queue.flush()
+    assert writer.batches == [{'SBER': 1}]